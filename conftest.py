@@ -0,0 +1,5 @@
+# -*- coding:UTF-8 -*-
+# ---------------------------------------------------------------------------------------------------------------------#
+# pytest configuration: the repository root is put in sys.path so the tests import the estimating_uncertainties_enso
+# package without installing it
+# ---------------------------------------------------------------------------------------------------------------------#
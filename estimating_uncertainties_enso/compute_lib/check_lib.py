@@ -4,6 +4,23 @@
 # ---------------------------------------------------------------------------------------------------------------------#
 
 
+# ---------------------------------------------------#
+# Import packages
+# ---------------------------------------------------#
+# basic python package
+from contextlib import contextmanager as contextlib__contextmanager
+from inspect import stack as inspect__stack
+# ---------------------------------------------------#
+
+
+# ---------------------------------------------------------------------------------------------------------------------#
+# Parameters
+# ---------------------------------------------------------------------------------------------------------------------#
+# if True, internal hot paths skip the checks of their inputs (set it with check_trusted_inputs_scope)
+check_parameters = {"trusted_inputs": False}
+# ---------------------------------------------------------------------------------------------------------------------#
+
+
 # ---------------------------------------------------------------------------------------------------------------------#
 # Classes
 # ---------------------------------------------------------------------------------------------------------------------#
@@ -39,6 +56,35 @@ def _types_to_string(type_or_types) -> str:
     return type_to_print
 
 
+def check_inputs(list_checks: list, hot_path: bool = False):
+    """
+    Run the checks of the inputs of a function and stop the code if one fails
+    The checks of internal hot paths are skipped in the 'trusted inputs' mode (see check_trusted_inputs_scope), the
+    checks of the other functions are always run
+
+    Inputs:
+    -------
+    :param list_checks: list
+        Checks, each given as a tuple (check function, arguments of the function except error_list), or as a str
+        describing an error already found, or as None (nothing to check); e.g., [(check_type, x, "x", int)]
+    :param hot_path: bool, optional
+        True if the checked function is an internal hot path (a kernel called for every leaf, sample size or
+        resample); e.g., hot_path = True
+        Default is False (the checks are always run)
+    """
+    if hot_path is True and check_parameters["trusted_inputs"] is True:
+        return
+    error = list()
+    for k in list_checks:
+        if isinstance(k, str) is True:
+            error.append(k)
+        elif k is not None:
+            k[0](*k[1:], error)
+    if len(error) > 0:
+        # skip the frame of this function to report the function that was checked
+        print_fail(inspect__stack()[1:], "\n".join(k for k in error))
+
+
 def check_interval(input_value, input_name: str, type_or_types, interval: list, error_list: list):
     """
     Check if given value has the right type and is within interval
@@ -105,6 +151,55 @@ def check_list(input_value, input_name: str, list_of_defined_values, error_list:
             ", ".join(repr(k) for k in sorted(list_of_defined_values, key=repr))))
         
         
+def check_set_trusted_inputs(trusted: bool = True):
+    """
+    Enable or disable the 'trusted inputs' mode, until it is set again (prefer check_trusted_inputs_scope, which
+    restores the previous mode)
+    In this mode, internal hot paths (kernels called for every leaf, sample size or resample) skip the checks of their
+    inputs; the checks of the public entry points are always run
+
+    Input:
+    ------
+    :param trusted: bool, optional
+        True to skip the checks in internal hot paths, False to perform them; e.g., trusted = True
+        Default is True
+    """
+    check_parameters["trusted_inputs"] = True if trusted is True else False
+
+
+def check_trusted_inputs() -> bool:
+    """
+    Return True if the 'trusted inputs' mode is enabled
+
+    Output:
+    -------
+    :return: bool
+        True if internal hot paths must skip the checks of their inputs
+    """
+    return check_parameters["trusted_inputs"]
+
+
+@contextlib__contextmanager
+def check_trusted_inputs_scope(trusted: bool = True):
+    """
+    Enable or disable the 'trusted inputs' mode (see check_set_trusted_inputs) within a with block; the previous mode
+    is restored when the block is left, also if an error is raised
+    E.g., with check_trusted_inputs_scope(True): nest_compute_uncertainty(...)
+
+    Input:
+    ------
+    :param trusted: bool, optional
+        True to skip the checks in internal hot paths, False to perform them; e.g., trusted = True
+        Default is True
+    """
+    previous = check_parameters["trusted_inputs"]
+    check_set_trusted_inputs(trusted)
+    try:
+        yield
+    finally:
+        check_parameters["trusted_inputs"] = previous
+
+
 def check_type(input_value, input_name: str, type_or_types, error_list: list):
     """
     Check if given value has the right type
@@ -141,18 +236,21 @@ def plural_s(list_i: list) -> str:
     return "s" if len(list_i) > 1 else ""
 
 
-def print_fail(stack_i: list, error_i: str):
+def print_fail(stack_i, error_i: str):
     """
     Print error message and stop the code
     
     Inputs:
     -------
-    :param stack_i: list
-        Given by inspect.stack()
+    :param stack_i: function or list
+        inspect.stack (not called, the stack is only read if there is an error) or given by inspect.stack()
     :param error_i: str
         Encountered errors
     """
     if isinstance(error_i, str) and error_i != "":
+        if callable(stack_i) is True:
+            # read the stack only now and skip the frame of this function
+            stack_i = stack_i()[1:]
         tmp = "ERROR: file " + str(stack_i[0][1]) + " ; fct " + str(stack_i[0][3]) + " ; line " + str(stack_i[0][2])
         raise ValueError(BackgroundColors.red + str(tmp) + "\n" + str(error_i) + BackgroundColors.normal)
 # ---------------------------------------------------------------------------------------------------------------------#
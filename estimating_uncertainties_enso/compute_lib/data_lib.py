@@ -11,15 +11,28 @@
 # basic python package
 from copy import deepcopy
 from glob import iglob as glob__iglob
-from inspect import stack as inspect__stack
 import os
+# numpy
+from numpy import full as numpy__full
+from numpy import nan as numpy__nan
+from numpy import nonzero as numpy__nonzero
+from numpy import zeros as numpy__zeros
 # estimating_uncertainties_enso package
-from . check_lib import check_interval, check_type, print_fail
+from . check_lib import check_inputs, check_interval, check_list, check_type
 from . stat_lib import stat_compute_statistic
-from . tool_lib import tool_put_in_dict, tool_read_json, tool_read_netcdf, tool_sort_members
+from . tool_lib import tool_columnar_is_available, tool_put_in_dict, tool_read_columnar, tool_read_json
+from . tool_lib import tool_read_netcdf, tool_sort_members, tool_write_columnar
 # ---------------------------------------------------#
 
 
+# ---------------------------------------------------------------------------------------------------------------------#
+# Parameters
+# ---------------------------------------------------------------------------------------------------------------------#
+# axes of the ensemble cube created from the output of data_organize_json
+cube_dimensions = ["diagnostic", "epoch_length", "project", "experiment", "dataset", "epoch", "member"]
+# ---------------------------------------------------------------------------------------------------------------------#
+
+
 # ---------------------------------------------------------------------------------------------------------------------#
 # Functions
 # ---------------------------------------------------------------------------------------------------------------------#
@@ -49,12 +62,11 @@ def data_create_mme(dict_i: dict, project: str, data_mme_use_all_smiles: bool, d
         with the multimodel ensemble in the dataset level
     """
     # check input
-    error = list()
-    check_type(dict_i, "dict_i", dict, error)
-    check_type(project, "project", str, error)
-    check_type(data_mme_use_all_smiles, "data_mme_use_all_smiles", bool, error)
-    check_type(data_mme_use_smile_mean, "data_mme_use_smile_mean", bool, error)
-    print_fail(inspect__stack(), "\n".join(k for k in error))
+    check_inputs([
+        (check_type, dict_i, "dict_i", dict),
+        (check_type, project, "project", str),
+        (check_type, data_mme_use_all_smiles, "data_mme_use_all_smiles", bool),
+        (check_type, data_mme_use_smile_mean, "data_mme_use_smile_mean", bool)])
     # create mme
     dict_o = deepcopy(dict_i)
     for exp in list(dict_i.keys()):  # loop on experiments
@@ -84,6 +96,109 @@ def data_create_mme(dict_i: dict, project: str, data_mme_use_all_smiles: bool, d
     return dict_o
 
 
+def data_cube_to_dict(cube: dict) -> dict:
+    """
+    Convert an ensemble cube (see data_dict_to_cube) to nested dictionaries
+
+    Input:
+    ------
+    :param cube: dict
+        Ensemble cube, with keys 'values', 'mask', 'sizes', 'axes' and 'dimensions'
+
+    Output:
+    -------
+    :return dict_o: dict
+        Dictionary with one nested level per dimension but the last one, filled with a list (the values along the last
+        dimension, None where the mask is False); e.g., six nested levels [diagnostic, epoch_length, project,
+        experiment, dataset, epoch] for a cube created from data_organize_json
+        Leaves that were empty lists in the dictionary given to data_dict_to_cube are kept as empty lists
+    """
+    # check input
+    check_inputs([(check_type, cube, "cube", dict)])
+    check_inputs([(check_list, k, "cube key", list(cube.keys()))
+                  for k in ["values", "mask", "sizes", "axes", "dimensions"]])
+    # labels of each axis but the last one
+    labels = [cube["axes"][k] for k in cube["dimensions"][:-1]]
+    # put the values of each leaf in the dictionary (sizes is -1 where the dictionary had no leaf)
+    dict_o = dict()
+    for index in zip(*[k.tolist() for k in numpy__nonzero(cube["sizes"] >= 0)]):
+        size = int(cube["sizes"][index])
+        values = [k1 if k2 is True else None
+                  for k1, k2 in zip(cube["values"][index][:size].tolist(), cube["mask"][index][:size].tolist())]
+        dict_t = dict_o
+        for k1, k2 in zip(labels[:-1], index[:-1]):
+            dict_t = dict_t.setdefault(k1[k2], dict())
+        dict_t[labels[-1][index[-1]]] = values
+    return dict_o
+
+
+def data_dict_to_cube(dict_i: dict, dimensions: list = None) -> dict:
+    """
+    Convert nested dictionaries filled with lists of floats to a labelled dense array (ensemble cube)
+    Each axis is integer-coded (the labels of the axis give the key of each position), lists of different lengths are
+    padded with NaN, so that statistics can be computed on all lists at once along the last axis; e.g., the ensemble
+    mean of all datasets and epochs is numpy.nanmean(cube['values'], axis=-1)
+
+    Inputs:
+    -------
+    :param dict_i: dict
+        Dictionary with six nested levels [diagnostic, epoch_length, project, experiment, dataset, epoch], filled with a
+        list of floats (members; epochs for piControl)
+    :param dimensions: list, optional
+        Name of each nested level followed by the name of the list dimension;
+        e.g., dimensions = ['diagnostic', 'epoch_length', 'project', 'experiment', 'dataset', 'epoch', 'member']
+        Default is None (cube_dimensions, levels of the dictionary returned by data_organize_json)
+
+    Output:
+    -------
+    :return cube: dict
+        Ensemble cube:
+        'values': array_like, one axis per dimension, filled with floats (NaN for missing keys, members or values)
+        'mask': array_like, same shape as values, True where a value exists (not None in the list)
+        'sizes': array_like, one axis per dimension but the last one, filled with the length of each list (-1 where
+        the dictionary has no list), so that empty lists and missing values are given back by data_cube_to_dict
+        'axes': dictionary [dimension], filled with the list of keys (sorted) of each dimension; the last dimension is
+        filled with the positions in the lists
+        'dimensions': list of dimension names
+    """
+    # check input
+    if dimensions is None:
+        dimensions = deepcopy(cube_dimensions)
+    check_inputs([
+        (check_type, dict_i, "dict_i", dict),
+        (check_type, dimensions, "dimensions", list)])
+    # list the keys of each nested level and the leaves (keys and lists)
+    list_keys = [set() for _ in dimensions[:-1]]
+    list_leaves = list()
+    list_levels = [((), dict_i)]
+    while len(list_levels) > 0:
+        keys, dict_t = list_levels.pop()
+        if len(keys) == len(dimensions) - 1:
+            list_leaves.append((keys, dict_t))
+            continue
+        if isinstance(dict_t, dict) is False:
+            check_inputs(["dictionary has %s nested levels, %s expected by dimensions: %s" % (
+                repr(len(keys)), repr(len(dimensions) - 1), ", ".join(repr(k) for k in dimensions[:-1]))])
+        for k1, k2 in dict_t.items():
+            list_keys[len(keys)].add(k1)
+            list_levels.append((keys + (k1,), k2))
+    # integer code of each key
+    axes = dict((k1, sorted(k2, key=str.casefold)) for k1, k2 in zip(dimensions[:-1], list_keys))
+    codes = [dict((k2, ii) for ii, k2 in enumerate(axes[k1])) for k1 in dimensions[:-1]]
+    axes[dimensions[-1]] = list(range(max([len(k[1]) for k in list_leaves] + [0])))
+    # fill the cube
+    shape = tuple(len(axes[k]) for k in dimensions)
+    values = numpy__full(shape, numpy__nan)
+    mask = numpy__zeros(shape, dtype=bool)
+    sizes = numpy__full(shape[:-1], -1, dtype=int)
+    for keys, list_values in list_leaves:
+        index = tuple(k1[k2] for k1, k2 in zip(codes, keys))
+        values[index][:len(list_values)] = [numpy__nan if k is None else k for k in list_values]
+        mask[index][:len(list_values)] = [k is not None for k in list_values]
+        sizes[index] = len(list_values)
+    return {"values": values, "mask": mask, "sizes": sizes, "axes": axes, "dimensions": list(dimensions)}
+
+
 def data_one_smile_per_model(list_datasets) -> list:
     """
     Keep only one smile per model
@@ -99,9 +214,8 @@ def data_one_smile_per_model(list_datasets) -> list:
         Dataset names with only one smile per model; e.g., list_o = ['CanESM5_p1']
     """
     # check input
-    error = list()
-    check_type(list_datasets, "list_datasets", list, error)
-    print_fail(inspect__stack(), "\n".join(k for k in error))
+    check_inputs([
+        (check_type, list_datasets, "list_datasets", list)])
     # delete extra smiles in the list
     list_o = deepcopy(list_datasets)
     # list models that have multiple smiles
@@ -122,7 +236,8 @@ def data_organize_json(data_diagnostics: list, data_epoch_lengths: list, data_pr
                        data_mme_use_smile_mean: bool = False, data_filename: str = None,
                        data_observations_desired: dict = None, data_smile_minimum_size: int = 1,
                        data_smile_rejected: list = None, data_smile_require_all_experiments: bool = False,
-                       members_as_list: bool = True) -> (dict, dict):
+                       members_as_list: bool = True, data_columnar_cache: bool = False,
+                       data_stream_json: bool = False, data_as_cube: bool = False) -> (dict, dict):
     """
     Read json dictionary and select values
 
@@ -166,10 +281,26 @@ def data_organize_json(data_diagnostics: list, data_epoch_lengths: list, data_pr
     :param members_as_list: bool, optional
         True to put members (epochs for piControl) in a list instead of a dictionary for a given epoch;
         e.g., members_as_list = True
+    :param data_columnar_cache: bool, optional
+        True to read the columnar cache of the json file (created at the first call, or when the json file changed)
+        instead of the json file; the cache is written next to the json file (directory '<name>_columnar');
+        e.g., data_columnar_cache = True
+        Default is False (json file read)
+    :param data_stream_json: bool, optional
+        True to stream the json file and skip the values that are not selected instead of loading it whole (json.load);
+        streaming trades speed for peak memory: it is slower but memory scales with the selected data and not with the
+        file size; e.g., data_stream_json = True
+        Default is False (json file loaded whole, unless it is very large, see tool_lib.json_stream_size)
+    :param data_as_cube: bool, optional
+        True to return the values as an ensemble cube (see data_dict_to_cube) instead of nested dictionaries (requires
+        members_as_list = True); e.g., data_as_cube = False
+        Default is False (nested dictionaries returned)
 
     Outputs:
     --------
     :return dict_diagnostics: dict
+        If data_as_cube is True, ensemble cube with seven dimensions
+        [diagnostic, epoch_length, project, experiment, dataset, epoch, member] (see data_dict_to_cube)
         If members_as_list is True, dictionary with six nested levels
         [diagnostic, epoch_length, project, experiment, dataset, epoch], filled with a list of floats
         If members_as_list is False, dictionary with seven nested levels
@@ -179,23 +310,36 @@ def data_organize_json(data_diagnostics: list, data_epoch_lengths: list, data_pr
         'name_long', 'name_short' and 'units'
     """
     # check input
-    error = list()
     if data_observations_desired is None:
         data_observations_desired = {}
     if data_smile_rejected is None:
         data_smile_rejected = []
-    check_type(data_diagnostics, "data_diagnostics", list, error)
-    check_type(data_epoch_lengths, "data_epoch_lengths", list, error)
-    check_type(data_experiments, "data_experiments", list, error)
-    check_type(data_mme_create, "data_mme_create", bool, error)
-    check_type(data_observations_desired, "data_observations_desired", dict, error)
-    check_interval(data_smile_minimum_size, "data_smile_minimum_size", int, [0, 100], error)
-    check_type(data_smile_rejected, "data_smile_rejected", list, error)
-    check_type(data_smile_require_all_experiments, "data_smile_require_all_experiments", bool, error)
-    check_type(members_as_list, "members_as_list", bool, error)
-    print_fail(inspect__stack(), "\n".join(k for k in error))
+    check_inputs([
+        (check_type, data_diagnostics, "data_diagnostics", list),
+        (check_type, data_epoch_lengths, "data_epoch_lengths", list),
+        (check_type, data_experiments, "data_experiments", list),
+        (check_type, data_mme_create, "data_mme_create", bool),
+        (check_type, data_observations_desired, "data_observations_desired", dict),
+        (check_interval, data_smile_minimum_size, "data_smile_minimum_size", int, [0, 100]),
+        (check_type, data_smile_rejected, "data_smile_rejected", list),
+        (check_type, data_smile_require_all_experiments, "data_smile_require_all_experiments", bool),
+        (check_type, members_as_list, "members_as_list", bool),
+        (check_type, data_columnar_cache, "data_columnar_cache", bool),
+        (check_type, data_stream_json, "data_stream_json", bool),
+        (check_type, data_as_cube, "data_as_cube", bool),
+        "data_as_cube requires members_as_list = True" if data_as_cube is True and members_as_list is False else None])
     # read input json file
-    dict_i = tool_read_json(filename=data_filename)
+    if data_columnar_cache is True:
+        # convert the json file once, then read only the desired values in the memory-mapped cache
+        if tool_columnar_is_available(filename=data_filename) is False:
+            tool_write_columnar(filename=data_filename)
+        dict_i = tool_read_columnar(filename=data_filename, diagnostics=data_diagnostics, projects=data_projects,
+                                    experiments=data_experiments, epoch_lengths=data_epoch_lengths)
+    else:
+        # read only the desired values of the json file (streamed if asked)
+        dict_i = tool_read_json(filename=data_filename, diagnostics=data_diagnostics, projects=data_projects,
+                                experiments=data_experiments, epoch_lengths=data_epoch_lengths,
+                                stream=data_stream_json)
     # output metadata and value dictionaries
     dict_diagnostics, dict_metadata = {}, {}
     # list desired diagnostics that are available
@@ -324,6 +468,8 @@ def data_organize_json(data_diagnostics: list, data_epoch_lengths: list, data_pr
         if len(list(dict_diagnostics[dia].keys())) == 0:
             del dict_diagnostics[dia]
             del dict_metadata[dia]
+    if data_as_cube is True:
+        dict_diagnostics = data_dict_to_cube(dict_diagnostics)
     return dict_diagnostics, dict_metadata
 
 
@@ -360,14 +506,13 @@ def data_organize_netcdf(data_diagnostics: list, data_projects: list, data_exper
         'name_long', 'name_short' and 'units'
     """
     # check input
-    error = list()
     if data_observations_desired is None:
         data_observations_desired = {}
-    check_type(data_diagnostics, "data_diagnostics", list, error)
-    check_type(data_experiments, "data_experiments", list, error)
-    check_type(data_observations_desired, "data_observations_desired", dict, error)
-    check_type(members_as_list, "members_as_list", bool, error)
-    print_fail(inspect__stack(), "\n".join(k for k in error))
+    check_inputs([
+        (check_type, data_diagnostics, "data_diagnostics", list),
+        (check_type, data_experiments, "data_experiments", list),
+        (check_type, data_observations_desired, "data_observations_desired", dict),
+        (check_type, members_as_list, "members_as_list", bool)])
     # plot directory (relative to current file directory)
     data_directory = "/".join(os.path.dirname(__file__).split("/")[:-2]) + "/data"
     # output metadata and value dictionaries
@@ -9,28 +9,347 @@
 # Import packages
 # ---------------------------------------------------#
 # basic python package
+from concurrent.futures import ProcessPoolExecutor as concurrent__futures__ProcessPoolExecutor
 from copy import deepcopy
-from inspect import stack as inspect__stack
+from math import ceil as math__ceil
+from multiprocessing import get_context as multiprocessing__get_context
+import os
+from zlib import crc32 as zlib__crc32
 # numpy
 from numpy import array as numpy__array
 from numpy import ndarray as numpy__ndarray
+from numpy import ndim as numpy__ndim
+from numpy import shape as numpy__shape
+from numpy.random import default_rng as numpy__random__default_rng
+from numpy.random import SeedSequence as numpy__random__SeedSequence
 # scipy
 from scipy.stats import scoreatpercentile as scipy__stats__scoreatpercentile
 # estimating_uncertainties_enso package
-from . check_lib import check_list, check_type, print_fail
-from . stat_lib import stat_res_based_on_obs, stat_res_bootstrap, stat_res_theory, stat_compute_statistic,\
-    stat_smooth_triangle, stat_uncertainty_select_and_compute
-from . tool_lib import tool_put_in_dict, tool_tuple_for_dict
+from . check_lib import check_inputs, check_interval, check_list, check_trusted_inputs, check_trusted_inputs_scope
+from . check_lib import check_type
+from . stat_lib import stat_res_based_on_obs, stat_res_bootstrap, stat_res_theory, stat_res_theory_leave_out,\
+    stat_compute_statistic, stat_smooth_triangle, stat_uncertainty_curve, stat_uncertainty_leave_out,\
+    stat_uncertainty_bootstrap_control, stat_uncertainty_sequential
+from . tool_lib import tool_put_in_dict
 # ---------------------------------------------------#
 
 
+# ---------------------------------------------------------------------------------------------------------------------#
+# Parameters
+# ---------------------------------------------------------------------------------------------------------------------#
+# environment variables limiting the number of threads of the linear algebra libraries in worker processes
+blas_variables = ["MKL_NUM_THREADS", "NUMEXPR_NUM_THREADS", "OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS",
+                  "VECLIB_MAXIMUM_THREADS"]
+# ---------------------------------------------------------------------------------------------------------------------#
+
+
 # ---------------------------------------------------------------------------------------------------------------------#
 # Functions
 # ---------------------------------------------------------------------------------------------------------------------#
+def _nest_apply_to_leaves(task: tuple) -> list:
+    """
+    Apply function to a batch of leaves (executed by nest_map_leaves, in the current process or in a worker)
+
+    Input:
+    ------
+    :param task: tuple
+        Function, keys of the leaves, leaves, aligned leaves (one list per aligned dictionary), positional arguments,
+        keyword arguments, True if the function takes the whole batch at once, seed (or None) and 'trusted inputs' mode
+        of the calling process; if the seed is given, the random number generator of each leaf is given to the function
+        as the keyword argument rng
+
+    Output:
+    -------
+    :return: list
+        Output of the function for each leaf
+    """
+    function, list_keys, list_leaves, list_aligned, function_args, function_kwargs, leaf_batched, leaf_seed, \
+        trusted_inputs = task
+    # spawned workers do not inherit the mode set in the calling process
+    with check_trusted_inputs_scope(trusted_inputs):
+        if leaf_batched is True:
+            return list(function(list_leaves, *list_aligned, *function_args, **function_kwargs))
+        list_o = list()
+        for keys, leaf_and_aligned in zip(list_keys, zip(list_leaves, *list_aligned)):
+            kwargs = function_kwargs
+            if leaf_seed is not None:
+                # the random numbers depend only on the seed and the keys of the leaf, not on the process nor the order
+                kwargs = dict(function_kwargs, rng=_nest_leaf_rng(leaf_seed, keys))
+            list_o.append(function(*leaf_and_aligned, *function_args, **kwargs))
+    return list_o
+
+
+def _nest_leaf_member_influence(arr_i, dict_threshold, list_flags, res_maximum: int,
+                                uncertainty_confidence_interval: float, uncertainty_distribution: str,
+                                uncertainty_relative: bool) -> dict:
+    """
+    Compute the uncertainty of the ensemble mean and the required ensemble size of one leaf without each member, and
+    without the flagged members (see nest_compute_member_influence)
+
+    Output:
+    -------
+    :return dict_o: dict
+        Dictionary with two nested levels [quantity, variant] for the uncertainty and three nested levels [method,
+        threshold, variant] for the required ensemble size
+    """
+    # variants: all members, without each member, without the flagged members
+    list_variants = ["all_members"] + ["without_" + str(k).zfill(3) for k in range(len(arr_i))]
+    excluded = [[]] + [[k] for k in range(len(arr_i))]
+    if list_flags is not None and any(list_flags) is True:
+        list_variants.append("without_flagged")
+        excluded.append([k for k, flag in enumerate(list_flags) if bool(flag) is True])
+    uncertainty = stat_uncertainty_leave_out(arr_i, uncertainty_confidence_interval, uncertainty_distribution,
+                                             uncertainty_relative, excluded=excluded)
+    dict_o = {"uncertainty": dict((k1, float(k2)) for k1, k2 in zip(list_variants, uncertainty))}
+    if dict_threshold is not None:
+        for criteria in list(dict_threshold.keys()):
+            if criteria == "obs":
+                # the sign of the bias cannot be computed from the moments of the ensemble
+                continue
+            for threshold, value in dict_threshold[criteria].items():
+                res = stat_res_theory_leave_out(arr_i, res_maximum, uncertainty_confidence_interval, value,
+                                                excluded=excluded, uncertainty_distribution=uncertainty_distribution)
+                dict_o.setdefault(criteria, dict())[threshold] = dict(
+                    (k1, int(k2)) for k1, k2 in zip(list_variants, res))
+    return dict_o
+
+
+def _nest_leaf_res(arr_i, dict_threshold: dict, res_maximum: int, uncertainty_confidence_interval: float,
+                   uncertainty_distribution: str, uncertainty_combinations: int, uncertainty_resamples: int,
+                   uncertainty_theory: bool, rng=None) -> dict:
+    """
+    Compute the required ensemble size of one leaf (see nest_compute_res)
+    A single random number generator (rng) is used for all criteria
+
+    Output:
+    -------
+    :return dict_o: dict
+        Dictionary with two nested levels [method, threshold], filled with the required ensemble size
+    """
+    rng = numpy__random__default_rng(rng)
+    dict_o = dict()
+    for criteria in list(dict_threshold.keys()):
+        list_threshold = list(dict_threshold[criteria].keys())
+        uncertainty_threshold = [dict_threshold[criteria][threshold] for threshold in list_threshold]
+        # compute RES (the uncertainty for all ensemble sizes is computed once for all thresholds)
+        if criteria == "obs":
+            list_res = stat_res_based_on_obs(
+                arr_i, uncertainty_threshold, res_maximum, uncertainty_confidence_interval, uncertainty_distribution,
+                uncertainty_combinations, uncertainty_resamples, uncertainty_theory, uncertainty_rng=rng)
+        elif uncertainty_theory is True:
+            list_res = stat_res_theory(arr_i, res_maximum, uncertainty_confidence_interval, uncertainty_threshold,
+                                       uncertainty_distribution=uncertainty_distribution)
+        else:
+            list_res = stat_res_bootstrap(arr_i, res_maximum, uncertainty_confidence_interval, uncertainty_resamples,
+                                          uncertainty_threshold, uncertainty_rng=rng)
+        for threshold, res in zip(list_threshold, list_res):
+            if res is not None:
+                dict_o.setdefault(criteria, dict())[threshold] = res
+    return dict_o
+
+
+def _nest_leaf_rng(leaf_seed: int, keys: tuple):
+    """
+    Random number generator of one leaf: a child stream of the seed given by the user, spawned from the keys of the leaf
+
+    Inputs:
+    -------
+    :param leaf_seed: int
+        Seed given by the user; e.g., leaf_seed = 0
+    :param keys: tuple
+        Keys of the leaf; e.g., keys = ('ave_pr_val_n30e', '030_year_epoch', 'cmip6', 'piControl', 'CanESM5', 'y0001')
+
+    Output:
+    -------
+    :return: numpy.random.Generator
+        Generator seeded with the seed given by the user, its spawn key is the checksum of each key of the leaf
+    """
+    spawn_key = tuple(zlib__crc32(str(k).encode("utf-8")) for k in keys)
+    return numpy__random__default_rng(numpy__random__SeedSequence(leaf_seed, spawn_key=spawn_key))
+
+
+def _nest_leaf_standardize(arr_i) -> list:
+    """
+    Standardize the distribution of one leaf (see nest_standardize_distributions)
+
+    Output:
+    -------
+    :return: list
+        Values minus the median, divided by the interquartile range
+    """
+    # compute median
+    median = stat_compute_statistic(arr_i, "med")
+    # compute standard deviation
+    standard_deviation = stat_compute_statistic(arr_i, "iqr")
+    # standardize distribution
+    return list((numpy__array(arr_i) - median) / standard_deviation)
+
+
+def _nest_leaf_uncertainty(arr_i, uncertainty_confidence_interval: float, uncertainty_distribution: str,
+                           uncertainty_relative: bool, uncertainty_combinations: int, uncertainty_resamples: int,
+                           uncertainty_theory: bool, uncertainty_sample_sizes: list, uncertainty_exact_bootstrap: bool,
+                           uncertainty_tolerance: float, uncertainty_control_variate: bool, rng=None) -> dict:
+    """
+    Compute the uncertainty of the sample mean of one leaf (see nest_compute_uncertainty), or of a 2-D array of leaves
+    (series x members) sharing the same draws
+
+    Output:
+    -------
+    :return dict_o: dict
+        Dictionary with one level [sample_size], filled with the uncertainty of the sample mean, or with the
+        uncertainty and the number of draws if uncertainty_tolerance is not None, or with the uncertainty and the
+        variance reduction factor if uncertainty_control_variate is True
+    """
+    # list the sample size
+    nbr_members = numpy__shape(arr_i)[-1]
+    sample_siz = [k for k in uncertainty_sample_sizes if isinstance(k, int) and k < nbr_members] + [nbr_members]
+    if uncertainty_control_variate is True:
+        # compute the uncertainty for each sample size with a bootstrap corrected by control variates (uncertainty,
+        # variance reduction factor); the series of a 2-D array are resampled one after the other
+        rng = numpy__random__default_rng(rng)
+        list_uncertainty = list()
+        for k in sample_siz:
+            list_t = [stat_uncertainty_bootstrap_control(
+                arr, uncertainty_confidence_interval, uncertainty_relative, uncertainty_resamples, k,
+                uncertainty_rng=rng) for arr in (arr_i if numpy__ndim(arr_i) == 2 else [arr_i])]
+            if numpy__ndim(arr_i) == 2:
+                list_uncertainty.append((numpy__array([k1[0] for k1 in list_t]),
+                                         numpy__array([k1[1] for k1 in list_t])))
+            else:
+                list_uncertainty.append(list_t[0])
+    elif uncertainty_tolerance is None:
+        # compute the uncertainty for all sample sizes at once
+        list_uncertainty = stat_uncertainty_curve(
+            arr_i, uncertainty_confidence_interval, uncertainty_distribution, uncertainty_relative,
+            uncertainty_combinations, uncertainty_resamples, uncertainty_theory, sample_siz, uncertainty_rng=rng,
+            uncertainty_exact_bootstrap=uncertainty_exact_bootstrap)
+    else:
+        # compute the uncertainty for each sample size with as few draws as needed (uncertainty, number of draws)
+        rng = numpy__random__default_rng(rng)
+        list_uncertainty = [stat_uncertainty_sequential(
+            arr_i, uncertainty_confidence_interval, uncertainty_distribution, uncertainty_relative,
+            uncertainty_combinations, uncertainty_resamples, uncertainty_theory, k, uncertainty_tolerance,
+            uncertainty_rng=rng) for k in sample_siz]
+    dict_o = dict()
+    for k, uncertainty in zip(sample_siz, list_uncertainty):
+        name = str(k).zfill(3) + "_members" if len(uncertainty_sample_sizes) > 0 else "max_members"
+        dict_o[name] = uncertainty
+    return dict_o
+
+
+def _nest_smile_uncertainty(smile: tuple, uncertainty_confidence_interval: float, uncertainty_distribution: str,
+                            uncertainty_relative: bool, uncertainty_combinations: int, uncertainty_resamples: int,
+                            uncertainty_theory: bool, uncertainty_sample_sizes: list, uncertainty_exact_bootstrap: bool,
+                            uncertainty_tolerance: float, uncertainty_control_variate: bool, rng=None) -> tuple:
+    """
+    Compute the uncertainty of the sample mean of all leaves of one SMILE with the same draws (see
+    nest_compute_uncertainty)
+
+    Output:
+    -------
+    :return: tuple
+        Keys of the leaves and, for each leaf, a dictionary with one level [sample_size], filled with the uncertainty
+        of the sample mean (and the number of draws, shared by all leaves, if uncertainty_tolerance is not None, or the
+        variance reduction factor if uncertainty_control_variate is True)
+    """
+    list_keys, arr_i = smile
+    dict_t = _nest_leaf_uncertainty(
+        arr_i, uncertainty_confidence_interval, uncertainty_distribution, uncertainty_relative,
+        uncertainty_combinations, uncertainty_resamples, uncertainty_theory, uncertainty_sample_sizes,
+        uncertainty_exact_bootstrap, uncertainty_tolerance, uncertainty_control_variate, rng=rng)
+    if uncertainty_tolerance is not None or uncertainty_control_variate is True:
+        return list_keys, [dict((k1, (float(k2[0][k]), k2[1] if numpy__ndim(k2[1]) == 0 else float(k2[1][k])))
+                                for k1, k2 in dict_t.items()) for k in range(len(list_keys))]
+    return list_keys, [dict((k1, float(k2[k])) for k1, k2 in dict_t.items()) for k in range(len(list_keys))]
+
+
+def nest_compute_member_influence(dict_i, uncertainty_confidence_interval: float, uncertainty_distribution: str,
+                                  uncertainty_relative: bool, dict_threshold: dict = None, res_maximum: int = 100,
+                                  dict_flags: dict = None, n_jobs: int = 1, dict_o: dict = None, list_k: tuple = None,
+                                  list_k_last: tuple = None) -> (dict, tuple, tuple):
+    """
+    Compute the influence of each member (and of a group of flagged members, e.g., outliers) on the theoretical
+    uncertainty of the ensemble mean and on the theoretical required ensemble size (see stat_res_theory)
+    The moments of the ensemble are downdated for each variant (see stat_leave_out_moments), so all leave-one-out
+    variants of a leaf cost O(N) instead of N computations of the uncertainty
+
+    Inputs:
+    -------
+    :param dict_i: dict
+        Dictionary with six nested levels [diagnostic, epoch_length, project, experiment, dataset, epoch], filled with a
+        list of values
+    :param uncertainty_confidence_interval: float
+        Confidence interval used to compute the uncertainty; e.g., uncertainty_confidence_interval = 95
+    :param uncertainty_distribution: str
+        Name of a distribution; e.g., distribution = 'normal'
+        Two distributions are defined: 'normal', 'student'
+    :param uncertainty_relative: bool
+        True to compute the uncertainty relative to the ensemble mean, else the absolute uncertainty is computed
+    :param dict_threshold: dict, optional
+        Dictionary with seven nested levels [diagnostic, epoch_length, project, experiment, dataset, epoch, method],
+        filled with a value or a list of values (see nest_define_uncertainty_threshold); the thresholds are the same for
+        all variants and the method 'obs' is not used
+        Default is None (the required ensemble size is not computed)
+    :param res_maximum: int, optional
+        Maximum value for the required ensemble size; e.g., maximum_res = 100
+        Default is 100
+    :param dict_flags: dict, optional
+        Dictionary with six nested levels [diagnostic, epoch_length, project, experiment, dataset, epoch], filled with a
+        list of booleans (True for the members left out together; e.g., outliers)
+        Default is None (only leave-one-out variants)
+    :param n_jobs: int, optional
+        Number of processes in which leaves (diagnostic, epoch length, project, experiment, dataset, epoch) are
+        dispatched; e.g., n_jobs = 4
+        Default is 1 (leaves are computed in the current process)
+    :param dict_o: dict or None, optional
+        Dictionary in which output values will be stored
+    :param list_k: tuple or None, optional
+        Keys put before the keys of dict_i in the output nested dictionary
+    :param list_k_last: tuple or None, optional
+        Not used (the nested dictionary is flattened once, see nest_map_leaves), returned as given
+
+    Outputs:
+    --------
+    :return dict_o: dict
+        Dictionary with eight nested levels [diagnostic, epoch_length, project, experiment, dataset, epoch,
+        'uncertainty', variant] filled with the uncertainty of the ensemble mean, and nine nested levels [diagnostic,
+        epoch_length, project, experiment, dataset, epoch, method, threshold, variant] filled with the required
+        ensemble size; variants are 'all_members', 'without_000' (without the first member), ..., 'without_flagged'
+    :return list_k: tuple
+    :return list_k_last: tuple
+    """
+    # check input
+    if dict_o is None:
+        dict_o = {}
+    if list_k is None:
+        list_k = ()
+    if list_k_last is None:
+        list_k_last = ()
+    check_inputs([
+        (check_type, dict_i, "dict_i", (dict, float, int, list, numpy__ndarray)),
+        (check_type, uncertainty_relative, "uncertainty_relative", bool),
+        (check_type, dict_threshold, "dict_threshold", (dict, type(None))),
+        (check_type, res_maximum, "res_maximum", int),
+        (check_type, dict_flags, "dict_flags", (dict, type(None))),
+        (check_type, dict_o, "dict_o", dict),
+        (check_type, list_k, "list_k", tuple),
+        (check_type, list_k_last, "list_k_last", tuple)])
+    # optional dictionaries are replaced by dictionaries filled with None (aligned with the leaves)
+    list_keys, _ = nest_flatten(dict_i)
+    list_aligned = [nest_unflatten(list_keys, [None] * len(list_keys)) if k is None else k
+                    for k in [dict_threshold, dict_flags]]
+    # compute the influence of the members of each leaf
+    dict_o = nest_map_leaves(
+        dict_i, _nest_leaf_member_influence, function_args=(
+            res_maximum, uncertainty_confidence_interval, uncertainty_distribution, uncertainty_relative),
+        dict_aligned=list_aligned, n_jobs=n_jobs, dict_o=dict_o, list_k=list_k)
+    return dict_o, list_k, list_k_last
+
+
 def nest_compute_res(dict_i, dict_threshold: dict, res_maximum: int, uncertainty_confidence_interval: float,
                      uncertainty_distribution: str, uncertainty_combinations: int, uncertainty_resamples: int,
-                     uncertainty_theory: bool, dict_o: dict = None, list_k: tuple = None,
-                     list_k_last: tuple = None) -> (dict, tuple, tuple):
+                     uncertainty_theory: bool, n_jobs: int = 1, uncertainty_seed: int = None, dict_o: dict = None,
+                     list_k: tuple = None, list_k_last: tuple = None) -> (dict, tuple, tuple):
     """
     Compute the uncertainty of the sample mean
 
@@ -58,13 +377,20 @@ def nest_compute_res(dict_i, dict_threshold: dict, res_maximum: int, uncertainty
         True to compute the theoretical uncertainty (using the standard error; e.g., Chapter 5 p. 92 of von Storch and
         Zwiers (1999; https://doi.org/10.1017/CBO9780511612336), else compute the uncertainty using a boostrap;
         e.g., uncertainty_theory = True
+    :param n_jobs: int, optional
+        Number of processes in which leaves (diagnostic, epoch length, project, experiment, dataset, epoch) are
+        dispatched; e.g., n_jobs = 4
+        Default is 1 (leaves are computed in the current process)
+    :param uncertainty_seed: int, optional
+        Seed of the random numbers; each leaf uses its own generator, spawned from this seed and the keys of the
+        leaf, so the output does not depend on n_jobs; e.g., uncertainty_seed = 0
+        Default is None (generators seeded by the operating system)
     :param dict_o: dict or None, optional
         Dictionary in which output values will be stored
-    :param list_k: list or None, optional
-        List of keys, in order, for the output nested dictionary
-    :param list_k_last: list or None, optional
-        List of the last key of each nested level, in order, to keep track of the position within the input nested
-        dictionary
+    :param list_k: tuple or None, optional
+        Keys put before the keys of dict_i in the output nested dictionary
+    :param list_k_last: tuple or None, optional
+        Not used (the nested dictionary is flattened once, see nest_map_leaves), returned as given
 
     Outputs:
     --------
@@ -75,116 +401,89 @@ def nest_compute_res(dict_i, dict_threshold: dict, res_maximum: int, uncertainty
     :return list_k_last: tuple
     """
     # check input
-    error = list()
     if dict_o is None:
         dict_o = {}
     if list_k is None:
         list_k = ()
     if list_k_last is None:
         list_k_last = ()
-    check_type(dict_i, "dict_i", (dict, float, int, list, numpy__ndarray), error)
-    check_type(dict_threshold, "dict_threshold", dict, error)
-    check_type(dict_o, "dict_o", dict, error)
-    check_type(list_k, "list_k", tuple, error)
-    check_type(list_k_last, "list_k_last", tuple, error)
-    print_fail(inspect__stack(), "\n".join(k for k in error))
-    # loop through nested levels
-    if isinstance(dict_i, dict) is True:
-        list_keys = sorted(list(dict_i.keys()), key=str.casefold)
-        for k in list_keys:
-            dict_o, list_k, list_k_last = nest_compute_res(
-                dict_i[k], dict_threshold[k], res_maximum, uncertainty_confidence_interval, uncertainty_distribution,
-                uncertainty_combinations, uncertainty_resamples, uncertainty_theory, dict_o=dict_o,
-                list_k=list_k + (k,), list_k_last=list_k_last + (list_keys[-1],))
-    else:
-        for criteria in list(dict_threshold.keys()):
-            for threshold in list(dict_threshold[criteria].keys()):
-                uncertainty_threshold = dict_threshold[criteria][threshold]
-                # compute RES
-                if criteria == "obs":
-                    res = stat_res_based_on_obs(
-                        dict_i, uncertainty_threshold, res_maximum, uncertainty_confidence_interval,
-                        uncertainty_distribution, uncertainty_combinations, uncertainty_resamples, uncertainty_theory)
-                else:
-                    if uncertainty_theory is True:
-                        res = stat_res_theory(
-                            dict_i, res_maximum, uncertainty_confidence_interval, uncertainty_threshold)
-                    else:
-                        res = stat_res_bootstrap(dict_i, res_maximum, uncertainty_confidence_interval,
-                                                 uncertainty_resamples, uncertainty_threshold)
-                if res is not None:
-                    # save values
-                    list_f = list_k + (criteria, threshold)
-                    dict_o = tool_put_in_dict(dict_o, res, *list_f)
-        # remove relevant keys from the tuples of keys
-        list_k, list_k_last = tool_tuple_for_dict(list_k, list_k_last)
+    check_inputs([
+        (check_type, dict_i, "dict_i", (dict, float, int, list, numpy__ndarray)),
+        (check_type, dict_threshold, "dict_threshold", dict),
+        (check_type, dict_o, "dict_o", dict),
+        (check_type, list_k, "list_k", tuple),
+        (check_type, list_k_last, "list_k_last", tuple)])
+    # compute the required ensemble size of each leaf
+    dict_o = nest_map_leaves(
+        dict_i, _nest_leaf_res, function_args=(
+            res_maximum, uncertainty_confidence_interval, uncertainty_distribution, uncertainty_combinations,
+            uncertainty_resamples, uncertainty_theory), dict_aligned=[dict_threshold], leaf_seed=uncertainty_seed,
+        n_jobs=n_jobs, dict_o=dict_o, list_k=list_k)
     return dict_o, list_k, list_k_last
 
 
-def nest_compute_statistic(dict_i, statistic: str, dict_o: dict = None, list_k: tuple = None,
+def nest_compute_statistic(dict_i, statistic, dict_o: dict = None, list_k: tuple = None,
                            list_k_last: tuple = None) -> (dict, tuple, tuple):
     """
-    Compute given statistic on arrays within the nested dictionary
+    Compute given statistic(s) on arrays within the nested dictionary
+    If several statistics are given, they are all computed in one traversal of the nested dictionary, sharing the
+    moments of each array (see stat_compute_statistic)
 
     Inputs:
     -------
     :param dict_i: dict
         Dictionary with six nested levels [diagnostic, epoch_length, project, experiment, dataset, epoch], filled with a
         list of values
-    :param statistic: str
-        Name of a statistic; e.g., statistic = 'mea'
+    :param statistic: str or list
+        Name of a statistic or list of names; e.g., statistic = 'mea' or statistic = ['mea', 'std']
         Seven statistics are defined: 'iqr', 'mea', 'med', 'ske', 'std', 'var', 'var_to_mea2'
     :param dict_o: dict or None, optional
         Dictionary in which output values will be stored
-    :param list_k: list or None, optional
-        List of keys, in order, for the output nested dictionary
-    :param list_k_last: list or None, optional
-        List of the last key of each nested level, in order, to keep track of the position within the input nested
-        dictionary
+    :param list_k: tuple or None, optional
+        Keys put before the keys of dict_i in the output nested dictionary
+    :param list_k_last: tuple or None, optional
+        Not used (the nested dictionary is flattened once, see nest_map_leaves), returned as given
 
     Outputs:
     --------
     :return dict_o: dict
-        Dictionary with seven nested levels [diagnostic, epoch_length, project, experiment, dataset, epoch], filled the
+        Dictionary with six nested levels [diagnostic, epoch_length, project, experiment, dataset, epoch], filled the
         desired statistical value
+        If a list of statistics is given, dictionary with seven nested levels
+        [diagnostic, epoch_length, project, experiment, dataset, epoch, statistic]
     :return list_k: tuple
     :return list_k_last: tuple
     """
     # check input
-    error = list()
     if dict_o is None:
         dict_o = {}
     if list_k is None:
         list_k = ()
     if list_k_last is None:
         list_k_last = ()
-    check_type(dict_i, "dict_i", (dict, float, int, list, numpy__ndarray), error)
-    check_type(dict_o, "dict_o", dict, error)
-    check_type(list_k, "list_k", tuple, error)
-    check_type(list_k_last, "list_k_last", tuple, error)
-    print_fail(inspect__stack(), "\n".join(k for k in error))
-    # loop through nested levels
-    if isinstance(dict_i, dict) is True:
-        list_keys = sorted(list(dict_i.keys()), key=str.casefold)
-        for k in list_keys:
-            dict_o, list_k, list_k_last = nest_compute_statistic(
-                dict_i[k], statistic, dict_o=dict_o, list_k=list_k + (k,), list_k_last=list_k_last + (list_keys[-1],))
-    else:
-        # compute statistic
-        value = stat_compute_statistic(dict_i, statistic)
-        # save values
-        dict_o = tool_put_in_dict(dict_o, value, *list_k)
-        # remove relevant keys from the tuples of keys
-        list_k, list_k_last = tool_tuple_for_dict(list_k, list_k_last)
+    check_inputs([
+        (check_type, dict_i, "dict_i", (dict, float, int, list, numpy__ndarray)),
+        (check_type, statistic, "statistic", (list, str)),
+        (check_type, dict_o, "dict_o", dict),
+        (check_type, list_k, "list_k", tuple),
+        (check_type, list_k_last, "list_k_last", tuple)])
+    # compute statistic(s) of each leaf
+    dict_o = nest_map_leaves(dict_i, stat_compute_statistic, function_args=(statistic,), dict_o=dict_o, list_k=list_k)
     return dict_o, list_k, list_k_last
 
 
 def nest_compute_uncertainty(dict_i, uncertainty_confidence_interval: float, uncertainty_distribution: str,
                              uncertainty_relative: bool, uncertainty_combinations: int, uncertainty_resamples: int,
-                             uncertainty_theory: bool, uncertainty_sample_sizes: list = None, dict_o: dict = None,
-                             list_k: tuple = None, list_k_last: tuple = None) -> (dict, tuple, tuple):
+                             uncertainty_theory: bool, uncertainty_sample_sizes: list = None, n_jobs: int = 1,
+                             uncertainty_seed: int = None, uncertainty_shared_draws: bool = False,
+                             uncertainty_exact_bootstrap: bool = False, uncertainty_tolerance: float = None,
+                             uncertainty_control_variate: bool = False, dict_draws: dict = None,
+                             dict_variance_reduction: dict = None, dict_o: dict = None, list_k: tuple = None,
+                             list_k_last: tuple = None) -> (dict, tuple, tuple):
     """
     Compute the uncertainty of the sample mean
+    If uncertainty_shared_draws is True, the leaves of a SMILE (same project, experiment, dataset and number of
+    members) are stacked in a (series x members) array and resampled with a single draw (see stat_resample_moments)
 
     Inputs:
     -------
@@ -211,13 +510,52 @@ def nest_compute_uncertainty(dict_i, uncertainty_confidence_interval: float, unc
     :param uncertainty_sample_sizes: list, optional
         Sample sizes used to compute the uncertainty (using resamples); e.g., uncertainty_sample_sizes = [10, 20]
         Default is None (the sample size will be the SMILE size)
+    :param n_jobs: int, optional
+        Number of processes in which leaves (diagnostic, epoch length, project, experiment, dataset, epoch) are
+        dispatched; e.g., n_jobs = 4
+        Default is 1 (leaves are computed in the current process)
+    :param uncertainty_seed: int, optional
+        Seed of the random numbers; each leaf uses its own generator, spawned from this seed and the keys of the
+        leaf, so the output does not depend on n_jobs; e.g., uncertainty_seed = 0
+        If uncertainty_shared_draws is True, each SMILE uses its own generator, spawned from this seed and the keys of
+        the SMILE
+        Default is None (generators seeded by the operating system)
+    :param uncertainty_shared_draws: bool, optional
+        True to use the same draws for all diagnostics, epoch lengths and epochs of a SMILE (the random numbers are
+        generated once and the samples of all leaves are computed with one matrix product, but the uncertainties of the
+        leaves are no longer independent); e.g., uncertainty_shared_draws = True
+        Default is False (each leaf is resampled independently)
+    :param uncertainty_exact_bootstrap: bool, optional
+        True to compute the bootstrap distribution of the sample mean without resampling (see
+        stat_uncertainty_bootstrap_exact), else uncertainty_resamples resamples are drawn; e.g.,
+        uncertainty_exact_bootstrap = True
+        Used only if uncertainty_theory is False
+        Default is False
+    :param uncertainty_tolerance: float, optional
+        Maximum Monte Carlo standard error of the uncertainty, relative to the uncertainty; samples are drawn in
+        batches until it is reached, using at most uncertainty_combinations or uncertainty_resamples samples (see
+        stat_uncertainty_sequential); e.g., uncertainty_tolerance = 0.001
+        Not used if the bootstrap is exact (uncertainty_theory is False and uncertainty_exact_bootstrap is True)
+        Default is None (uncertainty_combinations or uncertainty_resamples samples are drawn)
+    :param uncertainty_control_variate: bool, optional
+        True to correct the bootstrap resamples with control variates (see stat_uncertainty_bootstrap_control), the
+        same precision is reached with about ten times fewer resamples; e.g., uncertainty_control_variate = True
+        Used only if uncertainty_theory and uncertainty_exact_bootstrap are False and uncertainty_tolerance is None
+        Default is False
+    :param dict_draws: dict, optional
+        Dictionary in which the number of samples drawn for each leaf and sample size is stored (same levels as
+        dict_o), if uncertainty_tolerance is used
+        Default is None (numbers of samples are not stored)
+    :param dict_variance_reduction: dict, optional
+        Dictionary in which the variance reduction factor given by the control variates for each leaf and sample size
+        is stored (same levels as dict_o), if uncertainty_control_variate is used
+        Default is None (variance reduction factors are not stored)
     :param dict_o: dict or None, optional
         Dictionary in which output values will be stored
     :param list_k: tuple or None, optional
-        List of keys, in order, for the output nested dictionary
+        Keys put before the keys of dict_i in the output nested dictionary
     :param list_k_last: tuple or None, optional
-        List of the last key of each nested level, in order, to keep track of the position within the input nested
-        dictionary
+        Not used (the nested dictionary is flattened once, see nest_map_leaves), returned as given
 
     Outputs:
     --------
@@ -228,7 +566,6 @@ def nest_compute_uncertainty(dict_i, uncertainty_confidence_interval: float, unc
     :return list_k_last: tuple
     """
     # check input
-    error = list()
     if uncertainty_sample_sizes is None:
         uncertainty_sample_sizes = []
     if dict_o is None:
@@ -237,35 +574,63 @@ def nest_compute_uncertainty(dict_i, uncertainty_confidence_interval: float, unc
         list_k = ()
     if list_k_last is None:
         list_k_last = ()
-    check_type(dict_i, "dict_i", (dict, float, int, list, numpy__ndarray), error)
-    check_type(uncertainty_relative, "uncertainty_relative", bool, error)
-    check_type(uncertainty_sample_sizes, "uncertainty_sample_sizes", list, error)
-    check_type(dict_o, "dict_o", dict, error)
-    check_type(list_k, "list_k", tuple, error)
-    check_type(list_k_last, "list_k_last", tuple, error)
-    print_fail(inspect__stack(), "\n".join(k for k in error))
-    # loop through nested levels
-    if isinstance(dict_i, dict) is True:
-        list_keys = sorted(list(dict_i.keys()), key=str.casefold)
-        for k in list_keys:
-            dict_o, list_k, list_k_last = nest_compute_uncertainty(
-                dict_i[k], uncertainty_confidence_interval, uncertainty_distribution, uncertainty_relative,
-                uncertainty_combinations, uncertainty_resamples, uncertainty_theory,
-                uncertainty_sample_sizes=uncertainty_sample_sizes, dict_o=dict_o, list_k=list_k + (k,),
-                list_k_last=list_k_last + (list_keys[-1],))
+    check_inputs([
+        (check_type, dict_i, "dict_i", (dict, float, int, list, numpy__ndarray)),
+        (check_type, uncertainty_relative, "uncertainty_relative", bool),
+        (check_type, uncertainty_sample_sizes, "uncertainty_sample_sizes", list),
+        (check_type, uncertainty_shared_draws, "uncertainty_shared_draws", bool),
+        (check_type, uncertainty_exact_bootstrap, "uncertainty_exact_bootstrap", bool),
+        (check_interval, uncertainty_tolerance, "uncertainty_tolerance", (float, int), [1e-8, 1])
+        if uncertainty_tolerance is not None else None,
+        (check_type, uncertainty_control_variate, "uncertainty_control_variate", bool),
+        (check_type, dict_draws, "dict_draws", (dict, type(None))),
+        (check_type, dict_variance_reduction, "dict_variance_reduction", (dict, type(None))),
+        (check_type, dict_o, "dict_o", dict),
+        (check_type, list_k, "list_k", tuple),
+        (check_type, list_k_last, "list_k_last", tuple)])
+    if uncertainty_theory is False and uncertainty_exact_bootstrap is True:
+        # nothing is drawn
+        uncertainty_tolerance = None
+    if uncertainty_theory is True or uncertainty_exact_bootstrap is True or uncertainty_tolerance is not None:
+        # control variates are only used to correct a fixed number of bootstrap resamples
+        uncertainty_control_variate = False
+    function_args = (uncertainty_confidence_interval, uncertainty_distribution, uncertainty_relative,
+                     uncertainty_combinations, uncertainty_resamples, uncertainty_theory, uncertainty_sample_sizes,
+                     uncertainty_exact_bootstrap, uncertainty_tolerance, uncertainty_control_variate)
+    # leaves are filled with (uncertainty, number of draws) if uncertainty_tolerance is used, or with (uncertainty,
+    # variance reduction factor) if uncertainty_control_variate is used
+    paired = uncertainty_tolerance is not None or uncertainty_control_variate is True
+    dict_t = dict() if paired is True else dict_o
+    if uncertainty_shared_draws is False:
+        # compute the uncertainty of each leaf
+        dict_t = nest_map_leaves(dict_i, _nest_leaf_uncertainty, function_args=function_args,
+                                 leaf_seed=uncertainty_seed, n_jobs=n_jobs, dict_o=dict_t, list_k=list_k)
     else:
-        # list the sample size
-        sample_siz = [k for k in uncertainty_sample_sizes if isinstance(k, int) and k < len(dict_i)] + [len(dict_i)]
-        for k in sample_siz:
-            uncertainty = stat_uncertainty_select_and_compute(
-                dict_i, uncertainty_confidence_interval, uncertainty_distribution, uncertainty_relative,
-                uncertainty_combinations, uncertainty_resamples, uncertainty_theory, k)
-            # save values
-            name = str(k).zfill(3) + "_members" if len(uncertainty_sample_sizes) > 0 else "max_members"
-            list_f = list_k + (name,)
-            dict_o = tool_put_in_dict(dict_o, uncertainty, *list_f)
-        # remove relevant keys from the tuples of keys
-        list_k, list_k_last = tool_tuple_for_dict(list_k, list_k_last)
+        # stack the leaves of each SMILE (project, experiment, dataset, number of members)
+        dict_smile = dict()
+        for keys, leaf in zip(*nest_flatten(dict_i)):
+            smile = keys[2:-1] + (str(len(leaf)).zfill(3) + "_members",)
+            dict_smile.setdefault(smile, (list(), list()))
+            dict_smile[smile][0].append(keys)
+            dict_smile[smile][1].append(leaf)
+        dict_s = nest_unflatten(list(dict_smile.keys()), [(k1, numpy__array(k2)) for k1, k2 in dict_smile.values()])
+        # compute the uncertainty of all leaves of each SMILE at once
+        dict_s = nest_map_leaves(dict_s, _nest_smile_uncertainty, function_args=function_args,
+                                 leaf_seed=uncertainty_seed, n_jobs=n_jobs)
+        list_keys, list_values = list(), list()
+        for keys, values in nest_flatten(dict_s)[1]:
+            list_keys += [list_k + k for k in keys]
+            list_values += values
+        dict_t = nest_unflatten(list_keys, list_values, dict_o=dict_t)
+    if paired is True:
+        # split the uncertainty and the number of draws (or the variance reduction factor)
+        list_keys, list_values = nest_flatten(dict_t)
+        dict_o = nest_unflatten(list_keys, [k[0] for k in list_values], dict_o=dict_o)
+        dict_p = dict_draws if uncertainty_tolerance is not None else dict_variance_reduction
+        if dict_p is not None:
+            nest_unflatten(list_keys, [k[1] for k in list_values], dict_o=dict_p)
+    else:
+        dict_o = dict_t
     return dict_o, list_k, list_k_last
 
 
@@ -273,9 +638,12 @@ def nest_compute_uncertainty_hi_vs_pi(dict_i: dict, uncertainty_confidence_inter
                                       uncertainty_distribution: str, uncertainty_relative: bool,
                                       uncertainty_combinations: int, uncertainty_resamples: int,
                                       uncertainty_theory: bool, uncertainty_historical_epoch: str,
-                                      reference_experiment: str = "piControl") -> dict:
+                                      reference_experiment: str = "piControl", uncertainty_seed: int = None,
+                                      uncertainty_exact_bootstrap: bool = False) -> dict:
     """
     Compute the uncertainty of the sample mean
+    For each dataset, the epochs of the experiment are stacked in an (epochs x members) array and their samples are
+    drawn once (see stat_uncertainty_curve); the reference epoch shares this draw if it has the same number of members
 
     Inputs:
     -------
@@ -308,6 +676,16 @@ def nest_compute_uncertainty_hi_vs_pi(dict_i: dict, uncertainty_confidence_inter
         The first epoch of this experiment will be used as a reference to which experiments will be compared;
         e.g., reference_experiment = 'piControl'
         Default in 'piControl'
+    :param uncertainty_seed: int, optional
+        Seed of the random numbers; each dataset uses its own generator, spawned from this seed and the keys of the
+        dataset (diagnostic, epoch length, project, dataset); e.g., uncertainty_seed = 0
+        Default is None (generators seeded by the operating system)
+    :param uncertainty_exact_bootstrap: bool, optional
+        True to compute the bootstrap distribution of the sample mean without resampling (see
+        stat_uncertainty_bootstrap_exact), else uncertainty_resamples resamples are drawn; e.g.,
+        uncertainty_exact_bootstrap = True
+        Used only if uncertainty_theory is False
+        Default is False
 
     Output:
     -------
@@ -315,12 +693,12 @@ def nest_compute_uncertainty_hi_vs_pi(dict_i: dict, uncertainty_confidence_inter
         Dictionary with four nested levels [epoch length, diagnostic, dataset, x-or-y], filled with the values to plot
     """
     # check input
-    error = list()
     known_epochs = ["averaged", "first", "last"]
-    check_type(dict_i, "dict_i", dict, error)
-    check_type(uncertainty_relative, "uncertainty_relative", bool, error)
-    check_list(uncertainty_historical_epoch, "uncertainty_historical_epoch", known_epochs, error)
-    print_fail(inspect__stack(), "\n".join(k for k in error))
+    check_inputs([
+        (check_type, dict_i, "dict_i", dict),
+        (check_type, uncertainty_relative, "uncertainty_relative", bool),
+        (check_list, uncertainty_historical_epoch, "uncertainty_historical_epoch", known_epochs),
+        (check_type, uncertainty_exact_bootstrap, "uncertainty_exact_bootstrap", bool)])
     # compute uncertainty and organize data to plot the correspondence between experiments
     dict_o = {}
     for dia in list(dict_i.keys()):
@@ -335,7 +713,7 @@ def nest_compute_uncertainty_hi_vs_pi(dict_i: dict, uncertainty_confidence_inter
                             error = "there should be only one experiment available\n" + str().ljust(5)
                             error += "diagnostic: %s; epoch length: %s; project: %s; dataset: %s" % (dia, dur, pro, dat)
                             error += "\n" + str().ljust(5) + "experiments: " + str(list_exp)
-                            print_fail(inspect__stack(), error)
+                            check_inputs([error])
                         # there is only one experiment (not counting reference_experiment)
                         exp = list_exp[0]
                         # dictionaries
@@ -350,23 +728,28 @@ def nest_compute_uncertainty_hi_vs_pi(dict_i: dict, uncertainty_confidence_inter
                             epoch_exp = [epoch_exp[-1]]
                         # smallest ensemble size between reference and experiment
                         nbr = min(len(dict_ref[epoch_ref[0]]), len(dict_exp[epoch_exp[0]]))
-                        # compute uncertainty of the ensemble mean for the reference
-                        uncertainty_ref = stat_uncertainty_select_and_compute(
-                            dict_ref[epoch_ref[0]], uncertainty_confidence_interval, uncertainty_distribution,
-                            uncertainty_relative, uncertainty_combinations, uncertainty_resamples, uncertainty_theory,
-                            nbr)
-                        # compute uncertainty of the ensemble mean for the experiment
-                        uncertainty_exp = []
-                        for epo in epoch_exp:
-                            # compute uncertainty of the ensemble mean for given epoch
-                            tmp = stat_uncertainty_select_and_compute(
-                                dict_exp[epo], uncertainty_confidence_interval, uncertainty_distribution,
-                                uncertainty_relative, uncertainty_combinations, uncertainty_resamples,
-                                uncertainty_theory, nbr)
-                            uncertainty_exp.append(tmp)
+                        # reference epoch followed by the epochs of the experiment
+                        list_rows = [dict_ref[epoch_ref[0]]] + [dict_exp[epo] for epo in epoch_exp]
+                        if uncertainty_seed is None:
+                            rng = numpy__random__default_rng()
+                        else:
+                            rng = _nest_leaf_rng(uncertainty_seed, (dia, dur, pro, dat))
+                        # compute uncertainty of the ensemble mean of all rows with the same number of members at once
+                        # (the same combinations or resamples are used for all these rows)
+                        list_uncertainty = [0.] * len(list_rows)
+                        for siz in sorted(set(len(k) for k in list_rows)):
+                            list_idx = [i for i, k in enumerate(list_rows) if len(k) == siz]
+                            uncertainty = stat_uncertainty_curve(
+                                numpy__array([list_rows[i] for i in list_idx]), uncertainty_confidence_interval,
+                                uncertainty_distribution, uncertainty_relative, uncertainty_combinations,
+                                uncertainty_resamples, uncertainty_theory, [nbr], uncertainty_rng=rng,
+                                uncertainty_exact_bootstrap=uncertainty_exact_bootstrap)[0]
+                            for i, k in zip(list_idx, uncertainty):
+                                list_uncertainty[i] = float(k)
+                        uncertainty_ref = list_uncertainty[0]
                         # average across epoch (if experiment_epoch is 'first' or 'last', only the corresponding
                         # epoch was kept)
-                        uncertainty_exp = stat_compute_statistic(uncertainty_exp, "mea")
+                        uncertainty_exp = stat_compute_statistic(list_uncertainty[1:], "mea")
                         # save values
                         dict_o = tool_put_in_dict(dict_o, [uncertainty_ref], dur, dia, dat, "x")
                         dict_o = tool_put_in_dict(dict_o, [uncertainty_exp], dur, dia, dat, "y")
@@ -402,11 +785,10 @@ def nest_define_uncertainty_threshold(dict_i: dict, dict_threshold: dict,
         value to reach
     """
     # check input
-    error = list()
-    check_type(dict_i, "dict_i", dict, error)
-    check_type(dict_threshold, "dict_threshold", dict, error)
-    check_type(selected_model_experiment, "selected_model_experiment", (str, type(None)), error)
-    print_fail(inspect__stack(), "\n".join(k for k in error))
+    check_inputs([
+        (check_type, dict_i, "dict_i", dict),
+        (check_type, dict_threshold, "dict_threshold", dict),
+        (check_type, selected_model_experiment, "selected_model_experiment", (str, type(None)))])
     # compute uncertainty thresholds
     dict_model, dict_threshold_updated = {}, {}
     for dia in list(dict_i.keys()):
@@ -430,8 +812,7 @@ def nest_define_uncertainty_threshold(dict_i: dict, dict_threshold: dict,
                                 for method in list(dict_threshold[dia].keys()):
                                     # check method
                                     known_methods = ["mme", "obs", "unc"]
-                                    check_list(method, "threshold method", known_methods, error)
-                                    print_fail(inspect__stack(), "\n".join(k for k in error))
+                                    check_inputs([(check_list, method, "threshold method", known_methods)])
                                     # threshold
                                     if method in ["mme", "unc"]:
                                         list_threshold = dict_threshold[dia][method]["threshold"]
@@ -463,8 +844,7 @@ def nest_define_uncertainty_threshold(dict_i: dict, dict_threshold: dict,
                                         obs_epo = dict_threshold[dia][method]["epoch"]
                                         # check epoch
                                         known_epochs = ["first", "last", "same"]
-                                        check_list(obs_epo, "epoch name", known_epochs, error)
-                                        print_fail(inspect__stack(), "\n".join(k for k in error))
+                                        check_inputs([(check_list, obs_epo, "epoch name", known_epochs)])
                                         # select epoch
                                         list_epoch = sorted(list(obs.keys()), key=str.casefold)
                                         if obs_epo == "first":
@@ -511,7 +891,7 @@ def nest_examples_of_res_method(dict_i: dict, selected_model: str) -> dict:
         if len(list_epoch_lengths) > 1:
             error = "there should be only one epoch length available\n" + str().ljust(5) + "diagnostic: %s" % dia
             error += "\n" + str().ljust(5) + "epoch lengths: " + str(list_epoch_lengths)
-            print_fail(inspect__stack(), error)
+            check_inputs([error])
         dur = list_epoch_lengths[0]
         for pro in list(dict_i[dia][dur].keys()):
             # list experiments
@@ -520,7 +900,7 @@ def nest_examples_of_res_method(dict_i: dict, selected_model: str) -> dict:
                 error = "there should be only one experiment available\n" + str().ljust(5)
                 error += "diagnostic: %s ; epoch length: %s ; project: %s" % (dia, dur, pro)
                 error += "\n" + str().ljust(5) + "experiments: " + str(list_experiments)
-                print_fail(inspect__stack(), error)
+                check_inputs([error])
             exp = list_experiments[0]
             # dictionary
             d1 = dict_i[dia][dur][pro][exp]
@@ -541,7 +921,7 @@ def nest_examples_of_res_method(dict_i: dict, selected_model: str) -> dict:
                     error += "diagnostic: %s ; epoch length: %s ; project: %s ; experiment: %s" % (dia, dur, pro, exp)
                     error += " ; method: %s" % method
                     error += "\n" + str().ljust(5) + "thresholds: " + str(list_thresholds)
-                    print_fail(inspect__stack(), error)
+                    check_inputs([error])
                 thr = list_thresholds[0]
                 # get values per dataset
                 dict_t = {}
@@ -563,6 +943,37 @@ def nest_examples_of_res_method(dict_i: dict, selected_model: str) -> dict:
     return dict_o
 
 
+def nest_flatten(dict_i) -> (list, list):
+    """
+    Flatten the nested dictionary into a table of leaves
+    Keys of each level are sorted (str.casefold), so leaves are in the order in which the nested levels were looped
+    through by the recursive functions
+
+    Input:
+    ------
+    :param dict_i: dict
+        Nested dictionary, filled with anything else than a dictionary (e.g., a list of values)
+
+    Outputs:
+    --------
+    :return list_keys: list
+        Tuple of keys of each leaf
+    :return list_leaves: list
+        Value of each leaf
+    """
+    list_keys, list_leaves = list(), list()
+    # depth-first traversal, keys are put in the stack in reverse order to be popped in order
+    stack = [((), dict_i)]
+    while len(stack) > 0:
+        keys, value = stack.pop()
+        if isinstance(value, dict) is True:
+            stack += [(keys + (k,), value[k]) for k in reversed(sorted(list(value.keys()), key=str.casefold))]
+        else:
+            list_keys.append(keys)
+            list_leaves.append(value)
+    return list_keys, list_leaves
+
+
 def nest_influence_of_ensemble_size(dict_i: dict, ensemble_size_reference: str) -> dict:
     """
     Organize data to plot the influence of the ensemble size on the uncertainty of the ensemble mean
@@ -585,11 +996,10 @@ def nest_influence_of_ensemble_size(dict_i: dict, ensemble_size_reference: str)
         values to plot
     """
     # check input
-    error = list()
     known_references = ["maximum", "minimum"]
-    check_type(dict_i, "dict_i", dict, error)
-    check_list(ensemble_size_reference, "ensemble_size_reference", known_references, error)
-    print_fail(inspect__stack(), "\n".join(k for k in error))
+    check_inputs([
+        (check_type, dict_i, "dict_i", dict),
+        (check_list, ensemble_size_reference, "ensemble_size_reference", known_references)])
     # organize data to plot the influence of ensemble size
     dict_o = {}
     for dia in list(dict_i.keys()):
@@ -650,11 +1060,10 @@ def nest_influence_of_epoch_length(dict_i: dict, epoch_length_reference: str) ->
         values to plot
     """
     # check input
-    error = list()
     known_references = ["maximum", "minimum"]
-    check_type(dict_i, "dict_i", dict, error)
-    check_list(epoch_length_reference, "epoch_length_reference", known_references, error)
-    print_fail(inspect__stack(), "\n".join(k for k in error))
+    check_inputs([
+        (check_type, dict_i, "dict_i", dict),
+        (check_list, epoch_length_reference, "epoch_length_reference", known_references)])
     # organize data to plot the influence of ensemble size
     dict_o = {}
     for dia in list(dict_i.keys()):
@@ -704,6 +1113,117 @@ def nest_influence_of_epoch_length(dict_i: dict, epoch_length_reference: str) ->
     return dict_o
 
 
+def nest_map_leaves(dict_i, function, function_args: tuple = (), function_kwargs: dict = None,
+                    dict_aligned: list = None, leaf_batched: bool = False, leaf_seed: int = None, n_jobs: int = 1,
+                    blas_threads: int = None, dict_o: dict = None, list_k: tuple = None) -> dict:
+    """
+    Apply a function to each leaf of the nested dictionary
+    The dictionary is flattened once (nest_flatten), the function is applied to the table of leaves, serially, to
+    batches or in parallel, and the output dictionary is built in one pass (nest_unflatten)
+
+    Inputs:
+    -------
+    :param dict_i: dict
+        Nested dictionary, filled with anything else than a dictionary (e.g., a list of values)
+    :param function: function
+        Applied as function(leaf, *aligned_leaves, *function_args, **function_kwargs); it must be defined at the top
+        level of a module if n_jobs > 1 (it is sent to other processes)
+    :param function_args: tuple, optional
+        Positional arguments given to the function after the leaf (and aligned leaves); e.g., function_args = ('mea',)
+        Default is () (no positional argument)
+    :param function_kwargs: dict, optional
+        Keyword arguments given to the function
+        Default is None (no keyword argument)
+    :param dict_aligned: list, optional
+        Nested dictionaries with the same keys as dict_i, the value at the keys of each leaf is given to the function
+        after the leaf; e.g., dict_aligned = [dict_threshold]
+        Default is None (only the leaf is given to the function)
+    :param leaf_batched: bool, optional
+        True if the function takes a list of leaves (and lists of aligned leaves) and returns a list of outputs;
+        e.g., leaf_batched = False
+        Default is False (the function is called for each leaf)
+    :param leaf_seed: int, optional
+        Seed of the random numbers; a generator (numpy.random.Generator) is spawned from this seed and the keys of each
+        leaf and given to the function as the keyword argument rng, so the output does not depend on n_jobs nor on the
+        order of the leaves; e.g., leaf_seed = 0
+        Not available if leaf_batched is True
+        Default is None (no generator given to the function)
+    :param n_jobs: int, optional
+        Number of processes in which leaves are dispatched; e.g., n_jobs = 4
+        Default is 1 (leaves are computed in the current process)
+    :param blas_threads: int, optional
+        Number of threads of the linear algebra libraries in each process if n_jobs > 1; e.g., blas_threads = 1
+        Default is None (number of cores divided by n_jobs, to avoid oversubscription)
+    :param dict_o: dict, optional
+        Dictionary in which output values will be stored
+        Default is None (new dictionary)
+    :param list_k: tuple, optional
+        Keys put before the keys of each leaf in the output dictionary
+        Default is None (no key added)
+
+    Output:
+    -------
+    :return dict_o: dict
+        Dictionary with the same nested levels as dict_i, filled with the output of the function for each leaf
+    """
+    # check input
+    if function_kwargs is None:
+        function_kwargs = {}
+    if dict_aligned is None:
+        dict_aligned = []
+    if list_k is None:
+        list_k = ()
+    check_inputs([
+        (check_type, function_args, "function_args", tuple),
+        (check_type, function_kwargs, "function_kwargs", dict),
+        (check_type, dict_aligned, "dict_aligned", list),
+        (check_type, leaf_batched, "leaf_batched", bool),
+        (check_interval, leaf_seed, "leaf_seed", int, [0, 2 ** 32 - 1]) if leaf_seed is not None else None,
+        "leaf_seed cannot be used if leaf_batched is True" if leaf_seed is not None and leaf_batched is True else None,
+        (check_interval, n_jobs, "n_jobs", int, [1, 1e5]),
+        (check_type, blas_threads, "blas_threads", (int, type(None))),
+        (check_type, list_k, "list_k", tuple)])
+    # table of leaves
+    list_keys, list_leaves = nest_flatten(dict_i)
+    list_aligned = list()
+    for dict_t in dict_aligned:
+        list_t = list()
+        for keys in list_keys:
+            value = dict_t
+            for k in keys:
+                value = value[k]
+            list_t.append(value)
+        list_aligned.append(list_t)
+    # batches of leaves (one batch in the current process, a few batches per process otherwise)
+    nbr_batches = 1 if n_jobs <= 1 else min(len(list_leaves), 4 * n_jobs)
+    batch_size = max(1, int(math__ceil(len(list_leaves) / max(1, nbr_batches))))
+    list_tasks = [(function, list_keys[k: k + batch_size], list_leaves[k: k + batch_size],
+                   [k2[k: k + batch_size] for k2 in list_aligned], function_args, function_kwargs, leaf_batched,
+                   leaf_seed, check_trusted_inputs()) for k in range(0, len(list_leaves), batch_size)]
+    # apply function
+    if n_jobs <= 1 or len(list_tasks) <= 1:
+        list_outputs = [_nest_apply_to_leaves(k) for k in list_tasks]
+    else:
+        # limit the threads of the linear algebra libraries (read when the worker processes start)
+        if blas_threads is None:
+            blas_threads = max(1, (os.cpu_count() or 1) // n_jobs)
+        environment = dict((k, os.environ.get(k)) for k in blas_variables)
+        os.environ.update(dict((k, str(blas_threads)) for k in blas_variables))
+        try:
+            with concurrent__futures__ProcessPoolExecutor(
+                    max_workers=n_jobs, mp_context=multiprocessing__get_context("spawn")) as executor:
+                list_outputs = list(executor.map(_nest_apply_to_leaves, list_tasks))
+        finally:
+            # restore environment
+            for k1, k2 in environment.items():
+                if k2 is None:
+                    os.environ.pop(k1, None)
+                else:
+                    os.environ[k1] = k2
+    # reassemble output
+    return nest_unflatten([list_k + k for k in list_keys], [k2 for k1 in list_outputs for k2 in k1], dict_o=dict_o)
+
+
 def nest_quality_control_distributions(dict_i: dict, data_experiments: list,
                                        reference_experiment: str = "piControl") -> dict:
     """
@@ -734,7 +1254,7 @@ def nest_quality_control_distributions(dict_i: dict, data_experiments: list,
         if len(list_dur) > 1:
             error = "there should be only one epoch length available\n" + str().ljust(5) + "diagnostic: %s" % dia
             error += "\n" + str().ljust(5) + "epoch lengths: " + str(list_dur)
-            print_fail(inspect__stack(), error)
+            check_inputs([error])
         for dur in list_dur:
             for pro in list(dict_i[dia][dur].keys()):
                 # ensemble mean of the reference
@@ -785,7 +1305,7 @@ def nest_quality_control_time_series(dict_i: dict, epoch_length: str) -> dict:
     list_dia = list(dict_i.keys())
     if len(list_dia) > 1:
         error = "there should be only one diagnostic available\n" + str().ljust(5) + "diagnostics: " + str(list_dia)
-        print_fail(inspect__stack(), error)
+        check_inputs([error])
     for dia in list_dia:
         for pro in list(dict_i[dia].keys()):
             list_exp = list(dict_i[dia][pro].keys())
@@ -793,7 +1313,7 @@ def nest_quality_control_time_series(dict_i: dict, epoch_length: str) -> dict:
                 error = "there should be only one experiment available\n" + str().ljust(5)
                 error += "diagnostic: %s; project: %s" % (dia, pro)
                 error += "\n" + str().ljust(5) + "experiments: " + str(list_exp)
-                print_fail(inspect__stack(), error)
+                check_inputs([error])
             exp = list_exp[0]
             for dat in list(dict_i[dia][pro][exp]):
                 # array
@@ -827,11 +1347,10 @@ def nest_standardize_distributions(dict_i, dict_o: dict = None, list_k: tuple =
         list of values
     :param dict_o: dict or None, optional
         Dictionary in which output values will be stored
-    :param list_k: list or None, optional
-        List of keys, in order, for the output nested dictionary
-    :param list_k_last: list or None, optional
-        List of the last key of each nested level, in order, to keep track of the position within the input nested
-        dictionary
+    :param list_k: tuple or None, optional
+        Keys put before the keys of dict_i in the output nested dictionary
+    :param list_k_last: tuple or None, optional
+        Not used (the nested dictionary is flattened once, see nest_map_leaves), returned as given
 
     Outputs:
     --------
@@ -842,34 +1361,54 @@ def nest_standardize_distributions(dict_i, dict_o: dict = None, list_k: tuple =
     :return list_k_last: tuple
     """
     # check input
-    error = list()
     if dict_o is None:
         dict_o = {}
     if list_k is None:
         list_k = ()
     if list_k_last is None:
         list_k_last = ()
-    check_type(dict_i, "dict_i", (dict, float, int, list, numpy__ndarray), error)
-    check_type(dict_o, "dict_o", dict, error)
-    check_type(list_k, "list_k", tuple, error)
-    check_type(list_k_last, "list_k_last", tuple, error)
-    print_fail(inspect__stack(), "\n".join(k for k in error))
-    # loop through nested levels
-    if isinstance(dict_i, dict) is True:
-        list_keys = sorted(list(dict_i.keys()), key=str.casefold)
-        for k in list_keys:
-            dict_o, list_k, list_k_last = nest_standardize_distributions(
-                dict_i[k], dict_o=dict_o, list_k=list_k + (k,), list_k_last=list_k_last + (list_keys[-1],))
-    else:
-        # compute median
-        median = stat_compute_statistic(dict_i, "med")
-        # compute standard deviation
-        standard_deviation = stat_compute_statistic(dict_i, "iqr")
-        # standardize distribution
-        value = list((numpy__array(dict_i) - median) / standard_deviation)
-        # save values
-        dict_o = tool_put_in_dict(dict_o, value, *list_k)
-        # remove relevant keys from the tuples of keys
-        list_k, list_k_last = tool_tuple_for_dict(list_k, list_k_last)
+    check_inputs([
+        (check_type, dict_i, "dict_i", (dict, float, int, list, numpy__ndarray)),
+        (check_type, dict_o, "dict_o", dict),
+        (check_type, list_k, "list_k", tuple),
+        (check_type, list_k_last, "list_k_last", tuple)])
+    # standardize the distribution of each leaf
+    dict_o = nest_map_leaves(dict_i, _nest_leaf_standardize, dict_o=dict_o, list_k=list_k)
     return dict_o, list_k, list_k_last
+
+
+def nest_unflatten(list_keys: list, list_values: list, dict_o: dict = None) -> dict:
+    """
+    Build the nested dictionary from a table of leaves (inverse of nest_flatten)
+
+    Inputs:
+    -------
+    :param list_keys: list
+        Tuple of keys of each leaf
+    :param list_values: list
+        Value of each leaf
+    :param dict_o: dict, optional
+        Dictionary in which values will be stored
+        Default is None (new dictionary)
+
+    Output:
+    -------
+    :return dict_o: dict
+        Nested dictionary, with one level per key in the tuples, filled with the values
+    """
+    if dict_o is None:
+        dict_o = {}
+    for keys, value in zip(list_keys, list_values):
+        if len(keys) == 0 or (isinstance(value, dict) is True and len(value) == 0):
+            # nothing to save
+            continue
+        dict_t = dict_o
+        for k in keys[:-1]:
+            dict_t = dict_t.setdefault(k, dict())
+        if isinstance(value, dict) is True and isinstance(dict_t.get(keys[-1]), dict) is True:
+            # merge sub-dictionaries returned for the same keys
+            dict_t[keys[-1]].update(value)
+        else:
+            dict_t[keys[-1]] = value
+    return dict_o
 # ---------------------------------------------------------------------------------------------------------------------#
@@ -9,24 +9,60 @@
 # ---------------------------------------------------#
 # basic python package
 from copy import deepcopy
-from inspect import stack as inspect__stack
-from itertools import combinations as itertools__combinations
-from math import ceil as math__ceil
-from math import factorial as math__factorial
-from random import sample as random__sample
+from math import comb as math__comb
 # numpy
+from numpy import all as numpy__all
+from numpy import arange as numpy__arange
+from numpy import argpartition as numpy__argpartition
+from numpy import argsort as numpy__argsort
+from numpy import bincount as numpy__bincount
+from numpy import ceil as numpy__ceil
 from numpy import array as numpy__array
+from numpy import asarray as numpy__asarray
+from numpy import ascontiguousarray as numpy__ascontiguousarray
+from numpy import concatenate as numpy__concatenate
+from numpy import cumsum as numpy__cumsum
+from numpy import dtype as numpy__dtype
+from numpy import empty as numpy__empty
+from numpy import errstate as numpy__errstate
+from numpy import finfo as numpy__finfo
+from numpy import floor as numpy__floor
+from numpy import full as numpy__full
+from numpy import inf as numpy__inf
+from numpy import matmul as numpy__matmul
+from numpy import maximum as numpy__maximum
 from numpy import median as numpy__median
+from numpy import minimum as numpy__minimum
+from numpy import moveaxis as numpy__moveaxis
+from numpy import nan as numpy__nan
 from numpy import ndarray as numpy__ndarray
-from numpy.random import randint as numpy__random__randint
+from numpy import ndim as numpy__ndim
+from numpy import packbits as numpy__packbits
+from numpy import put_along_axis as numpy__put_along_axis
+from numpy import repeat as numpy__repeat
+from numpy import rint as numpy__rint
+from numpy import searchsorted as numpy__searchsorted
+from numpy import shape as numpy__shape
+from numpy import sort as numpy__sort
+from numpy import sqrt as numpy__sqrt
+from numpy import unique as numpy__unique
+from numpy import void as numpy__void
+from numpy import where as numpy__where
+from numpy import zeros as numpy__zeros
+from numpy.linalg import lstsq as numpy__linalg__lstsq
+from numpy.random import default_rng as numpy__random__default_rng
 # scipy
+from scipy.fft import irfft as scipy__fft__irfft
+from scipy.fft import next_fast_len as scipy__fft__next_fast_len
+from scipy.fft import rfft as scipy__fft__rfft
+from scipy.ndimage import correlate1d as scipy__ndimage__correlate1d
 from scipy.stats import linregress as scipy__stats__linregress
 from scipy.stats import norm as scipy__stats__norm
 from scipy.stats import scoreatpercentile as scipy__stats__scoreatpercentile
 from scipy.stats import skew as scipy__stats__skew
 from scipy.stats import t as scipy__stats__t
 # estimating_uncertainties_enso package
-from . check_lib import check_integer_even_or_odd, check_interval, check_list, check_type, print_fail
+from . check_lib import check_inputs, check_integer_even_or_odd, check_interval, check_list, check_type
 # ---------------------------------------------------#
 
 
@@ -163,16 +199,22 @@ def stat_variance_to_mean2(arr_i, axis=None):
     :return: ndarray
         Array containing the variance / mean**2 values
     """
-    return numpy__array(arr_i).var(axis=axis) / numpy__array(arr_i).mean(axis=axis)**2
+    return stat_from_moments(stat_moments(arr_i, axis=axis), "var_to_mea2")
 
 
+# statistics that can be derived from the moments (see stat_moments and stat_from_moments)
+list_stat_moments = ["mea", "ske", "std", "var", "var_to_mea2"]
 dic_stat = {"iqr": stat_iqr, "mea": stat_mean, "med": stat_median, "ske": stat_skewness, "std": stat_standard_deviation,
             "var": stat_variance, "var_to_mea2": stat_variance_to_mean2}
 
 
-def stat_bootstrap(arr_i, statistic: str, nbr_resamples: int, sample_size: int):
+def stat_bootstrap(arr_i, statistic: str, nbr_resamples: int, sample_size: int, memory_budget: float = 256,
+                   rng=None):
     """
     Compute the given statistic on a resampled array
+    Resamples are processed in blocks so that the random indices and the selected values never use more than
+    memory_budget; the random numbers are drawn in the same order, so, for a given rng, the result does not depend on
+    the block size
 
     Inputs:
     -------
@@ -184,6 +226,12 @@ def stat_bootstrap(arr_i, statistic: str, nbr_resamples: int, sample_size: int):
         Number of samples to generate; e.g., nbr_resamples = 1000
     :param sample_size: int
         Number of values in each sample; e.g., sample_size = 10
+    :param memory_budget: float, optional
+        Maximum memory (in MB) used by each block of resamples; e.g., memory_budget = 256
+        Default is 256
+    :param rng: numpy.random.Generator or int or None, optional
+        Random number generator, or seed used to create it; e.g., rng = numpy.random.default_rng(0)
+        Default is None (new generator seeded by the operating system)
 
     Output:
     -------
@@ -191,24 +239,89 @@ def stat_bootstrap(arr_i, statistic: str, nbr_resamples: int, sample_size: int):
         Array containing the statistic values computed 'nbr_samples' times
     """
     # check input
-    error = list()
-    check_type(arr_i, "arr_i", (list, numpy__ndarray), error)
-    check_list(statistic, "statistic", list(dic_stat.keys()), error)
-    check_interval(nbr_resamples, "nbr_resamples", int, [10, 1e10], error)
-    if isinstance(arr_i, (list, numpy__ndarray)) is True:
-        check_interval(sample_size, "sample_size", int, [1, len(arr_i)], error)
-    print_fail(inspect__stack(), "\n".join(k for k in error))
-    # create random indices
-    idx = numpy__random__randint(0, len(arr_i), (nbr_resamples, sample_size))
-    # randomly select members
-    sample = numpy__array(arr_i)[idx]
-    # compute the statistic
-    return dic_stat[statistic](sample, axis=1)
+    check_inputs([
+        (check_type, arr_i, "arr_i", (list, numpy__ndarray)),
+        (check_list, statistic, "statistic", list(dic_stat.keys())),
+        (check_interval, nbr_resamples, "nbr_resamples", int, [10, 1e10]),
+        (check_interval, sample_size, "sample_size", int, [1, len(arr_i)])
+        if isinstance(arr_i, (list, numpy__ndarray)) is True else None,
+        (check_interval, memory_budget, "memory_budget", (float, int), [1e-3, 1e10])], hot_path=True)
+    arr_i = numpy__array(arr_i)
+    rng = numpy__random__default_rng(rng)
+    # number of resamples per block (an index and a value, 8 bytes each, per member of each resample)
+    block_size = max(1, min(nbr_resamples, int(memory_budget * 2**20 / (16 * sample_size))))
+    arr_o = numpy__empty(nbr_resamples)
+    for k in range(0, nbr_resamples, block_size):
+        block = min(block_size, nbr_resamples - k)
+        # create random indices
+        idx = rng.integers(0, len(arr_i), (block, sample_size))
+        # randomly select members and compute the statistic
+        arr_o[k: k + block] = dic_stat[statistic](arr_i[idx], axis=1)
+    return arr_o
 
 
-def stat_combination_indices(population_size: int, nbr_combinations: int, sample_size: int):
+def _stat_combination_keys(idx, population_size: int):
     """
-    Compute the given statistic on a resampled array
+    Encode each combination as a bitmask (one bit per member of the population) to detect duplicates
+
+    Inputs:
+    -------
+    :param idx: ndarray
+        Array of shape (combinations, sample_size) containing the indices of each combination
+    :param population_size: int
+        Number of values in the population; e.g., population_size = 100
+
+    Output:
+    -------
+    :return: ndarray
+        Array of shape (combinations,) containing one hashable bitmask per combination
+    """
+    membership = numpy__zeros((len(idx), population_size), dtype=bool)
+    numpy__put_along_axis(membership, idx, True, axis=1)
+    keys = numpy__ascontiguousarray(numpy__packbits(membership, axis=1))
+    return keys.view(numpy__dtype((numpy__void, keys.shape[1]))).ravel()
+
+
+def _stat_combination_unrank(ranks, population_size: int, sample_size: int):
+    """
+    Convert ranks into combinations using the combinatorial number system
+
+    Inputs:
+    -------
+    :param ranks: ndarray
+        Ranks of the combinations, within [0, C(population_size, sample_size)[
+    :param population_size: int
+        Number of values in the population; e.g., population_size = 100
+    :param sample_size: int
+        Number of values in each sample; e.g., sample_size = 10
+
+    Output:
+    -------
+    :return idx: ndarray
+        Array of shape (len(ranks), sample_size) containing the sorted indices of each combination
+    """
+    # binomial coefficients C(c, k) for c in [0, population_size[, capped to stay in int64 (ranks are much smaller)
+    cap = 2**62
+    idx = numpy__empty((len(ranks), sample_size), dtype=int)
+    remainder = numpy__array(ranks, dtype="int64")
+    for k in range(sample_size, 0, -1):
+        column = numpy__array([min(math__comb(c, k), cap) for c in range(population_size)], dtype="int64")
+        # largest c such that C(c, k) <= remainder
+        idx[:, k - 1] = numpy__searchsorted(column, remainder, side="right") - 1
+        remainder = remainder - column[idx[:, k - 1]]
+    return idx
+
+
+def stat_combination_indices(population_size: int, nbr_combinations: int, sample_size: int, rng=None,
+                             balanced: bool = False):
+    """
+    Select unique combinations of sample_size values among population_size values
+    If the number of possible combinations is small, combinations are selected by drawing their rank, else they are
+    generated randomly; in both cases duplicates are removed and new combinations are drawn until nbr_combinations are
+    selected (the possible combinations are never all enumerated)
+    If balanced is True, the combinations are generated by cutting random permutations of the population into
+    population_size // sample_size disjoint combinations (stratified selection): all values are selected about as
+    often, so averages over the combinations converge faster than with independent combinations
 
     Inputs:
     -------
@@ -218,6 +331,14 @@ def stat_combination_indices(population_size: int, nbr_combinations: int, sample
         Maximum number of combinations to use; e.g., nbr_combinations = 1000
     :param sample_size: int
         Number of values in each sample; e.g., sample_size = 10
+    :param rng: numpy.random.Generator or int or None, optional
+        Random number generator, or seed used to create it; e.g., rng = numpy.random.default_rng(0)
+        Default is None (new generator seeded by the operating system)
+    :param balanced: bool, optional
+        True to select balanced combinations (disjoint combinations cut from random permutations), else combinations
+        are independent; e.g., balanced = True
+        Used only if the number of possible combinations is large (at least ten times nbr_combinations)
+        Default is False
 
     Output:
     -------
@@ -225,36 +346,153 @@ def stat_combination_indices(population_size: int, nbr_combinations: int, sample
         Indices to select from the population
     """
     # check input
-    error = list()
-    check_type(population_size, "population_size", int, error)
-    check_interval(nbr_combinations, "nbr_combinations", int, [10, int(1e10)], error)
-    check_interval(sample_size, "sample_size", int, [1, population_size - 1], error)
-    print_fail(inspect__stack(), "\n".join(k for k in error))
-    # define size of array and indices of the array
-    indices = list(range(population_size))
+    check_inputs([
+        (check_type, population_size, "population_size", int),
+        (check_interval, nbr_combinations, "nbr_combinations", int, [10, int(1e10)]),
+        (check_interval, sample_size, "sample_size", int, [1, population_size - 1]),
+        (check_type, balanced, "balanced", bool)], hot_path=True)
     # compute the number of combinations
-    maximum_combinations = int(math__factorial(population_size) / (
-            math__factorial(sample_size) * math__factorial(population_size - sample_size)))
-    # compute and select combinations
-    if maximum_combinations < nbr_combinations * 10:
-        # compute all possible combinations
-        idx = list(itertools__combinations(indices, sample_size))
-        # select 'nbr_samples' of them
-        if maximum_combinations > nbr_combinations:
-            selected = sorted(random__sample(range(maximum_combinations), nbr_combinations))
-            idx = [tuple(idx)[k] for k in selected]
-    else:
-        idx = list()
-        while len(idx) < nbr_combinations:
-            # randomly generate a combination
-            sample = sorted(random__sample(indices, sample_size))
-            # keep it if it is not already
-            if sample not in idx:
-                idx.append(sample)
-    return numpy__array(idx)
+    maximum_combinations = math__comb(population_size, sample_size)
+    if maximum_combinations <= nbr_combinations:
+        # all combinations are selected
+        return _stat_combination_unrank(numpy__arange(maximum_combinations), population_size, sample_size)
+    # draw combinations until nbr_combinations unique combinations are selected
+    rng = numpy__random__default_rng(rng)
+    keys, idx = numpy__empty(0, dtype="int64"), numpy__empty((0, sample_size), dtype=int)
+    while len(idx) < nbr_combinations:
+        nbr = nbr_combinations - len(idx)
+        if maximum_combinations < nbr_combinations * 10:
+            # randomly draw ranks, the rank is the key of the combination
+            new_keys = rng.integers(0, maximum_combinations, nbr, dtype="int64")
+            new_idx = None
+        else:
+            if balanced is True:
+                # cut random permutations in disjoint combinations
+                per_permutation = population_size // sample_size
+                new_idx = numpy__argsort(rng.random((-(-nbr // per_permutation), population_size)), axis=1)
+                new_idx = new_idx[:, :per_permutation * sample_size].reshape(-1, sample_size)[:nbr]
+            else:
+                # randomly generate combinations: keep the sample_size smallest of population_size random numbers
+                new_idx = numpy__argpartition(rng.random((nbr, population_size)), sample_size - 1,
+                                              axis=1)[:, :sample_size]
+            new_idx.sort(axis=1)
+            new_keys = _stat_combination_keys(new_idx, population_size)
+            if len(keys) == 0:
+                keys = keys.astype(new_keys.dtype)
+        # keep combinations that are not already selected (first occurrence, in the order they were drawn)
+        _, first = numpy__unique(numpy__concatenate((keys, new_keys)), return_index=True)
+        first = numpy__sort(first[first >= len(keys)]) - len(keys)
+        keys = numpy__concatenate((keys, new_keys[first]))
+        if new_idx is None:
+            new_idx = _stat_combination_unrank(new_keys[first], population_size, sample_size)
+        else:
+            new_idx = new_idx[first]
+        idx = numpy__concatenate((idx, new_idx))
+    return idx
+
+
+def _stat_combination_revolving_door(population_size: int, sample_size: int):
+    """
+    List all combinations of sample_size values among population_size values in revolving door order (each combination
+    differs from the previous one by a single swap: one value removed, one value added)
+    The order is built recursively: the combinations of j values among p values are the combinations of j values among
+    p - 1 values, followed by the combinations of j - 1 values among p - 1 values in reverse order, to which the value
+    p - 1 is added (Nijenhuis and Wilf, 1978, Combinatorial algorithms, chapter 3); only the swaps are stored
+
+    Inputs:
+    -------
+    :param population_size: int
+        Number of values in the population; e.g., population_size = 20
+    :param sample_size: int
+        Number of values in each sample; e.g., sample_size = 10
+
+    Outputs:
+    --------
+    :return first: ndarray
+        Indices of the first combination
+    :return removed: ndarray
+        Index removed at each swap (C(population_size, sample_size) - 1 swaps)
+    :return added: ndarray
+        Index added at each swap
+    """
+    empty = numpy__empty(0, dtype="int32")
+    # first combination, last combination, removed and added indices for each number of selected values j (only the
+    # numbers of values needed to reach sample_size values among population_size values are kept)
+    row = {0: ((), (), empty, empty)}
+    for p in range(1, population_size + 1):
+        row_p = dict()
+        for j in range(max(0, sample_size - population_size + p), min(sample_size, p) + 1):
+            if j == 0 or j == p:
+                row_p[j] = (tuple(range(j)), tuple(range(j)), empty, empty)
+                continue
+            first_a, last_a, removed_a, added_a = row[j]
+            first_b, last_b, removed_b, added_b = row[j - 1]
+            # swap from the last combination of the first part to the first combination of the reversed second part
+            start_b = set(last_b) | {p - 1}
+            removed = numpy__array(list(set(last_a) - start_b), dtype="int32")
+            added = numpy__array(list(start_b - set(last_a)), dtype="int32")
+            # the swaps of the reversed second part are reversed and exchanged
+            row_p[j] = (first_a, tuple(first_b) + (p - 1,), numpy__concatenate((removed_a, removed, added_b[::-1])),
+                        numpy__concatenate((added_a, added, removed_b[::-1])))
+        row = row_p
+    first, _, removed, added = row[sample_size]
+    return numpy__array(first, dtype=int), removed, added
+
+
+def stat_combination_moments(arr_i, sample_size: int, memory_budget: float = 256):
+    """
+    Compute the mean and the variance of all combinations of sample_size values
+    Combinations are visited in revolving door order (see _stat_combination_revolving_door), so the sum and the sum of
+    squares of each combination are updated from the previous combination with one subtraction and one addition
+    If a 2-D array (series x members) is given, the same combinations are used for all series
 
+    Inputs:
+    -------
+    :param arr_i: array_like
+        Values of the members, or 2-D array of shape (series, members)
+    :param sample_size: int
+        Number of values in each sample; e.g., sample_size = 10
+    :param memory_budget: float, optional
+        Maximum memory (in MB) used by each block of swaps (the outputs are not included); e.g., memory_budget = 256
+        Default is 256
 
-def stat_combination_random(arr_i, statistic: str, nbr_combinations: int, sample_size: int):
+    Outputs:
+    --------
+    :return sample_mean: ndarray
+        Mean of each combination, of shape (C(members, sample_size),) or (C(members, sample_size), series)
+    :return sample_variance: ndarray
+        Variance of each combination, of shape (C(members, sample_size),) or (C(members, sample_size), series)
+    """
+    # check input
+    check_inputs([
+        (check_type, arr_i, "arr_i", (list, numpy__ndarray)),
+        (check_interval, sample_size, "sample_size", int, [1, numpy__shape(arr_i)[-1]])
+        if isinstance(arr_i, (list, numpy__ndarray)) is True else None,
+        (check_interval, memory_budget, "memory_budget", (float, int), [1e-3, 1e10])], hot_path=True)
+    # center values to avoid losing precision in the running sums; members along the first axis
+    arr_i = numpy__array(arr_i, dtype=float)
+    center = arr_i.mean(axis=-1, keepdims=True)
+    values = numpy__moveaxis(arr_i - center, -1, 0)
+    squared = values**2
+    first, removed, added = _stat_combination_revolving_door(len(values), sample_size)
+    sums = numpy__empty((len(removed) + 1,) + values.shape[1:])
+    squares = numpy__empty(sums.shape)
+    sums[0], squares[0] = values[first].sum(axis=0), squared[first].sum(axis=0)
+    # running sums, by blocks of swaps (differences and cumulative sums of the block)
+    nbr_series = 1 if arr_i.ndim == 1 else len(arr_i)
+    block_size = max(1, int(memory_budget * 2**20 / (32 * nbr_series + 8)))
+    for k in range(0, len(removed), block_size):
+        swap = slice(k, k + block_size)
+        sums[k + 1: k + block_size + 1] = sums[k] + numpy__cumsum(values[added[swap]] - values[removed[swap]], axis=0)
+        squares[k + 1: k + block_size + 1] = squares[k] + numpy__cumsum(
+            squared[added[swap]] - squared[removed[swap]], axis=0)
+    sample_mean = sums / sample_size
+    sample_variance = numpy__maximum(squares / sample_size - sample_mean**2, 0)
+    return sample_mean + center[..., 0], sample_variance
+
+
+def stat_combination_random(arr_i, statistic: str, nbr_combinations: int, sample_size: int, rng=None,
+                            balanced: bool = False):
     """
     Compute the given statistic on a resampled array
 
@@ -268,6 +506,15 @@ def stat_combination_random(arr_i, statistic: str, nbr_combinations: int, sample
         Maximum number of combinations to use; e.g., nbr_combinations = 1000
     :param sample_size: int
         Number of values in each sample; e.g., sample_size = 10
+    :param rng: numpy.random.Generator or int or None, optional
+        Random number generator, or seed used to create it; e.g., rng = numpy.random.default_rng(0)
+        Default is None (new generator seeded by the operating system)
+    :param balanced: bool, optional
+        True to select balanced combinations (disjoint combinations cut from random permutations), else combinations
+        are independent; e.g., balanced = True
+        Used only if the number of possible combinations is large (at least ten times nbr_combinations; see
+        stat_combination_indices)
+        Default is False
 
     Output:
     -------
@@ -275,51 +522,203 @@ def stat_combination_random(arr_i, statistic: str, nbr_combinations: int, sample
         Array containing the statistic values computed 'nbr_samples' times
     """
     # check input
-    error = list()
-    check_type(arr_i, "arr_i", (list, numpy__ndarray), error)
-    check_list(statistic, "statistic", list(dic_stat.keys()), error)
-    print_fail(inspect__stack(), "\n".join(k for k in error))
+    check_inputs([
+        (check_type, arr_i, "arr_i", (list, numpy__ndarray)),
+        (check_list, statistic, "statistic", list(dic_stat.keys()))], hot_path=True)
     # select necessary indices
-    idx = stat_combination_indices(len(arr_i), nbr_combinations, sample_size)
+    idx = stat_combination_indices(len(arr_i), nbr_combinations, sample_size, rng=rng, balanced=balanced)
     # randomly select members
     sample = numpy__array(arr_i)[idx]
     # compute the statistic
     return dic_stat[statistic](sample, axis=1)
 
 
-def stat_compute_statistic(arr_i, statistic: str):
+def stat_compute_statistic(arr_i, statistic):
     """
-    Compute the given statistic of the flattened array
+    Compute the given statistic(s) of the flattened array
+    If several statistics are given, the moments of the array are computed once (see stat_moments) and shared by all
+    statistics derived from them
 
     Inputs:
     -------
     :param arr_i: array_like
-    :param statistic: str
-        Name of a statistic; e.g., statistic = 'mea'
+    :param statistic: str or list
+        Name of a statistic or list of names; e.g., statistic = 'mea' or statistic = ['mea', 'std']
         Seven statistics are defined: 'iqr', 'mea', 'med', 'ske', 'std', 'var', 'var_to_mea2'
 
     Output:
     -------
-    :return arr_o: ndarray
+    :return arr_o: float or dict
+        Statistic value (or None if it cannot be computed), or a dictionary [statistic] if a list of statistics is given
+    """
+    list_statistics = statistic if isinstance(statistic, list) is True else [statistic]
+    # check input
+    check_inputs([
+        (check_type, arr_i, "arr_i", (float, int, list, numpy__ndarray)),
+        (check_type, statistic, "statistic", (list, str))] +
+        [(check_list, k, "statistic", list(dic_stat.keys())) for k in list_statistics], hot_path=True)
+    # compute statistics
+    arr_o, moments = dict(), None
+    for stat in list_statistics:
+        if stat == "mea" and isinstance(arr_i, (float, int)) is True:
+            arr_o[stat] = deepcopy(arr_i)
+        elif stat == "mea" and isinstance(arr_i, list) is True and len(arr_i) == 1:
+            arr_o[stat] = arr_i[0]
+        elif isinstance(arr_i, (list, numpy__ndarray)) is True and len(arr_i) > 1:
+            if stat in list_stat_moments:
+                # moments are computed only once
+                if moments is None:
+                    moments = stat_moments(arr_i)
+                arr_o[stat] = float(stat_from_moments(moments, stat))
+            else:
+                arr_o[stat] = float(dic_stat[stat](arr_i))
+        else:
+            arr_o[stat] = None
+    return arr_o if isinstance(statistic, list) is True else arr_o[statistic]
+
+
+def stat_from_moments(moments: dict, statistic: str):
+    """
+    Derive the given statistic from the moments computed by stat_moments
+
+    Inputs:
+    -------
+    :param moments: dict
+        Output of stat_moments (keys: 'count', 'mean', 'm2', 'm3')
+    :param statistic: str
+        Name of a statistic; e.g., statistic = 'std'
+        Five statistics can be derived from the moments: 'mea', 'ske', 'std', 'var', 'var_to_mea2'
+
+    Output:
+    -------
+    :return: ndarray
         Array containing the statistic values
     """
     # check input
-    error = list()
-    check_type(arr_i, "arr_i", (float, int, list, numpy__ndarray), error)
-    check_list(statistic, "statistic", list(dic_stat.keys()), error)
-    print_fail(inspect__stack(), "\n".join(k for k in error))
-    # compute statistic
-    if statistic == "mea" and isinstance(arr_i, (float, int)) is True:
-        arr_o = deepcopy(arr_i)
-    elif statistic == "mea" and isinstance(arr_i, list) is True and len(arr_i) == 1:
-        arr_o = arr_i[0]
-    elif isinstance(arr_i, (list, numpy__ndarray)) is True and len(arr_i) > 1:
-        arr_o = float(dic_stat[statistic](arr_i))
+    check_inputs([
+        (check_type, moments, "moments", dict),
+        (check_list, statistic, "statistic", list_stat_moments)], hot_path=True)
+    mean = moments["mean"]
+    # biased variance (as numpy.var)
+    variance = moments["m2"] / moments["count"]
+    if statistic == "mea":
+        arr_o = mean
+    elif statistic == "ske":
+        # biased skewness (as scipy.stats.skew), undefined if the variance is lost in the precision of the mean (same
+        # threshold as scipy.stats.skew: standard deviation below the machine epsilon times the mean)
+        with numpy__errstate(divide="ignore", invalid="ignore"):
+            arr_o = moments["m3"] / moments["count"] / variance**1.5
+        arr_o = numpy__where(variance <= (numpy__finfo(float).eps * mean)**2, numpy__nan, arr_o)
+    elif statistic == "std":
+        arr_o = numpy__sqrt(variance)
+    elif statistic == "var":
+        arr_o = variance
     else:
-        arr_o = None
+        arr_o = variance / mean**2
     return arr_o
 
 
+def _stat_check_excluded(excluded: list, nbr_members: int, error_list: list):
+    """
+    Check the members left out of each variant (see stat_leave_out_moments)
+
+    Inputs:
+    -------
+    :param excluded: list
+        For each variant, list of the indices of the members left out
+    :param nbr_members: int
+        Number of members in the ensemble
+    :param error_list: list
+        Descriptions of errors
+    """
+    for k in excluded:
+        check_type(k, "excluded variant", list, error_list)
+        if isinstance(k, list) is True:
+            for k2 in k:
+                check_interval(k2, "excluded member", int, [0, nbr_members - 1], error_list)
+            if len(set(k)) != len(k) or len(k) >= nbr_members:
+                error_list.append("excluded variant: members must be distinct and at least one member must remain")
+
+
+def stat_leave_out_moments(arr_i, excluded: list = None) -> (numpy__ndarray, numpy__ndarray, numpy__ndarray):
+    """
+    Compute the mean and the variance of the ensemble without some of its members, for several variants, in O(N)
+    The sum and the sum of squares of the whole ensemble are computed once, then the values of the excluded members are
+    subtracted (downdating) instead of recomputing the moments of each variant
+
+    Inputs:
+    -------
+    :param arr_i: array_like
+        Values of the members
+    :param excluded: list, optional
+        For each variant, list of the (distinct) indices of the members left out; e.g., excluded = [[], [0], [3, 7]]
+        An empty list gives the moments of the whole ensemble
+        Default is None (leave-one-out: one variant per member, without this member)
+
+    Outputs:
+    --------
+    :return sample_mean: ndarray
+        Mean of each variant
+    :return sample_variance: ndarray
+        Variance of each variant (biased, as numpy.var)
+    :return sample_size: ndarray
+        Number of members of each variant
+    """
+    nbr_members = len(arr_i)
+    if excluded is None:
+        excluded = [[k] for k in range(nbr_members)]
+    # check input
+    check_inputs([
+        (check_type, arr_i, "arr_i", (list, numpy__ndarray)),
+        (check_type, excluded, "excluded", list),
+        (_stat_check_excluded, excluded, nbr_members)], hot_path=True)
+    # center values to avoid losing precision when the sums are downdated
+    arr_i = numpy__array(arr_i, dtype=float)
+    center = arr_i.mean()
+    values = arr_i - center
+    # sums of the excluded values of each variant (one pass over all excluded members)
+    nbr_excluded = numpy__array([len(k) for k in excluded], dtype=int)
+    variant = numpy__repeat(numpy__arange(len(excluded)), nbr_excluded)
+    members = numpy__array([k2 for k1 in excluded for k2 in k1], dtype=int)
+    sums = values.sum() - numpy__bincount(variant, weights=values[members], minlength=len(excluded))
+    squares = (values**2).sum() - numpy__bincount(variant, weights=values[members]**2, minlength=len(excluded))
+    # moments of each variant
+    sample_size = nbr_members - nbr_excluded
+    sample_mean = sums / sample_size
+    sample_variance = numpy__maximum(squares / sample_size - sample_mean**2, 0)
+    return sample_mean + center, sample_variance, sample_size
+
+
+def stat_moments(arr_i, axis=None) -> dict:
+    """
+    Compute the number of values, the mean and the sums of squared (M2) and cubed (M3) deviations from the mean along
+    the given axis
+    The array is converted and the deviations are computed only once; every statistic of dic_stat except 'iqr' and
+    'med' is derived from these moments (see stat_from_moments)
+
+    Inputs:
+    -------
+    :param arr_i: array_like
+    :param axis: None or int, optional
+        Axis along which the moments are computed; e.g., axis = 1 to compute the moments of each sample (row) of a 2-D
+        array of samples
+        Default is None (compute moments of the flattened array)
+
+    Output:
+    -------
+    :return: dict
+        Dictionary with the keys 'count' (int), 'mean', 'm2' and 'm3' (ndarray, or float if axis is None)
+    """
+    arr_t = numpy__asarray(arr_i, dtype=float)
+    count = arr_t.size if axis is None else arr_t.shape[axis]
+    mean = arr_t.mean(axis=axis, keepdims=True)
+    # deviations from the mean, squared deviations
+    deviation = arr_t - mean
+    square = deviation * deviation
+    return {"count": count, "mean": mean.squeeze(axis=axis), "m2": square.sum(axis=axis),
+            "m3": (square * deviation).sum(axis=axis)}
+
+
 def stat_regression(arr_i1, arr_i2) -> (float, float, float, float):
     """
     Compute the linear least-squares regression between the two given arrays
@@ -342,29 +741,56 @@ def stat_regression(arr_i1, arr_i2) -> (float, float, float, float):
         t-distribution of the test statistic.
     """
     # check input
-    error = list()
-    check_type(arr_i1, "arr_i1", (list, numpy__ndarray), error)
-    check_type(arr_i2, "arr_i2", (list, numpy__ndarray), error)
-    if len(arr_i1) != len(arr_i2):
-        error.append("arrays don't have the same length")
-        error.append(str().ljust(5) + "len(arr_i1) = %s and len(arr_i2) = %s" % (repr(len(arr_i1)), type(len(arr_i2))))
-    print_fail(inspect__stack(), "\n".join(k for k in error))
+    check_inputs([
+        (check_type, arr_i1, "arr_i1", (list, numpy__ndarray)),
+        (check_type, arr_i2, "arr_i2", (list, numpy__ndarray)),
+        "arrays don't have the same length\n" + str().ljust(5) + "len(arr_i1) = %s and len(arr_i2) = %s" % (
+            repr(len(arr_i1)), repr(len(arr_i2))) if len(arr_i1) != len(arr_i2) else None])
     # compute linear regression
     slope, intercept, correlation, p_value, _ = scipy__stats__linregress(arr_i1, arr_i2)
     return slope, intercept, correlation, p_value
 
 
-def stat_res_based_on_obs(arr_model, arr_obs: float, maximum_res: int, uncertainty_confidence_interval: float,
+def _stat_res_from_sizes(sample_sizes: list, is_smaller, res_maximum: int) -> int:
+    """
+    Find the required ensemble size from the comparison, for each sample size, between the uncertainty and its threshold
+    The required ensemble size is the sample size after which the uncertainty is always smaller than the threshold (for
+    a monotonous uncertainty, it is the value a bisection would find)
+
+    Inputs:
+    -------
+    :param sample_sizes: list
+        Increasing sample sizes; the last one is the largest accepted ensemble size
+    :param is_smaller: array_like
+        True if the uncertainty computed with the corresponding sample size is smaller than the threshold
+    :param res_maximum: int
+        Maximum value for the required ensemble size; e.g., res_maximum = 100
+
+    Output:
+    -------
+    :return res: int
+        Required ensemble size (res_maximum if the uncertainty of the largest sample size is not small enough)
+    """
+    if bool(is_smaller[-1]) is False:
+        # res cannot be computed
+        return res_maximum
+    # first sample size after the last one for which the uncertainty is too large
+    list_larger = [siz for siz, smaller in zip(sample_sizes, is_smaller) if bool(smaller) is False]
+    return list_larger[-1] + 1 if len(list_larger) > 0 else sample_sizes[0]
+
+
+def stat_res_based_on_obs(arr_model, arr_obs, maximum_res: int, uncertainty_confidence_interval: float,
                           uncertainty_distribution: str, uncertainty_combinations: int, uncertainty_resamples: int,
-                          uncertainty_theory: bool) -> int:
+                          uncertainty_theory: bool, uncertainty_memory_budget: float = 256, uncertainty_rng=None):
     """
     Compute the required ensemble size to know the sign of the bias (using combinations of model members)
+    The samples of all ensemble sizes are drawn once (see stat_uncertainty_curve) and shared by all observed values
     
     Inputs:
     -------
     :param arr_model: array_like
-    :param arr_obs: float
-        Observed value (or reverence value); e.g., arr_obs = 3.4
+    :param arr_obs: float or list
+        Observed value(s) (or reverence value); e.g., arr_obs = 3.4
     :param maximum_res: int
         Maximum value for the required ensemble size; e.g., maximum_res = 100
     :param uncertainty_confidence_interval: float
@@ -382,53 +808,59 @@ def stat_res_based_on_obs(arr_model, arr_obs: float, maximum_res: int, uncertain
         True to compute the theoretical uncertainty (using the standard error; e.g., Chapter 5 p. 92 of von Storch and
         Zwiers (1999; https://doi.org/10.1017/CBO9780511612336), else compute the uncertainty using a boostrap;
         e.g., uncertainty_theoretical = True
+    :param uncertainty_memory_budget: float, optional
+        Maximum memory (in MB) used by the draws; e.g., uncertainty_memory_budget = 256
+        Default is 256
+    :param uncertainty_rng: numpy.random.Generator or int or None, optional
+        Random number generator, or seed used to create it; e.g., uncertainty_rng = numpy.random.default_rng(0)
+        Default is None (new generator seeded by the operating system)
         
     Output:
     -------
-    :return res: int
-        Required ensemble size to know the sign of the bias
+    :return res: int or list
+        Required ensemble size to know the sign of the bias (a list if a list of observed values is given)
     """
     # check input
-    error = list()
-    check_type(arr_model, "arr_model", (list, numpy__ndarray), error)
-    check_type(arr_obs, "arr_obs", (float, int), error)
-    check_type(maximum_res, "maximum_res", int, error)
-    print_fail(inspect__stack(), "\n".join(k for k in error))
-    # compute the sign of the bias using the largest accepted ensemble size
-    low, res = 0, min(len(arr_model), maximum_res)
-    if uncertainty_theory is True:
-        # if the uncertainty is computed using the theory, the variance of the sample will be computed. It cannot be
-        # computed if the sample size is smaller than 2
-        low = 1
-    is_true = stat_uncertainties_smaller_than_difference(
-        arr_model, arr_obs, uncertainty_confidence_interval, uncertainty_distribution, uncertainty_combinations,
-        uncertainty_resamples, uncertainty_theory, res)
-    if is_true:
-        # the uncertainty computed using the largest accepted ensemble size is smaller than the desired uncertainty,
-        # find the smallest ensemble required.
-        while low + 1 != res:
-            # divide the interval by two
-            size = min(res - 1, math__ceil(res / 2 + low / 2))
-            # compute the sample uncertainty and the threshold using sample size = size
-            is_true = stat_uncertainties_smaller_than_difference(
-                arr_model, arr_obs, uncertainty_confidence_interval, uncertainty_distribution, uncertainty_combinations,
-                uncertainty_resamples, uncertainty_theory, size)
-            if is_true:
-                # uncertainty computed with size samples is smaller than desired uncertainty (ensemble too large)
-                res = deepcopy(size)
+    check_inputs([
+        (check_type, arr_model, "arr_model", (list, numpy__ndarray)),
+        (check_type, arr_obs, "arr_obs", (float, int, list)),
+        (check_type, maximum_res, "maximum_res", int),
+        (check_type, uncertainty_theory, "uncertainty_theory", bool)])
+    list_obs = arr_obs if isinstance(arr_obs, list) is True else [arr_obs]
+    # if the uncertainty is computed using the theory, the variance of the sample will be computed. It cannot be
+    # computed if the sample size is smaller than 2
+    low = 1 if uncertainty_theory is True else 0
+    # sample sizes up to the largest accepted ensemble size
+    sample_sizes = list(range(low + 1, min(len(arr_model), maximum_res) + 1))
+    # compare, for each sample size, the uncertainty and its threshold (the difference model-obs)
+    is_smaller = [list() for _ in list_obs]
+    moments = _stat_sample_moments_by_size(arr_model, sample_sizes, uncertainty_combinations, uncertainty_resamples,
+                                           uncertainty_theory, uncertainty_memory_budget, uncertainty_rng)
+    for siz, (sample_mean, sample_variance) in zip(sample_sizes, moments):
+        if uncertainty_theory is True:
+            uncertainty = _stat_uncertainty_from_variance(
+                sample_mean, sample_variance, uncertainty_confidence_interval, uncertainty_distribution, False, siz)
+        else:
+            uncertainty = _stat_uncertainty_from_bootstrap(sample_mean, uncertainty_confidence_interval, False)
+        for k, obs in enumerate(list_obs):
+            if uncertainty_theory is True and siz == len(arr_model):
+                # if sample_size is the size of the ensemble, the sample mean becomes the ensemble mean (i.e., 1 value)
+                # by definition uncertainty threshold becomes the difference between the two values
+                threshold = abs(float(sample_mean[0]) - obs)
             else:
-                # uncertainty computed with size samples is larger than desired uncertainty (ensemble too small)
-                low = deepcopy(size)
-    else:
-        # res cannot be computed
-        res = deepcopy(maximum_res)
-    return res
+                threshold = float(scipy__stats__scoreatpercentile(abs(sample_mean - obs),
+                                                                  100 - uncertainty_confidence_interval))
+            is_smaller[k].append(uncertainty < threshold)
+    res = [_stat_res_from_sizes(sample_sizes, k, maximum_res) if len(sample_sizes) > 0 else maximum_res
+           for k in is_smaller]
+    return res if isinstance(arr_obs, list) is True else res[0]
 
 
 def stat_res_bootstrap(arr_i, res_maximum: int, uncertainty_confidence_interval: float, uncertainty_resamples: int,
-                       uncertainty_threshold: float) -> int:
+                       uncertainty_threshold, uncertainty_memory_budget: float = 256, uncertainty_rng=None):
     """
     Compute the required ensemble size to obtain the given uncertainty of the ensemble mean (using bootstrap)
+    The uncertainty is computed once for all ensemble sizes (see stat_uncertainty_curve) and compared to each threshold
 
     Inputs:
     -------
@@ -439,51 +871,90 @@ def stat_res_bootstrap(arr_i, res_maximum: int, uncertainty_confidence_interval:
         Confidence interval used to compute the uncertainty; e.g., uncertainty_confidence_interval = 95
     :param uncertainty_resamples: int
         Number of samples to generate; e.g., uncertainty_resamples = 1000
-    :param uncertainty_threshold: float
-        Desired uncertainty; e.g., uncertainty = 1
+    :param uncertainty_threshold: float or list
+        Desired uncertainty(ies); e.g., uncertainty = 1
+    :param uncertainty_memory_budget: float, optional
+        Maximum memory (in MB) used by the draws; e.g., uncertainty_memory_budget = 256
+        Default is 256
+    :param uncertainty_rng: numpy.random.Generator or int or None, optional
+        Random number generator, or seed used to create it; e.g., uncertainty_rng = numpy.random.default_rng(0)
+        Default is None (new generator seeded by the operating system)
 
     Output:
     -------
-    :return res: int
-        Required ensemble size to obtain the given uncertainty
+    :return res: int or list
+        Required ensemble size to obtain the given uncertainty (a list if a list of thresholds is given)
     """
     # check input
-    error = list()
-    check_type(arr_i, "arr_i", (list, numpy__ndarray), error)
-    check_type(res_maximum, "maximum_res", int, error)
-    check_interval(uncertainty_threshold, "uncertainty_threshold", (float, int), [0, 1e20], error)
-    print_fail(inspect__stack(), "\n".join(k for k in error))
-    # compute uncertainty using the largest accepted ensemble size
-    low, res = 0, min(len(arr_i), res_maximum)
-    sample_uncertainty = stat_uncertainty_bootstrap(arr_i, uncertainty_confidence_interval, False,
-                                                    uncertainty_resamples, res)
-    if sample_uncertainty < uncertainty_threshold:
-        # the uncertainty computed using the largest accepted ensemble size is smaller than the desired uncertainty,
-        # find the smallest ensemble required.
-        while low + 1 != res:
-            # divide the interval by two
-            size = min(res - 1, math__ceil(res / 2 + low / 2))
-            sample_uncertainty = stat_uncertainty_bootstrap(arr_i, uncertainty_confidence_interval, False,
-                                                            uncertainty_resamples, size)
-            if sample_uncertainty < uncertainty_threshold:
-                # uncertainty computed with size samples is lower than desired uncertainty (ensemble too large)
-                res = deepcopy(size)
-            else:
-                # uncertainty computed with size samples is higher than desired uncertainty (ensemble too small)
-                low = deepcopy(size)
-    else:
-        # res cannot be computed
-        res = deepcopy(res_maximum)
-    return res
+    list_threshold = uncertainty_threshold if isinstance(uncertainty_threshold, list) is True else \
+        [uncertainty_threshold]
+    check_inputs([
+        (check_type, arr_i, "arr_i", (list, numpy__ndarray)),
+        (check_type, res_maximum, "maximum_res", int)] +
+        [(check_interval, k, "uncertainty_threshold", (float, int), [0, 1e20]) for k in list_threshold])
+    # compute uncertainty for all sample sizes up to the largest accepted ensemble size (absolute bootstrap uncertainty,
+    # the distribution and the number of combinations are only used by the theory)
+    sample_sizes = list(range(1, min(len(arr_i), res_maximum) + 1))
+    curve = stat_uncertainty_curve(
+        arr_i, uncertainty_confidence_interval=uncertainty_confidence_interval, uncertainty_distribution="normal",
+        uncertainty_relative=False, uncertainty_combinations=10, uncertainty_resamples=uncertainty_resamples,
+        uncertainty_theory=False, uncertainty_sample_sizes=sample_sizes,
+        uncertainty_memory_budget=uncertainty_memory_budget, uncertainty_rng=uncertainty_rng)
+    res = [_stat_res_from_sizes(sample_sizes, [k < thr for k in curve], res_maximum) for thr in list_threshold]
+    return res if isinstance(uncertainty_threshold, list) is True else res[0]
+
+
+def _stat_res_from_variance(variance, maximum_res: int, uncertainty_confidence_interval: float, list_threshold: list,
+                            uncertainty_distribution: str):
+    """
+    Compute the required ensemble size from the variance of the ensemble(s) for all thresholds at once
+    For the normal distribution, the smallest n with z * sigma / sqrt(n) <= threshold is given by a closed form; for the
+    student distribution, the quantile depends on n, so t_{n-1} / sqrt(n) (decreasing with n) is tabulated for
+    n = 2, ..., maximum_res and the smallest n is found by a binary search of sigma / threshold in the table
 
+    Inputs:
+    -------
+    :param variance: float or ndarray
+        Variance of the ensemble(s); e.g., one value per leave-out variant
+    :param maximum_res: int
+        Maximum value for the required ensemble size; e.g., maximum_res = 100
+    :param uncertainty_confidence_interval: float
+        Confidence level used to compute the z-score; e.g., uncertainty_confidence_interval = 95
+    :param list_threshold: list
+        Desired uncertainties; e.g., list_threshold = [0.5, 1]
+    :param uncertainty_distribution: str
+        Name of a distribution; e.g., distribution = 'normal'
+        Two distributions are defined: 'normal', 'student'
 
-def stat_res_theory(arr_i, maximum_res: int, uncertainty_confidence_interval: float,
-                    uncertainty_threshold: float) -> int:
+    Output:
+    -------
+    :return res: ndarray
+        Required ensemble size, of shape numpy.shape(variance) + (len(list_threshold),)
+    """
+    # threshold divided by the standard deviation (infinite if all members are equal)
+    with numpy__errstate(divide="ignore"):
+        ratio = numpy__array(list_threshold, dtype=float) / numpy__sqrt(numpy__array(variance, dtype=float))[..., None]
+    if uncertainty_distribution == "normal":
+        # number of standard deviations needed to obtain given significance_level (the sample size is set to 1 as it
+        # is not used for a normal distribution)
+        zscore = stat_zscore(1, uncertainty_confidence_interval, "normal")
+        with numpy__errstate(divide="ignore"):
+            res = numpy__ceil(zscore**2 / ratio**2)
+        return numpy__minimum(res, maximum_res).astype(int)
+    # uncertainty of the ensemble mean divided by the standard deviation, for each ensemble size
+    list_size = numpy__arange(2, maximum_res + 1)
+    table = stat_zscore(list_size, uncertainty_confidence_interval, "student") / numpy__sqrt(list_size)
+    # first ensemble size for which the uncertainty is smaller than the threshold (the table is decreasing)
+    idx = numpy__searchsorted(-table, -ratio, side="left")
+    return numpy__where(idx < len(table), idx + 2, maximum_res)
+
+
+def stat_res_theory(arr_i, maximum_res: int, uncertainty_confidence_interval: float, uncertainty_threshold,
+                    uncertainty_distribution: str = "normal"):
     """
     Compute the required ensemble size to obtain the given uncertainty of the ensemble mean (using the standard error of
     the mean).
-    YYP: Distributions are assumed to be normal. The student distribution should be used for the uncertainty of the
-    ensemble mean, but it depends on n (sample size) and that's what we are looking for
+    The variance and the z-score (or the table of student quantiles) are computed once for all thresholds
 
     Inputs:
     -------
@@ -492,39 +963,235 @@ def stat_res_theory(arr_i, maximum_res: int, uncertainty_confidence_interval: fl
         Maximum value for the required ensemble size; e.g., maximum_res = 100
     :param uncertainty_confidence_interval: float
         Confidence level used to compute the z-score; e.g., uncertainty_confidence_interval = 95
-    :param uncertainty_threshold: float
-        Desired uncertainty; e.g., uncertainty_threshold = 1
+    :param uncertainty_threshold: float or list
+        Desired uncertainty(ies); e.g., uncertainty_threshold = 1
+    :param uncertainty_distribution: str, optional
+        Name of a distribution; e.g., distribution = 'normal'
+        Two distributions are defined: 'normal', 'student' (the quantile depends on the required ensemble size, which
+        is at least 2)
+        Default is 'normal'
 
     Output:
     -------
-    :return res: int
-        Required ensemble size to obtain the given uncertainty
+    :return res: int or list
+        Required ensemble size to obtain the given uncertainty (a list if a list of thresholds is given); None if the
+        variance is not defined (fewer than two members)
     """
     # check input
-    error = list()
-    check_type(arr_i, "arr_i", (list, numpy__ndarray), error)
-    check_type(maximum_res, "maximum_res", int, error)
-    check_interval(uncertainty_threshold, "uncertainty", (float, int), [0, 1e20], error)
-    print_fail(inspect__stack(), "\n".join(k for k in error))
-    # number of standard deviations needed to obtain given significance_level (the sample size is set to 1 as it is not
-    # used for a normal distribution)
-    zscore = stat_zscore(1, uncertainty_confidence_interval, "normal")
+    list_threshold = uncertainty_threshold if isinstance(uncertainty_threshold, list) is True else \
+        [uncertainty_threshold]
+    check_inputs([
+        (check_type, arr_i, "arr_i", (list, numpy__ndarray)),
+        (check_type, maximum_res, "maximum_res", int),
+        (check_list, uncertainty_distribution, "uncertainty_distribution", ["normal", "student"])] +
+        [(check_interval, k, "uncertainty", (float, int), [0, 1e20]) for k in list_threshold])
     # compute ensemble variance using combination of sample_size values from arr_i
     variance = stat_compute_statistic(arr_i, "var")
-    # required ensemble size
-    res = math__ceil(zscore**2 * variance / uncertainty_threshold**2)
-    if res > maximum_res:
-        res = deepcopy(maximum_res)
-    return res
+    if variance is None:
+        res = [None] * len(list_threshold)
+        return res if isinstance(uncertainty_threshold, list) is True else res[0]
+    # required ensemble size for all thresholds at once
+    res = [int(k) for k in _stat_res_from_variance(variance, maximum_res, uncertainty_confidence_interval,
+                                                   list_threshold, uncertainty_distribution)]
+    return res if isinstance(uncertainty_threshold, list) is True else res[0]
+
+
+def stat_res_theory_leave_out(arr_i, maximum_res: int, uncertainty_confidence_interval: float,
+                              uncertainty_threshold: float, excluded: list = None,
+                              uncertainty_distribution: str = "normal") -> numpy__ndarray:
+    """
+    Compute the required ensemble size (see stat_res_theory) of the ensemble without some of its members, for several
+    variants, in O(N) (see stat_leave_out_moments)
+
+    Inputs:
+    -------
+    :param arr_i: array_like
+    :param maximum_res: int
+        Maximum value for the required ensemble size; e.g., maximum_res = 100
+    :param uncertainty_confidence_interval: float
+        Confidence level used to compute the z-score; e.g., uncertainty_confidence_interval = 95
+    :param uncertainty_threshold: float
+        Desired uncertainty; e.g., uncertainty_threshold = 1
+    :param excluded: list, optional
+        For each variant, list of the (distinct) indices of the members left out; e.g., excluded = [[], [0], [3, 7]]
+        Default is None (leave-one-out: one variant per member, without this member)
+    :param uncertainty_distribution: str, optional
+        Name of a distribution; e.g., distribution = 'normal'
+        Two distributions are defined: 'normal', 'student'
+        Default is 'normal'
+
+    Output:
+    -------
+    :return res: ndarray
+        Required ensemble size of each variant
+    """
+    # check input
+    check_inputs([
+        (check_type, maximum_res, "maximum_res", int),
+        (check_interval, uncertainty_threshold, "uncertainty", (float, int), [0, 1e20]),
+        (check_list, uncertainty_distribution, "uncertainty_distribution", ["normal", "student"])])
+    # ensemble variance of each variant
+    _, variance, _ = stat_leave_out_moments(arr_i, excluded=excluded)
+    # required ensemble size (all variants at once)
+    return _stat_res_from_variance(variance, maximum_res, uncertainty_confidence_interval, [uncertainty_threshold],
+                                   uncertainty_distribution)[:, 0]
+
+
+def stat_resample_moments(arr_i, sample_sizes: list, nbr_draws: int, replace: bool, memory_budget: float = 256,
+                          rng=None, drawn: dict = None):
+    """
+    Compute the mean and the variance of random samples of every given size using a single random draw
+    Each draw selects max(sample_sizes) values (with replacement for a bootstrap, without replacement for combinations);
+    the sample of size n is made of the first n selected values, so cumulative sums give all sizes at once
+    If a 2-D array (series x members) is given, the same draws are used for all series (e.g., all diagnostics and
+    epochs of an ensemble): the number of times each member is selected in the first n values is counted, and the sums
+    of all series are computed with a single matrix product of these counts with the values (if there are fewer series
+    than members, the selected values of each series are summed directly)
+
+    Inputs:
+    -------
+    :param arr_i: array_like
+        Values of the members, or 2-D array of shape (series, members)
+    :param sample_sizes: list
+        Number of values in each sample; e.g., sample_sizes = [10, 20]
+    :param nbr_draws: int
+        Number of samples to generate for each size; e.g., nbr_draws = 1000
+    :param replace: bool
+        True to select values with replacement (bootstrap), else values are selected without replacement;
+        e.g., replace = True
+    :param memory_budget: float, optional
+        Maximum memory (in MB) used by each block of draws; e.g., memory_budget = 256
+        Default is 256
+    :param rng: numpy.random.Generator or int or None, optional
+        Random number generator, or seed used to create it; e.g., rng = numpy.random.default_rng(0)
+        Default is None (new generator seeded by the operating system)
+    :param drawn: dict, optional
+        Combinations already drawn for each sample size (bitmasks, see _stat_combination_keys), updated in place; if
+        given and replace is False, each combination is drawn at most once per sample size, also across the calls
+        sharing this dictionary: repeated combinations are replaced by new random combinations; e.g., drawn = {}
+        Default is None (the same combination may be drawn several times)
+
+    Outputs:
+    --------
+    :return sample_mean: ndarray
+        Array of shape (nbr_draws, len(sample_sizes)) containing the mean of each sample, or
+        (nbr_draws, len(sample_sizes), series) if arr_i is 2-D
+    :return sample_variance: ndarray
+        Array of shape (nbr_draws, len(sample_sizes)) containing the variance of each sample, or
+        (nbr_draws, len(sample_sizes), series) if arr_i is 2-D
+    """
+    # check input
+    check_inputs([
+        (check_type, arr_i, "arr_i", (list, numpy__ndarray)),
+        (check_type, sample_sizes, "sample_sizes", list),
+        (check_interval, nbr_draws, "nbr_draws", int, [1, 1e10]),
+        (check_type, replace, "replace", bool),
+        (check_interval, memory_budget, "memory_budget", (float, int), [1e-3, 1e10]),
+        (check_type, drawn, "drawn", (dict, type(None)))] +
+        [(check_interval, k, "sample_size", int, [1, numpy__shape(arr_i)[-1]]) for k in sample_sizes
+         if isinstance(arr_i, (list, numpy__ndarray)) is True] +
+        ["drawn: not enough combinations of " + str(k) + " members left to draw " + str(nbr_draws) + " unique ones"
+         for k in sample_sizes if isinstance(drawn, dict) is True and replace is False and
+         isinstance(arr_i, (list, numpy__ndarray)) is True and isinstance(k, int) is True and
+         math__comb(numpy__shape(arr_i)[-1], k) < len(drawn.get(k, [])) + nbr_draws], hot_path=True)
+    # center values to avoid losing precision when computing the variance from sums
+    arr_i = numpy__array(arr_i, dtype=float)
+    center = arr_i.mean(axis=-1, keepdims=True)
+    arr_i = arr_i - center
+    nbr_members = arr_i.shape[-1]
+    rng = numpy__random__default_rng(rng)
+    # positions of the sample sizes in the cumulative sums
+    position = numpy__array(sample_sizes) - 1
+    size_max = int(position.max()) + 1
+    # few series: select the values of each series rather than counting the selected members
+    gather = arr_i.ndim == 1 or len(arr_i) < nbr_members
+    if gather is True:
+        # number of draws per block (index, and value and two cumulative sums per selected value and series)
+        nbr_series = 1 if arr_i.ndim == 1 else len(arr_i)
+        block_size = int(memory_budget * 2**20 / (8 * size_max * (1 + 3 * nbr_series) + 8 * nbr_members))
+        block_size = max(1, min(nbr_draws, block_size))
+    else:
+        # number of draws per block (index and counts per selected value, counts per sample size and member, sums and
+        # sums of squares per sample size and series)
+        block_size = int(memory_budget * 2**20 / (
+            8 * size_max * (1 + nbr_members) + 8 * len(position) * (nbr_members + 2 * len(arr_i))))
+        block_size = max(1, min(nbr_draws, block_size))
+        # values and squared values of each member (members x series)
+        values = numpy__ascontiguousarray(arr_i.T)
+        squared = values**2
+    sample_mean = numpy__empty((nbr_draws,) + position.shape + arr_i.shape[:-1])
+    sample_variance = numpy__empty(sample_mean.shape)
+    # combinations of each sample size (bitmasks), to find the repeated ones
+    unique = drawn is not None and replace is False
+    dict_keys = dict((k, list()) for k in sample_sizes)
+    for k in range(0, nbr_draws, block_size):
+        block = min(block_size, nbr_draws - k)
+        if replace is True:
+            idx = rng.integers(0, nbr_members, (block, size_max))
+        else:
+            # random permutations: any prefix is a random combination
+            idx = numpy__argsort(rng.random((block, nbr_members)), axis=1)[:, :size_max]
+            if unique is True:
+                for siz in dict_keys.keys():
+                    dict_keys[siz].append(_stat_combination_keys(idx[:, :siz], nbr_members))
+        if gather is True:
+            # selected values (draws x size x series, or draws x size if arr_i is 1-D)
+            sample = numpy__moveaxis(arr_i[..., idx], 0, -1) if arr_i.ndim == 2 else arr_i[idx]
+            sums = numpy__cumsum(sample, axis=1)[:, position]
+            squares = numpy__cumsum(sample**2, axis=1)[:, position]
+            size = (position + 1).reshape((-1,) + (1,) * (arr_i.ndim - 1))
+        else:
+            # number of times each member is selected in the first n values (indicator matrix)
+            counts = numpy__zeros((block, size_max, nbr_members))
+            numpy__put_along_axis(counts, idx[:, :, None], 1., axis=2)
+            counts = numpy__cumsum(counts, axis=1)[:, position]
+            # sums and sums of squares of all series
+            sums = numpy__matmul(counts, values)
+            squares = numpy__matmul(counts, squared)
+            size = (position + 1)[:, None]
+        sample_mean[k: k + block] = sums / size
+        sample_variance[k: k + block] = squares / size - sample_mean[k: k + block]**2
+    if unique is True:
+        for i, siz in enumerate(sample_sizes):
+            if siz in sample_sizes[:i]:
+                # same sample size given twice
+                j = sample_sizes.index(siz)
+                sample_mean[:, i], sample_variance[:, i] = sample_mean[:, j], sample_variance[:, j]
+                continue
+            # keep the first occurrence of each combination that was not drawn before
+            keys = numpy__concatenate(dict_keys[siz])
+            selected = drawn.get(siz, numpy__empty(0, dtype=keys.dtype))
+            _, first = numpy__unique(numpy__concatenate((selected, keys)), return_index=True)
+            new = numpy__zeros(nbr_draws, dtype=bool)
+            new[first[first >= len(selected)] - len(selected)] = True
+            selected = numpy__concatenate((selected, keys[new]))
+            repeated = numpy__where(~new)[0]
+            while len(repeated) > 0:
+                # replace repeated combinations by new random combinations (see stat_combination_indices)
+                idx = numpy__argpartition(rng.random((len(repeated), nbr_members)), siz - 1, axis=1)[:, :siz]
+                keys = _stat_combination_keys(idx, nbr_members)
+                _, first = numpy__unique(numpy__concatenate((selected, keys)), return_index=True)
+                first = numpy__sort(first[first >= len(selected)]) - len(selected)
+                selected = numpy__concatenate((selected, keys[first]))
+                sample = arr_i[..., idx[first]]
+                sample_mean[repeated[:len(first)], i] = numpy__moveaxis(sample.mean(axis=-1), 0, -1)
+                sample_variance[repeated[:len(first)], i] = numpy__moveaxis(sample.var(axis=-1), 0, -1)
+                repeated = repeated[len(first):]
+            drawn[siz] = selected
+    return sample_mean + center[..., 0], numpy__maximum(sample_variance, 0)
 
 
 def stat_smooth_triangle(arr_i, window: int):
     """
     Smooth given array using a triangle-weighted running average
+    The weights of the triangle centered on each point are 1, 2, ..., degree + 1, ..., 2, 1 (degree = window // 2);
+    near the edges, the triangle is narrowed so that it fits in the array (the first and last points are unchanged)
+    The core of the array is smoothed using a convolution, the points near the edges using a small weight matrix
     
     Inputs:
     -------
     :param arr_i: array_like
+        One time series or a 2-D array of time series (e.g., members x time), smoothed along the last axis
     :param window: int
         Number of points used to compute the running average
     
@@ -534,54 +1201,51 @@ def stat_smooth_triangle(arr_i, window: int):
         Smoothed array
     """
     # check input
-    error = list()
-    check_type(arr_i, "arr_i1", (list, numpy__ndarray), error)
-    check_integer_even_or_odd(window, "window", "odd", error)
-    print_fail(inspect__stack(), "\n".join(k for k in error))
+    check_inputs([
+        (check_type, arr_i, "arr_i1", (list, numpy__ndarray)),
+        (check_integer_even_or_odd, window, "window", "odd")], hot_path=True)
+    arr_t = numpy__array(arr_i, dtype=float)
+    length = arr_t.shape[-1]
     # degree
     degree = window // 2
-    #
-    # -- Smooth the first degree points of the array
-    #
-    arr_o = [arr_i[0]]
-    for k in range(1, degree):
-        # create the weight array (triangle)
-        weight = [float(1 + k - abs(k - i)) for i in range(0, (2 * k) + 1)]
-        # total weight
-        weight_sum = sum(weight)
-        # smooth
-        arr_o.append(sum([i * j for i, j in zip(arr_i[: len(weight)], weight)]) / weight_sum)
+    # half width of the triangle centered on each point (narrowed near the edges)
+    position = numpy__arange(length)
+    half = numpy__minimum(numpy__minimum(position, position[::-1]), degree)
+    core = half == degree
+    arr_o = numpy__empty(arr_t.shape)
     #
     # -- Smooth the core of the array
     #
-    # create the weight array (triangle)
-    weight = [float(1 + degree - abs(degree - k)) for k in range(0, (2 * degree) + 1)]
-    # total weight
-    weight_sum = sum(weight)
-    # smooth
-    for k in range(degree, len(arr_i) - degree):
-        arr_o.append(sum([i * j for i, j in zip(arr_i[k - degree: k + degree + 1], weight)]) / weight_sum)
+    if core.any():
+        # create the weight array (triangle)
+        weight = degree + 1. - abs(numpy__arange(-degree, degree + 1))
+        arr_o[..., core] = scipy__ndimage__correlate1d(arr_t, weight, axis=-1, mode="constant")[..., core]
     #
-    # -- Smooth the last degree points of the array
+    # -- Smooth the first and last degree points of the array
     #
-    for k in range(degree - 1, 0, -1):
-        # create the weight array (triangle)
-        weight = [float(1 + k - abs(k - i)) for i in range(0, (2 * k) + 1)]
-        # total weight
-        weight_sum = sum(weight)
-        # smooth
-        arr_o.append(sum([i * j for i, j in zip(arr_i[-len(weight):], weight)]) / weight_sum)
-    arr_o += [arr_i[-1]]
-    # convert to ndarray if the input was ndarray
-    if isinstance(arr_i, numpy__ndarray):
-        arr_o = numpy__array(arr_o)
+    # the triangles of the first (last) points only use the first (last) 2 * degree - 1 values
+    nbr_columns = min(2 * degree - 1, length)
+    list_edges = [((~core) & (2 * position < length), 0), ((~core) & (2 * position >= length), length - nbr_columns)]
+    for edge, first in list_edges:
+        if edge.any():
+            # create the weight matrix (one triangle per point)
+            column = first + numpy__arange(nbr_columns)
+            weight = numpy__maximum(half[edge, None] + 1. - abs(column[None, :] - position[edge, None]), 0)
+            arr_o[..., edge] = numpy__matmul(arr_t[..., first: first + nbr_columns], weight.T)
+    # divide by the total weight
+    arr_o /= (half + 1.)**2
+    # convert to list if the input was list
+    if isinstance(arr_i, numpy__ndarray) is False:
+        arr_o = arr_o.tolist()
     return arr_o
 
 
 def stat_uncertainties_smaller_than_difference(arr_model, arr_obs, uncertainty_confidence_interval: float,
                                                uncertainty_distribution: str, uncertainty_combinations: int,
                                                uncertainty_resamples: int, uncertainty_theory: bool,
-                                               uncertainty_sample_size: int) -> bool:
+                                               uncertainty_sample_size: int,
+                                               uncertainty_memory_budget: float = 256,
+                                               uncertainty_rng=None, uncertainty_balanced: bool = False) -> bool:
     """
     Compute the uncertainty of the ensemble mean using given sample size, as well as the threshold for this uncertainty
     This is the case where the uncertainty of the ensemble mean need to be smaller than the difference model-obs
@@ -608,6 +1272,17 @@ def stat_uncertainties_smaller_than_difference(arr_model, arr_obs, uncertainty_c
         e.g., uncertainty_theoretical = True
     :param uncertainty_sample_size: int
         Number of values in each sample; e.g., uncertainty_sample_size = 10
+    :param uncertainty_memory_budget: float, optional
+        Maximum memory (in MB) used by each block of bootstrap resamples; e.g., uncertainty_memory_budget = 256
+        Default is 256
+    :param uncertainty_rng: numpy.random.Generator or int or None, optional
+        Random number generator, or seed used to create it; e.g., uncertainty_rng = numpy.random.default_rng(0)
+        Default is None (new generator seeded by the operating system)
+    :param uncertainty_balanced: bool, optional
+        True to select balanced combinations (see stat_combination_indices), the average across combinations converges
+        faster; e.g., uncertainty_balanced = True
+        Used only if uncertainty_theory is True
+        Default is False
     
     Output:
     -------
@@ -615,16 +1290,18 @@ def stat_uncertainties_smaller_than_difference(arr_model, arr_obs, uncertainty_c
         True if the uncertainty of the ensemble mean is smaller than the difference model-obs
     """
     # check input
-    error = list()
-    check_type(arr_model, "arr_model", (list, numpy__ndarray), error)
-    check_type(arr_obs, "arr_obs", (float, int), error)
-    check_type(uncertainty_theory, "uncertainty_theory", bool, error)
-    print_fail(inspect__stack(), "\n".join(k for k in error))
+    check_inputs([
+        (check_type, arr_model, "arr_model", (list, numpy__ndarray)),
+        (check_type, arr_obs, "arr_obs", (float, int)),
+        (check_type, uncertainty_theory, "uncertainty_theory", bool)])
+    # a single generator is used by all draws
+    uncertainty_rng = numpy__random__default_rng(uncertainty_rng)
     # compute uncertainty and threshold of said uncertainty (desired maximum value)
     if uncertainty_theory is True:
         if uncertainty_sample_size < len(arr_model):
             # compute ensemble mean using sample_size
-            sample_mean = stat_combination_random(arr_model, "mea", uncertainty_combinations, uncertainty_sample_size)
+            sample_mean = stat_combination_random(arr_model, "mea", uncertainty_combinations, uncertainty_sample_size,
+                                                  rng=uncertainty_rng, balanced=uncertainty_balanced)
             # uncertainty threshold
             threshold = float(scipy__stats__scoreatpercentile(abs(sample_mean - arr_obs),
                                                               100 - uncertainty_confidence_interval))
@@ -634,10 +1311,11 @@ def stat_uncertainties_smaller_than_difference(arr_model, arr_obs, uncertainty_c
             threshold = abs(stat_compute_statistic(arr_model, "mea") - arr_obs)
         uncertainty = stat_uncertainty_theory(
             arr_model, uncertainty_confidence_interval, False, uncertainty_combinations, uncertainty_sample_size,
-            uncertainty_distribution)
+            uncertainty_distribution, uncertainty_rng=uncertainty_rng, uncertainty_balanced=uncertainty_balanced)
     else:
         # compute ensemble mean using 'res' sample size
-        sample_mean = stat_bootstrap(arr_model, "mea", uncertainty_resamples, uncertainty_sample_size)
+        sample_mean = stat_bootstrap(arr_model, "mea", uncertainty_resamples, uncertainty_sample_size,
+                                     memory_budget=uncertainty_memory_budget, rng=uncertainty_rng)
         # uncertainty threshold
         threshold = float(scipy__stats__scoreatpercentile(abs(sample_mean - arr_obs),
                                                           100 - uncertainty_confidence_interval))
@@ -648,8 +1326,87 @@ def stat_uncertainties_smaller_than_difference(arr_model, arr_obs, uncertainty_c
     return uncertainty < threshold
 
 
+def stat_uncertainty_batch(arr_i, uncertainty_confidence_interval: float, uncertainty_distribution: str,
+                           uncertainty_relative: bool, uncertainty_combinations: int, uncertainty_resamples: int,
+                           uncertainty_theory: bool, uncertainty_sample_size: int,
+                           uncertainty_memory_budget: float = 256, uncertainty_rng=None,
+                           uncertainty_exact_bootstrap: bool = False):
+    """
+    Compute the uncertainty of the sample mean of each row of a 2-D array (e.g., many reduced ensembles), either using
+    the theory or a bootstrap
+    Rows are processed in chunks that share the same draws (see stat_uncertainty_curve), as many rows as
+    uncertainty_memory_budget allows per chunk
+
+    Inputs:
+    -------
+    :param arr_i: array_like
+        2-D array of shape (samples, members)
+    :param uncertainty_confidence_interval: float
+        Confidence interval used to compute the uncertainty; e.g., uncertainty_confidence_interval = 95
+    :param uncertainty_distribution: str
+        Name of a distribution; e.g., distribution = 'normal'
+        Two distributions are defined: 'normal', 'student'
+        Used only if uncertainty_theory is True
+    :param uncertainty_relative: bool
+        True to compute the uncertainty relative to the sample mean, else the absolute uncertainty is computed;
+        e.g., uncertainty_relative = True
+    :param uncertainty_combinations: int
+        Maximum number of combinations to used to compute the uncertainty if uncertainty_sample_size < members;
+        e.g., uncertainty_combinations = 1000
+    :param uncertainty_resamples: int
+        Number of resamples to compute (boostrap uncertainty); e.g., uncertainty_resamples = 1000
+    :param uncertainty_theory: bool
+        True to compute the theoretical uncertainty (using the standard error; e.g., Chapter 5 p. 92 of von Storch and
+        Zwiers (1999; https://doi.org/10.1017/CBO9780511612336), else compute the uncertainty using a boostrap;
+        e.g., uncertainty_theory = True
+    :param uncertainty_sample_size: int
+        Number of values in each sample; e.g., uncertainty_sample_size = 10
+    :param uncertainty_memory_budget: float, optional
+        Maximum memory (in MB) used by the draws of each chunk of rows; e.g., uncertainty_memory_budget = 256
+        Default is 256
+    :param uncertainty_rng: numpy.random.Generator or int or None, optional
+        Random number generator, or seed used to create it; e.g., uncertainty_rng = numpy.random.default_rng(0)
+        Default is None (new generator seeded by the operating system)
+    :param uncertainty_exact_bootstrap: bool, optional
+        True to compute the bootstrap distribution of the sample mean without resampling (see
+        stat_uncertainty_bootstrap_exact), else uncertainty_resamples resamples are drawn; e.g.,
+        uncertainty_exact_bootstrap = True
+        Used only if uncertainty_theory is False
+        Default is False
+
+    Output:
+    -------
+    :return uncertainty: ndarray
+        Uncertainty of the sample mean of each row
+    """
+    # check input
+    check_inputs([
+        (check_type, arr_i, "arr_i", (list, numpy__ndarray)),
+        "'arr_i' shape error\n" + str().ljust(5) + "'arr_i' should be a 2-D array (samples x members)"
+        if isinstance(arr_i, (list, numpy__ndarray)) is True and numpy__ndim(arr_i) != 2 else None,
+        (check_interval, uncertainty_memory_budget, "uncertainty_memory_budget", (float, int), [1e-3, 1e10])])
+    arr_i = numpy__array(arr_i, dtype=float)
+    # a single generator is used by all chunks
+    uncertainty_rng = numpy__random__default_rng(uncertainty_rng)
+    # number of samples drawn for each row (the mean and the variance of each sample are stored)
+    nbr_draws = uncertainty_resamples
+    if uncertainty_theory is True:
+        nbr_draws = 1 if uncertainty_sample_size == arr_i.shape[1] else uncertainty_combinations
+    chunk_size = max(1, int(uncertainty_memory_budget * 2**20 / (16 * nbr_draws)))
+    uncertainty = numpy__empty(len(arr_i))
+    for k in range(0, len(arr_i), chunk_size):
+        uncertainty[k: k + chunk_size] = stat_uncertainty_curve(
+            arr_i[k: k + chunk_size], uncertainty_confidence_interval, uncertainty_distribution, uncertainty_relative,
+            uncertainty_combinations, uncertainty_resamples, uncertainty_theory, [uncertainty_sample_size],
+            uncertainty_memory_budget=uncertainty_memory_budget, uncertainty_rng=uncertainty_rng,
+            uncertainty_exact_bootstrap=uncertainty_exact_bootstrap)[0]
+    return uncertainty
+
+
 def stat_uncertainty_bootstrap(arr_i, uncertainty_confidence_interval: float, uncertainty_relative: bool,
-                               uncertainty_resamples: int, uncertainty_sample_size: int) -> float:
+                               uncertainty_resamples: int, uncertainty_sample_size: int,
+                               uncertainty_memory_budget: float = 256, uncertainty_rng=None,
+                               uncertainty_exact_bootstrap: bool = False) -> float:
     """
     Compute the uncertainty of the sample mean (using a boostrap)
 
@@ -665,6 +1422,17 @@ def stat_uncertainty_bootstrap(arr_i, uncertainty_confidence_interval: float, un
         Number of resamples to compute (boostrap uncertainty); e.g., uncertainty_resamples = 1000
     :param uncertainty_sample_size: int
         Number of values in each sample; e.g., uncertainty_sample_size = 10
+    :param uncertainty_memory_budget: float, optional
+        Maximum memory (in MB) used by each block of bootstrap resamples; e.g., uncertainty_memory_budget = 256
+        Default is 256
+    :param uncertainty_rng: numpy.random.Generator or int or None, optional
+        Random number generator, or seed used to create it; e.g., uncertainty_rng = numpy.random.default_rng(0)
+        Default is None (new generator seeded by the operating system)
+    :param uncertainty_exact_bootstrap: bool, optional
+        True to compute the bootstrap distribution of the sample mean without resampling (see
+        stat_uncertainty_bootstrap_exact), else uncertainty_resamples resamples are drawn; e.g.,
+        uncertainty_exact_bootstrap = True
+        Default is False
 
     Output:
     -------
@@ -672,13 +1440,18 @@ def stat_uncertainty_bootstrap(arr_i, uncertainty_confidence_interval: float, un
         Uncertainty of the sample mean computed using a boostrap
     """
     # check input
-    error = list()
-    check_type(arr_i, "arr_i", (list, numpy__ndarray), error)
-    check_interval(uncertainty_confidence_interval, "uncertainty_confidence_interval", (float, int), [0, 100], error)
-    check_type(uncertainty_relative, "uncertainty_relative", bool, error)
-    print_fail(inspect__stack(), "\n".join(k for k in error))
+    check_inputs([
+        (check_type, arr_i, "arr_i", (list, numpy__ndarray)),
+        (check_interval, uncertainty_confidence_interval, "uncertainty_confidence_interval", (float, int), [0, 100]),
+        (check_type, uncertainty_relative, "uncertainty_relative", bool),
+        (check_type, uncertainty_exact_bootstrap, "uncertainty_exact_bootstrap", bool)])
+    if uncertainty_exact_bootstrap is True:
+        # bootstrap distribution of the sample mean computed without resampling
+        return stat_uncertainty_bootstrap_exact(arr_i, uncertainty_confidence_interval, uncertainty_relative,
+                                                uncertainty_sample_size)
     # compute uncertainty using bootstrap
-    bootstrap = stat_bootstrap(arr_i, "mea", uncertainty_resamples, uncertainty_sample_size)
+    bootstrap = stat_bootstrap(arr_i, "mea", uncertainty_resamples, uncertainty_sample_size,
+                               memory_budget=uncertainty_memory_budget, rng=uncertainty_rng)
     # mean
     mean = float(stat_mean(bootstrap))
     # half confidence interval on the statistic
@@ -688,10 +1461,546 @@ def stat_uncertainty_bootstrap(arr_i, uncertainty_confidence_interval: float, un
     return uncertainty
 
 
+def _stat_bootstrap_mean_distribution(arr_i, sample_size: int, bins: int, center: float, linear: bool = True):
+    """
+    Compute the distribution of the distance between the bootstrapped sample mean and the given center
+    The values are binned on a regular grid of bins points between their minimum and maximum; the distribution of the
+    sum of sample_size values drawn with replacement is the sample_size-fold convolution of the binned distribution,
+    computed with a fast Fourier transform (zero padding avoids the circular convolution)
+
+    Inputs:
+    -------
+    :param arr_i: ndarray
+        Values of the members (not all equal)
+    :param sample_size: int
+        Number of values in each sample; e.g., sample_size = 10
+    :param bins: int
+        Number of points of the grid on which the values are binned; e.g., bins = 2048
+    :param center: float
+        Value from which the distance is computed; e.g., center = 0.
+    :param linear: bool, optional
+        True to split each value between its two neighbouring grid points (the mean is preserved), else each value is
+        moved to the nearest grid point; e.g., linear = True
+        Default is True
+
+    Outputs:
+    --------
+    :return distance: ndarray
+        Possible distances between the sample mean and center, in increasing order
+    :return within: ndarray
+        Probability that the distance is smaller than or equal to each distance
+    :return binned: ndarray
+        Values moved to the nearest grid point (arr_i if linear is True)
+    """
+    minimum, maximum = float(arr_i.min()), float(arr_i.max())
+    step = (maximum - minimum) / (bins - 1)
+    position = (arr_i - minimum) / step
+    if linear is True:
+        # the weights are split between the two neighbouring grid points
+        idx = numpy__minimum(numpy__floor(position).astype(int), bins - 2)
+        weight = position - idx
+        probability = numpy__bincount(idx, weights=1 - weight, minlength=bins)
+        probability += numpy__bincount(idx + 1, weights=weight, minlength=bins)
+        binned = arr_i
+    else:
+        idx = numpy__rint(position).astype(int)
+        probability = numpy__bincount(idx, minlength=bins).astype(float)
+        binned = minimum + idx * step
+    probability /= len(arr_i)
+    # distribution of the sum of sample_size values
+    length = sample_size * (bins - 1) + 1
+    fft_length = scipy__fft__next_fast_len(length, real=True)
+    probability = scipy__fft__irfft(scipy__fft__rfft(probability, fft_length)**sample_size, fft_length)
+    probability = numpy__maximum(probability[:length], 0)
+    # distance between each possible sample mean and center (the distances on each side of center are two sorted runs)
+    distance = abs(minimum + numpy__arange(length) * step / sample_size - center)
+    order = numpy__argsort(distance, kind="stable")
+    within = numpy__cumsum(probability[order])
+    return distance[order], within / within[-1], binned
+
+
+def _stat_bootstrap_mean_powers(arr_i, sample_size: int):
+    """
+    Compute the expected powers (1 to 4) of the bootstrapped sample mean, centered on the mean of arr_i
+    E.g., the second power is the variance of the bootstrapped sample mean, i.e., the squared standard error
+
+    Inputs:
+    -------
+    :param arr_i: ndarray
+        Values of the members, centered on their mean
+    :param sample_size: int
+        Number of values in each sample; e.g., sample_size = 10
+
+    Output:
+    -------
+    :return: ndarray
+        Expected first, second, third and fourth powers of the bootstrapped sample mean
+    """
+    # central moments of the members
+    m2, m3, m4 = [float((arr_i**k).mean()) for k in (2, 3, 4)]
+    return numpy__array([0., m2 / sample_size, m3 / sample_size**2,
+                         (m4 + 3 * (sample_size - 1) * m2**2) / sample_size**3])
+
+
+def stat_uncertainty_bootstrap_control(arr_i, uncertainty_confidence_interval: float, uncertainty_relative: bool,
+                                       uncertainty_resamples: int, uncertainty_sample_size: int,
+                                       uncertainty_bins: int = 256, uncertainty_memory_budget: float = 256,
+                                       uncertainty_rng=None) -> (float, float):
+    """
+    Compute the uncertainty of the sample mean (using a boostrap with control variates)
+    Two kinds of control variates, whose expected values are known, are computed from the resamples:
+    - the powers (1 to 4) of the bootstrapped sample means centered on the mean (the expected second power is the
+      squared standard error used by the theory, see stat_uncertainty_theory)
+    - whether the sample means of the same resamples, taken from the values moved to the nearest point of a coarse grid
+      of uncertainty_bins points, are within the uncertainty (the distribution of these sample means is computed
+      without resampling, see stat_uncertainty_bootstrap_exact)
+    The proportion of resamples within the uncertainty is corrected by regression on the difference between the
+    average and the expected value of the control variates, and the uncertainty is corrected accordingly
+
+    Inputs:
+    -------
+    :param arr_i: array_like
+    :param uncertainty_confidence_interval: float
+        Confidence interval used to compute the uncertainty; e.g., uncertainty_confidence_interval = 95
+    :param uncertainty_relative: bool
+        True to compute the uncertainty relative to the sample mean, else the absolute uncertainty is computed;
+        e.g., uncertainty_relative = True
+    :param uncertainty_resamples: int
+        Number of resamples to compute (boostrap uncertainty); e.g., uncertainty_resamples = 100000
+    :param uncertainty_sample_size: int
+        Number of values in each sample; e.g., uncertainty_sample_size = 10
+    :param uncertainty_bins: int, optional
+        Number of points of the grid on which the values are moved for the second control variate; e.g.,
+        uncertainty_bins = 256
+        Default is 256
+    :param uncertainty_memory_budget: float, optional
+        Maximum memory (in MB) used by each block of bootstrap resamples; e.g., uncertainty_memory_budget = 256
+        Default is 256
+    :param uncertainty_rng: numpy.random.Generator or int or None, optional
+        Random number generator, or seed used to create it; e.g., uncertainty_rng = numpy.random.default_rng(0)
+        Default is None (new generator seeded by the operating system)
+
+    Outputs:
+    --------
+    :return uncertainty: float
+        Uncertainty of the sample mean computed using a boostrap with control variates
+    :return variance_reduction: float
+        Variance of the proportion of resamples within the uncertainty without control variates divided by its
+        variance with control variates (i.e., the number of resamples is virtually multiplied by this factor; the
+        actual gain on the uncertainty is smaller, it is limited by the estimation of the density of the distances);
+        inf if the control variates explain all the variance (up to rounding errors)
+    """
+    # check input
+    check_inputs([
+        (check_type, arr_i, "arr_i", (list, numpy__ndarray)),
+        (check_interval, uncertainty_confidence_interval, "uncertainty_confidence_interval", (float, int), [0, 100]),
+        (check_type, uncertainty_relative, "uncertainty_relative", bool),
+        (check_interval, uncertainty_resamples, "uncertainty_resamples", int, [10, 1e10]),
+        (check_interval, uncertainty_bins, "uncertainty_bins", int, [2, 1e8])])
+    arr_i = numpy__array(arr_i, dtype=float)
+    mean = float(arr_i.mean())
+    # expected powers of the bootstrapped sample mean, normalized by the standard error
+    expected = _stat_bootstrap_mean_powers(arr_i - mean, uncertainty_sample_size)
+    standard_error = float(expected[1])**0.5
+    if standard_error == 0:
+        # all values are equal, all resamples have the same mean
+        return 0., 1.
+    power = numpy__arange(1, 5)
+    expected = expected / standard_error**power
+    # distribution of the sample means of the values moved to the nearest grid point
+    distance_binned, within_binned, binned = _stat_bootstrap_mean_distribution(
+        arr_i, uncertainty_sample_size, uncertainty_bins, mean, linear=False)
+    # sample means of the values and of the binned values, computed with the same resamples
+    bootstrap = stat_resample_moments(numpy__array([arr_i, binned]), [uncertainty_sample_size], uncertainty_resamples,
+                                      True, memory_budget=uncertainty_memory_budget, rng=uncertainty_rng)[0][:, 0]
+    bootstrap -= mean
+    distance = abs(bootstrap[:, 0])
+    # half confidence interval on the sample mean and density of the distances at this point (distance between the
+    # order statistics one binomial standard deviation below and above the percentile)
+    probability = uncertainty_confidence_interval / 100
+    delta = min((probability * (1 - probability) / uncertainty_resamples)**0.5, probability, 1 - probability)
+    score = scipy__stats__scoreatpercentile(
+        distance, [100 * (probability - delta), uncertainty_confidence_interval, 100 * (probability + delta)])
+    uncertainty = float(score[1])
+    # control variates and their expected values
+    controls = numpy__concatenate(((bootstrap[:, :1] / standard_error)**power,
+                                   (abs(bootstrap[:, 1:]) <= uncertainty).astype(float)), axis=1)
+    idx = numpy__searchsorted(distance_binned, uncertainty, "right") - 1
+    expected = numpy__concatenate((expected, [within_binned[idx] if idx >= 0 else 0.]))
+    # regression of the resamples within the uncertainty on the control variates
+    within = (distance <= uncertainty).astype(float)
+    anomalies = controls - controls.mean(axis=0)
+    beta = numpy__linalg__lstsq(anomalies, within - within.mean(), rcond=None)[0]
+    variance = float(within.var())
+    residual = float((within - within.mean() - numpy__matmul(anomalies, beta)).var())
+    if variance == 0:
+        # all resamples are on the same side of the uncertainty, there is no variance to reduce
+        variance_reduction = 1.
+    elif residual <= variance * len(within) * numpy__finfo(float).eps:
+        # the control variates explain all the variance, the residual is only made of rounding errors
+        variance_reduction = numpy__inf
+    else:
+        variance_reduction = variance / residual
+    # proportion of resamples within the uncertainty corrected by the control variates, converted into a distance
+    if score[2] > score[0]:
+        correction = float(numpy__matmul(controls.mean(axis=0) - expected, beta))
+        uncertainty += correction * (score[2] - score[0]) / (2 * delta)
+    if uncertainty_relative is True:
+        uncertainty *= 100 / abs(mean)
+    return uncertainty, variance_reduction
+
+
+def stat_uncertainty_bootstrap_exact(arr_i, uncertainty_confidence_interval: float, uncertainty_relative: bool,
+                                     uncertainty_sample_size: int, uncertainty_bins: int = 2048):
+    """
+    Compute the uncertainty of the sample mean (bootstrap distribution computed without resampling)
+    The values are binned on a regular grid of uncertainty_bins points between their minimum and maximum (each value is
+    split between its two neighbouring grid points, so the mean is preserved); the distribution of the sum of
+    uncertainty_sample_size values drawn with replacement is the uncertainty_sample_size-fold convolution of this
+    binned distribution, computed with a fast Fourier transform
+    Accuracy: each value is moved by less than one grid step h = (max(arr_i) - min(arr_i)) / (uncertainty_bins - 1),
+    so the uncertainty differs by less than h from the bootstrap uncertainty computed with infinitely many resamples
+    (e.g., for 40 normally distributed members and the default uncertainty_bins, h is about 0.7% of the absolute
+    uncertainty, the actual difference is usually much smaller)
+
+    Inputs:
+    -------
+    :param arr_i: array_like
+        Values of the members, or 2-D array of shape (series, members)
+    :param uncertainty_confidence_interval: float
+        Confidence interval used to compute the uncertainty; e.g., uncertainty_confidence_interval = 95
+    :param uncertainty_relative: bool
+        True to compute the uncertainty relative to the sample mean, else the absolute uncertainty is computed;
+        e.g., uncertainty_relative = True
+    :param uncertainty_sample_size: int
+        Number of values in each sample; e.g., uncertainty_sample_size = 10
+    :param uncertainty_bins: int, optional
+        Number of points of the grid on which the values are binned; e.g., uncertainty_bins = 2048
+        Default is 2048
+
+    Output:
+    -------
+    :return uncertainty: float or ndarray
+        Uncertainty of the sample mean (one value per series if arr_i is 2-D)
+    """
+    # check input
+    check_inputs([
+        (check_type, arr_i, "arr_i", (list, numpy__ndarray)),
+        (check_interval, uncertainty_confidence_interval, "uncertainty_confidence_interval", (float, int), [0, 100]),
+        (check_type, uncertainty_relative, "uncertainty_relative", bool),
+        (check_interval, uncertainty_sample_size, "uncertainty_sample_size", int, [1, 1e5]),
+        (check_interval, uncertainty_bins, "uncertainty_bins", int, [2, 1e8])])
+    arr_i = numpy__array(arr_i, dtype=float)
+    if arr_i.ndim == 2:
+        # each series has its own bootstrap distribution
+        return numpy__array([stat_uncertainty_bootstrap_exact(
+            k, uncertainty_confidence_interval, uncertainty_relative, uncertainty_sample_size,
+            uncertainty_bins=uncertainty_bins) for k in arr_i])
+    mean = float(arr_i.mean())
+    minimum, maximum = float(arr_i.min()), float(arr_i.max())
+    if maximum == minimum:
+        # all values are equal, all resamples have the same mean
+        return 0.
+    # distribution of the distance between the bootstrapped sample means and the mean
+    distance, within, _ = _stat_bootstrap_mean_distribution(arr_i, uncertainty_sample_size, uncertainty_bins, mean)
+    # half confidence interval on the sample mean: smallest distance including the confidence interval (with a
+    # tolerance for the rounding errors of the Fourier transform)
+    idx = numpy__searchsorted(within, uncertainty_confidence_interval / 100 * (1 - 1e-12))
+    uncertainty = float(distance[min(idx, len(distance) - 1)])
+    if uncertainty_relative is True:
+        uncertainty *= 100 / abs(mean)
+    return uncertainty
+
+
+def _stat_sample_moments_by_size(arr_i, sample_sizes: list, uncertainty_combinations: int,
+                                 uncertainty_resamples: int, uncertainty_theory: bool,
+                                 uncertainty_memory_budget: float, uncertainty_rng=None,
+                                 uncertainty_exhaustive: bool = False):
+    """
+    Generate the mean and the variance of the samples used to compute the uncertainty, for each sample size in turn
+    Sample sizes are processed in groups sharing a single random draw (see stat_resample_moments), as many sizes as
+    uncertainty_memory_budget allows per group
+    In theory mode, sample sizes with few possible combinations use all of them (see stat_combination_moments; at most
+    uncertainty_combinations, or 100 times uncertainty_combinations if uncertainty_exhaustive is True), sample sizes
+    with fewer than ten times uncertainty_combinations use stat_combination_indices (most combinations are used), the
+    full ensemble is used as is and the other sample sizes use prefixes of random permutations, each combination being
+    used at most once (as with stat_combination_indices)
+    If a 2-D array (series x members) is given, all series share the same samples
+
+    Inputs:
+    -------
+    :param arr_i: array_like
+        Values of the members, or 2-D array of shape (series, members)
+    :param sample_sizes: list
+        Number of values in each sample; e.g., sample_sizes = [10, 20]
+    :param uncertainty_combinations: int
+        Maximum number of combinations to used if uncertainty_theory is True; e.g., uncertainty_combinations = 1000
+    :param uncertainty_resamples: int
+        Number of resamples to compute if uncertainty_theory is False; e.g., uncertainty_resamples = 1000
+    :param uncertainty_theory: bool
+        True to select combinations of values (without replacement), else values are resampled (with replacement)
+    :param uncertainty_memory_budget: float
+        Maximum memory (in MB) used by each group of sample sizes
+    :param uncertainty_rng: numpy.random.Generator or int or None, optional
+        Random number generator, or seed used to create it; e.g., uncertainty_rng = numpy.random.default_rng(0)
+        Default is None (new generator seeded by the operating system)
+    :param uncertainty_exhaustive: bool, optional
+        True to use all combinations (see stat_combination_moments) if there are at most 100 times
+        uncertainty_combinations, the average across combinations is then exact; e.g., uncertainty_exhaustive = True
+        Default is False
+
+    Outputs:
+    --------
+    :return: generator
+        Yield, for each sample size, the mean and the variance (ndarray) of each sample, of shape (samples,) or
+        (samples, series) if arr_i is 2-D
+    """
+    arr_i = numpy__array(arr_i, dtype=float)
+    nbr_members = arr_i.shape[-1]
+    nbr_series = 1 if arr_i.ndim == 1 else len(arr_i)
+    # a single generator is used by all draws
+    uncertainty_rng = numpy__random__default_rng(uncertainty_rng)
+    nbr_draws = uncertainty_combinations if uncertainty_theory is True else uncertainty_resamples
+    # sample sizes for which all combinations are used
+    nbr_maximum = uncertainty_combinations * (100 if uncertainty_exhaustive is True else 1)
+    list_all = [k for k in sample_sizes if uncertainty_theory is True and k < nbr_members and
+                math__comb(nbr_members, k) <= nbr_maximum]
+    # sample sizes that need a random draw
+    list_draw = list()
+    for siz in sample_sizes:
+        if uncertainty_theory is True and (siz == nbr_members or siz in list_all or
+                                           math__comb(nbr_members, siz) < uncertainty_combinations * 10):
+            continue
+        if siz not in list_draw:
+            list_draw.append(siz)
+    # number of sample sizes that can be stored (mean and variance of each draw) in the memory budget
+    group_size = max(1, int(uncertainty_memory_budget * 2**20 / (16 * nbr_draws * nbr_series)))
+    groups = [list_draw[k: k + group_size] for k in range(0, len(list_draw), group_size)]
+    group, moments = None, dict()
+    for siz in sample_sizes:
+        if uncertainty_theory is True and siz == nbr_members:
+            yield arr_i.mean(axis=-1)[None], arr_i.var(axis=-1)[None]
+        elif siz in list_all:
+            # all combinations (updated by one swap from one combination to the next)
+            yield stat_combination_moments(arr_i, siz, memory_budget=uncertainty_memory_budget)
+        elif uncertainty_theory is True and siz not in list_draw:
+            idx = stat_combination_indices(nbr_members, uncertainty_combinations, siz, rng=uncertainty_rng)
+            # samples along the first axis, series along the last axis
+            sample = numpy__moveaxis(arr_i[..., idx], -2, 0)
+            yield sample.mean(axis=-1), sample.var(axis=-1)
+        else:
+            if siz not in list(moments.keys()):
+                # draw the samples of all sizes of the group at once (previous group is released)
+                group = [k for k in groups if siz in k][0]
+                sample_mean, sample_variance = stat_resample_moments(
+                    arr_i, group, nbr_draws, not uncertainty_theory, memory_budget=uncertainty_memory_budget,
+                    rng=uncertainty_rng, drawn=dict() if uncertainty_theory is True else None)
+                moments = dict((j, (sample_mean[:, i], sample_variance[:, i])) for i, j in enumerate(group))
+            yield moments[siz]
+
+
+def stat_uncertainty_curve(arr_i, uncertainty_confidence_interval: float, uncertainty_distribution: str,
+                           uncertainty_relative: bool, uncertainty_combinations: int, uncertainty_resamples: int,
+                           uncertainty_theory: bool, uncertainty_sample_sizes: list,
+                           uncertainty_memory_budget: float = 256, uncertainty_rng=None,
+                           uncertainty_exact_bootstrap: bool = False, uncertainty_exhaustive: bool = False) -> list:
+    """
+    Compute the uncertainty of the sample mean for several sample sizes, either using the theory or a bootstrap
+    The samples of all sizes are taken from a single random draw (see stat_resample_moments), or a few draws if the
+    memory budget cannot hold all of them
+    If a 2-D array (series x members) is given, e.g., all diagnostics and epochs of an ensemble, the same draw is
+    shared by all series
+
+    Inputs:
+    -------
+    :param arr_i: array_like
+        Values of the members, or 2-D array of shape (series, members)
+    :param uncertainty_confidence_interval: float
+        Confidence interval used to compute the uncertainty; e.g., uncertainty_confidence_interval = 95
+    :param uncertainty_distribution: str
+        Name of a distribution; e.g., distribution = 'normal'
+        Two distributions are defined: 'normal', 'student'
+        Used only if uncertainty_theory is True
+    :param uncertainty_relative: bool
+        True to compute the uncertainty relative to the sample mean, else the absolute uncertainty is computed;
+        e.g., uncertainty_relative = True
+    :param uncertainty_combinations: int
+        Maximum number of combinations to used to compute the uncertainty if uncertainty_sample_size < len(arr_i);
+        e.g., uncertainty_combinations = 1000
+    :param uncertainty_resamples: int
+        Number of resamples to compute (boostrap uncertainty); e.g., uncertainty_resamples = 1000
+    :param uncertainty_theory: bool
+        True to compute the theoretical uncertainty (using the standard error; e.g., Chapter 5 p. 92 of von Storch and
+        Zwiers (1999; https://doi.org/10.1017/CBO9780511612336), else compute the uncertainty using a boostrap;
+        e.g., uncertainty_theory = True
+    :param uncertainty_sample_sizes: list
+        Number of values in each sample; e.g., uncertainty_sample_sizes = [10, 20]
+    :param uncertainty_memory_budget: float, optional
+        Maximum memory (in MB) used by the draws; e.g., uncertainty_memory_budget = 256
+        Default is 256
+    :param uncertainty_rng: numpy.random.Generator or int or None, optional
+        Random number generator, or seed used to create it; e.g., uncertainty_rng = numpy.random.default_rng(0)
+        Default is None (new generator seeded by the operating system)
+    :param uncertainty_exact_bootstrap: bool, optional
+        True to compute the bootstrap distribution of the sample mean without resampling (see
+        stat_uncertainty_bootstrap_exact), else uncertainty_resamples resamples are drawn; e.g.,
+        uncertainty_exact_bootstrap = True
+        Used only if uncertainty_theory is False
+        Default is False
+    :param uncertainty_exhaustive: bool, optional
+        True to use all combinations (see stat_combination_moments) if there are at most 100 times
+        uncertainty_combinations, the average across combinations is then exact; e.g., uncertainty_exhaustive = True
+        Used only if uncertainty_theory is True (all combinations are always used if there are at most
+        uncertainty_combinations)
+        Default is False
+
+    Output:
+    -------
+    :return uncertainty: list
+        Uncertainty of the sample mean for each sample size (an ndarray with one value per series if arr_i is 2-D)
+    """
+    # check input
+    check_inputs([
+        (check_type, arr_i, "arr_i", (list, numpy__ndarray)),
+        (check_interval, uncertainty_confidence_interval, "uncertainty_confidence_interval", (float, int), [0, 100]),
+        (check_type, uncertainty_relative, "uncertainty_relative", bool),
+        (check_type, uncertainty_theory, "uncertainty_theory", bool),
+        (check_type, uncertainty_sample_sizes, "uncertainty_sample_sizes", list),
+        (check_type, uncertainty_exact_bootstrap, "uncertainty_exact_bootstrap", bool),
+        (check_type, uncertainty_exhaustive, "uncertainty_exhaustive", bool)])
+    if uncertainty_theory is False and uncertainty_exact_bootstrap is True:
+        # bootstrap distribution of the sample mean computed without resampling
+        return [stat_uncertainty_bootstrap_exact(arr_i, uncertainty_confidence_interval, uncertainty_relative, k)
+                for k in uncertainty_sample_sizes]
+    uncertainty = list()
+    moments = _stat_sample_moments_by_size(arr_i, uncertainty_sample_sizes, uncertainty_combinations,
+                                           uncertainty_resamples, uncertainty_theory, uncertainty_memory_budget,
+                                           uncertainty_rng, uncertainty_exhaustive=uncertainty_exhaustive)
+    for siz, (sample_mean, sample_variance) in zip(uncertainty_sample_sizes, moments):
+        if uncertainty_theory is True:
+            # theoretical uncertainty of each sample mean, averaged across combinations
+            uncertainty.append(_stat_uncertainty_from_variance(
+                sample_mean, sample_variance, uncertainty_confidence_interval, uncertainty_distribution,
+                uncertainty_relative, siz))
+        else:
+            # half confidence interval on the bootstrapped sample mean
+            uncertainty.append(_stat_uncertainty_from_bootstrap(
+                sample_mean, uncertainty_confidence_interval, uncertainty_relative))
+    return uncertainty
+
+
+def stat_uncertainty_leave_out(arr_i, uncertainty_confidence_interval: float, uncertainty_distribution: str,
+                               uncertainty_relative: bool, excluded: list = None) -> numpy__ndarray:
+    """
+    Compute the theoretical uncertainty of the ensemble mean (see stat_uncertainty_theory) of the ensemble without some
+    of its members, for several variants, in O(N) (see stat_leave_out_moments)
+
+    Inputs:
+    -------
+    :param arr_i: array_like
+    :param uncertainty_confidence_interval: float
+        Confidence interval used to compute the uncertainty; e.g., uncertainty_confidence_interval = 95
+    :param uncertainty_distribution: str
+        Name of a distribution; e.g., distribution = 'normal'
+        Two distributions are defined: 'normal', 'student'
+    :param uncertainty_relative: bool
+        True to compute the uncertainty relative to the ensemble mean, else the absolute uncertainty is computed
+    :param excluded: list, optional
+        For each variant, list of the (distinct) indices of the members left out; e.g., excluded = [[], [0], [3, 7]]
+        Default is None (leave-one-out: one variant per member, without this member)
+
+    Output:
+    -------
+    :return uncertainty: ndarray
+        Uncertainty of the ensemble mean of each variant
+    """
+    # check input
+    check_inputs([
+        (check_interval, uncertainty_confidence_interval, "uncertainty_confidence_interval", (float, int), [0, 100]),
+        (check_type, uncertainty_relative, "uncertainty_relative", bool)])
+    sample_mean, sample_variance, sample_size = stat_leave_out_moments(arr_i, excluded=excluded)
+    if uncertainty_relative is True:
+        sample_variance = sample_variance / sample_mean**2
+    # number of standard deviations needed to obtain given significance_level (one lookup for all ensemble sizes)
+    zscore = stat_zscore(sample_size, uncertainty_confidence_interval, uncertainty_distribution)
+    # theoretical uncertainty of the ensemble mean
+    uncertainty = zscore * sample_variance**0.5 / sample_size**0.5
+    if uncertainty_relative is True:
+        uncertainty *= 100
+    return uncertainty
+
+
+def _stat_uncertainty_from_bootstrap(bootstrap, uncertainty_confidence_interval: float, uncertainty_relative: bool):
+    """
+    Compute the uncertainty of the sample mean from bootstrapped sample means
+
+    Inputs:
+    -------
+    :param bootstrap: ndarray
+        Mean of each resample, of shape (resamples,) or (resamples, series)
+    :param uncertainty_confidence_interval: float
+        Confidence interval used to compute the uncertainty; e.g., uncertainty_confidence_interval = 95
+    :param uncertainty_relative: bool
+        True to compute the uncertainty relative to the sample mean, else the absolute uncertainty is computed
+
+    Output:
+    -------
+    :return uncertainty: float or ndarray
+        Half confidence interval on the bootstrapped sample mean (one value per series if bootstrap is 2-D)
+    """
+    # mean
+    mean = stat_mean(bootstrap, axis=0)
+    # half confidence interval on the statistic
+    uncertainty = scipy__stats__scoreatpercentile(abs(bootstrap - mean), uncertainty_confidence_interval, axis=0)
+    if uncertainty_relative is True:
+        uncertainty *= 100 / abs(mean)
+    return uncertainty
+
+
+def _stat_uncertainty_from_variance(sample_mean, sample_variance, uncertainty_confidence_interval: float,
+                                    uncertainty_distribution: str, uncertainty_relative: bool,
+                                    uncertainty_sample_size: int) -> float:
+    """
+    Compute the theoretical uncertainty of the sample mean (standard error) averaged across samples
+
+    Inputs:
+    -------
+    :param sample_mean: ndarray
+        Mean of each sample, of shape (samples,) or (samples, series)
+    :param sample_variance: ndarray
+        Variance of each sample, of shape (samples,) or (samples, series)
+    :param uncertainty_confidence_interval: float
+        Confidence interval used to compute the uncertainty; e.g., uncertainty_confidence_interval = 95
+    :param uncertainty_distribution: str
+        Name of a distribution; e.g., distribution = 'normal'
+        Two distributions are defined: 'normal', 'student'
+    :param uncertainty_relative: bool
+        True to compute the uncertainty relative to the sample mean, else the absolute uncertainty is computed
+    :param uncertainty_sample_size: int
+        Number of values in each sample; e.g., uncertainty_sample_size = 10
+
+    Output:
+    -------
+    :return: float or ndarray
+        Uncertainty of the sample mean computed using the theory (one value per series if the samples are 2-D)
+    """
+    if uncertainty_relative is True:
+        sample_variance = sample_variance / sample_mean**2
+    # number of standard deviations needed to obtain given significance_level
+    zscore = stat_zscore(uncertainty_sample_size, uncertainty_confidence_interval, uncertainty_distribution)
+    # theoretical uncertainty of the sample mean
+    uncertainty = zscore * sample_variance**0.5 / uncertainty_sample_size**0.5
+    if uncertainty_relative is True:
+        uncertainty *= 100
+    uncertainty = stat_mean(uncertainty, axis=0)
+    return float(uncertainty) if numpy__ndim(uncertainty) == 0 else uncertainty
+
+
 def stat_uncertainty_select_and_compute(arr_i, uncertainty_confidence_interval: float, uncertainty_distribution: str,
                                         uncertainty_relative: bool, uncertainty_combinations: int,
                                         uncertainty_resamples: int, uncertainty_theory: bool,
-                                        uncertainty_sample_size: int) -> float:
+                                        uncertainty_sample_size: int, uncertainty_memory_budget: float = 256,
+                                        uncertainty_rng=None, uncertainty_exact_bootstrap: bool = False) -> float:
     """
     Compute the uncertainty of the sample mean, either using the theory or a bootstrap
 
@@ -718,6 +2027,19 @@ def stat_uncertainty_select_and_compute(arr_i, uncertainty_confidence_interval:
         e.g., uncertainty_theory = True
     :param uncertainty_sample_size: int
         Number of values in each sample; e.g., uncertainty_sample_size = 10
+    :param uncertainty_memory_budget: float, optional
+        Maximum memory (in MB) used by each block of bootstrap resamples (used only if uncertainty_theory is False);
+        e.g., uncertainty_memory_budget = 256
+        Default is 256
+    :param uncertainty_rng: numpy.random.Generator or int or None, optional
+        Random number generator, or seed used to create it; e.g., uncertainty_rng = numpy.random.default_rng(0)
+        Default is None (new generator seeded by the operating system)
+    :param uncertainty_exact_bootstrap: bool, optional
+        True to compute the bootstrap distribution of the sample mean without resampling (see
+        stat_uncertainty_bootstrap_exact), else uncertainty_resamples resamples are drawn; e.g.,
+        uncertainty_exact_bootstrap = True
+        Used only if uncertainty_theory is False
+        Default is False
 
     Output:
     -------
@@ -725,25 +2047,160 @@ def stat_uncertainty_select_and_compute(arr_i, uncertainty_confidence_interval:
         Uncertainty of the sample mean
     """
     # check input
-    error = list()
-    check_type(uncertainty_relative, "uncertainty_relative", bool, error)
-    print_fail(inspect__stack(), "\n".join(k for k in error))
+    check_inputs([
+        (check_type, uncertainty_relative, "uncertainty_relative", bool)])
     # compute uncertainty
     if uncertainty_theory is True:
         # compute the uncertainty based on the theory (using standard error)
         uncertainty = stat_uncertainty_theory(arr_i, uncertainty_confidence_interval, uncertainty_relative,
                                               uncertainty_combinations, uncertainty_sample_size,
-                                              uncertainty_distribution)
+                                              uncertainty_distribution, uncertainty_rng=uncertainty_rng)
     else:
         # compute uncertainty using bootstrap
         uncertainty = stat_uncertainty_bootstrap(arr_i, uncertainty_confidence_interval, uncertainty_relative,
-                                                 uncertainty_resamples, uncertainty_sample_size)
+                                                 uncertainty_resamples, uncertainty_sample_size,
+                                                 uncertainty_memory_budget=uncertainty_memory_budget,
+                                                 uncertainty_rng=uncertainty_rng,
+                                                 uncertainty_exact_bootstrap=uncertainty_exact_bootstrap)
     return uncertainty
 
 
+def stat_uncertainty_sequential(arr_i, uncertainty_confidence_interval: float, uncertainty_distribution: str,
+                                uncertainty_relative: bool, uncertainty_combinations: int, uncertainty_resamples: int,
+                                uncertainty_theory: bool, uncertainty_sample_size: int, uncertainty_tolerance: float,
+                                uncertainty_batch_size: int = 1000, uncertainty_memory_budget: float = 256,
+                                uncertainty_rng=None) -> tuple:
+    """
+    Compute the uncertainty of the sample mean, either using the theory or a bootstrap, with as few draws as needed
+    Samples are drawn in batches (the first batch has uncertainty_batch_size samples, then the number of samples is
+    doubled) until the Monte Carlo standard error of the uncertainty is smaller than uncertainty_tolerance times the
+    uncertainty, or until uncertainty_combinations (theory) or uncertainty_resamples (bootstrap) samples are drawn
+    The samples are those of stat_uncertainty_curve, drawn in batches: in theory mode, sample sizes with fewer than
+    ten times uncertainty_combinations possible combinations use the unique combinations of stat_combination_indices,
+    the other sample sizes use prefixes of random permutations, and no combination is used twice across batches
+    Standard error: standard deviation of the uncertainties of the combinations divided by the square root of their
+    number (theory); half the distance between the order statistics one binomial standard deviation below and above
+    the percentile (bootstrap)
+    If a 2-D array (series x members) is given, all series share the same samples and draws stop when the tolerance is
+    met for every series
+
+    Inputs:
+    -------
+    :param arr_i: array_like
+        Values of the members, or 2-D array of shape (series, members)
+    :param uncertainty_confidence_interval: float
+        Confidence interval used to compute the uncertainty; e.g., uncertainty_confidence_interval = 95
+    :param uncertainty_distribution: str
+        Name of a distribution; e.g., distribution = 'normal'
+        Two distributions are defined: 'normal', 'student'
+        Used only if uncertainty_theory is True
+    :param uncertainty_relative: bool
+        True to compute the uncertainty relative to the sample mean, else the absolute uncertainty is computed;
+        e.g., uncertainty_relative = True
+    :param uncertainty_combinations: int
+        Maximum number of combinations to used to compute the uncertainty if uncertainty_sample_size < members;
+        e.g., uncertainty_combinations = 10000
+    :param uncertainty_resamples: int
+        Maximum number of resamples to compute (boostrap uncertainty); e.g., uncertainty_resamples = 1000000
+    :param uncertainty_theory: bool
+        True to compute the theoretical uncertainty (using the standard error; e.g., Chapter 5 p. 92 of von Storch and
+        Zwiers (1999; https://doi.org/10.1017/CBO9780511612336), else compute the uncertainty using a boostrap;
+        e.g., uncertainty_theory = True
+    :param uncertainty_sample_size: int
+        Number of values in each sample; e.g., uncertainty_sample_size = 10
+    :param uncertainty_tolerance: float
+        Maximum Monte Carlo standard error of the uncertainty, relative to the uncertainty; e.g.,
+        uncertainty_tolerance = 0.001
+    :param uncertainty_batch_size: int, optional
+        Number of samples of the first batch; e.g., uncertainty_batch_size = 1000
+        Default is 1000
+    :param uncertainty_memory_budget: float, optional
+        Maximum memory (in MB) used by each block of draws; e.g., uncertainty_memory_budget = 256
+        Default is 256
+    :param uncertainty_rng: numpy.random.Generator or int or None, optional
+        Random number generator, or seed used to create it; e.g., uncertainty_rng = numpy.random.default_rng(0)
+        Default is None (new generator seeded by the operating system)
+
+    Outputs:
+    --------
+    :return uncertainty: float or ndarray
+        Uncertainty of the sample mean (one value per series if arr_i is 2-D)
+    :return nbr_draws: int
+        Number of samples drawn
+    """
+    # check input
+    check_inputs([
+        (check_type, arr_i, "arr_i", (list, numpy__ndarray)),
+        (check_interval, uncertainty_confidence_interval, "uncertainty_confidence_interval", (float, int), [0, 100]),
+        (check_type, uncertainty_relative, "uncertainty_relative", bool),
+        (check_type, uncertainty_theory, "uncertainty_theory", bool),
+        (check_interval, uncertainty_tolerance, "uncertainty_tolerance", (float, int), [1e-8, 1]),
+        (check_interval, uncertainty_batch_size, "uncertainty_batch_size", int, [2, 1e10])])
+    arr_i = numpy__array(arr_i, dtype=float)
+    nbr_members = arr_i.shape[-1]
+    # a single generator is used by all batches
+    uncertainty_rng = numpy__random__default_rng(uncertainty_rng)
+    if uncertainty_theory is True and (uncertainty_sample_size == nbr_members or
+                                       math__comb(nbr_members, uncertainty_sample_size) <= uncertainty_combinations):
+        # all combinations are used, there is no Monte Carlo error
+        uncertainty = stat_uncertainty_curve(
+            arr_i, uncertainty_confidence_interval, uncertainty_distribution, uncertainty_relative,
+            uncertainty_combinations, uncertainty_resamples, uncertainty_theory, [uncertainty_sample_size],
+            uncertainty_memory_budget=uncertainty_memory_budget, uncertainty_rng=uncertainty_rng)[0]
+        return uncertainty, math__comb(nbr_members, uncertainty_sample_size)
+    nbr_maximum = uncertainty_combinations if uncertainty_theory is True else uncertainty_resamples
+    probability = uncertainty_confidence_interval / 100
+    list_mean, list_variance = list(), list()
+    # combinations already drawn, so that no combination is used twice across batches
+    drawn = dict() if uncertainty_theory is True else None
+    idx = None
+    if uncertainty_theory is True and math__comb(nbr_members, uncertainty_sample_size) < nbr_maximum * 10:
+        # unique combinations selected as in stat_uncertainty_curve, consumed batch after batch
+        idx = stat_combination_indices(nbr_members, nbr_maximum, uncertainty_sample_size, rng=uncertainty_rng)
+    nbr_draws, batch = 0, min(uncertainty_batch_size, nbr_maximum)
+    while batch > 0:
+        if idx is not None:
+            # samples along the first axis, series along the last axis
+            sample = numpy__moveaxis(arr_i[..., idx[nbr_draws: nbr_draws + batch]], -2, 0)
+            list_mean.append(sample.mean(axis=-1))
+            list_variance.append(sample.var(axis=-1))
+        else:
+            sample_mean, sample_variance = stat_resample_moments(
+                arr_i, [uncertainty_sample_size], batch, not uncertainty_theory,
+                memory_budget=uncertainty_memory_budget, rng=uncertainty_rng, drawn=drawn)
+            list_mean.append(sample_mean[:, 0])
+            list_variance.append(sample_variance[:, 0])
+        nbr_draws += batch
+        sample_mean = numpy__concatenate(list_mean)
+        if uncertainty_theory is True:
+            # theoretical uncertainty of each combination (the average is done over the leading axis of size 1)
+            values = _stat_uncertainty_from_variance(
+                sample_mean[None], numpy__concatenate(list_variance)[None], uncertainty_confidence_interval,
+                uncertainty_distribution, uncertainty_relative, uncertainty_sample_size)
+            uncertainty = stat_mean(values, axis=0)
+            error = values.std(axis=0) / nbr_draws**0.5
+        else:
+            # percentile and order statistics one binomial standard deviation below and above it
+            delta = (probability * (1 - probability) / nbr_draws)**0.5
+            mean = stat_mean(sample_mean, axis=0)
+            percentile = [100 * max(probability - delta, 0), uncertainty_confidence_interval,
+                          100 * min(probability + delta, 1)]
+            score = scipy__stats__scoreatpercentile(abs(sample_mean - mean), percentile, axis=0)
+            uncertainty, error = score[1], (score[2] - score[0]) / 2
+            if uncertainty_relative is True:
+                uncertainty, error = uncertainty * 100 / abs(mean), error * 100 / abs(mean)
+        if numpy__all(error <= uncertainty_tolerance * abs(uncertainty)):
+            break
+        # double the number of samples
+        batch = min(nbr_draws, nbr_maximum - nbr_draws)
+    uncertainty = float(uncertainty) if numpy__ndim(uncertainty) == 0 else numpy__array(uncertainty)
+    return uncertainty, nbr_draws
+
+
 def stat_uncertainty_theory(arr_i, uncertainty_confidence_interval: float, uncertainty_relative: bool,
                             uncertainty_combinations: int, uncertainty_sample_size: int,
-                            uncertainty_distribution: str) -> float:
+                            uncertainty_distribution: str, uncertainty_rng=None,
+                            uncertainty_balanced: bool = False, uncertainty_exhaustive: bool = False) -> float:
     """
     Compute the uncertainty of the sample mean (using the theory, i.e., the standard error).
     E.g., Chapter 5 p. 92 of von Storch and Zwiers (1999; https://doi.org/10.1017/CBO9780511612336)
@@ -764,6 +2221,18 @@ def stat_uncertainty_theory(arr_i, uncertainty_confidence_interval: float, uncer
     :param uncertainty_distribution: str
         Name of a distribution; e.g., distribution = 'normal'
         Two distributions are defined: 'normal', 'student'
+    :param uncertainty_rng: numpy.random.Generator or int or None, optional
+        Random number generator, or seed used to create it; e.g., uncertainty_rng = numpy.random.default_rng(0)
+        Default is None (new generator seeded by the operating system)
+    :param uncertainty_balanced: bool, optional
+        True to select balanced combinations (see stat_combination_indices), the average across combinations converges
+        faster; e.g., uncertainty_balanced = True
+        Default is False
+    :param uncertainty_exhaustive: bool, optional
+        True to use all combinations (see stat_combination_moments) if there are at most 100 times
+        uncertainty_combinations, the average across combinations is then exact; e.g., uncertainty_exhaustive = True
+        All combinations are always used if there are at most uncertainty_combinations
+        Default is False
 
     Output:
     -------
@@ -771,17 +2240,24 @@ def stat_uncertainty_theory(arr_i, uncertainty_confidence_interval: float, uncer
         Uncertainty of the sample mean computed using the theory
     """
     # check input
-    error = list()
-    check_type(arr_i, "arr_i", (list, numpy__ndarray), error)
-    check_type(uncertainty_relative, "uncertainty_relative", bool, error)
-    print_fail(inspect__stack(), "\n".join(k for k in error))
+    check_inputs([
+        (check_type, arr_i, "arr_i", (list, numpy__ndarray)),
+        (check_type, uncertainty_relative, "uncertainty_relative", bool),
+        (check_type, uncertainty_exhaustive, "uncertainty_exhaustive", bool)])
     # statistic for the uncertainty of the ensemble mean
     statistic = "var_to_mea2" if uncertainty_relative is True else "var"
     # compute ensemble variance using combination of sample_size values from arr_i
+    nbr_maximum = uncertainty_combinations * (100 if uncertainty_exhaustive is True else 1)
     if uncertainty_sample_size == len(arr_i):
         variance = stat_compute_statistic(arr_i, statistic)
+    elif math__comb(len(arr_i), uncertainty_sample_size) <= nbr_maximum:
+        # all combinations (updated by one swap from one combination to the next)
+        sample_mean, variance = stat_combination_moments(arr_i, uncertainty_sample_size)
+        if uncertainty_relative is True:
+            variance = variance / sample_mean**2
     else:
-        variance = stat_combination_random(arr_i, statistic, uncertainty_combinations, uncertainty_sample_size)
+        variance = stat_combination_random(arr_i, statistic, uncertainty_combinations, uncertainty_sample_size,
+                                           rng=uncertainty_rng, balanced=uncertainty_balanced)
     # number of standard deviations needed to obtain given significance_level
     zscore = stat_zscore(uncertainty_sample_size, uncertainty_confidence_interval, uncertainty_distribution)
     # standard error
@@ -796,13 +2272,55 @@ def stat_uncertainty_theory(arr_i, uncertainty_confidence_interval: float, uncer
     return uncertainty
 
 
-def stat_zscore(sample_size, confidence_interval: float, distribution: str) -> float:
+# z-scores already computed, by (confidence_interval, distribution), indexed by the sample size (see stat_zscore)
+dict_zscore_table = dict()
+
+
+def _stat_zscore_table(confidence_interval: float, distribution: str, maximum_size: int):
+    """
+    Return the memoised table of z-scores for all sample sizes up to at least maximum_size
+    The table is computed with one vectorized call of the quantile function and kept for the next calls; if a larger
+    sample size is needed, the table is recomputed with (at least) twice its size
+
+    Inputs:
+    -------
+    :param confidence_interval: float
+        Confidence interval used to compute the z-score; e.g., confidence_interval = 95
+    :param distribution: str
+        Name of a distribution; e.g., distribution = 'normal'
+        Two distributions are defined: 'normal', 'student'
+    :param maximum_size: int
+        Largest sample size needed; e.g., maximum_size = 100
+
+    Output:
+    -------
+    :return table: ndarray
+        z-score of each sample size (the index is the sample size; nan if the student distribution is not defined)
+    """
+    key = (float(confidence_interval), distribution)
+    table = dict_zscore_table.get(key)
+    if table is None or len(table) <= maximum_size:
+        size = max(maximum_size + 1, 2 * (0 if table is None else len(table)), 128)
+        # confidence level for 2-sided confidence interval
+        alpha = 0.5 + confidence_interval / 200
+        if distribution == "normal":
+            table = numpy__full(size, scipy__stats__norm.ppf(alpha))
+        else:
+            with numpy__errstate(invalid="ignore"):
+                table = scipy__stats__t.ppf(alpha, numpy__arange(size) - 1)
+        dict_zscore_table[key] = table
+    return table
+
+
+def stat_zscore(sample_size, confidence_interval: float, distribution: str):
     """
     Compute the distribution's zscore for the given significance_level
+    Z-scores of integer sample sizes are read in a memoised table (see _stat_zscore_table), so arrays of sample sizes
+    are looked up at once and repeated calls do not go through the quantile function again
 
     Inputs:
     -------
-    :param sample_size: float or list
+    :param sample_size: float or list or ndarray
         Number of values in each sample; e.g., sample_size = 10
     :param confidence_interval: float
         Confidence interval used to compute the z-score; e.g., confidence_interval = 95
@@ -812,22 +2330,27 @@ def stat_zscore(sample_size, confidence_interval: float, distribution: str) -> f
     
     Output:
     -------
-    :return zscore: float
-        Normal distribution's zscore for the given significance_level
+    :return zscore: float or ndarray
+        Distribution's zscore for the given significance_level (an array if an array or a list of sample sizes is
+        given)
     """
     # check input
-    error = list()
-    known_distributions = ["normal", "student"]
-    check_type(sample_size, "sample_size", (float, int), error)
-    check_interval(confidence_interval, "confidence_interval", (float, int), [0, 100], error)
-    check_list(distribution, "distribution", known_distributions, error)
-    print_fail(inspect__stack(), "\n".join(k for k in error))
-    # confidence level for 2-sided confidence interval
-    alpha = 0.5 + confidence_interval / 200
-    # number of standard deviations needed to obtain given significance_level
-    if distribution == "normal":
-        zscore = scipy__stats__norm.ppf(alpha)
+    check_inputs([
+        (check_type, sample_size, "sample_size", (float, int, list, numpy__ndarray)),
+        (check_interval, confidence_interval, "confidence_interval", (float, int), [0, 100]),
+        (check_list, distribution, "distribution", ["normal", "student"])], hot_path=True)
+    arr_size = numpy__asarray(sample_size, dtype=float)
+    if arr_size.size > 0 and numpy__all(arr_size >= 0) and numpy__all(arr_size == numpy__floor(arr_size)):
+        # integer sample sizes: read the table
+        table = _stat_zscore_table(confidence_interval, distribution, int(arr_size.max()))
+        zscore = table[arr_size.astype(int)]
     else:
-        zscore = scipy__stats__t.ppf(alpha, sample_size - 1)
-    return zscore
+        # confidence level for 2-sided confidence interval
+        alpha = 0.5 + confidence_interval / 200
+        # number of standard deviations needed to obtain given significance_level
+        if distribution == "normal":
+            zscore = numpy__full(arr_size.shape, scipy__stats__norm.ppf(alpha))
+        else:
+            zscore = scipy__stats__t.ppf(alpha, arr_size - 1)
+    return float(zscore) if numpy__ndim(zscore) == 0 else zscore
 # ---------------------------------------------------------------------------------------------------------------------#
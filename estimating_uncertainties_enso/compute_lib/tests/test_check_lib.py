@@ -0,0 +1,64 @@
+# -*- coding:UTF-8 -*-
+# ---------------------------------------------------------------------------------------------------------------------#
+# Tests of check_lib: the 'trusted inputs' mode skips the checks of the hot paths, also in the worker processes of
+# nest_map_leaves, and is restored when its scope is left
+# ---------------------------------------------------------------------------------------------------------------------#
+
+
+# ---------------------------------------------------#
+# Import packages
+# ---------------------------------------------------#
+# pytest
+import pytest
+# estimating_uncertainties_enso package
+from estimating_uncertainties_enso.compute_lib.check_lib import check_inputs, check_trusted_inputs, \
+    check_trusted_inputs_scope, check_type
+from estimating_uncertainties_enso.compute_lib.nest_lib import nest_map_leaves
+from estimating_uncertainties_enso.compute_lib.stat_lib import stat_uncertainty_curve
+# ---------------------------------------------------#
+
+
+# ---------------------------------------------------------------------------------------------------------------------#
+# Tests
+# ---------------------------------------------------------------------------------------------------------------------#
+def _leaf_trusted_inputs(leaf) -> bool:
+    return check_trusted_inputs()
+
+
+def test_check_inputs_skipped_if_trusted():
+    list_checks = [(check_type, "a", "input_value", int), None]
+    with pytest.raises(ValueError, match="'input_value' type error"):
+        check_inputs(list_checks, hot_path=True)
+    with pytest.raises(ValueError, match="custom error"):
+        check_inputs([None, "custom error"])
+    with check_trusted_inputs_scope(True):
+        # only the hot paths skip their checks
+        check_inputs(list_checks + ["custom error"], hot_path=True)
+        with pytest.raises(ValueError, match="custom error"):
+            check_inputs(list_checks + ["custom error"])
+        # public entry points still explain wrong inputs
+        with pytest.raises(ValueError, match="'uncertainty_sample_sizes' type error"):
+            stat_uncertainty_curve([1., 2., 3.], 95, "normal", False, 10, 10, True, 2)
+    assert check_trusted_inputs() is False
+
+
+def test_trusted_inputs_scope_is_restored():
+    with pytest.raises(ValueError, match="custom error"):
+        with check_trusted_inputs_scope(True):
+            assert check_trusted_inputs() is True
+            check_inputs(["custom error"])
+    assert check_trusted_inputs() is False
+    with check_trusted_inputs_scope(True):
+        with check_trusted_inputs_scope(False):
+            assert check_trusted_inputs() is False
+        assert check_trusted_inputs() is True
+    assert check_trusted_inputs() is False
+
+
+@pytest.mark.parametrize("trusted", [False, True])
+def test_trusted_inputs_reach_workers(trusted):
+    dict_i = {"a": {"x": 1., "y": 2.}, "b": {"x": 3., "y": 4.}}
+    with check_trusted_inputs_scope(trusted):
+        dict_o = nest_map_leaves(dict_i, _leaf_trusted_inputs, n_jobs=2)
+    assert dict_o == {"a": {"x": trusted, "y": trusted}, "b": {"x": trusted, "y": trusted}}
+# ---------------------------------------------------------------------------------------------------------------------#
@@ -0,0 +1,77 @@
+# -*- coding:UTF-8 -*-
+# ---------------------------------------------------------------------------------------------------------------------#
+# Tests of data_lib: the ensemble cube gives back the nested dictionaries it was created from
+# ---------------------------------------------------------------------------------------------------------------------#
+
+
+# ---------------------------------------------------#
+# Import packages
+# ---------------------------------------------------#
+# basic python package
+from json import dump as json__dump
+# numpy
+import numpy
+# pytest
+import pytest
+# estimating_uncertainties_enso package
+from estimating_uncertainties_enso.compute_lib import tool_lib
+from estimating_uncertainties_enso.compute_lib.data_lib import data_cube_to_dict, data_dict_to_cube, \
+    data_organize_json
+# ---------------------------------------------------#
+
+
+# ---------------------------------------------------------------------------------------------------------------------#
+# Tests
+# ---------------------------------------------------------------------------------------------------------------------#
+@pytest.fixture
+def json_file(tmp_path, monkeypatch):
+    # two diagnostics, SMILEs of different sizes, a missing value (None) and observations
+    epochs = {"030_year_epoch": {"1850-1879": 0.5, "1880-1909": -1.}, "150_year_epoch": {"1850-1999": 2.}}
+    dict_i = dict()
+    for dia, scale in [("ave_ts_val_n30e", 1.), ("var_pr_ano_n30e", 3.)]:
+        values = {
+            "cmip6": {
+                "ACCESS-ESM1-5": {
+                    "historical": dict(("r%di1p1f1" % k1, dict((k2, dict((k3, k4 * scale + k1)
+                                                                          for k3, k4 in k5.items()))
+                                                               for k2, k5 in epochs.items())) for k1 in range(1, 5)),
+                    "piControl": {"r1i1p1f1": {"030_year_epoch": {"0001-0030": 1., "0031-0060": 2. * scale}}}},
+                "CanESM5_p1": {
+                    "historical": dict(("r%di1p1f1" % k1, {"030_year_epoch": {"1850-1879": None if k1 == 2 else k1}})
+                                       for k1 in range(1, 3))}},
+            "observations": {"HadISST": {"historical": {"r1i1p1f1": {"030_year_epoch": {"1990-2019": scale}}}}}}
+        metadata = {"method": "mean", "diagnostic_long_name": dia, "diagnostic_short_name": "AVE", "units": "degC"}
+        dict_i[dia] = {"diagnostic": {"value": values}, "metadata": metadata}
+    path = tmp_path / "values.json"
+    with open(path, "w") as ff:
+        json__dump({"RESULTS": dict_i}, ff)
+    monkeypatch.setattr(tool_lib, "_tool_json_path", lambda filename=None: str(path))
+    return str(path)
+
+
+def test_cube_round_trip_of_organized_json(json_file):
+    arguments = [["ave_ts_val_n30e", "var_pr_ano_n30e"], ["030_year_epoch", "150_year_epoch"],
+                 ["cmip6", "observations"], ["historical", "piControl"]]
+    values, _ = data_organize_json(*arguments)
+    cube = data_dict_to_cube(values)
+    assert data_cube_to_dict(cube) == values
+    # data_as_cube gives the same cube
+    cube_read, _ = data_organize_json(*arguments, data_as_cube=True)
+    assert cube_read["axes"] == cube["axes"]
+    numpy.testing.assert_array_equal(cube_read["values"], cube["values"])
+    numpy.testing.assert_array_equal(cube_read["mask"], cube["mask"])
+    # missing members and missing values are NaN
+    index = tuple(cube["axes"][k1].index(k2) for k1, k2 in zip(
+        cube["dimensions"][:-1], ["ave_ts_val_n30e", "030_year_epoch", "cmip6", "historical", "CanESM5_p1",
+                                  "1850-1879"]))
+    assert values["ave_ts_val_n30e"]["030_year_epoch"]["cmip6"]["historical"]["CanESM5_p1"]["1850-1879"] == [1, None]
+    assert cube["mask"][index].tolist() == [True, False, False, False]
+    assert numpy.nanmean(cube["values"][index]) == 1.
+
+
+def test_cube_keeps_empty_leaves():
+    dict_i = {"dia": {"dur": {"pro": {"exp": {"dat1": {"epo1": [], "epo2": [1., None, 3.]}, "dat2": {"epo1": []}}}}}}
+    cube = data_dict_to_cube(dict_i)
+    assert cube["values"].shape == (1, 1, 1, 1, 2, 2, 3)
+    assert data_cube_to_dict(cube) == dict_i
+# ---------------------------------------------------------------------------------------------------------------------#
@@ -0,0 +1,171 @@
+# -*- coding:UTF-8 -*-
+# ---------------------------------------------------------------------------------------------------------------------#
+# Regression tests of nest_lib: the flattened-leaf engine gives the output of the recursive loops it replaces
+# ---------------------------------------------------------------------------------------------------------------------#
+
+
+# ---------------------------------------------------#
+# Import packages
+# ---------------------------------------------------#
+# basic python package
+from math import ceil as math__ceil
+# numpy
+import numpy
+# scipy
+from scipy.stats import norm as scipy__stats__norm
+# estimating_uncertainties_enso package
+from estimating_uncertainties_enso.compute_lib.nest_lib import _nest_leaf_rng, nest_compute_res, \
+    nest_compute_statistic, nest_compute_uncertainty, nest_compute_uncertainty_hi_vs_pi, nest_flatten, nest_unflatten
+from estimating_uncertainties_enso.compute_lib.stat_lib import stat_compute_statistic, stat_uncertainty_curve
+# ---------------------------------------------------#
+
+
+# ---------------------------------------------------------------------------------------------------------------------#
+# Tests
+# ---------------------------------------------------------------------------------------------------------------------#
+def _recursive_statistic(dict_i, statistic: str):
+    # nested loops of nest_compute_statistic before the leaves were flattened
+    if isinstance(dict_i, dict) is True:
+        return dict((k, _recursive_statistic(dict_i[k], statistic)) for k in sorted(dict_i.keys(), key=str.casefold))
+    return stat_compute_statistic(dict_i, statistic)
+
+
+def _nested_values(seed: int = 0) -> dict:
+    rng = numpy.random.default_rng(seed)
+    return {
+        "var_ts_ano_nin3": {
+            "030_year_epoch": {"cmip6": {"historical": {"b-model": list(rng.normal(size=10)),
+                                                        "A-model": list(rng.normal(size=7))}}},
+            "150_year_epoch": {"cmip6": {"piControl": {"A-model": list(rng.normal(size=12))}}}},
+        "ave_pr_val_n30e": {"030_year_epoch": {"observations": {"historical": {"GPCPv2.3": [2.5]}}}}}
+
+
+def test_flatten_unflatten_round_trip():
+    dict_i = _nested_values()
+    list_keys, list_leaves = nest_flatten(dict_i)
+    # leaves are listed in the order of the recursive loops (keys sorted without case)
+    assert list_keys[0] == ("ave_pr_val_n30e", "030_year_epoch", "observations", "historical", "GPCPv2.3")
+    assert list_keys[1][-1] == "A-model" and list_keys[2][-1] == "b-model"
+    assert nest_unflatten(list_keys, list_leaves) == dict_i
+
+
+def test_compute_statistic_matches_recursion():
+    dict_i = _nested_values(seed=3)
+    for statistic in ["mea", "std", "ske"]:
+        dict_o, _, _ = nest_compute_statistic(dict_i, statistic)
+        assert dict_o == _recursive_statistic(dict_i, statistic)
+    # output put under given keys, in a given dictionary
+    dict_o, _, _ = nest_compute_statistic(dict_i, "var", dict_o={"other": 1.}, list_k=("variance",))
+    assert dict_o == {"other": 1., "variance": _recursive_statistic(dict_i, "var")}
+
+
+def test_parallel_leaves_match_serial_leaves():
+    # six nested levels [diagnostic, epoch_length, project, experiment, dataset, epoch], three leaves per process
+    rng = numpy.random.default_rng(10)
+    dict_i = dict((dia, {"030_year_epoch": {"cmip6": {"historical": dict(
+        (dat, dict(("epoch_%d" % k, list(rng.normal(size=15))) for k in range(3))) for dat in ["A", "B"])}}})
+        for dia in ["ave_ts_val_n30e", "var_ts_ano_nin3"])
+    list_keys, _ = nest_flatten(dict_i)
+    dict_threshold = nest_unflatten(list_keys, [{"unc": {"low": 0.2, "high": 0.6}} for _ in list_keys])
+    list_uncertainty, list_res = list(), list()
+    for n_jobs in [1, 2]:
+        list_uncertainty.append(nest_compute_uncertainty(
+            dict_i, 95, "normal", False, 100, 500, False, uncertainty_sample_sizes=[5, 10], n_jobs=n_jobs,
+            uncertainty_seed=4)[0])
+        list_res.append(nest_compute_res(dict_i, dict_threshold, 15, 95, "normal", 100, 500, False, n_jobs=n_jobs,
+                                         uncertainty_seed=4)[0])
+    # the random numbers of a leaf depend on the seed and the keys of the leaf, not on the process
+    assert list_uncertainty[0] == list_uncertainty[1]
+    assert list_res[0] == list_res[1]
+    assert list_uncertainty[0] != nest_compute_uncertainty(
+        dict_i, 95, "normal", False, 100, 500, False, uncertainty_sample_sizes=[5, 10], uncertainty_seed=5)[0]
+
+
+def test_shared_draws_within_a_smile():
+    # two diagnostics of the same SMILE with the same values: same draws only if uncertainty_shared_draws is True
+    values = list(numpy.random.default_rng(14).normal(size=20))
+    dict_i = dict((dia, {"030_year_epoch": {"cmip6": {"historical": {"A": {"y1850": values}}}}})
+                  for dia in ["ave_ts_val_n30e", "var_ts_ano_nin3"])
+    for shared in [False, True]:
+        dict_o = nest_compute_uncertainty(dict_i, 95, "normal", False, 100, 500, False,
+                                          uncertainty_sample_sizes=[5, 10], uncertainty_seed=0,
+                                          uncertainty_shared_draws=shared)[0]
+        assert (dict_o["ave_ts_val_n30e"] == dict_o["var_ts_ano_nin3"]) is shared
+
+
+def test_hi_vs_pi_epochs_share_one_draw():
+    # reference epoch and historical epochs with the same number of members: one draw for all of them, so each epoch
+    # gets the uncertainty it gets alone with the generator of the dataset
+    rng = numpy.random.default_rng(16)
+    dict_i = {"ave_ts_val_n30e": {"030_year_epoch": {"cmip6": {
+        "piControl": {"A": {"y0001": list(rng.normal(size=12))}},
+        "historical": {"A": dict(("y%d" % k, list(rng.normal(size=12))) for k in [1850, 1880, 1910])}}}}}
+    for theory in [True, False]:
+        dict_o = nest_compute_uncertainty_hi_vs_pi(dict_i, 95, "normal", False, 200, 200, theory, "averaged",
+                                                   uncertainty_seed=3)
+        list_uncertainty = list()
+        for exp in ["piControl", "historical"]:
+            epochs = dict_i["ave_ts_val_n30e"]["030_year_epoch"]["cmip6"][exp]["A"]
+            for epo in sorted(epochs.keys()):
+                list_uncertainty.append(stat_uncertainty_curve(
+                    epochs[epo], 95, "normal", False, 200, 200, theory, [12],
+                    uncertainty_rng=_nest_leaf_rng(3, ("ave_ts_val_n30e", "030_year_epoch", "cmip6", "A")))[0])
+        numpy.testing.assert_allclose(dict_o["030_year_epoch"]["ave_ts_val_n30e"]["A"]["x"], list_uncertainty[:1],
+                                      rtol=1e-10)
+        numpy.testing.assert_allclose(dict_o["030_year_epoch"]["ave_ts_val_n30e"]["A"]["y"],
+                                      [numpy.mean(list_uncertainty[1:])], rtol=1e-10)
+
+
+def test_control_variates_store_the_variance_reduction():
+    rng = numpy.random.default_rng(19)
+    dict_i = {"ave_ts_val_n30e": {"030_year_epoch": {"cmip6": {"historical": {
+        "A": {"y1850": list(rng.normal(size=25)), "y1880": list(rng.normal(size=25))}}}}}}
+    reference = nest_compute_uncertainty(dict_i, 95, "normal", False, 100, 200000, False,
+                                         uncertainty_sample_sizes=[10], uncertainty_seed=1)[0]
+    for shared in [False, True]:
+        dict_variance_reduction = dict()
+        dict_o = nest_compute_uncertainty(dict_i, 95, "normal", False, 100, 20000, False,
+                                          uncertainty_sample_sizes=[10], uncertainty_seed=2,
+                                          uncertainty_shared_draws=shared, uncertainty_control_variate=True,
+                                          dict_variance_reduction=dict_variance_reduction)[0]
+        list_keys, list_uncertainty = nest_flatten(dict_o)
+        # one reduction factor per leaf and sample size, uncertainties close to ten times more plain resamples
+        assert nest_flatten(dict_variance_reduction)[0] == list_keys
+        assert all(k > 1 for k in nest_flatten(dict_variance_reduction)[1])
+        numpy.testing.assert_allclose(list_uncertainty, nest_flatten(reference)[1], rtol=0.02)
+    # no resampling to correct: the option is ignored
+    dict_variance_reduction = dict()
+    dict_o = nest_compute_uncertainty(dict_i, 95, "normal", False, 100, 20000, True, uncertainty_sample_sizes=[10],
+                                      uncertainty_seed=2, uncertainty_control_variate=True,
+                                      dict_variance_reduction=dict_variance_reduction)[0]
+    assert dict_variance_reduction == {}
+    assert dict_o == nest_compute_uncertainty(dict_i, 95, "normal", False, 100, 20000, True,
+                                              uncertainty_sample_sizes=[10], uncertainty_seed=2)[0]
+
+
+def _scalar_res_theory(list_i: list, res_maximum: int, confidence_interval: float, threshold: float) -> int:
+    # one threshold at a time, as before the thresholds of a leaf were computed together
+    if len(list_i) < 2:
+        return None
+    zscore = scipy__stats__norm.ppf(0.5 + confidence_interval / 200)
+    return min(math__ceil(zscore**2 * numpy.var(list_i) / threshold**2), res_maximum)
+
+
+def test_theory_res_of_all_thresholds_matches_scalar_loop():
+    dict_i = _nested_values(seed=23)
+    list_keys, list_leaves = nest_flatten(dict_i)
+    # each leaf has its own thresholds, some of them too small to be reached with 40 members
+    list_threshold = [{"unc": {"low": 0.1 * (k + 1), "mid": 0.5, "high": 0.9}, "abs": {"one": 0.05}}
+                      for k in range(len(list_keys))]
+    dict_o, _, _ = nest_compute_res(dict_i, nest_unflatten(list_keys, list_threshold), 40, 90, "normal", 100, 100,
+                                    True)
+    for keys, leaf, dict_threshold in zip(list_keys, list_leaves, list_threshold):
+        for criteria, thresholds in dict_threshold.items():
+            for name, threshold in thresholds.items():
+                reference = _scalar_res_theory(leaf, 40, 90, threshold)
+                # no required ensemble size for a single member
+                res = dict_o
+                for k in keys + (criteria, name):
+                    res = res.get(k) if isinstance(res, dict) is True else None
+                assert res == reference
+# ---------------------------------------------------------------------------------------------------------------------#
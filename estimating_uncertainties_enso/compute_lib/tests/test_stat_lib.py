@@ -0,0 +1,385 @@
+# -*- coding:UTF-8 -*-
+# ---------------------------------------------------------------------------------------------------------------------#
+# Regression tests of stat_lib: fast paths are compared with the straightforward computation they replace
+# ---------------------------------------------------------------------------------------------------------------------#
+
+
+# ---------------------------------------------------#
+# Import packages
+# ---------------------------------------------------#
+# basic python package
+from itertools import combinations as itertools__combinations
+from itertools import product as itertools__product
+# numpy
+import numpy
+# pytest
+import pytest
+# scipy
+from scipy.stats import norm as scipy__stats__norm
+from scipy.stats import skew as scipy__stats__skew
+from scipy.stats import t as scipy__stats__t
+# estimating_uncertainties_enso package
+from estimating_uncertainties_enso.compute_lib import stat_lib
+from estimating_uncertainties_enso.compute_lib.stat_lib import _stat_combination_revolving_door, \
+    _stat_combination_unrank, _stat_res_from_sizes, stat_bootstrap, stat_combination_indices, \
+    stat_combination_moments, stat_combination_random, stat_compute_statistic, stat_from_moments, \
+    stat_leave_out_moments, stat_moments, stat_res_bootstrap, stat_res_theory, stat_res_theory_leave_out, \
+    stat_resample_moments, stat_smooth_triangle, stat_uncertainty_batch, stat_uncertainty_bootstrap, \
+    stat_uncertainty_bootstrap_control, stat_uncertainty_bootstrap_exact, stat_uncertainty_curve, \
+    stat_uncertainty_leave_out, stat_uncertainty_select_and_compute, stat_uncertainty_sequential, \
+    stat_uncertainty_theory, stat_zscore
+# ---------------------------------------------------#
+
+
+# ---------------------------------------------------------------------------------------------------------------------#
+# Tests
+# ---------------------------------------------------------------------------------------------------------------------#
+def test_bootstrap_blocks_match_single_draw():
+    # one draw of all indices, as before the resamples were processed in blocks
+    arr = numpy.random.default_rng(1).normal(size=30)
+    idx = numpy.random.default_rng(7).integers(0, 30, (5000, 12))
+    reference = arr[idx].std(axis=1)
+    # tiny memory budget: many blocks
+    for memory_budget in [0.01, 256]:
+        result = stat_bootstrap(arr, "std", 5000, 12, memory_budget=memory_budget, rng=7)
+        numpy.testing.assert_allclose(result, reference, rtol=1e-13)
+
+
+def test_combination_unrank_lists_all_combinations():
+    # ranks in colexicographic order, as itertools.combinations sorted by their last index first
+    reference = sorted(itertools__combinations(range(9), 4), key=lambda k: k[::-1])
+    idx = _stat_combination_unrank(numpy.arange(len(reference)), 9, 4)
+    assert [tuple(k) for k in idx] == reference
+
+
+def test_combination_indices_are_unique():
+    # ranks drawn (few possible combinations), combinations generated (many possible combinations)
+    for population_size, sample_size in [(12, 3), (40, 6)]:
+        idx = stat_combination_indices(population_size, 200, sample_size, rng=3)
+        assert idx.shape == (200, sample_size)
+        assert (numpy.diff(idx, axis=1) > 0).all() and idx.min() >= 0 and idx.max() < population_size
+        assert len(set(tuple(k) for k in idx)) == 200
+    # all combinations are returned if there are not more than requested
+    idx = stat_combination_indices(7, 40, 3, rng=3)
+    assert sorted(tuple(k) for k in idx) == list(itertools__combinations(range(7), 3))
+
+
+def test_resample_moments_match_each_sample_size():
+    # 1-D array, few series (values gathered) and many series (counts of the selected members)
+    members = numpy.random.default_rng(2).normal(3, 2, (12, 8))
+    sample_sizes = [2, 5, 8]
+    for replace in [True, False]:
+        rng = numpy.random.default_rng(5)
+        if replace is True:
+            idx = rng.integers(0, 8, (300, 8))
+        else:
+            idx = numpy.argsort(rng.random((300, 8)), axis=1)
+        for arr in [members[0], members[:3], members]:
+            sample_mean, sample_variance = stat_resample_moments(arr, sample_sizes, 300, replace, rng=5)
+            for k, siz in enumerate(sample_sizes):
+                # the sample of size n is made of the first n selected values
+                sample = numpy.moveaxis(arr[..., idx[:, :siz]], 0, -1) if arr.ndim == 2 else arr[idx[:, :siz]]
+                numpy.testing.assert_allclose(sample_mean[:, k], sample.mean(axis=1), rtol=1e-12)
+                numpy.testing.assert_allclose(sample_variance[:, k], sample.var(axis=1), rtol=1e-9, atol=1e-12)
+
+
+def _bisection_res(uncertainty, res_maximum: int, threshold: float) -> int:
+    # bisection used before the uncertainty curve was inverted (uncertainty is a function of the sample size)
+    low, res = 0, res_maximum
+    if uncertainty(res) >= threshold:
+        return res_maximum
+    while low + 1 != res:
+        size = min(res - 1, -(-(res + low) // 2))
+        if uncertainty(size) < threshold:
+            res = size
+        else:
+            low = size
+    return res
+
+
+def test_res_from_sizes_matches_bisection():
+    # monotonous uncertainty: reading the curve gives the sample size the bisection finds
+    sample_sizes = list(range(1, 41))
+    curve = [2 / k**0.5 for k in sample_sizes]
+    for threshold in numpy.linspace(0.2, 2.5, 50):
+        res = _stat_res_from_sizes(sample_sizes, [k < threshold for k in curve], 40)
+        assert res == _bisection_res(lambda k: 2 / k**0.5, 40, threshold)
+
+
+def test_res_bootstrap_matches_bisection():
+    arr = numpy.random.default_rng(4).normal(0, 1, 40)
+    thresholds = [0.6, 0.9, 1.2]
+    list_res = stat_res_bootstrap(arr, 40, 95, 20000, thresholds, uncertainty_rng=0)
+    for threshold, res in zip(thresholds, list_res):
+        reference = _bisection_res(lambda k: stat_uncertainty_bootstrap(arr, 95, False, 20000, k, uncertainty_rng=1),
+                                   40, threshold)
+        # different draws: the sample sizes can differ where the uncertainty is close to the threshold
+        assert abs(res - reference) <= 1
+
+
+@pytest.mark.parametrize("draw", [
+    lambda arr, rng: stat_bootstrap(arr, "mea", 200, 10, rng=rng),
+    lambda arr, rng: stat_combination_random(arr, "std", 200, 10, rng=rng),
+    lambda arr, rng: stat_resample_moments(arr, [5, 10], 200, True, rng=rng)[0],
+    lambda arr, rng: stat_uncertainty_select_and_compute(arr, 95, "normal", True, 200, 200, True, 10,
+                                                         uncertainty_rng=rng),
+    lambda arr, rng: stat_uncertainty_select_and_compute(arr, 95, "normal", True, 200, 200, False, 10,
+                                                         uncertainty_rng=rng)])
+def test_draws_only_use_the_given_generator(draw):
+    arr = numpy.random.default_rng(11).normal(2, 1, 30)
+    numpy.random.seed(0)
+    global_state = numpy.random.get_state()[1].copy()
+    # a seed and the generator created from this seed give the same draws
+    reference = numpy.asarray(draw(arr, 5))
+    numpy.testing.assert_array_equal(numpy.asarray(draw(arr, numpy.random.default_rng(5))), reference)
+    assert numpy.array_equal(numpy.asarray(draw(arr, 6)), reference) is False
+    # numpy's global random state is not used
+    numpy.testing.assert_array_equal(numpy.random.get_state()[1], global_state)
+
+
+def _loop_smooth_triangle(list_i: list, window: int) -> list:
+    # running average written with loops (triangle narrowed near the edges)
+    degree, list_o = window // 2, list()
+    for k in range(len(list_i)):
+        half = min(k, len(list_i) - 1 - k, degree)
+        weight = [half + 1 - abs(k2) for k2 in range(-half, half + 1)]
+        list_o.append(sum(k2 * k3 for k2, k3 in zip(list_i[k - half: k + half + 1], weight)) / sum(weight))
+    return list_o
+
+
+def test_smooth_triangle_matches_loops():
+    rng = numpy.random.default_rng(12)
+    for window, length in [(3, 3), (5, 9), (11, 11), (11, 40), (25, 100)]:
+        arr = rng.normal(size=(4, length))
+        smoothed = stat_smooth_triangle(arr, window)
+        for k in range(len(arr)):
+            reference = _loop_smooth_triangle(arr[k].tolist(), window)
+            numpy.testing.assert_allclose(smoothed[k], reference, rtol=1e-12, atol=1e-14)
+            # one series given as a list gives a list
+            assert isinstance(stat_smooth_triangle(arr[k].tolist(), window), list) is True
+            numpy.testing.assert_allclose(stat_smooth_triangle(arr[k].tolist(), window), reference, rtol=1e-12,
+                                          atol=1e-14)
+
+
+@pytest.mark.filterwarnings("ignore:Precision loss occurred in moment calculation")
+def test_moments_match_numpy_and_scipy():
+    rng = numpy.random.default_rng(13)
+    arr = rng.gamma(2., 3., (6, 25))
+    reference = {"mea": arr.mean(axis=1), "std": arr.std(axis=1), "var": arr.var(axis=1),
+                 "var_to_mea2": arr.var(axis=1) / arr.mean(axis=1)**2, "ske": scipy__stats__skew(arr, axis=1)}
+    # one traversal for all statistics of each sample (row)
+    moments = stat_moments(arr, axis=1)
+    for statistic, values in reference.items():
+        numpy.testing.assert_allclose(stat_from_moments(moments, statistic), values, rtol=1e-12)
+    # several statistics of one list
+    dict_o = stat_compute_statistic(arr[0].tolist(), list(reference.keys()))
+    assert dict_o == pytest.approx(dict((k1, k2[0]) for k1, k2 in reference.items()), rel=1e-12)
+    # skewness undefined when the spread is lost in the precision of the mean, as in scipy
+    for arr in [numpy.full(10, 3.3), 1e6 + 1e-10 * numpy.arange(10), 1e3 + 1e-10 * numpy.arange(10)]:
+        numpy.testing.assert_allclose(stat_from_moments(stat_moments(arr), "ske"), scipy__stats__skew(arr), rtol=1e-12)
+
+
+@pytest.mark.parametrize("theory", [True, False])
+def test_shared_draws_match_series_drawn_alone(theory):
+    # series x members: the same indices are used for every series, as for a series resampled alone with the same seed
+    arr = numpy.random.default_rng(14).normal(1, 1, (3, 20))
+    curves = stat_uncertainty_curve(arr, 95, "normal", True, 300, 300, theory, [5, 10, 15], uncertainty_rng=7)
+    for k in range(len(arr)):
+        curve = stat_uncertainty_curve(arr[k], 95, "normal", True, 300, 300, theory, [5, 10, 15], uncertainty_rng=7)
+        numpy.testing.assert_allclose(numpy.asarray(curves)[:, k], curve, rtol=1e-10)
+
+
+def test_uncertainty_batch_matches_rows():
+    # modes without random draws: the batch must give the uncertainty of each row, whatever the chunks of rows
+    arr = numpy.random.default_rng(15).normal(2, 1, (40, 12))
+    for theory, exact_bootstrap, sample_size in [(True, False, 12), (False, True, 12), (False, True, 6)]:
+        batch = stat_uncertainty_batch(arr, 95, "student", True, 100, 100, theory, sample_size,
+                                       uncertainty_memory_budget=0.01, uncertainty_exact_bootstrap=exact_bootstrap)
+        rows = [stat_uncertainty_select_and_compute(k, 95, "student", True, 100, 100, theory, sample_size,
+                                                    uncertainty_exact_bootstrap=exact_bootstrap) for k in arr]
+        numpy.testing.assert_allclose(batch, rows, rtol=1e-12)
+    with pytest.raises(ValueError, match="'arr_i' should be a 2-D array"):
+        stat_uncertainty_batch(arr[0], 95, "normal", True, 100, 100, True, 12)
+
+
+def _enumerated_bootstrap(list_i: list, confidence_interval: float, sample_size: int) -> float:
+    # all the len(list_i)**sample_size resamples: smallest distance to the mean reached by confidence_interval % of them
+    mean = numpy.mean(list_i)
+    distance = numpy.sort([abs(numpy.mean(k) - mean) for k in itertools__product(list_i, repeat=sample_size)])
+    frequency = numpy.arange(1, len(distance) + 1) / len(distance)
+    return float(distance[numpy.searchsorted(frequency, confidence_interval / 100 * (1 - 1e-12))])
+
+
+def test_exact_bootstrap_matches_enumeration():
+    for list_i in [[0., 1., 2., 3., 4.], [0., 0., 1., 3., 4.], [2., 5., 5., 6., 9.]]:
+        for sample_size in [1, 2, 3]:
+            for confidence_interval in [50, 68, 90, 95, 99]:
+                reference = _enumerated_bootstrap(list_i, confidence_interval, sample_size)
+                # integer values on a grid of unit step: binning moves no value
+                uncertainty = stat_uncertainty_bootstrap_exact(list_i, confidence_interval, False, sample_size,
+                                                               uncertainty_bins=int(max(list_i) - min(list_i)) + 1)
+                assert uncertainty == pytest.approx(reference, abs=1e-9)
+    # any values: the difference is smaller than the grid step
+    list_i = numpy.random.default_rng(17).normal(0, 1, 6).tolist()
+    step = (max(list_i) - min(list_i)) / (2048 - 1)
+    for confidence_interval in [68, 95]:
+        uncertainty = stat_uncertainty_bootstrap_exact(list_i, confidence_interval, False, 4)
+        assert abs(uncertainty - _enumerated_bootstrap(list_i, confidence_interval, 4)) <= step
+
+
+@pytest.mark.parametrize("theory", [True, False])
+def test_sequential_stopping(theory):
+    arr = numpy.random.default_rng(18).normal(1, 1, 30)
+    reference = stat_uncertainty_curve(arr, 95, "normal", False, 20000, 20000, theory, [10], uncertainty_rng=1)[0]
+    # unreachable tolerance: all samples are drawn, in batches, and the draws are those of a single call
+    uncertainty, nbr_draws = stat_uncertainty_sequential(arr, 95, "normal", False, 20000, 20000, theory, 10, 1e-8,
+                                                         uncertainty_batch_size=500, uncertainty_rng=1)
+    assert nbr_draws == 20000
+    assert uncertainty == pytest.approx(reference, rel=1e-12)
+    # 1% tolerance: fewer draws, the uncertainty stays within a few standard errors of the reference
+    uncertainty, nbr_draws = stat_uncertainty_sequential(arr, 95, "normal", False, 20000, 20000, theory, 10, 0.01,
+                                                         uncertainty_batch_size=500, uncertainty_rng=1)
+    assert nbr_draws < 20000
+    assert uncertainty == pytest.approx(reference, rel=0.04)
+    if theory is True:
+        # few combinations: all are used, without Monte Carlo error
+        assert stat_uncertainty_sequential(arr[:8], 95, "normal", False, 100, 100, True, 3, 0.01)[1] == 56
+        # fewer than ten times 100 combinations: the unique combinations of the curve, consumed batch after batch
+        reference = stat_uncertainty_curve(arr[:12], 95, "normal", False, 100, 100, True, [4], uncertainty_rng=2)[0]
+        uncertainty, nbr_draws = stat_uncertainty_sequential(arr[:12], 95, "normal", False, 100, 100, True, 4, 1e-8,
+                                                             uncertainty_batch_size=20, uncertainty_rng=2)
+        assert nbr_draws == 100
+        assert uncertainty == pytest.approx(reference, rel=1e-12)
+
+
+def test_control_variates_reduce_the_variance():
+    arr = numpy.random.default_rng(19).normal(1, 1, 30)
+    reference = stat_uncertainty_bootstrap_exact(arr, 95, False, 10)
+    for seed in range(3):
+        uncertainty, variance_reduction = stat_uncertainty_bootstrap_control(arr, 95, False, 20000, 10,
+                                                                             uncertainty_rng=seed)
+        assert 1 < variance_reduction < numpy.inf
+        assert uncertainty == pytest.approx(reference, rel=0.01)
+    # integer values lie on the grid of the binned control variate, which then equals the resamples within the
+    # uncertainty: the residual variance is only rounding errors and the reduction is explicitly infinite
+    arr = [0., 0., 1., 2., 3., 0., 1., 0., 0., 1.]
+    assert stat_uncertainty_bootstrap_control(arr, 95, False, 2000, 5, uncertainty_rng=0)[1] == numpy.inf
+    # equal values: nothing to reduce
+    assert stat_uncertainty_bootstrap_control([2.] * 5, 95, False, 200, 3) == (0., 1.)
+
+
+def test_balanced_combinations_cover_members_evenly():
+    # 40 members cut in 4 disjoint combinations of 10 per permutation: each member is in exactly one in four
+    idx = stat_combination_indices(40, 1000, 10, rng=1, balanced=True)
+    assert idx.shape == (1000, 10)
+    assert len(set(map(tuple, idx))) == 1000
+    assert (numpy.bincount(idx.ravel(), minlength=40) == 250).all()
+    # same target as independent combinations, reached with a smaller error
+    arr = numpy.random.default_rng(20).normal(1, 1, 40)
+    reference = stat_uncertainty_theory(arr, 95, False, 200000, 10, "normal", uncertainty_rng=0)
+    error = dict((balanced, [stat_uncertainty_theory(arr, 95, False, 1000, 10, "normal", uncertainty_rng=seed,
+                                                     uncertainty_balanced=balanced) - reference for seed in range(10)])
+                 for balanced in [False, True])
+    assert numpy.abs(error[True]).max() < 0.005
+    assert numpy.sqrt(numpy.mean(numpy.square(error[True]))) < numpy.sqrt(numpy.mean(numpy.square(error[False])))
+
+
+@pytest.mark.parametrize("population_size, sample_size", [(5, 1), (6, 3), (9, 4), (12, 11)])
+def test_revolving_door_matches_combinations(population_size, sample_size):
+    first, removed, added = _stat_combination_revolving_door(population_size, sample_size)
+    # replay the swaps: one value out, one value in, never the same combination twice
+    list_combinations = [frozenset(first.tolist())]
+    for out, new in zip(removed.tolist(), added.tolist()):
+        assert out in list_combinations[-1] and new not in list_combinations[-1]
+        list_combinations.append(list_combinations[-1] - {out} | {new})
+    assert set(list_combinations) == set(map(frozenset, itertools__combinations(range(population_size),
+                                                                                sample_size)))
+    assert len(list_combinations) == len(set(list_combinations))
+    # running moments (several blocks of swaps) match the moments computed from scratch, in the same order
+    arr = numpy.random.default_rng(21).normal(5, 2, (3, population_size))
+    sample_mean, sample_variance = stat_combination_moments(arr, sample_size, memory_budget=1e-3)
+    list_idx = [sorted(k) for k in list_combinations]
+    numpy.testing.assert_allclose(sample_mean, [arr[:, k].mean(axis=1) for k in list_idx], rtol=1e-12)
+    numpy.testing.assert_allclose(sample_variance, [arr[:, k].var(axis=1) for k in list_idx], atol=1e-12)
+
+
+def test_leave_out_downdating_matches_recomputation():
+    # large mean, small spread: the downdated sums must not lose the variance
+    arr = numpy.random.default_rng(22).normal(1e6, 1, 15)
+    excluded = [[], [0], [3, 7], list(range(1, 15, 2))]
+    sample_mean, sample_variance, sample_size = stat_leave_out_moments(arr, excluded=excluded)
+    uncertainty = stat_uncertainty_leave_out(arr, 95, "student", True, excluded=excluded)
+    res = stat_res_theory_leave_out(arr - 1e6, 100, 95, 0.5, excluded=excluded)
+    for k, members in enumerate(excluded):
+        kept = numpy.delete(arr, members)
+        assert sample_size[k] == len(kept)
+        assert sample_mean[k] == pytest.approx(kept.mean(), rel=1e-15)
+        assert sample_variance[k] == pytest.approx(kept.var(), rel=1e-9)
+        assert uncertainty[k] == pytest.approx(
+            stat_uncertainty_theory(list(kept), 95, True, 100, len(kept), "student"), rel=1e-9)
+        assert res[k] == stat_res_theory(list(kept - 1e6), 100, 95, 0.5)
+    # default: leave-one-out
+    numpy.testing.assert_allclose(stat_leave_out_moments(arr)[1], [numpy.delete(arr, k).var() for k in range(15)],
+                                  rtol=1e-9)
+
+
+@pytest.mark.parametrize("confidence_interval", [68, 90, 95, 99])
+def test_student_res_matches_brute_force(confidence_interval):
+    arr = numpy.random.default_rng(24).normal(0, 2, 12)
+    thresholds = numpy.geomspace(0.05, 20, 200).tolist()
+
+    def scan(list_i, threshold):
+        # first ensemble size whose student uncertainty is below the threshold, trying each size in turn
+        for size in range(2, 61):
+            quantile = scipy__stats__t.ppf(0.5 + confidence_interval / 200, size - 1)
+            if quantile * numpy.std(list_i) / size**0.5 <= threshold:
+                return size
+        return 60
+    assert stat_res_theory(list(arr), 60, confidence_interval, thresholds, uncertainty_distribution="student") == \
+        [scan(arr, k) for k in thresholds]
+    # leave-out variants: one variance per variant, same scan on the remaining members
+    res = stat_res_theory_leave_out(arr, 60, confidence_interval, 0.8, excluded=[[0], [1, 2]],
+                                    uncertainty_distribution="student")
+    assert res.tolist() == [scan(numpy.delete(arr, [0]), 0.8), scan(numpy.delete(arr, [1, 2]), 0.8)]
+
+
+def test_zscore_table_matches_quantile_function(monkeypatch):
+    monkeypatch.setattr(stat_lib, "dict_zscore_table", dict())
+    sizes = numpy.array([2, 3, 10, 40, 127, 128, 500, 3000])
+    for confidence_interval in [50, 95, 99.9]:
+        alpha = 0.5 + confidence_interval / 200
+        # a scalar first (small table), then sizes that make the table grow
+        assert stat_zscore(5, confidence_interval, "student") == pytest.approx(scipy__stats__t.ppf(alpha, 4),
+                                                                               rel=1e-14)
+        numpy.testing.assert_allclose(stat_zscore(sizes, confidence_interval, "student"),
+                                      scipy__stats__t.ppf(alpha, sizes - 1), rtol=1e-14)
+        numpy.testing.assert_allclose(stat_zscore(list(sizes), confidence_interval, "normal"),
+                                      scipy__stats__norm.ppf(alpha), rtol=1e-14)
+        # non-integer sizes bypass the table
+        assert stat_zscore(7.5, confidence_interval, "student") == pytest.approx(scipy__stats__t.ppf(alpha, 6.5),
+                                                                                 rel=1e-14)
+    # one table per confidence interval and distribution, kept for the next calls
+    table = stat_lib.dict_zscore_table[(95., "student")]
+    assert len(table) > 3000 and numpy.isnan(table[1])
+    stat_zscore(sizes, 95, "student")
+    assert stat_lib.dict_zscore_table[(95., "student")] is table
+
+
+def test_permutation_prefixes_are_not_repeated():
+    # C(12, 3) = 220 combinations drawn in two calls sharing the record of the drawn combinations: each is drawn once
+    arr = numpy.random.default_rng(3).normal(0, 1, (4, 12))
+    drawn = dict()
+    first_mean, first_variance = stat_resample_moments(arr, [3, 6, 3], 200, False, rng=0, drawn=drawn)
+    last_mean, last_variance = stat_resample_moments(arr, [3], 20, False, rng=1, drawn=drawn)
+    assert len(drawn[3]) == 220 and len(drawn[6]) == 200
+    assert (first_mean[:, 0] == first_mean[:, 2]).all()
+    reference = dict((round(float(arr[0, list(k)].mean()), 12), arr[:, list(k)].var(axis=1))
+                     for k in itertools__combinations(range(12), 3))
+    sample_mean = numpy.concatenate((first_mean[:, 0], last_mean[:, 0]))
+    sample_variance = numpy.concatenate((first_variance[:, 0], last_variance[:, 0]))
+    assert sorted(round(float(k), 12) for k in sample_mean[:, 0]) == sorted(reference.keys())
+    for mean, variance in zip(sample_mean, sample_variance):
+        numpy.testing.assert_allclose(variance, reference[round(float(mean[0]), 12)], atol=1e-12)
+    # the 6-member combinations are unique too
+    assert len(numpy.unique(numpy.round(first_mean[:, 1, 0], 12))) == 200
+# ---------------------------------------------------------------------------------------------------------------------#
@@ -0,0 +1,106 @@
+# -*- coding:UTF-8 -*-
+# ---------------------------------------------------------------------------------------------------------------------#
+# Tests of tool_lib: the columnar cache gives back what is read in the json file
+# ---------------------------------------------------------------------------------------------------------------------#
+
+
+# ---------------------------------------------------#
+# Import packages
+# ---------------------------------------------------#
+# basic python package
+from json import dump as json__dump
+from json import load as json__load
+# pytest
+import pytest
+# estimating_uncertainties_enso package
+from estimating_uncertainties_enso.compute_lib import tool_lib
+# ---------------------------------------------------#
+
+
+# ---------------------------------------------------------------------------------------------------------------------#
+# Tests
+# ---------------------------------------------------------------------------------------------------------------------#
+def _filter_keys(dict_i, filters: list):
+    # keep the selected keys of each nested level of a loaded json file
+    if len(filters) == 0 or isinstance(dict_i, dict) is False:
+        return dict_i
+    return dict((k1, _filter_keys(k2, filters[1:])) for k1, k2 in dict_i.items()
+                if filters[0] is None or k1 in filters[0])
+
+
+@pytest.fixture
+def json_file(tmp_path, monkeypatch):
+    # two diagnostics, two projects, missing values (None) in both
+    epochs = {"030_year_epoch": {"1850-1879": 0.5, "1880-1909": None}, "150_year_epoch": {"1850-1999": -1.25}}
+    dict_i = dict()
+    for dia, scale in [("ave_ts_val_n30e", 1.), ("var_pr_ano_nin3", 3.)]:
+        values = {
+            "cmip6": {
+                "ACCESS-ESM1-5": {
+                    "historical": dict(("r%di1p1f1" % k1, dict((k2, dict((k3, None if k4 is None else k4 * scale + k1)
+                                                                          for k3, k4 in k5.items()))
+                                                            for k2, k5 in epochs.items())) for k1 in range(1, 4)),
+                    "piControl": {"r1i1p1f1": {"030_year_epoch": {"0001-0030": None, "0031-0060": 2. * scale}}}}},
+            "observations": {"HadISST": {"historical": {"r1i1p1f1": {"030_year_epoch": {"1990-2019": scale}}}}}}
+        dict_i[dia] = {"diagnostic": {"value": values}, "metadata": {"units": "K", "name_short": dia}}
+    path = tmp_path / "values.json"
+    with open(path, "w") as ff:
+        json__dump({"RESULTS": dict_i}, ff)
+    monkeypatch.setattr(tool_lib, "_tool_json_path", lambda filename=None: str(path))
+    return str(path)
+
+
+@pytest.mark.parametrize("filters", [
+    {},
+    {"diagnostics": ["var_pr_ano_nin3"], "projects": ["cmip6"]},
+    {"experiments": ["historical"], "epoch_lengths": ["030_year_epoch"]},
+    {"projects": ["observations"], "epoch_lengths": ["150_year_epoch"]}])
+def test_columnar_cache_matches_json(json_file, filters):
+    assert tool_lib.tool_columnar_is_available() is False
+    tool_lib.tool_write_columnar()
+    assert tool_lib.tool_columnar_is_available() is True
+    dict_cache = tool_lib.tool_read_columnar(**filters)
+    assert dict_cache == tool_lib.tool_read_json(**filters)
+    if filters == {}:
+        # the missing values are still None, not nan
+        values = dict_cache["ave_ts_val_n30e"]["diagnostic"]["value"]["cmip6"]["ACCESS-ESM1-5"]
+        assert values["historical"]["r2i1p1f1"]["030_year_epoch"]["1880-1909"] is None
+        assert values["piControl"]["r1i1p1f1"]["030_year_epoch"]["0001-0030"] is None
+
+
+def test_streamed_json_matches_loaded_json(json_file):
+    # values that the streaming parser must skip or read: escaped strings, braces in strings, lists, exponents
+    with open(json_file) as ff:
+        dict_i = json__load(ff)
+    dict_i["RESULTS"]["ave_ts_val_n30e"]["metadata"]["method"] = 'mean of "ts" \\ {box: [190\u00b0E, 240\u00b0E]}'
+    dict_i["RESULTS"]["skipped_diagnostic"] = {"diagnostic": {"value": {"cmip6": [1e-3, {"}": "{"}, [], None, True]}}}
+    with open(json_file, "w") as ff:
+        json__dump(dict_i, ff, indent=2)
+    for diagnostics, projects, experiments, epoch_lengths in [
+            (["ave_ts_val_n30e"], None, None, None), (None, ["cmip6"], ["piControl"], None),
+            (["var_pr_ano_nin3", "ave_ts_val_n30e"], ["observations", "cmip6"], None, ["150_year_epoch"])]:
+        filters = [diagnostics, None, None, projects, None, experiments, None, epoch_lengths]
+        for stream in [False, True]:
+            assert tool_lib.tool_read_json(diagnostics=diagnostics, projects=projects, experiments=experiments,
+                                           epoch_lengths=epoch_lengths, stream=stream) == \
+                _filter_keys(dict_i["RESULTS"], filters)
+
+
+def test_json_streamed_only_if_asked_or_large(json_file, monkeypatch):
+    # json.load is the default reader, the file is streamed if asked or if it is larger than json_stream_size
+    calls = []
+    read_object = tool_lib._tool_json_read_object
+    monkeypatch.setattr(tool_lib, "_tool_json_read_object", lambda *args: calls.append(1) or read_object(*args))
+    dict_loaded = tool_lib.tool_read_json(diagnostics=["ave_ts_val_n30e"])
+    assert len(calls) == 0
+    assert tool_lib.tool_read_json(diagnostics=["ave_ts_val_n30e"], stream=True) == dict_loaded
+    assert len(calls) > 0
+    del calls[:]
+    monkeypatch.setattr(tool_lib, "json_stream_size", 0)
+    assert tool_lib.tool_read_json(diagnostics=["ave_ts_val_n30e"]) == dict_loaded
+    assert len(calls) > 0
+    del calls[:]
+    # nothing to skip: the file is loaded whole
+    tool_lib.tool_read_json()
+    assert len(calls) == 0
+# ---------------------------------------------------------------------------------------------------------------------#
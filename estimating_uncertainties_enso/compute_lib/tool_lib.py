@@ -9,21 +9,311 @@
 # ---------------------------------------------------#
 # basic python package
 from copy import deepcopy
-from inspect import stack as inspect__stack
+from json import dump as json__dump
+from json import JSONDecodeError as json__JSONDecodeError
+from json import JSONDecoder as json__JSONDecoder
 from json import load as json__load
 import os
+from re import compile as re__compile
 # numpy
+from numpy import array as numpy__array
+from numpy import asarray as numpy__asarray
+from numpy import full as numpy__full
+from numpy import isin as numpy__isin
+from numpy import load as numpy__load
+from numpy import nan as numpy__nan
 from numpy import ndarray as numpy__ndarray
+from numpy import nonzero as numpy__nonzero
+from numpy import save as numpy__save
 # xarray
 from xarray import open_dataset
 # estimating_uncertainties_enso package
-from . check_lib import check_type, print_fail
+from . check_lib import check_inputs, check_type
 # ---------------------------------------------------#
 
 
+# ---------------------------------------------------------------------------------------------------------------------#
+# Parameters
+# ---------------------------------------------------------------------------------------------------------------------#
+# key columns of the columnar cache, in the order of the nested levels of the json file
+columnar_columns = ["diagnostic", "project", "dataset", "experiment", "member", "epoch_length", "epoch"]
+# version of the columnar cache format (increase it if the format changes)
+columnar_version = 2
+# number of characters read at once when streaming the json file
+json_chunk_size = 2 ** 20
+json_decoder = json__JSONDecoder()
+# anything but brackets of json arrays and objects, strings and arrays or objects nested up to three levels included
+# (used to skip values)
+json_skip = r'(?:[^\[\]{}"]|"(?:[^"\\]|\\.)*")*'
+for _ in range(3):
+    json_skip = r'(?:[^\[\]{}"]|"(?:[^"\\]|\\.)*"|\{' + json_skip + r'\}|\[' + json_skip + r'\])*'
+json_skip = re__compile(json_skip)
+# size (in bytes) above which the json file is streamed even if it was not asked (json.load would need several times
+# the file size in memory)
+json_stream_size = 2 ** 30
+json_whitespace = re__compile(r"[ \t\n\r]*")
+# ---------------------------------------------------------------------------------------------------------------------#
+
+
 # ---------------------------------------------------------------------------------------------------------------------#
 # Functions
 # ---------------------------------------------------------------------------------------------------------------------#
+def _tool_columnar_directory(filename: str = None) -> str:
+    """
+    Path to the columnar cache of the json file
+
+    Input:
+    ------
+    :param filename: str
+        json file name
+
+    Output:
+    -------
+    :return: str
+        Path to the directory containing the columnar cache
+    """
+    return os.path.splitext(_tool_json_path(filename))[0] + "_columnar"
+
+
+def _tool_filter_keys(dict_i, filters: list):
+    """
+    Keep only the selected keys of each nested level of a loaded json value
+
+    Inputs:
+    -------
+    :param dict_i: anything
+        Loaded json value
+    :param filters: list
+        Keys to keep for each nested level, None to keep all keys of a level; below the last filtered level, values
+        are kept whole
+
+    Output:
+    -------
+    :return: anything
+        Json value limited to the selected keys
+    """
+    if len(filters) == 0 or isinstance(dict_i, dict) is False:
+        return dict_i
+    return dict((k1, _tool_filter_keys(k2, filters[1:])) for k1, k2 in dict_i.items()
+                if filters[0] is None or k1 in filters[0])
+
+
+def _tool_json_fill(state: dict) -> bool:
+    """
+    Read the next chunk of the json file in the buffer (the characters already parsed are dropped)
+
+    Input:
+    ------
+    :param state: dict
+        Streaming state: opened file ('file'), buffer ('buffer') and position in the buffer ('position')
+
+    Output:
+    -------
+    :return: bool
+        False if the end of the file was already reached (the buffer is then unchanged)
+    """
+    chunk = state["file"].read(json_chunk_size)
+    if len(chunk) == 0:
+        return False
+    state["buffer"] = state["buffer"][state["position"]:] + chunk
+    state["position"] = 0
+    return True
+
+
+def _tool_json_keys(state: dict):
+    """
+    Iterate over the keys of the json object starting at the current position
+    The value of each key must be read or skipped before asking for the next key
+
+    Input:
+    ------
+    :param state: dict
+        Streaming state: opened file ('file'), buffer ('buffer') and position in the buffer ('position')
+
+    Output:
+    -------
+    :return: str
+        Keys of the object, in the order of the file
+    """
+    _tool_json_next_char(state)
+    state["position"] += 1
+    while True:
+        char = _tool_json_next_char(state)
+        if char == "}":
+            state["position"] += 1
+            return
+        if char == ",":
+            state["position"] += 1
+            _tool_json_next_char(state)
+        key = _tool_json_read_value(state)
+        _tool_json_next_char(state)
+        # skip ':'
+        state["position"] += 1
+        yield key
+
+
+def _tool_json_next_char(state: dict) -> str:
+    """
+    Skip whitespaces and return the next character of the json file (the character is not consumed)
+
+    Input:
+    ------
+    :param state: dict
+        Streaming state: opened file ('file'), buffer ('buffer') and position in the buffer ('position')
+
+    Output:
+    -------
+    :return: str
+        Next character
+    """
+    while True:
+        state["position"] = json_whitespace.match(state["buffer"], state["position"]).end()
+        if state["position"] < len(state["buffer"]):
+            return state["buffer"][state["position"]]
+        if _tool_json_fill(state) is False:
+            raise json__JSONDecodeError("Unexpected end of file", state["buffer"], state["position"])
+
+
+def _tool_json_path(filename: str = None) -> str:
+    """
+    Path to the json file
+
+    Input:
+    ------
+    :param filename: str
+        json file name
+
+    Output:
+    -------
+    :return: str
+        Path to the json file in the data directory
+    """
+    if isinstance(filename, str) is False:
+        filename = "estimating_uncertainties_in_simulated_enso.json"
+    # data directory (relative to current file directory)
+    data_directory = "/".join(os.path.dirname(__file__).split("/")[:-2])
+    # path to input data file
+    return os.path.join(data_directory, "data/" + str(filename))
+
+
+def _tool_json_read_object(state: dict, filters: list):
+    """
+    Read the json value starting at the current position, skipping the keys that are not selected
+
+    Inputs:
+    -------
+    :param state: dict
+        Streaming state: opened file ('file'), buffer ('buffer') and position in the buffer ('position')
+    :param filters: list
+        Keys to read for each nested level, None to read all keys of a level; below the last filtered level, values
+        are read whole
+
+    Output:
+    -------
+    :return: anything
+        Read value
+    """
+    if len(filters) == 0 or _tool_json_next_char(state) != "{":
+        return _tool_json_read_value(state)
+    dict_o = dict()
+    for key in _tool_json_keys(state):
+        if filters[0] is None or key in filters[0]:
+            dict_o[key] = _tool_json_read_object(state, filters[1:])
+        else:
+            _tool_json_skip_value(state)
+    return dict_o
+
+
+def _tool_json_read_value(state: dict):
+    """
+    Read the whole json value starting at the current position
+
+    Input:
+    ------
+    :param state: dict
+        Streaming state: opened file ('file'), buffer ('buffer') and position in the buffer ('position')
+
+    Output:
+    -------
+    :return: anything
+        Read value
+    """
+    _tool_json_next_char(state)
+    while True:
+        try:
+            value, end = json_decoder.raw_decode(state["buffer"], state["position"])
+        except json__JSONDecodeError:
+            # value not entirely in the buffer
+            if _tool_json_fill(state) is False:
+                raise
+            continue
+        if end == len(state["buffer"]) and _tool_json_fill(state) is True:
+            # a number may be cut at the end of the buffer: decode it again with the next chunk
+            continue
+        state["position"] = end
+        return value
+
+
+def _tool_json_skip_value(state: dict):
+    """
+    Skip the json value starting at the current position without creating python objects
+
+    Input:
+    ------
+    :param state: dict
+        Streaming state: opened file ('file'), buffer ('buffer') and position in the buffer ('position')
+    """
+    if _tool_json_next_char(state) not in "[{":
+        _tool_json_read_value(state)
+        return
+    # consume the opening bracket
+    depth = 1
+    state["position"] += 1
+    while True:
+        # jump over everything but brackets (strings may contain brackets)
+        state["position"] = json_skip.match(state["buffer"], state["position"]).end()
+        char = state["buffer"][state["position"]] if state["position"] < len(state["buffer"]) else '"'
+        if char == '"':
+            # end of the buffer or string cut at the end of the buffer
+            if _tool_json_fill(state) is False:
+                raise json__JSONDecodeError("Unexpected end of file", state["buffer"], state["position"])
+            continue
+        depth += 1 if char in "[{" else -1
+        state["position"] += 1
+        if depth == 0:
+            return
+
+
+def tool_columnar_is_available(filename: str = None) -> bool:
+    """
+    Check if the columnar cache of the json file exists and is up to date
+
+    Input:
+    ------
+    :param filename: str
+        json file name
+
+    Output:
+    -------
+    :return: bool
+        True if the columnar cache can be read instead of the json file
+    """
+    json_file_path = _tool_json_path(filename)
+    index_file_path = os.path.join(_tool_columnar_directory(filename), "index.json")
+    if os.path.isfile(index_file_path) is False:
+        return False
+    with open(index_file_path) as ff:
+        index = json__load(ff)
+    if index.get("version") != columnar_version:
+        return False
+    if os.path.isfile(json_file_path) is False:
+        # the json file is not there, the cache is the only source
+        return True
+    # the cache is outdated if the json file changed
+    json_file_stat = os.stat(json_file_path)
+    return index["source_size"] == json_file_stat.st_size and index["source_mtime_ns"] == json_file_stat.st_mtime_ns
+
+
 def tool_put_in_dict(dict_i: dict, value, *args) -> dict:
     """
     Put value in the dictionary
@@ -44,11 +334,10 @@ def tool_put_in_dict(dict_i: dict, value, *args) -> dict:
         Dictionary in which the value was added at the nested level given by the list of keys
     """
     # check input
-    error = list()
-    check_type(dict_i, "dict_i", dict, error)
-    check_type(value, "value", (float, int, list, numpy__ndarray, str, type(None)), error)
-    check_type(args, "args", tuple, error)
-    print_fail(inspect__stack(), "\n".join(k for k in error))
+    check_inputs([
+        (check_type, dict_i, "dict_i", dict),
+        (check_type, value, "value", (float, int, list, numpy__ndarray, str, type(None))),
+        (check_type, args, "args", tuple)], hot_path=True)
     # put value in the dictionary
     _dict = dict_i
     for k in args:
@@ -63,34 +352,143 @@ def tool_put_in_dict(dict_i: dict, value, *args) -> dict:
     return dict_i
 
 
-def tool_read_json(filename: str = None) -> dict:
+def tool_read_json(filename: str = None, diagnostics: list = None, projects: list = None, experiments: list = None,
+                   epoch_lengths: list = None, stream: bool = False) -> dict:
     """
     Read the json file
+    By default the file is loaded whole (json.load) and the selected keys are kept
+    If stream is True (or if the file is larger than json_stream_size) and keys are selected, the file is streamed and
+    the values of the other keys are skipped without being loaded: streaming trades speed for peak memory, it is slower
+    than json.load but memory then scales with the selected data and not with the file size
 
-    Input:
-    ------
+    Inputs:
+    -------
     :param filename: str
         json file name to read
-        
+    :param diagnostics: list, optional
+        Diagnostic names to read; e.g., diagnostics = ['var_pr_ano_nin3', 'var_ts_ano_nin3']
+        Default is None (all diagnostics are read)
+    :param projects: list, optional
+        Project names to read; e.g., projects = ['cmip6', 'observations']
+        Default is None (all projects are read)
+    :param experiments: list, optional
+        Experiment names to read; e.g., experiments = ['historical', 'piControl']
+        Default is None (all experiments are read)
+    :param epoch_lengths: list, optional
+        Epoch length names to read; e.g., epoch_lengths = ['030_year_epoch', '150_year_epoch']
+        Default is None (all epoch lengths are read)
+    :param stream: bool, optional
+        True to stream the json file (lower peak memory, slower); e.g., stream = True
+        Default is False (the json file is loaded whole, unless it is larger than json_stream_size)
+
     Output:
     -------
     :return dict_o: dict
         Dictionary with nine nested levels [metric, diagnostic or metadata, value or metadata_name, project, dataset,
         experiment, member, epoch_length, epoch], filled with a value
     """
-    if isinstance(filename, str) is False:
-        filename = "estimating_uncertainties_in_simulated_enso.json"
-    # data directory (relative to current file directory)
-    data_directory = "/".join(os.path.dirname(__file__).split("/")[:-2])
+    # check input
+    check_inputs([(check_type, k2, k1, (list, type(None))) for k1, k2 in zip(
+        ["diagnostics", "projects", "experiments", "epoch_lengths"],
+        [diagnostics, projects, experiments, epoch_lengths])] + [(check_type, stream, "stream", bool)])
     # path to input data file
-    json_file_path = os.path.join(data_directory, "data/" + str(filename))
+    json_file_path = _tool_json_path(filename)
+    # keys to read for each nested level (RESULTS, metric, diagnostic or metadata, value or metadata_name, project,
+    # dataset, experiment, member, epoch_length)
+    filters = [["RESULTS"], diagnostics, None, None, projects, None, experiments, None, epoch_lengths]
+    if stream is False and os.path.getsize(json_file_path) > json_stream_size:
+        stream = True
     # load data
     with open(json_file_path) as ff:
-        dict_o = json__load(ff)
+        if all(k is None for k in filters[1:]):
+            dict_o = json__load(ff)
+        elif stream is True:
+            dict_o = _tool_json_read_object({"file": ff, "buffer": "", "position": 0}, filters)
+        else:
+            dict_o = _tool_filter_keys(json__load(ff), filters)
     ff.close()
     return dict_o["RESULTS"]
 
 
+def tool_read_columnar(filename: str = None, diagnostics: list = None, projects: list = None,
+                       experiments: list = None, epoch_lengths: list = None) -> dict:
+    """
+    Read the columnar cache of the json file (written by tool_write_columnar)
+    Arrays are memory-mapped, only the rows of the selected keys are read and put in a dictionary
+
+    Inputs:
+    -------
+    :param filename: str
+        json file name
+    :param diagnostics: list, optional
+        Diagnostic names to read; e.g., diagnostics = ['var_pr_ano_nin3', 'var_ts_ano_nin3']
+        Default is None (all diagnostics are read)
+    :param projects: list, optional
+        Project names to read; e.g., projects = ['cmip6', 'observations']
+        Default is None (all projects are read)
+    :param experiments: list, optional
+        Experiment names to read; e.g., experiments = ['historical', 'piControl']
+        Default is None (all experiments are read)
+    :param epoch_lengths: list, optional
+        Epoch length names to read; e.g., epoch_lengths = ['030_year_epoch', '150_year_epoch']
+        Default is None (all epoch lengths are read)
+
+    Output:
+    -------
+    :return dict_o: dict
+        Dictionary with the same nested levels as the one returned by tool_read_json, limited to the selected keys
+    """
+    # check input
+    check_inputs([(check_type, k2, k1, (list, type(None))) for k1, k2 in zip(
+        ["diagnostics", "projects", "experiments", "epoch_lengths"],
+        [diagnostics, projects, experiments, epoch_lengths])])
+    # read index and memory-map arrays
+    directory = _tool_columnar_directory(filename)
+    with open(os.path.join(directory, "index.json")) as ff:
+        index = json__load(ff)
+    codes = numpy__load(os.path.join(directory, "codes.npy"), mmap_mode="r")
+    missing = numpy__load(os.path.join(directory, "missing.npy"), mmap_mode="r")
+    values = numpy__load(os.path.join(directory, "values.npy"), mmap_mode="r")
+    labels = [index["labels"][k] for k in columnar_columns]
+    # codes of the selected keys for the filtered columns
+    dict_filters = dict()
+    for k1, k2 in zip(["project", "experiment", "epoch_length"], [projects, experiments, epoch_lengths]):
+        if k2 is not None:
+            position = columnar_columns.index(k1)
+            dict_filters[position] = [ii for ii, k3 in enumerate(labels[position]) if k3 in k2]
+    # rows of each diagnostic are contiguous
+    list_dia = [k for k in list(index["rows"].keys()) if diagnostics is None or k in diagnostics]
+    dict_o = dict()
+    for dia in list_dia:  # loop on diagnostics
+        start, stop = index["rows"][dia]
+        cod = numpy__asarray(codes[start:stop])
+        # number of nested levels [project, dataset, experiment, member, epoch_length, epoch] kept for each row: as
+        # in the streamed json file (see tool_read_json), the dictionaries above the first level whose key is not
+        # selected are kept (empty)
+        depth = numpy__full(stop - start, 6, dtype="int32")
+        for k1, k2 in sorted(dict_filters.items()):
+            depth[(depth == 6) & numpy__isin(cod[:, k1], k2, invert=True)] = k1 - 1
+        rows = numpy__nonzero(depth > 0)[0]
+        # put selected values in the dictionary, missing values are None as in the json file
+        dict_o[dia] = {"diagnostic": {"value": dict()}, "metadata": deepcopy(index["metadata"][dia])}
+        dict_t = dict_o[dia]["diagnostic"]["value"]
+        list_values = numpy__asarray(values[start:stop])[rows].tolist()
+        list_missing = numpy__asarray(missing[start:stop])[rows].tolist()
+        list_values = [None if k2 is True else k1 for k1, k2 in zip(list_values, list_missing)]
+        # rows are in the order of the json file: the epochs of an epoch length are contiguous, the dictionary of the
+        # epoch length is created once and then filled
+        previous_keys, dict_epochs = None, None
+        for keys, nbr, val in zip(cod[rows].tolist(), depth[rows].tolist(), list_values):
+            if keys[1:min(nbr, 5) + 1] != previous_keys:
+                previous_keys = keys[1:min(nbr, 5) + 1]
+                dict_epochs = dict_t
+                for k1, k2 in zip(previous_keys, labels[1:6]):
+                    dict_epochs = dict_epochs.setdefault(k2[k1], {})
+            if nbr == 6:
+                dict_epochs[labels[6][keys[6]]] = val
+    return dict_o
+
+
 def tool_read_netcdf(file_i, variable_i):
     """
     Read neCDF file
@@ -152,10 +550,9 @@ def tool_sort_members(dataset: str, list_members: list) -> list:
         Sorted list of members; e.g., list_o = ['r1i1p1f1', 'r2i1p1f1', 'r10i1p1f1', 'r20i1p1f1']
     """
     # check input
-    error = list()
-    check_type(dataset, "dataset", str, error)
-    check_type(list_members, "list_members", list, error)
-    print_fail(inspect__stack(), "\n".join(k for k in error))
+    check_inputs([
+        (check_type, dataset, "dataset", str),
+        (check_type, list_members, "list_members", list)])
     # sort members
     list_o = deepcopy(list_members)
     if dataset == "MPI-ESM" and len(list_members) > 1:
@@ -195,6 +592,65 @@ def tool_sort_members(dataset: str, list_members: list) -> list:
     return list_o
 
 
+def tool_write_columnar(filename: str = None) -> str:
+    """
+    Convert the json file to a columnar cache that can be memory-mapped (read it with tool_read_columnar)
+    The cache is a directory next to the json file containing:
+        'values.npy': array of floats, one value per row
+        'missing.npy': array of booleans, one per row, True if the value is missing (None in the json file)
+        'codes.npy': array of integers, one row per value, one column per key (columnar_columns), each integer being
+        the position of the key in the labels
+        'index.json': labels of each column, rows of each diagnostic, metadata of each diagnostic and details about the
+        json file (to know if the cache is outdated)
+
+    Input:
+    ------
+    :param filename: str
+        json file name to convert
+
+    Output:
+    -------
+    :return directory: str
+        Path to the directory containing the columnar cache
+    """
+    # read input json file
+    dict_i = tool_read_json(filename=filename)
+    # key labels (in the order in which they appear in the json file) and their integer codes
+    dict_labels = dict((k, dict()) for k in columnar_columns)
+    list_codes, list_missing, list_values, dict_rows, dict_metadata = list(), list(), list(), dict(), dict()
+    for dia in list(dict_i.keys()):  # loop on diagnostics
+        start = len(list_values)
+        dict_t = dict_i[dia]["diagnostic"]["value"]
+        for pro in list(dict_t.keys()):  # loop on projects
+            for dat in list(dict_t[pro].keys()):  # loop on datasets
+                for exp in list(dict_t[pro][dat].keys()):  # loop on experiments
+                    for mem in list(dict_t[pro][dat][exp].keys()):  # loop on members
+                        for dur in list(dict_t[pro][dat][exp][mem].keys()):  # loop on epoch lengths
+                            for epo, val in dict_t[pro][dat][exp][mem][dur].items():  # loop on epochs
+                                list_codes.append([dict_labels[k1].setdefault(k2, len(dict_labels[k1])) for k1, k2 in
+                                                   zip(columnar_columns, [dia, pro, dat, exp, mem, dur, epo])])
+                                list_missing.append(val is None)
+                                list_values.append(numpy__nan if val is None else float(val))
+        dict_rows[dia] = [start, len(list_values)]
+        dict_metadata[dia] = dict_i[dia]["metadata"]
+    # write arrays
+    directory = _tool_columnar_directory(filename)
+    os.makedirs(directory, exist_ok=True)
+    numpy__save(os.path.join(directory, "codes.npy"), numpy__array(list_codes, dtype="int32").reshape(-1, len(
+        columnar_columns)))
+    numpy__save(os.path.join(directory, "missing.npy"), numpy__array(list_missing, dtype=bool))
+    numpy__save(os.path.join(directory, "values.npy"), numpy__array(list_values, dtype="float64"))
+    # write index last: the cache is not available until it is complete
+    json_file_stat = os.stat(_tool_json_path(filename))
+    index = {
+        "version": columnar_version, "source_size": json_file_stat.st_size,
+        "source_mtime_ns": json_file_stat.st_mtime_ns, "rows": dict_rows, "metadata": dict_metadata,
+        "labels": dict((k, list(dict_labels[k].keys())) for k in columnar_columns)}
+    with open(os.path.join(directory, "index.json"), "w") as ff:
+        json__dump(index, ff)
+    return directory
+
+
 def tool_tuple_for_dict(tuple_of_keys: tuple, tuple_of_last_key: tuple) -> (tuple, tuple):
     """
     Remove keys that reached the end of the list
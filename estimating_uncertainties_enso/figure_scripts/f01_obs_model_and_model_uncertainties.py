@@ -41,6 +41,10 @@ default = {
     "data_observations_desired": default_parameters["data_observations_desired"],
     # list of rejected SMILEs
     "data_smile_rejected": default_parameters["data_smile_rejected"],
+    # read the columnar cache of the json file (created at the first call, faster reads): True, False
+    "data_columnar_cache": default_parameters["data_columnar_cache"],
+    # stream the json file (slower, but lower peak memory; very large files are always streamed): True, False
+    "data_stream_json": default_parameters["data_stream_json"],
     #
     # -- Figure
     #
@@ -114,6 +118,8 @@ def f01_model_uncertainties(
         data_mme_use_smile_mean: bool = default["data_mme_use_smile_mean"],
         data_observations_desired: dict = default["data_observations_desired"],
         data_smile_rejected: list = default["data_smile_rejected"],
+        data_columnar_cache: bool = default["data_columnar_cache"],
+        data_stream_json: bool = default["data_stream_json"],
         fig_colors: dict = default["fig_colors"],
         fig_format: str = default["fig_format"],
         fig_legend_position: str = default["fig_legend_position"],
@@ -135,7 +141,8 @@ def f01_model_uncertainties(
     values, metadata = data_organize_json(
         data_diagnostics, data_epoch_lengths, data_projects, data_experiments, data_mme_create=data_mme_create,
         data_mme_use_all_smiles=data_mme_use_all_smiles, data_mme_use_smile_mean=data_mme_use_smile_mean,
-        data_observations_desired=data_observations_desired, data_smile_rejected=data_smile_rejected)
+        data_observations_desired=data_observations_desired, data_smile_rejected=data_smile_rejected,
+        data_columnar_cache=data_columnar_cache, data_stream_json=data_stream_json)
     #
     # -- Read netCDF
     #
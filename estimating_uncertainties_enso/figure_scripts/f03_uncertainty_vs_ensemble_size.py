@@ -10,6 +10,7 @@
 # ---------------------------------------------------#
 # estimating_uncertainties_enso package
 from . params import default_parameters
+from estimating_uncertainties_enso.compute_lib.check_lib import check_trusted_inputs_scope
 from estimating_uncertainties_enso.compute_lib.data_lib import data_organize_json
 from estimating_uncertainties_enso.compute_lib.nest_lib import nest_compute_uncertainty, nest_influence_of_ensemble_size
 from estimating_uncertainties_enso.compute_lib.tool_lib import tool_put_in_dict
@@ -46,6 +47,10 @@ default = {
     "data_smile_rejected": default_parameters["data_smile_rejected"],
     # require all experiments to keep SMILE: True, False
     "data_smile_require_all_experiments": default_parameters["data_smile_require_all_experiments"],
+    # read the columnar cache of the json file (created at the first call, faster reads): True, False
+    "data_columnar_cache": default_parameters["data_columnar_cache"],
+    # stream the json file (slower, but lower peak memory; very large files are always streamed): True, False
+    "data_stream_json": default_parameters["data_stream_json"],
     #
     # -- Uncertainty
     #
@@ -61,6 +66,24 @@ default = {
     "uncertainty_combinations": default_parameters["uncertainty_combinations"],
     # number of resamples used for the bootstrap if uncertainty_theory is False: int [10, 1e10]
     "uncertainty_resamples": default_parameters["uncertainty_resamples"],
+    # number of processes used to compute the uncertainty of the datasets and epochs in parallel: int [1, 1e5]
+    "uncertainty_n_jobs": default_parameters["uncertainty_n_jobs"],
+    # seed of the random numbers (None to draw different random numbers at each call): int [0, 2**32 - 1], None
+    "uncertainty_seed": default_parameters["uncertainty_seed"],
+    # skip the checks of the inputs in internal hot paths (faster, but wrong inputs are not explained): True, False
+    "uncertainty_trusted_inputs": default_parameters["uncertainty_trusted_inputs"],
+    # same draws for all diagnostics, epoch lengths and epochs of a SMILE (faster, uncertainties not independent):
+    # True, False
+    "uncertainty_shared_draws": default_parameters["uncertainty_shared_draws"],
+    # bootstrap distribution of the sample mean computed without resampling if uncertainty_theory is False (faster,
+    # see stat_uncertainty_bootstrap_exact): True, False
+    "uncertainty_exact_bootstrap": default_parameters["uncertainty_exact_bootstrap"],
+    # relative Monte Carlo standard error at which the draws stop (None to draw all uncertainty_combinations or
+    # uncertainty_resamples samples): float [1e-8, 1], None
+    "uncertainty_tolerance": default_parameters["uncertainty_tolerance"],
+    # bootstrap resamples corrected with control variates if uncertainty_theory is False (about ten times fewer
+    # resamples for the same precision, see stat_uncertainty_bootstrap_control): True, False
+    "uncertainty_control_variate": default_parameters["uncertainty_control_variate"],
     # list of sample sizes for which the uncertainty will be computed
     "uncertainty_sample_sizes": default_parameters["uncertainty_sample_sizes"],
     #
@@ -135,13 +158,22 @@ def f03_ensemble_size(
         data_smile_minimum_size: int = default["data_smile_minimum_size"],
         data_smile_rejected: list = default["data_smile_rejected"],
         data_smile_require_all_experiments: bool = default["data_smile_require_all_experiments"],
+        data_columnar_cache: bool = default["data_columnar_cache"],
+        data_stream_json: bool = default["data_stream_json"],
         uncertainty_combinations: int = default["uncertainty_combinations"],
         uncertainty_confidence_interval: float = default["uncertainty_confidence_interval"],
+        uncertainty_control_variate: bool = default["uncertainty_control_variate"],
         uncertainty_distribution: str = default["uncertainty_distribution"],
+        uncertainty_exact_bootstrap: bool = default["uncertainty_exact_bootstrap"],
+        uncertainty_n_jobs: int = default["uncertainty_n_jobs"],
         uncertainty_relative: bool = default["uncertainty_relative"],
         uncertainty_resamples: int = default["uncertainty_resamples"],
         uncertainty_sample_sizes: list = default["uncertainty_sample_sizes"],
+        uncertainty_seed: int = default["uncertainty_seed"],
+        uncertainty_shared_draws: bool = default["uncertainty_shared_draws"],
         uncertainty_theory: bool = default["uncertainty_theory"],
+        uncertainty_tolerance: float = default["uncertainty_tolerance"],
+        uncertainty_trusted_inputs: bool = default["uncertainty_trusted_inputs"],
         fig_colors: dict = default["fig_colors"],
         fig_format: str = default["fig_format"],
         fig_legend_position: str = default["fig_legend_position"],
@@ -159,89 +191,97 @@ def f03_ensemble_size(
         fig_uncertainty_reference: str = default["fig_uncertainty_reference"],
         panel_param: dict = default["panel_param"],
         **kwargs):
-    #
-    # -- Read json
-    #
-    values, metadata = data_organize_json(
-        data_diagnostics, data_epoch_lengths, data_projects, data_experiments, data_filename=data_filename,
-        data_mme_create=data_mme_create, data_mme_use_all_smiles=data_mme_use_all_smiles,
-        data_mme_use_smile_mean=data_mme_use_smile_mean, data_smile_minimum_size=data_smile_minimum_size,
-        data_smile_rejected=data_smile_rejected, data_smile_require_all_experiments=data_smile_require_all_experiments)
-    #
-    # -- Compute uncertainty
-    #
-    uncertainties, _, _ = nest_compute_uncertainty(
-        values, uncertainty_confidence_interval, uncertainty_distribution, uncertainty_relative,
-        uncertainty_combinations, uncertainty_resamples, uncertainty_theory,
-        uncertainty_sample_sizes=uncertainty_sample_sizes)
-    #
-    # -- Compute the influence of the ensemble size on uncertainty
-    #
-    influence = nest_influence_of_ensemble_size(uncertainties, fig_uncertainty_reference)
-    #
-    # -- Organize data to for figure
-    #
-    method = "relative" if uncertainty_relative is True else "absolute"
-    for dia in list(influence.keys()):
-        # x-y titles
-        title = ""
-        if "x_axis" in list(fig_titles.keys()) and fig_uncertainty_reference in list(fig_titles["x_axis"].keys()):
-            title = fig_titles["x_axis"][fig_uncertainty_reference]
-        fig_titles = tool_put_in_dict(fig_titles, title, "x_axis", dia)
-        title = ""
-        if "y_axis" in list(fig_titles.keys()) and fig_uncertainty_reference in list(fig_titles["y_axis"].keys()):
-            title = str(fig_titles[method]) + " " + str(fig_titles["y_axis"][fig_uncertainty_reference])
-            title = title.replace("NBR_MEM", str(data_smile_minimum_size))
-        fig_titles = tool_put_in_dict(fig_titles, title, "y_axis", dia)
-        # x tics
-        if "x_axis" in list(fig_ticks.keys()) and isinstance(fig_ticks["x_axis"], dict) is True and \
-                dia in list(fig_ticks["x_axis"].keys()) and isinstance(fig_ticks["x_axis"][dia], list) is True:
-            pass
-        else:
-            list_ticks = None
+    # skip (or not) the checks of the inputs in internal hot paths, also in the worker processes (the previous mode
+    # is restored once the figure is done)
+    with check_trusted_inputs_scope(uncertainty_trusted_inputs):
+        #
+        # -- Read json
+        #
+        values, metadata = data_organize_json(
+            data_diagnostics, data_epoch_lengths, data_projects, data_experiments, data_filename=data_filename,
+            data_mme_create=data_mme_create, data_mme_use_all_smiles=data_mme_use_all_smiles,
+            data_mme_use_smile_mean=data_mme_use_smile_mean, data_smile_minimum_size=data_smile_minimum_size,
+            data_smile_rejected=data_smile_rejected,
+            data_smile_require_all_experiments=data_smile_require_all_experiments,
+            data_columnar_cache=data_columnar_cache, data_stream_json=data_stream_json)
+        #
+        # -- Compute uncertainty
+        #
+        uncertainties, _, _ = nest_compute_uncertainty(
+            values, uncertainty_confidence_interval, uncertainty_distribution, uncertainty_relative,
+            uncertainty_combinations, uncertainty_resamples, uncertainty_theory,
+            uncertainty_sample_sizes=uncertainty_sample_sizes, n_jobs=uncertainty_n_jobs,
+            uncertainty_seed=uncertainty_seed, uncertainty_shared_draws=uncertainty_shared_draws,
+            uncertainty_exact_bootstrap=uncertainty_exact_bootstrap, uncertainty_tolerance=uncertainty_tolerance,
+            uncertainty_control_variate=uncertainty_control_variate)
+        #
+        # -- Compute the influence of the ensemble size on uncertainty
+        #
+        influence = nest_influence_of_ensemble_size(uncertainties, fig_uncertainty_reference)
+        #
+        # -- Organize data to for figure
+        #
+        method = "relative" if uncertainty_relative is True else "absolute"
+        for dia in list(influence.keys()):
+            # x-y titles
+            title = ""
+            if "x_axis" in list(fig_titles.keys()) and fig_uncertainty_reference in list(fig_titles["x_axis"].keys()):
+                title = fig_titles["x_axis"][fig_uncertainty_reference]
+            fig_titles = tool_put_in_dict(fig_titles, title, "x_axis", dia)
+            title = ""
+            if "y_axis" in list(fig_titles.keys()) and fig_uncertainty_reference in list(fig_titles["y_axis"].keys()):
+                title = str(fig_titles[method]) + " " + str(fig_titles["y_axis"][fig_uncertainty_reference])
+                title = title.replace("NBR_MEM", str(data_smile_minimum_size))
+            fig_titles = tool_put_in_dict(fig_titles, title, "y_axis", dia)
+            # x tics
             if "x_axis" in list(fig_ticks.keys()) and isinstance(fig_ticks["x_axis"], dict) is True and \
-                    fig_uncertainty_reference in list(fig_ticks["x_axis"].keys()) and \
-                    isinstance(fig_ticks["x_axis"][fig_uncertainty_reference], list) is True:
-                list_ticks = fig_ticks["x_axis"][fig_uncertainty_reference]
-            fig_ticks = tool_put_in_dict(fig_ticks, list_ticks, "x_axis", dia)
-        # y tics
-        if "y_axis" in list(fig_ticks.keys()) and isinstance(fig_ticks["y_axis"], dict) is True and \
-                dia in list(fig_ticks["y_axis"].keys()) and isinstance(fig_ticks["y_axis"][dia], list) is True:
-            pass
-        else:
-            list_ticks = None
+                    dia in list(fig_ticks["x_axis"].keys()) and isinstance(fig_ticks["x_axis"][dia], list) is True:
+                pass
+            else:
+                list_ticks = None
+                if "x_axis" in list(fig_ticks.keys()) and isinstance(fig_ticks["x_axis"], dict) is True and \
+                        fig_uncertainty_reference in list(fig_ticks["x_axis"].keys()) and \
+                        isinstance(fig_ticks["x_axis"][fig_uncertainty_reference], list) is True:
+                    list_ticks = fig_ticks["x_axis"][fig_uncertainty_reference]
+                fig_ticks = tool_put_in_dict(fig_ticks, list_ticks, "x_axis", dia)
+            # y tics
             if "y_axis" in list(fig_ticks.keys()) and isinstance(fig_ticks["y_axis"], dict) is True and \
-                    fig_uncertainty_reference in list(fig_ticks["y_axis"].keys()) and \
-                    isinstance(fig_ticks["y_axis"][fig_uncertainty_reference], list) is True:
-                list_ticks = fig_ticks["y_axis"][fig_uncertainty_reference]
-            elif "y_axis" in list(fig_ticks.keys()) and isinstance(fig_ticks["y_axis"], dict) is True and \
-                    fig_uncertainty_reference in list(fig_ticks["y_axis"].keys()) and \
-                    isinstance(fig_ticks["y_axis"][fig_uncertainty_reference], dict) is True and \
-                    dia in list(fig_ticks["y_axis"][fig_uncertainty_reference].keys()) and \
-                    isinstance(fig_ticks["y_axis"][fig_uncertainty_reference][dia], list) is True:
-                list_ticks = fig_ticks["y_axis"][fig_uncertainty_reference][dia]
-            fig_ticks = tool_put_in_dict(fig_ticks, list_ticks, "y_axis", dia)
-    #
-    # -- Figure
-    #
-    # output figure name will be the file name (path removed and extension removed)
-    fig_name = __file__.split("/")[-1].split(".")[0] + str(fig_name_add)
-    if fig_name_details is True:
-        # add details of the computation to the figure name
-        fig_name += "_data_" + str(len(data_projects)) + "pro_" + str(len(data_experiments)) + "exp_" + \
-                    str(data_smile_minimum_size) + "mem_" + str(len(data_diagnostics)) + "dia"
-        if data_mme_create is True:
-            fig_name += "_mme"
-            fig_name += "_of_em" if data_mme_use_smile_mean is True else "_of_1m"
-            fig_name += "_all_smile" if data_mme_use_all_smiles is True else "_1st_smile"
-        fig_name += "_relative_uncertainty" if uncertainty_relative is True else "_absolute_uncertainty"
-        fig_name += "_theory" if uncertainty_theory is True else "_random"
-        fig_name += "_" + str(uncertainty_confidence_interval) + "ci_" + str(fig_uncertainty_reference)
-        if uncertainty_theory is True:
-            fig_name += "_" + str(uncertainty_distribution) + "_distribution"
-        fig_name += "_" + str(fig_orientation)
-    fig_influence_of(influence, data_diagnostics, data_experiments, fig_format, fig_name, fig_colors,
-                     fig_legend_position, fig_linestyles, fig_linewidth, fig_linezorder, fig_markers, fig_marker_size,
-                     fig_orientation, fig_panel_size, fig_ticks, fig_titles, data_smile_minimum_size, "ensemble_size",
-                     fig_uncertainty_reference, panel_param=panel_param)
+                    dia in list(fig_ticks["y_axis"].keys()) and isinstance(fig_ticks["y_axis"][dia], list) is True:
+                pass
+            else:
+                list_ticks = None
+                if "y_axis" in list(fig_ticks.keys()) and isinstance(fig_ticks["y_axis"], dict) is True and \
+                        fig_uncertainty_reference in list(fig_ticks["y_axis"].keys()) and \
+                        isinstance(fig_ticks["y_axis"][fig_uncertainty_reference], list) is True:
+                    list_ticks = fig_ticks["y_axis"][fig_uncertainty_reference]
+                elif "y_axis" in list(fig_ticks.keys()) and isinstance(fig_ticks["y_axis"], dict) is True and \
+                        fig_uncertainty_reference in list(fig_ticks["y_axis"].keys()) and \
+                        isinstance(fig_ticks["y_axis"][fig_uncertainty_reference], dict) is True and \
+                        dia in list(fig_ticks["y_axis"][fig_uncertainty_reference].keys()) and \
+                        isinstance(fig_ticks["y_axis"][fig_uncertainty_reference][dia], list) is True:
+                    list_ticks = fig_ticks["y_axis"][fig_uncertainty_reference][dia]
+                fig_ticks = tool_put_in_dict(fig_ticks, list_ticks, "y_axis", dia)
+        #
+        # -- Figure
+        #
+        # output figure name will be the file name (path removed and extension removed)
+        fig_name = __file__.split("/")[-1].split(".")[0] + str(fig_name_add)
+        if fig_name_details is True:
+            # add details of the computation to the figure name
+            fig_name += "_data_" + str(len(data_projects)) + "pro_" + str(len(data_experiments)) + "exp_" + \
+                        str(data_smile_minimum_size) + "mem_" + str(len(data_diagnostics)) + "dia"
+            if data_mme_create is True:
+                fig_name += "_mme"
+                fig_name += "_of_em" if data_mme_use_smile_mean is True else "_of_1m"
+                fig_name += "_all_smile" if data_mme_use_all_smiles is True else "_1st_smile"
+            fig_name += "_relative_uncertainty" if uncertainty_relative is True else "_absolute_uncertainty"
+            fig_name += "_theory" if uncertainty_theory is True else "_random"
+            fig_name += "_" + str(uncertainty_confidence_interval) + "ci_" + str(fig_uncertainty_reference)
+            if uncertainty_theory is True:
+                fig_name += "_" + str(uncertainty_distribution) + "_distribution"
+            fig_name += "_" + str(fig_orientation)
+        fig_influence_of(influence, data_diagnostics, data_experiments, fig_format, fig_name, fig_colors,
+                         fig_legend_position, fig_linestyles, fig_linewidth, fig_linezorder, fig_markers,
+                         fig_marker_size, fig_orientation, fig_panel_size, fig_ticks, fig_titles,
+                         data_smile_minimum_size, "ensemble_size", fig_uncertainty_reference, panel_param=panel_param)
 # ---------------------------------------------------------------------------------------------------------------------#
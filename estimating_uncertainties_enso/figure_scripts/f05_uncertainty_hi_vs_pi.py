@@ -10,6 +10,7 @@
 # ---------------------------------------------------#
 # estimating_uncertainties_enso package
 from . params import default_parameters
+from estimating_uncertainties_enso.compute_lib.check_lib import check_trusted_inputs_scope
 from estimating_uncertainties_enso.compute_lib.data_lib import data_organize_json
 from estimating_uncertainties_enso.compute_lib.nest_lib import nest_compute_uncertainty_hi_vs_pi
 from estimating_uncertainties_enso.compute_lib.tool_lib import tool_put_in_dict
@@ -46,6 +47,10 @@ default = {
     "data_smile_rejected": default_parameters["data_smile_rejected"],
     # require all experiments to keep SMILE: True, False
     "data_smile_require_all_experiments": default_parameters["data_smile_require_all_experiments"],
+    # read the columnar cache of the json file (created at the first call, faster reads): True, False
+    "data_columnar_cache": default_parameters["data_columnar_cache"],
+    # stream the json file (slower, but lower peak memory; very large files are always streamed): True, False
+    "data_stream_json": default_parameters["data_stream_json"],
     #
     # -- Uncertainty
     #
@@ -63,6 +68,13 @@ default = {
     "uncertainty_resamples": default_parameters["uncertainty_resamples"],
     # first epoch, last epoch or averaged across epochs used for historical experiments
     "uncertainty_historical_epoch": "averaged",
+    # seed of the random numbers (None to draw different random numbers at each call): int [0, 2**32 - 1], None
+    "uncertainty_seed": default_parameters["uncertainty_seed"],
+    # skip the checks of the inputs in internal hot paths (faster, but wrong inputs are not explained): True, False
+    "uncertainty_trusted_inputs": default_parameters["uncertainty_trusted_inputs"],
+    # bootstrap distribution of the sample mean computed without resampling if uncertainty_theory is False (faster,
+    # see stat_uncertainty_bootstrap_exact): True, False
+    "uncertainty_exact_bootstrap": default_parameters["uncertainty_exact_bootstrap"],
     #
     # -- Figure
     #
@@ -483,13 +495,18 @@ def f05_hi_vs_pi(
         data_smile_minimum_size: int = default["data_smile_minimum_size"],
         data_smile_rejected: list = default["data_smile_rejected"],
         data_smile_require_all_experiments: bool = default["data_smile_require_all_experiments"],
+        data_columnar_cache: bool = default["data_columnar_cache"],
+        data_stream_json: bool = default["data_stream_json"],
         uncertainty_combinations: int = default["uncertainty_combinations"],
         uncertainty_confidence_interval: float = default["uncertainty_confidence_interval"],
         uncertainty_distribution: str = default["uncertainty_distribution"],
+        uncertainty_exact_bootstrap: bool = default["uncertainty_exact_bootstrap"],
         uncertainty_historical_epoch: str = default["uncertainty_historical_epoch"],
         uncertainty_relative: bool = default["uncertainty_relative"],
         uncertainty_resamples: int = default["uncertainty_resamples"],
+        uncertainty_seed: int = default["uncertainty_seed"],
         uncertainty_theory: bool = default["uncertainty_theory"],
+        uncertainty_trusted_inputs: bool = default["uncertainty_trusted_inputs"],
         fig_colors: dict = default["fig_colors"],
         fig_format: str = default["fig_format"],
         fig_legend_position: str = default["fig_legend_position"],
@@ -503,97 +520,105 @@ def f05_hi_vs_pi(
         fig_titles: dict = default["fig_titles"],
         panel_param: dict = default["panel_param"],
         **kwargs):
-    #
-    # -- Read json
-    #
-    values, metadata = data_organize_json(
-        data_diagnostics, data_epoch_lengths, data_projects, data_experiments, data_filename=data_filename,
-        data_mme_create=data_mme_create, data_mme_use_all_smiles=data_mme_use_all_smiles,
-        data_mme_use_smile_mean=data_mme_use_smile_mean, data_smile_minimum_size=data_smile_minimum_size,
-        data_smile_rejected=data_smile_rejected, data_smile_require_all_experiments=data_smile_require_all_experiments)
-    #
-    # -- Compute uncertainty with the same sample size for piControl and historical
-    #
-    uncertainties = nest_compute_uncertainty_hi_vs_pi(
-        values, uncertainty_confidence_interval, uncertainty_distribution, uncertainty_relative,
-        uncertainty_combinations, uncertainty_resamples, uncertainty_theory, uncertainty_historical_epoch,
-        reference_experiment="piControl")
-    #
-    # -- Organize data to for figure
-    #
-    figure_ticks = {}
-    method = "relative" if uncertainty_relative is True else "absolute"
-    for dur in list(uncertainties.keys()):
-        for dia in list(uncertainties[dur].keys()):
-            units = ""
-            if method == "absolute" and metadata[dia]["units"] != "":
-                units = " (" + str(metadata[dia]["units"]) + ")"
-            elif method == "relative":
-                units = " (%)"
-            # x-axis
-            name = str(fig_titles[method]) + " in piControl" + str(units)
-            if "x_axis" in list(fig_titles.keys()) and isinstance(fig_titles["x_axis"], dict) is True and \
-                    dia in list(fig_titles["x_axis"].keys()) and isinstance(fig_titles["x_axis"][dia], str) is True:
-                pass
-            else:
-                fig_titles = tool_put_in_dict(fig_titles, name, "x_axis", dia)
-            # y-axis
-            name = str(fig_titles[method]) + " in historical "
-            if uncertainty_historical_epoch == "averaged":
-                name += str(uncertainty_historical_epoch) + "\nacross epochs"
-            else:
-                name += str(uncertainty_historical_epoch) + "\nepoch"
-            name += str(units)
-            if "y_axis" in list(fig_titles.keys()) and isinstance(fig_titles["y_axis"], dict) is True and \
-                    dia in list(fig_titles["y_axis"].keys()) and isinstance(fig_titles["y_axis"][dia], str) is True:
-                pass
-            else:
-                fig_titles = tool_put_in_dict(fig_titles, name, "y_axis", dia)
-            # x-y tics
-            for k1 in ["x_axis", "y_axis"]:
-                k2 = "y_axis" if k1 == "x_axis" else "x_axis"
-                list_ticks = None
-                if k1 in list(fig_ticks.keys()) and isinstance(fig_ticks[k1], dict) is True and \
-                        dia in list(fig_ticks[k1].keys()) and isinstance(fig_ticks[k1][dia], list) is True:
-                    list_ticks = fig_ticks[k1][dia]
-                elif k1 in list(fig_ticks.keys()) and isinstance(fig_ticks[k1], dict) is True and \
-                        dur in list(fig_ticks[k1].keys()) and isinstance(fig_ticks[k1][dur], dict) is True and \
-                        dia in list(fig_ticks[k1][dur].keys()) and isinstance(fig_ticks[k1][dur][dia], list) is True:
-                    list_ticks = fig_ticks[k1][dur][dia]
-                elif k2 in list(fig_ticks.keys()) and isinstance(fig_ticks[k2], dict) is True and \
-                        dia in list(fig_ticks[k2].keys()) and isinstance(fig_ticks[k2][dia], list) is True:
-                    list_ticks = fig_ticks[k2][dia]
-                elif k2 in list(fig_ticks.keys()) and isinstance(fig_ticks[k2], dict) is True and \
-                        dur in list(fig_ticks[k2].keys()) and isinstance(fig_ticks[k2][dur], dict) is True and \
-                        dia in list(fig_ticks[k2][dur].keys()) and isinstance(fig_ticks[k2][dur][dia], list) is True:
-                    list_ticks = fig_ticks[k2][dur][dia]
-                figure_ticks = tool_put_in_dict(figure_ticks, list_ticks, dur, k1, dia)
-    #
-    # -- Figure
-    #
-    for dur in list(uncertainties.keys()):
-        # output figure name will be the file name (path removed and extension removed)
-        fig_name = __file__.split("/")[-1].split(".")[0] + str(fig_name_add) + "_" + str(dur)
-        if fig_name_details is True:
-            # add details of the computation to the figure name
-            fig_name += "_data_" + str(len(data_projects)) + "pro_" + str(len(data_experiments)) + "exp_" + \
-                        str(data_smile_minimum_size) + "mem_" + str(len(data_diagnostics)) + "dia"
-            if len(data_epoch_lengths) == 1:
-                fig_name += "_" + str(data_epoch_lengths[0])
-            else:
-                fig_name += "_" + str(len(data_epoch_lengths)) + "dur"
-            if data_mme_create is True:
-                fig_name += "_mme"
-                fig_name += "_of_em" if data_mme_use_smile_mean is True else "_of_1m"
-                fig_name += "_all_smile" if data_mme_use_all_smiles is True else "_1st_smile"
-            fig_name += "_relative_uncertainty" if uncertainty_relative is True else "_absolute_uncertainty"
-            fig_name += "_theory" if uncertainty_theory is True else "_random"
-            fig_name += "_" + str(uncertainty_confidence_interval) + "ci"
-            if uncertainty_theory is True:
-                fig_name += "_" + str(uncertainty_distribution) + "_distribution"
-            fig_name += "_" + str(uncertainty_historical_epoch) + "_epoch"
-            fig_name += "_" + str(fig_orientation)
-        fig_scatter_and_regression(uncertainties[dur], data_diagnostics, fig_format, fig_name, fig_colors, fig_markers,
-                                   fig_marker_size, fig_orientation, fig_panel_size, figure_ticks[dur], fig_titles,
-                                   fig_legend_position=fig_legend_position, panel_param=panel_param)
+    # skip (or not) the checks of the inputs in internal hot paths, also in the worker processes (the previous mode
+    # is restored once the figure is done)
+    with check_trusted_inputs_scope(uncertainty_trusted_inputs):
+        #
+        # -- Read json
+        #
+        values, metadata = data_organize_json(
+            data_diagnostics, data_epoch_lengths, data_projects, data_experiments, data_filename=data_filename,
+            data_mme_create=data_mme_create, data_mme_use_all_smiles=data_mme_use_all_smiles,
+            data_mme_use_smile_mean=data_mme_use_smile_mean, data_smile_minimum_size=data_smile_minimum_size,
+            data_smile_rejected=data_smile_rejected,
+            data_smile_require_all_experiments=data_smile_require_all_experiments,
+            data_columnar_cache=data_columnar_cache, data_stream_json=data_stream_json)
+        #
+        # -- Compute uncertainty with the same sample size for piControl and historical
+        #
+        uncertainties = nest_compute_uncertainty_hi_vs_pi(
+            values, uncertainty_confidence_interval, uncertainty_distribution, uncertainty_relative,
+            uncertainty_combinations, uncertainty_resamples, uncertainty_theory, uncertainty_historical_epoch,
+            reference_experiment="piControl", uncertainty_seed=uncertainty_seed,
+            uncertainty_exact_bootstrap=uncertainty_exact_bootstrap)
+        #
+        # -- Organize data to for figure
+        #
+        figure_ticks = {}
+        method = "relative" if uncertainty_relative is True else "absolute"
+        for dur in list(uncertainties.keys()):
+            for dia in list(uncertainties[dur].keys()):
+                units = ""
+                if method == "absolute" and metadata[dia]["units"] != "":
+                    units = " (" + str(metadata[dia]["units"]) + ")"
+                elif method == "relative":
+                    units = " (%)"
+                # x-axis
+                name = str(fig_titles[method]) + " in piControl" + str(units)
+                if "x_axis" in list(fig_titles.keys()) and isinstance(fig_titles["x_axis"], dict) is True and \
+                        dia in list(fig_titles["x_axis"].keys()) and isinstance(fig_titles["x_axis"][dia], str) is True:
+                    pass
+                else:
+                    fig_titles = tool_put_in_dict(fig_titles, name, "x_axis", dia)
+                # y-axis
+                name = str(fig_titles[method]) + " in historical "
+                if uncertainty_historical_epoch == "averaged":
+                    name += str(uncertainty_historical_epoch) + "\nacross epochs"
+                else:
+                    name += str(uncertainty_historical_epoch) + "\nepoch"
+                name += str(units)
+                if "y_axis" in list(fig_titles.keys()) and isinstance(fig_titles["y_axis"], dict) is True and \
+                        dia in list(fig_titles["y_axis"].keys()) and isinstance(fig_titles["y_axis"][dia], str) is True:
+                    pass
+                else:
+                    fig_titles = tool_put_in_dict(fig_titles, name, "y_axis", dia)
+                # x-y tics
+                for k1 in ["x_axis", "y_axis"]:
+                    k2 = "y_axis" if k1 == "x_axis" else "x_axis"
+                    list_ticks = None
+                    if k1 in list(fig_ticks.keys()) and isinstance(fig_ticks[k1], dict) is True and \
+                            dia in list(fig_ticks[k1].keys()) and isinstance(fig_ticks[k1][dia], list) is True:
+                        list_ticks = fig_ticks[k1][dia]
+                    elif k1 in list(fig_ticks.keys()) and isinstance(fig_ticks[k1], dict) is True and \
+                            dur in list(fig_ticks[k1].keys()) and isinstance(fig_ticks[k1][dur], dict) is True and \
+                            dia in list(fig_ticks[k1][dur].keys()) and \
+                            isinstance(fig_ticks[k1][dur][dia], list) is True:
+                        list_ticks = fig_ticks[k1][dur][dia]
+                    elif k2 in list(fig_ticks.keys()) and isinstance(fig_ticks[k2], dict) is True and \
+                            dia in list(fig_ticks[k2].keys()) and isinstance(fig_ticks[k2][dia], list) is True:
+                        list_ticks = fig_ticks[k2][dia]
+                    elif k2 in list(fig_ticks.keys()) and isinstance(fig_ticks[k2], dict) is True and \
+                            dur in list(fig_ticks[k2].keys()) and isinstance(fig_ticks[k2][dur], dict) is True and \
+                            dia in list(fig_ticks[k2][dur].keys()) and \
+                            isinstance(fig_ticks[k2][dur][dia], list) is True:
+                        list_ticks = fig_ticks[k2][dur][dia]
+                    figure_ticks = tool_put_in_dict(figure_ticks, list_ticks, dur, k1, dia)
+        #
+        # -- Figure
+        #
+        for dur in list(uncertainties.keys()):
+            # output figure name will be the file name (path removed and extension removed)
+            fig_name = __file__.split("/")[-1].split(".")[0] + str(fig_name_add) + "_" + str(dur)
+            if fig_name_details is True:
+                # add details of the computation to the figure name
+                fig_name += "_data_" + str(len(data_projects)) + "pro_" + str(len(data_experiments)) + "exp_" + \
+                            str(data_smile_minimum_size) + "mem_" + str(len(data_diagnostics)) + "dia"
+                if len(data_epoch_lengths) == 1:
+                    fig_name += "_" + str(data_epoch_lengths[0])
+                else:
+                    fig_name += "_" + str(len(data_epoch_lengths)) + "dur"
+                if data_mme_create is True:
+                    fig_name += "_mme"
+                    fig_name += "_of_em" if data_mme_use_smile_mean is True else "_of_1m"
+                    fig_name += "_all_smile" if data_mme_use_all_smiles is True else "_1st_smile"
+                fig_name += "_relative_uncertainty" if uncertainty_relative is True else "_absolute_uncertainty"
+                fig_name += "_theory" if uncertainty_theory is True else "_random"
+                fig_name += "_" + str(uncertainty_confidence_interval) + "ci"
+                if uncertainty_theory is True:
+                    fig_name += "_" + str(uncertainty_distribution) + "_distribution"
+                fig_name += "_" + str(uncertainty_historical_epoch) + "_epoch"
+                fig_name += "_" + str(fig_orientation)
+            fig_scatter_and_regression(uncertainties[dur], data_diagnostics, fig_format, fig_name, fig_colors,
+                                       fig_markers, fig_marker_size, fig_orientation, fig_panel_size, figure_ticks[dur],
+                                       fig_titles, fig_legend_position=fig_legend_position, panel_param=panel_param)
 # ---------------------------------------------------------------------------------------------------------------------#
@@ -10,6 +10,7 @@
 # ---------------------------------------------------#
 # estimating_uncertainties_enso package
 from . params import default_parameters
+from estimating_uncertainties_enso.compute_lib.check_lib import check_trusted_inputs_scope
 from estimating_uncertainties_enso.compute_lib.data_lib import data_organize_json
 from estimating_uncertainties_enso.compute_lib.nest_lib import nest_compute_res, nest_define_uncertainty_threshold,\
     nest_examples_of_res_method
@@ -47,6 +48,10 @@ default = {
     "data_smile_rejected": default_parameters["data_smile_rejected"],
     # require all experiments to keep SMILE: True, False
     "data_smile_require_all_experiments": False,
+    # read the columnar cache of the json file (created at the first call, faster reads): True, False
+    "data_columnar_cache": default_parameters["data_columnar_cache"],
+    # stream the json file (slower, but lower peak memory; very large files are always streamed): True, False
+    "data_stream_json": default_parameters["data_stream_json"],
     #
     # -- Uncertainty
     #
@@ -60,6 +65,12 @@ default = {
     "uncertainty_combinations": default_parameters["uncertainty_combinations"],
     # number of resamples used for the bootstrap if uncertainty_theory is False: int [10, 1e10]
     "uncertainty_resamples": default_parameters["uncertainty_resamples"],
+    # number of processes used to compute the uncertainty of the datasets and epochs in parallel: int [1, 1e5]
+    "uncertainty_n_jobs": default_parameters["uncertainty_n_jobs"],
+    # seed of the random numbers (None to draw different random numbers at each call): int [0, 2**32 - 1], None
+    "uncertainty_seed": default_parameters["uncertainty_seed"],
+    # skip the checks of the inputs in internal hot paths (faster, but wrong inputs are not explained): True, False
+    "uncertainty_trusted_inputs": default_parameters["uncertainty_trusted_inputs"],
     # uncertainty computed for a given experiment
     "uncertainty_experiment": "piControl",
     # uncertainty to reach per diagnostic per method
@@ -151,14 +162,19 @@ def f06_required_ensemble_size(
         data_smile_minimum_size: int = default["data_smile_minimum_size"],
         data_smile_rejected: list = default["data_smile_rejected"],
         data_smile_require_all_experiments: bool = default["data_smile_require_all_experiments"],
+        data_columnar_cache: bool = default["data_columnar_cache"],
+        data_stream_json: bool = default["data_stream_json"],
         res_maximum: int = default["res_maximum"],
         uncertainty_combinations: int = default["uncertainty_combinations"],
         uncertainty_confidence_interval: float = default["uncertainty_confidence_interval"],
         uncertainty_distribution: str = default["uncertainty_distribution"],
         uncertainty_experiment: str = default["uncertainty_experiment"],
+        uncertainty_n_jobs: int = default["uncertainty_n_jobs"],
         uncertainty_resamples: int = default["uncertainty_resamples"],
+        uncertainty_seed: int = default["uncertainty_seed"],
         uncertainty_theory: bool = default["uncertainty_theory"],
         uncertainty_threshold: dict = default["uncertainty_threshold"],
+        uncertainty_trusted_inputs: bool = default["uncertainty_trusted_inputs"],
         fig_colors: dict = default["fig_colors"],
         fig_format: str = default["fig_format"],
         fig_markers: dict = default["fig_markers"],
@@ -172,77 +188,84 @@ def f06_required_ensemble_size(
         fig_titles: dict = default["fig_titles"],
         panel_param: dict = default["panel_param"],
         **kwargs):
-    #
-    # -- Read json
-    #
-    values, metadata = data_organize_json(
-        data_diagnostics, data_epoch_lengths, data_projects, data_experiments, data_filename=data_filename,
-        data_mme_create=data_mme_create, data_mme_use_all_smiles=data_mme_use_all_smiles,
-        data_mme_use_smile_mean=data_mme_use_smile_mean, data_smile_minimum_size=data_smile_minimum_size,
-        data_smile_rejected=data_smile_rejected, data_smile_require_all_experiments=data_smile_require_all_experiments)
-    #
-    # -- Define thresholds for each method
-    #
-    values, thresholds = nest_define_uncertainty_threshold(values, uncertainty_threshold, uncertainty_experiment)
-    #
-    # -- Compute required ensemble size (RES) to reach an uncertainty smaller than the desired ones
-    #
-    res, _, _ = nest_compute_res(
-        values, thresholds, res_maximum, uncertainty_confidence_interval, uncertainty_distribution,
-        uncertainty_combinations, uncertainty_resamples, uncertainty_theory)
-    #
-    # -- Organize data for the plot
-    #
-    examples = nest_examples_of_res_method(res, fig_smile_selected)
-    for dia in list(uncertainty_threshold.keys()):
-        for method in list(uncertainty_threshold[dia].keys()):
-            dict_method = uncertainty_threshold[dia][method]
-            if method == "unc":
-                tmp = "relative" if dict_method["uncertainty_relative"] is True else "absolute"
-                lab = str(fig_titles[tmp]) + " = " + str(dict_method["threshold"])
-                if tmp == "absolute" and metadata[dia]["units"] != "":
-                    lab += metadata[dia]["units"]
-                elif tmp == "relative":
-                    lab += "%"
-            elif method == "mme":
-                if dict_method["range"] == [25, 75]:
-                    tmp = " MME's IQR"
-                elif dict_method["range"] == [0, 100]:
-                    tmp = " MME's range"
+    # skip (or not) the checks of the inputs in internal hot paths, also in the worker processes (the previous mode
+    # is restored once the figure is done)
+    with check_trusted_inputs_scope(uncertainty_trusted_inputs):
+        #
+        # -- Read json
+        #
+        values, metadata = data_organize_json(
+            data_diagnostics, data_epoch_lengths, data_projects, data_experiments, data_filename=data_filename,
+            data_mme_create=data_mme_create, data_mme_use_all_smiles=data_mme_use_all_smiles,
+            data_mme_use_smile_mean=data_mme_use_smile_mean, data_smile_minimum_size=data_smile_minimum_size,
+            data_smile_rejected=data_smile_rejected,
+            data_smile_require_all_experiments=data_smile_require_all_experiments,
+            data_columnar_cache=data_columnar_cache, data_stream_json=data_stream_json)
+        #
+        # -- Define thresholds for each method
+        #
+        values, thresholds = nest_define_uncertainty_threshold(values, uncertainty_threshold, uncertainty_experiment)
+        #
+        # -- Compute required ensemble size (RES) to reach an uncertainty smaller than the desired ones
+        #
+        res, _, _ = nest_compute_res(
+            values, thresholds, res_maximum, uncertainty_confidence_interval, uncertainty_distribution,
+            uncertainty_combinations, uncertainty_resamples, uncertainty_theory, n_jobs=uncertainty_n_jobs,
+            uncertainty_seed=uncertainty_seed)
+        #
+        # -- Organize data for the plot
+        #
+        examples = nest_examples_of_res_method(res, fig_smile_selected)
+        for dia in list(uncertainty_threshold.keys()):
+            for method in list(uncertainty_threshold[dia].keys()):
+                dict_method = uncertainty_threshold[dia][method]
+                if method == "unc":
+                    tmp = "relative" if dict_method["uncertainty_relative"] is True else "absolute"
+                    lab = str(fig_titles[tmp]) + " = " + str(dict_method["threshold"])
+                    if tmp == "absolute" and metadata[dia]["units"] != "":
+                        lab += metadata[dia]["units"]
+                    elif tmp == "relative":
+                        lab += "%"
+                elif method == "mme":
+                    if dict_method["range"] == [25, 75]:
+                        tmp = " MME's IQR"
+                    elif dict_method["range"] == [0, 100]:
+                        tmp = " MME's range"
+                    else:
+                        tmp = " MME's P$_{" + str(dict_method["range"][0]) + "-" + str(dict_method["range"][1]) + "}$"
+                    lab = str(fig_titles["absolute"]) + " = " + str(dict_method["threshold"]) + str(tmp)
                 else:
-                    tmp = " MME's P$_{" + str(dict_method["range"][0]) + "-" + str(dict_method["range"][1]) + "}$"
-                lab = str(fig_titles["absolute"]) + " = " + str(dict_method["threshold"]) + str(tmp)
+                    tmp = "P$_{" + str(100 - uncertainty_confidence_interval) + "}$"
+                    lab = str(fig_titles["absolute"]) + " = " + str(tmp) + "(" + r"$\vert$" + "mod - obs" + \
+                        r"$\vert$" + ")"
+                fig_titles = tool_put_in_dict(fig_titles, lab, "x_axis", dia, method)
+        # x tics
+        if "x_axis" not in list(fig_ticks.keys()):
+            fig_ticks = tool_put_in_dict(fig_ticks, None, "x_axis")
+        # y tics
+        if "y_axis" not in list(fig_ticks.keys()):
+            fig_ticks = tool_put_in_dict(fig_ticks, None, "y_axis")
+        #
+        # -- Figure
+        #
+        # output figure name will be the file name (path removed and extension removed)
+        fig_name = __file__.split("/")[-1].split(".")[0] + str(fig_name_add)
+        if fig_name_details is True:
+            # add details of the computation to the figure name
+            fig_name += "_data_" + str(len(data_projects)) + "pro_" + str(len(data_experiments)) + "exp_" + \
+                        str(data_smile_minimum_size) + "mem_" + str(len(data_diagnostics)) + "dia"
+            if len(data_epoch_lengths) == 1:
+                fig_name += "_" + str(data_epoch_lengths[0])
             else:
-                tmp = "P$_{" + str(100 - uncertainty_confidence_interval) + "}$"
-                lab = str(fig_titles["absolute"]) + " = " + str(tmp) + "(" + r"$\vert$" + "mod - obs" + r"$\vert$" + ")"
-            fig_titles = tool_put_in_dict(fig_titles, lab, "x_axis", dia, method)
-    # x tics
-    if "x_axis" not in list(fig_ticks.keys()):
-        fig_ticks = tool_put_in_dict(fig_ticks, None, "x_axis")
-    # y tics
-    if "y_axis" not in list(fig_ticks.keys()):
-        fig_ticks = tool_put_in_dict(fig_ticks, None, "y_axis")
-    #
-    # -- Figure
-    #
-    # output figure name will be the file name (path removed and extension removed)
-    fig_name = __file__.split("/")[-1].split(".")[0] + str(fig_name_add)
-    if fig_name_details is True:
-        # add details of the computation to the figure name
-        fig_name += "_data_" + str(len(data_projects)) + "pro_" + str(len(data_experiments)) + "exp_" + \
-                    str(data_smile_minimum_size) + "mem_" + str(len(data_diagnostics)) + "dia"
-        if len(data_epoch_lengths) == 1:
-            fig_name += "_" + str(data_epoch_lengths[0])
-        else:
-            fig_name += "_" + str(len(data_epoch_lengths)) + "dur"
-        if data_mme_create is True:
-            fig_name += "_mme"
-            fig_name += "_of_em" if data_mme_use_smile_mean is True else "_of_1m"
-            fig_name += "_all_smile" if data_mme_use_all_smiles is True else "_1st_smile"
-        fig_name += "_theory" if uncertainty_theory is True else "_random"
-        fig_name += "_" + str(95) + "ci"
-        fig_name += "_" + str(fig_orientation)
-    fig_examples_of_res(examples, data_diagnostics, fig_format, fig_name, fig_colors, fig_markers, fig_marker_size,
-                        fig_orientation, fig_panel_size, fig_smile_selected, fig_ticks, fig_titles,
-                        panel_param=panel_param)
+                fig_name += "_" + str(len(data_epoch_lengths)) + "dur"
+            if data_mme_create is True:
+                fig_name += "_mme"
+                fig_name += "_of_em" if data_mme_use_smile_mean is True else "_of_1m"
+                fig_name += "_all_smile" if data_mme_use_all_smiles is True else "_1st_smile"
+            fig_name += "_theory" if uncertainty_theory is True else "_random"
+            fig_name += "_" + str(95) + "ci"
+            fig_name += "_" + str(fig_orientation)
+        fig_examples_of_res(examples, data_diagnostics, fig_format, fig_name, fig_colors, fig_markers, fig_marker_size,
+                            fig_orientation, fig_panel_size, fig_smile_selected, fig_ticks, fig_titles,
+                            panel_param=panel_param)
 # ---------------------------------------------------------------------------------------------------------------------#
@@ -54,6 +54,10 @@ default_parameters = {
     "data_smile_rejected": ["CAS-ESM2-0", "KACE-1-0-G"],
     # require all experiments to keep SMILE: True, False
     "data_smile_require_all_experiments": True,
+    # read the columnar cache of the json file (created at the first call, faster reads): True, False
+    "data_columnar_cache": False,
+    # stream the json file (slower, but lower peak memory; very large files are always streamed): True, False
+    "data_stream_json": False,
     #
     # -- Uncertainty
     #
@@ -69,6 +73,24 @@ default_parameters = {
     "uncertainty_combinations": int(1e4),
     # number of resamples used for the bootstrap if uncertainty_theory is False: int [10, 1e10]
     "uncertainty_resamples": int(1e6),
+    # number of processes used to compute the uncertainty of the datasets and epochs in parallel: int [1, 1e5]
+    "uncertainty_n_jobs": 1,
+    # seed of the random numbers (None to draw different random numbers at each call): int [0, 2**32 - 1], None
+    "uncertainty_seed": None,
+    # skip the checks of the inputs in internal hot paths (faster, but wrong inputs are not explained): True, False
+    "uncertainty_trusted_inputs": False,
+    # same draws for all diagnostics, epoch lengths and epochs of a SMILE (faster, uncertainties not independent):
+    # True, False
+    "uncertainty_shared_draws": False,
+    # bootstrap distribution of the sample mean computed without resampling if uncertainty_theory is False (faster,
+    # see stat_uncertainty_bootstrap_exact): True, False
+    "uncertainty_exact_bootstrap": False,
+    # relative Monte Carlo standard error at which the draws stop (None to draw all uncertainty_combinations or
+    # uncertainty_resamples samples): float [1e-8, 1], None
+    "uncertainty_tolerance": None,
+    # bootstrap resamples corrected with control variates if uncertainty_theory is False (about ten times fewer
+    # resamples for the same precision, see stat_uncertainty_bootstrap_control): True, False
+    "uncertainty_control_variate": False,
     # list of sample sizes for which the uncertainty will be computed: list[int]
     "uncertainty_sample_sizes": [k for k in range(10, 101, 5)],
     # uncertainty computed for a given experiment: str
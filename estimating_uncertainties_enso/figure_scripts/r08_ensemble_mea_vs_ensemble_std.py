@@ -53,6 +53,10 @@ default = {
     "data_smile_rejected": default_parameters["data_smile_rejected"],
     # require all experiments to keep SMILE: True, False
     "data_smile_require_all_experiments": default_parameters["data_smile_require_all_experiments"],
+    # read the columnar cache of the json file (created at the first call, faster reads): True, False
+    "data_columnar_cache": default_parameters["data_columnar_cache"],
+    # stream the json file (slower, but lower peak memory; very large files are always streamed): True, False
+    "data_stream_json": default_parameters["data_stream_json"],
     #
     # -- Figure
     #
@@ -110,6 +114,8 @@ def r08_ensemble_mea_vs_std(
         data_smile_minimum_size: int = default["data_smile_minimum_size"],
         data_smile_rejected: list = default["data_smile_rejected"],
         data_smile_require_all_experiments: bool = default["data_smile_require_all_experiments"],
+        data_columnar_cache: bool = default["data_columnar_cache"],
+        data_stream_json: bool = default["data_stream_json"],
         fig_colors: dict = default["fig_colors"],
         fig_format: Literal["eps", "pdf", "png", "svg"] = default["fig_format"],
         fig_legend_position: Literal["bottom", "right"] = default["fig_legend_position"],
@@ -130,23 +136,24 @@ def r08_ensemble_mea_vs_std(
         data_diagnostics, data_epoch_lengths, data_projects, data_experiments, data_mme_create=data_mme_create,
         data_mme_use_all_smiles=data_mme_use_all_smiles, data_mme_use_smile_mean=data_mme_use_smile_mean,
         data_smile_minimum_size=data_smile_minimum_size, data_smile_rejected=data_smile_rejected,
-        data_smile_require_all_experiments=data_smile_require_all_experiments)
+        data_smile_require_all_experiments=data_smile_require_all_experiments, data_columnar_cache=data_columnar_cache,
+        data_stream_json=data_stream_json)
     #
     # -- Compute SMILE std
     #
-    means, _, _ = nest_compute_statistic(values, "mea")
-    standards, _, _ = nest_compute_statistic(values, "std")
+    # mean and standard deviation of each SMILE computed at once
+    statistics, _, _ = nest_compute_statistic(values, ["mea", "std"])
     #
     # -- Organize data to for figure
     #
     plot_data = {}
     # markers
-    for dia in list(means.keys()):
-        for dur in list(means[dia].keys()):
-            for pro in list(means[dia][dur].keys()):
-                for exp in list(means[dia][dur][pro].keys()):
-                    for dat in list(means[dia][dur][pro][exp].keys()):
-                        list_epo = list(means[dia][dur][pro][exp][dat].keys())
+    for dia in list(statistics.keys()):
+        for dur in list(statistics[dia].keys()):
+            for pro in list(statistics[dia][dur].keys()):
+                for exp in list(statistics[dia][dur][pro].keys()):
+                    for dat in list(statistics[dia][dur][pro][exp].keys()):
+                        list_epo = list(statistics[dia][dur][pro][exp][dat].keys())
                         plot_type = "mar"
                         panel = "panel_1"
                         val = fig_colors[dat]
@@ -155,10 +162,11 @@ def r08_ensemble_mea_vs_std(
                         plot_data = tool_put_in_dict(plot_data, [val], dur, dia, panel, str(plot_type) + "_m")
                         val = deepcopy(fig_marker_size)
                         plot_data = tool_put_in_dict(plot_data, [val], dur, dia, panel, str(plot_type) + "_s")
-                        val = stat_compute_statistic([means[dia][dur][pro][exp][dat][epo] for epo in list_epo], "mea")
+                        val = stat_compute_statistic(
+                            [statistics[dia][dur][pro][exp][dat][epo]["mea"] for epo in list_epo], "mea")
                         plot_data = tool_put_in_dict(plot_data, [val], dur, dia, panel, str(plot_type) + "_x")
                         val = stat_compute_statistic(
-                            [standards[dia][dur][pro][exp][dat][epo] for epo in list_epo], "mea")
+                            [statistics[dia][dur][pro][exp][dat][epo]["std"] for epo in list_epo], "mea")
                         plot_data = tool_put_in_dict(plot_data, [val], dur, dia, panel, str(plot_type) + "_y")
                         val = randint(1, 8)
                         plot_data = tool_put_in_dict(plot_data, [val], dur, dia, panel, str(plot_type) + "_z")
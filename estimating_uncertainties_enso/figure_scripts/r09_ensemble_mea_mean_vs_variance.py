@@ -53,6 +53,10 @@ default = {
     "data_smile_rejected": default_parameters["data_smile_rejected"],
     # require all experiments to keep SMILE: True, False
     "data_smile_require_all_experiments": default_parameters["data_smile_require_all_experiments"],
+    # read the columnar cache of the json file (created at the first call, faster reads): True, False
+    "data_columnar_cache": default_parameters["data_columnar_cache"],
+    # stream the json file (slower, but lower peak memory; very large files are always streamed): True, False
+    "data_stream_json": default_parameters["data_stream_json"],
     #
     # -- Figure
     #
@@ -110,6 +114,8 @@ def r09_mean_mean_vs_variance(
         data_smile_minimum_size: int = default["data_smile_minimum_size"],
         data_smile_rejected: list = default["data_smile_rejected"],
         data_smile_require_all_experiments: bool = default["data_smile_require_all_experiments"],
+        data_columnar_cache: bool = default["data_columnar_cache"],
+        data_stream_json: bool = default["data_stream_json"],
         fig_colors: dict = default["fig_colors"],
         fig_format: Literal["eps", "pdf", "png", "svg"] = default["fig_format"],
         fig_legend_position: Literal["bottom", "right"] = default["fig_legend_position"],
@@ -130,12 +136,12 @@ def r09_mean_mean_vs_variance(
         data_diagnostics, data_epoch_lengths, data_projects, data_experiments, data_mme_create=data_mme_create,
         data_mme_use_all_smiles=data_mme_use_all_smiles, data_mme_use_smile_mean=data_mme_use_smile_mean,
         data_smile_minimum_size=data_smile_minimum_size, data_smile_rejected=data_smile_rejected,
-        data_smile_require_all_experiments=data_smile_require_all_experiments)
+        data_smile_require_all_experiments=data_smile_require_all_experiments, data_columnar_cache=data_columnar_cache,
+        data_stream_json=data_stream_json)
     #
     # -- Compute SMILE mean
     #
     means, _, _ = nest_compute_statistic(values, "mea")
-    standards, _, _ = nest_compute_statistic(values, "std")
     #
     # -- Organize data to for figure
     #
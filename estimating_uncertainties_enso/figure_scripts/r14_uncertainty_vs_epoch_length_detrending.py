@@ -14,6 +14,7 @@
 from copy import deepcopy
 # estimating_uncertainties_enso package
 from . params import default_parameters
+from estimating_uncertainties_enso.compute_lib.check_lib import check_trusted_inputs_scope
 from estimating_uncertainties_enso.compute_lib.data_lib import data_organize_json
 from estimating_uncertainties_enso.compute_lib.nest_lib import nest_compute_uncertainty, nest_influence_of_epoch_length
 from estimating_uncertainties_enso.compute_lib.tool_lib import tool_put_in_dict
@@ -58,6 +59,24 @@ default = {
     "uncertainty_combinations": default_parameters["uncertainty_combinations"],
     # number of resamples used for the bootstrap if uncertainty_theory is False: int [10, 1e10]
     "uncertainty_resamples": default_parameters["uncertainty_resamples"],
+    # number of processes used to compute the uncertainty of the datasets and epochs in parallel: int [1, 1e5]
+    "uncertainty_n_jobs": default_parameters["uncertainty_n_jobs"],
+    # seed of the random numbers (None to draw different random numbers at each call): int [0, 2**32 - 1], None
+    "uncertainty_seed": default_parameters["uncertainty_seed"],
+    # skip the checks of the inputs in internal hot paths (faster, but wrong inputs are not explained): True, False
+    "uncertainty_trusted_inputs": default_parameters["uncertainty_trusted_inputs"],
+    # same draws for all diagnostics, epoch lengths and epochs of a SMILE (faster, uncertainties not independent):
+    # True, False
+    "uncertainty_shared_draws": default_parameters["uncertainty_shared_draws"],
+    # bootstrap distribution of the sample mean computed without resampling if uncertainty_theory is False (faster,
+    # see stat_uncertainty_bootstrap_exact): True, False
+    "uncertainty_exact_bootstrap": default_parameters["uncertainty_exact_bootstrap"],
+    # relative Monte Carlo standard error at which the draws stop (None to draw all uncertainty_combinations or
+    # uncertainty_resamples samples): float [1e-8, 1], None
+    "uncertainty_tolerance": default_parameters["uncertainty_tolerance"],
+    # bootstrap resamples corrected with control variates if uncertainty_theory is False (about ten times fewer
+    # resamples for the same precision, see stat_uncertainty_bootstrap_control): True, False
+    "uncertainty_control_variate": default_parameters["uncertainty_control_variate"],
     #
     # -- Figure
     #
@@ -201,10 +220,17 @@ def r14_epoch_length_detrending(
         data_experiments: list = default["data_experiments"],
         uncertainty_combinations: int = default["uncertainty_combinations"],
         uncertainty_confidence_interval: float = default["uncertainty_confidence_interval"],
+        uncertainty_control_variate: bool = default["uncertainty_control_variate"],
         uncertainty_distribution: str = default["uncertainty_distribution"],
+        uncertainty_exact_bootstrap: bool = default["uncertainty_exact_bootstrap"],
+        uncertainty_n_jobs: int = default["uncertainty_n_jobs"],
         uncertainty_relative: bool = default["uncertainty_relative"],
         uncertainty_resamples: int = default["uncertainty_resamples"],
+        uncertainty_seed: int = default["uncertainty_seed"],
+        uncertainty_shared_draws: bool = default["uncertainty_shared_draws"],
         uncertainty_theory: bool = default["uncertainty_theory"],
+        uncertainty_tolerance: float = default["uncertainty_tolerance"],
+        uncertainty_trusted_inputs: bool = default["uncertainty_trusted_inputs"],
         fig_colors: dict = default["fig_colors"],
         fig_detailed_name: bool = default["fig_detailed_name"],
         fig_format: str = default["fig_format"],
@@ -222,113 +248,121 @@ def r14_epoch_length_detrending(
         fig_uncertainty_reference: str = default["fig_uncertainty_reference"],
         panel_param: dict = default["panel_param"],
         **kwargs):
-    #
-    # -- Read json
-    #
-    values, metadata = data_organize_json(data_diagnostics, data_epoch_lengths, data_projects, data_experiments,
-                                          data_filename=data_filename)
-    #
-    # -- Reorder dictionary and keep only the selected dataset
-    #
-    values_new = {}
-    for dia in list(values.keys()):
-        for dur in list(values[dia].keys()):
-            for pro in list(values[dia][dur].keys()):
-                for exp in list(values[dia][dur][pro].keys()):
-                    dat = deepcopy(fig_smile_selected)
-                    if exp != "historical" or dat not in list(values[dia][dur][pro][exp].keys()):
-                        # do not continue the computation but continue the loop if the selected dataset is not available
-                        continue
-                    for epo in list(values[dia][dur][pro][exp][dat].keys()):
-                        values_new = tool_put_in_dict(values_new, values[dia][dur][pro][exp][dat][epo], dia, dur, pro,
-                                                      exp, dat, epo)
-    #
-    # -- Compute uncertainty
-    #
-    uncertainties, _, _ = nest_compute_uncertainty(
-        values_new, uncertainty_confidence_interval, uncertainty_distribution, uncertainty_relative,
-        uncertainty_combinations, uncertainty_resamples, uncertainty_theory)
-    #
-    # -- Compute the influence of the ensemble size on uncertainty
-    #
-    influence = nest_influence_of_epoch_length(uncertainties, fig_uncertainty_reference)
-    #
-    # -- Organize data to for figure
-    #
-    # data to plot
-    data_to_plot = {}
-    dict_detrend = {0: "none", 1: "linear", 2: "quadratic", 3: "cubic", "e": "ensemble mean"}
-    for dia in list(influence.keys()):
-        for dat in list(influence[dia].keys()):
-            for exp in list(influence[dia][dat].keys()):
-                for siz in list(influence[dia][dat][exp].keys()):
-                    for axi in list(influence[dia][dat][exp][siz].keys()):
-                        # get array
-                        arr = influence[dia][dat][exp][siz][axi]
-                        # output keys
-                        dia_o = deepcopy(dia)
-                        det_o = deepcopy(dict_detrend[1])
-                        for k in list(range(4)) + ["e"]:
-                            if "_d" + str(k) in dia_o:
-                                dia_o = dia.replace("_d" + str(k), "")
-                                det_o = deepcopy(dict_detrend[k])
-                                break
-                        # save value
-                        data_to_plot = tool_put_in_dict(data_to_plot, arr, dia_o, det_o, exp, siz, axi)
-    list_dia = list(data_to_plot.keys())
-    list_dia = [k for k in list_dia if k[:4] == "ave_"] + [k for k in list_dia if k[:4] == "var_"] + \
-               [k for k in list_dia if k[:4] == "ske_"]
-    # panels, axes, titles
-    method = "relative" if uncertainty_relative is True else "absolute"
-    for dia in list_dia:
-        # x-y titles
-        title = ""
-        if "x_axis" in list(fig_titles.keys()) and fig_uncertainty_reference in list(fig_titles["x_axis"].keys()):
-            title = fig_titles["x_axis"][fig_uncertainty_reference]
-        fig_titles = tool_put_in_dict(fig_titles, title, "x_axis", dia)
-        title = ""
-        if "y_axis" in list(fig_titles.keys()) and fig_uncertainty_reference in list(fig_titles["y_axis"].keys()):
-            title = str(fig_titles[method]) + " " + str(fig_titles["y_axis"][fig_uncertainty_reference])
-        fig_titles = tool_put_in_dict(fig_titles, title, "y_axis", dia)
-        # x tics
-        if "x_axis" in list(fig_ticks.keys()) and isinstance(fig_ticks["x_axis"], dict) is True and \
-                dia in list(fig_ticks["x_axis"].keys()) and isinstance(fig_ticks["x_axis"][dia], list) is True:
-            pass
-        else:
-            list_ticks = None
-            if "x_axis" in list(fig_ticks.keys()) and fig_uncertainty_reference in list(fig_ticks["x_axis"].keys()):
-                list_ticks = fig_ticks["x_axis"][fig_uncertainty_reference]
-            fig_ticks = tool_put_in_dict(fig_ticks, list_ticks, "x_axis", dia)
-        # y tics
-        if "y_axis" in list(fig_ticks.keys()) and isinstance(fig_ticks["y_axis"], dict) is True and \
-                dia in list(fig_ticks["y_axis"].keys()) and isinstance(fig_ticks["y_axis"][dia], list) is True:
-            pass
-        else:
-            list_ticks = None
-            if "y_axis" in list(fig_ticks.keys()) and fig_uncertainty_reference in list(fig_ticks["y_axis"].keys()) \
-                    and fig_smile_selected in list(fig_ticks["y_axis"][fig_uncertainty_reference].keys()) and \
-                    dia in list(fig_ticks["y_axis"][fig_uncertainty_reference][fig_smile_selected].keys()):
-                list_ticks = fig_ticks["y_axis"][fig_uncertainty_reference][fig_smile_selected][dia]
-            fig_ticks = tool_put_in_dict(fig_ticks, list_ticks, "y_axis", dia)
-    # markers
-    fig_markers = dict((k, fig_marker) for k in list(fig_colors.keys()))
-    #
-    # -- Figure
-    #
-    # output figure name will be the file name (path removed and extension removed)
-    fig_name = __file__.split("/")[-1].split(".")[0] + "_" + str(fig_smile_selected)
-    if fig_detailed_name is True:
-        # add details of the computation to the figure name
-        fig_name += "_data_" + str(len(data_projects)) + "pro_" + str(len(data_experiments)) + "exp_" + \
-                    str(len(list_dia)) + "dia_" + str(fig_smile_selected)
-        fig_name += "_relative_uncertainty" if uncertainty_relative is True else "_absolute_uncertainty"
-        fig_name += "_theory" if uncertainty_theory is True else "_random"
-        fig_name += "_" + str(uncertainty_confidence_interval) + "ci_" + str(fig_uncertainty_reference)
-        if uncertainty_theory is True:
-            fig_name += "_" + str(uncertainty_distribution) + "_distribution"
-        fig_name += "_" + str(fig_orientation)
-    fig_influence_of(data_to_plot, list_dia, data_experiments, fig_format, fig_name, fig_colors,
-                     fig_legend_position, fig_linestyles, fig_linewidth, fig_linezorder, fig_markers, fig_marker_size,
-                     fig_orientation, fig_panel_size, fig_ticks, fig_titles, 10, "epoch_length",
-                     fig_uncertainty_reference, panel_param=panel_param)
+    # skip (or not) the checks of the inputs in internal hot paths, also in the worker processes (the previous mode
+    # is restored once the figure is done)
+    with check_trusted_inputs_scope(uncertainty_trusted_inputs):
+        #
+        # -- Read json
+        #
+        values, metadata = data_organize_json(data_diagnostics, data_epoch_lengths, data_projects, data_experiments,
+                                              data_filename=data_filename)
+        #
+        # -- Reorder dictionary and keep only the selected dataset
+        #
+        values_new = {}
+        for dia in list(values.keys()):
+            for dur in list(values[dia].keys()):
+                for pro in list(values[dia][dur].keys()):
+                    for exp in list(values[dia][dur][pro].keys()):
+                        dat = deepcopy(fig_smile_selected)
+                        if exp != "historical" or dat not in list(values[dia][dur][pro][exp].keys()):
+                            # do not continue the computation but continue the loop if the selected dataset is not
+                            # available
+                            continue
+                        for epo in list(values[dia][dur][pro][exp][dat].keys()):
+                            values_new = tool_put_in_dict(values_new, values[dia][dur][pro][exp][dat][epo], dia, dur,
+                                                          pro, exp, dat, epo)
+        #
+        # -- Compute uncertainty
+        #
+        uncertainties, _, _ = nest_compute_uncertainty(
+            values_new, uncertainty_confidence_interval, uncertainty_distribution, uncertainty_relative,
+            uncertainty_combinations, uncertainty_resamples, uncertainty_theory, n_jobs=uncertainty_n_jobs,
+            uncertainty_seed=uncertainty_seed, uncertainty_shared_draws=uncertainty_shared_draws,
+            uncertainty_exact_bootstrap=uncertainty_exact_bootstrap, uncertainty_tolerance=uncertainty_tolerance,
+            uncertainty_control_variate=uncertainty_control_variate)
+        #
+        # -- Compute the influence of the ensemble size on uncertainty
+        #
+        influence = nest_influence_of_epoch_length(uncertainties, fig_uncertainty_reference)
+        #
+        # -- Organize data to for figure
+        #
+        # data to plot
+        data_to_plot = {}
+        dict_detrend = {0: "none", 1: "linear", 2: "quadratic", 3: "cubic", "e": "ensemble mean"}
+        for dia in list(influence.keys()):
+            for dat in list(influence[dia].keys()):
+                for exp in list(influence[dia][dat].keys()):
+                    for siz in list(influence[dia][dat][exp].keys()):
+                        for axi in list(influence[dia][dat][exp][siz].keys()):
+                            # get array
+                            arr = influence[dia][dat][exp][siz][axi]
+                            # output keys
+                            dia_o = deepcopy(dia)
+                            det_o = deepcopy(dict_detrend[1])
+                            for k in list(range(4)) + ["e"]:
+                                if "_d" + str(k) in dia_o:
+                                    dia_o = dia.replace("_d" + str(k), "")
+                                    det_o = deepcopy(dict_detrend[k])
+                                    break
+                            # save value
+                            data_to_plot = tool_put_in_dict(data_to_plot, arr, dia_o, det_o, exp, siz, axi)
+        list_dia = list(data_to_plot.keys())
+        list_dia = [k for k in list_dia if k[:4] == "ave_"] + [k for k in list_dia if k[:4] == "var_"] + \
+                   [k for k in list_dia if k[:4] == "ske_"]
+        # panels, axes, titles
+        method = "relative" if uncertainty_relative is True else "absolute"
+        for dia in list_dia:
+            # x-y titles
+            title = ""
+            if "x_axis" in list(fig_titles.keys()) and fig_uncertainty_reference in list(fig_titles["x_axis"].keys()):
+                title = fig_titles["x_axis"][fig_uncertainty_reference]
+            fig_titles = tool_put_in_dict(fig_titles, title, "x_axis", dia)
+            title = ""
+            if "y_axis" in list(fig_titles.keys()) and fig_uncertainty_reference in list(fig_titles["y_axis"].keys()):
+                title = str(fig_titles[method]) + " " + str(fig_titles["y_axis"][fig_uncertainty_reference])
+            fig_titles = tool_put_in_dict(fig_titles, title, "y_axis", dia)
+            # x tics
+            if "x_axis" in list(fig_ticks.keys()) and isinstance(fig_ticks["x_axis"], dict) is True and \
+                    dia in list(fig_ticks["x_axis"].keys()) and isinstance(fig_ticks["x_axis"][dia], list) is True:
+                pass
+            else:
+                list_ticks = None
+                if "x_axis" in list(fig_ticks.keys()) and fig_uncertainty_reference in list(fig_ticks["x_axis"].keys()):
+                    list_ticks = fig_ticks["x_axis"][fig_uncertainty_reference]
+                fig_ticks = tool_put_in_dict(fig_ticks, list_ticks, "x_axis", dia)
+            # y tics
+            if "y_axis" in list(fig_ticks.keys()) and isinstance(fig_ticks["y_axis"], dict) is True and \
+                    dia in list(fig_ticks["y_axis"].keys()) and isinstance(fig_ticks["y_axis"][dia], list) is True:
+                pass
+            else:
+                list_ticks = None
+                if "y_axis" in list(fig_ticks.keys()) and \
+                        fig_uncertainty_reference in list(fig_ticks["y_axis"].keys()) and \
+                        fig_smile_selected in list(fig_ticks["y_axis"][fig_uncertainty_reference].keys()) and \
+                        dia in list(fig_ticks["y_axis"][fig_uncertainty_reference][fig_smile_selected].keys()):
+                    list_ticks = fig_ticks["y_axis"][fig_uncertainty_reference][fig_smile_selected][dia]
+                fig_ticks = tool_put_in_dict(fig_ticks, list_ticks, "y_axis", dia)
+        # markers
+        fig_markers = dict((k, fig_marker) for k in list(fig_colors.keys()))
+        #
+        # -- Figure
+        #
+        # output figure name will be the file name (path removed and extension removed)
+        fig_name = __file__.split("/")[-1].split(".")[0] + "_" + str(fig_smile_selected)
+        if fig_detailed_name is True:
+            # add details of the computation to the figure name
+            fig_name += "_data_" + str(len(data_projects)) + "pro_" + str(len(data_experiments)) + "exp_" + \
+                        str(len(list_dia)) + "dia_" + str(fig_smile_selected)
+            fig_name += "_relative_uncertainty" if uncertainty_relative is True else "_absolute_uncertainty"
+            fig_name += "_theory" if uncertainty_theory is True else "_random"
+            fig_name += "_" + str(uncertainty_confidence_interval) + "ci_" + str(fig_uncertainty_reference)
+            if uncertainty_theory is True:
+                fig_name += "_" + str(uncertainty_distribution) + "_distribution"
+            fig_name += "_" + str(fig_orientation)
+        fig_influence_of(data_to_plot, list_dia, data_experiments, fig_format, fig_name, fig_colors,
+                         fig_legend_position, fig_linestyles, fig_linewidth, fig_linezorder, fig_markers,
+                         fig_marker_size, fig_orientation, fig_panel_size, fig_ticks, fig_titles, 10, "epoch_length",
+                         fig_uncertainty_reference, panel_param=panel_param)
 # ---------------------------------------------------------------------------------------------------------------------#
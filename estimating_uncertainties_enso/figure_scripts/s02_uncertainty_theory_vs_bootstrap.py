@@ -10,6 +10,7 @@
 # ---------------------------------------------------#
 # estimating_uncertainties_enso package
 from . params import default_parameters
+from estimating_uncertainties_enso.compute_lib.check_lib import check_trusted_inputs_scope
 from estimating_uncertainties_enso.compute_lib.data_lib import data_organize_json
 from estimating_uncertainties_enso.compute_lib.nest_lib import nest_compute_uncertainty
 from estimating_uncertainties_enso.compute_lib.tool_lib import tool_put_in_dict
@@ -46,6 +47,10 @@ default = {
     "data_smile_rejected": default_parameters["data_smile_rejected"],
     # require all experiments to keep SMILE: True, False
     "data_smile_require_all_experiments": False,
+    # read the columnar cache of the json file (created at the first call, faster reads): True, False
+    "data_columnar_cache": default_parameters["data_columnar_cache"],
+    # stream the json file (slower, but lower peak memory; very large files are always streamed): True, False
+    "data_stream_json": default_parameters["data_stream_json"],
     #
     # -- Uncertainty
     #
@@ -59,6 +64,24 @@ default = {
     "uncertainty_combinations": default_parameters["uncertainty_combinations"],
     # number of resamples used for the bootstrap if uncertainty_theory is False: int [10, 1e10]
     "uncertainty_resamples": default_parameters["uncertainty_resamples"],
+    # number of processes used to compute the uncertainty of the datasets and epochs in parallel: int [1, 1e5]
+    "uncertainty_n_jobs": default_parameters["uncertainty_n_jobs"],
+    # seed of the random numbers (None to draw different random numbers at each call): int [0, 2**32 - 1], None
+    "uncertainty_seed": default_parameters["uncertainty_seed"],
+    # skip the checks of the inputs in internal hot paths (faster, but wrong inputs are not explained): True, False
+    "uncertainty_trusted_inputs": default_parameters["uncertainty_trusted_inputs"],
+    # same draws for all diagnostics, epoch lengths and epochs of a SMILE (faster, uncertainties not independent):
+    # True, False
+    "uncertainty_shared_draws": default_parameters["uncertainty_shared_draws"],
+    # bootstrap distribution of the sample mean computed without resampling if uncertainty_theory is False (faster,
+    # see stat_uncertainty_bootstrap_exact): True, False
+    "uncertainty_exact_bootstrap": default_parameters["uncertainty_exact_bootstrap"],
+    # relative Monte Carlo standard error at which the draws stop (None to draw all uncertainty_combinations or
+    # uncertainty_resamples samples): float [1e-8, 1], None
+    "uncertainty_tolerance": default_parameters["uncertainty_tolerance"],
+    # bootstrap resamples corrected with control variates if uncertainty_theory is False (about ten times fewer
+    # resamples for the same precision, see stat_uncertainty_bootstrap_control): True, False
+    "uncertainty_control_variate": default_parameters["uncertainty_control_variate"],
     #
     # -- Figure
     #
@@ -176,11 +199,20 @@ def s02_theory_vs_bootstrap(
         data_smile_minimum_size: int = default["data_smile_minimum_size"],
         data_smile_rejected: list = default["data_smile_rejected"],
         data_smile_require_all_experiments: bool = default["data_smile_require_all_experiments"],
+        data_columnar_cache: bool = default["data_columnar_cache"],
+        data_stream_json: bool = default["data_stream_json"],
         uncertainty_combinations: int = default["uncertainty_combinations"],
         uncertainty_confidence_interval: float = default["uncertainty_confidence_interval"],
+        uncertainty_control_variate: bool = default["uncertainty_control_variate"],
         uncertainty_distribution: str = default["uncertainty_distribution"],
+        uncertainty_exact_bootstrap: bool = default["uncertainty_exact_bootstrap"],
+        uncertainty_n_jobs: int = default["uncertainty_n_jobs"],
         uncertainty_relative: bool = default["uncertainty_relative"],
         uncertainty_resamples: int = default["uncertainty_resamples"],
+        uncertainty_seed: int = default["uncertainty_seed"],
+        uncertainty_shared_draws: bool = default["uncertainty_shared_draws"],
+        uncertainty_tolerance: float = default["uncertainty_tolerance"],
+        uncertainty_trusted_inputs: bool = default["uncertainty_trusted_inputs"],
         fig_format: str = default["fig_format"],
         fig_marker: str = default["fig_marker"],
         fig_marker_color: str = default["fig_marker_color"],
@@ -193,82 +225,93 @@ def s02_theory_vs_bootstrap(
         fig_titles: dict = default["fig_titles"],
         panel_param: dict = default["panel_param"],
         **kwargs):
-    #
-    # -- Read json
-    #
-    values, metadata = data_organize_json(
-        data_diagnostics, data_epoch_lengths, data_projects, data_experiments, data_filename=data_filename,
-        data_mme_create=data_mme_create, data_mme_use_all_smiles=data_mme_use_all_smiles,
-        data_mme_use_smile_mean=data_mme_use_smile_mean, data_smile_minimum_size=data_smile_minimum_size,
-        data_smile_rejected=data_smile_rejected, data_smile_require_all_experiments=data_smile_require_all_experiments)
-    #
-    # -- Compute uncertainty
-    #
-    bootstrap, _, _ = nest_compute_uncertainty(
-        values, uncertainty_confidence_interval, uncertainty_distribution, uncertainty_relative,
-        uncertainty_combinations, uncertainty_resamples, False)
-    theory, _, _ = nest_compute_uncertainty(
-        values, uncertainty_confidence_interval, uncertainty_distribution, uncertainty_relative,
-        uncertainty_combinations, uncertainty_resamples, True)
-    #
-    # -- Organize data for the figure
-    #
-    data_to_plot = {}
-    for dia in sorted(list(theory.keys()), key=str.casefold):
-        for dur in sorted(list(theory[dia].keys()), key=str.casefold):
-            for pro in sorted(list(theory[dia][dur].keys()), key=str.casefold):
-                for exp in sorted(list(theory[dia][dur][pro].keys()), key=str.casefold):
-                    for dat in sorted(list(theory[dia][dur][pro][exp].keys()), key=str.casefold):
-                        for epo in sorted(list(theory[dia][dur][pro][exp][dat].keys()), key=str.casefold):
-                            for siz in sorted(list(theory[dia][dur][pro][exp][dat][epo].keys()), key=str.casefold):
-                                # uncertainty of the sample mean computed using the bootstrap as x values
-                                data_to_plot = tool_put_in_dict(
-                                    data_to_plot, [bootstrap[dia][dur][pro][exp][dat][epo][siz]], dia, dat, "x")
-                                # uncertainty of the sample mean computed using the theory as y values
-                                data_to_plot = tool_put_in_dict(
-                                    data_to_plot, [theory[dia][dur][pro][exp][dat][epo][siz]], dia, dat, "y")
-    fig_colors = dict((dat, fig_marker_color) for dat in list(data_to_plot[data_diagnostics[0]].keys()))
-    fig_markers = dict((dat, fig_marker) for dat in list(data_to_plot[data_diagnostics[0]].keys()))
-    method = "relative" if uncertainty_relative is True else "absolute"
-    for dia in list(data_to_plot.keys()):
-        units = ""
-        if method == "absolute" and metadata[dia]["units"] != "":
-            units = " (" + str(metadata[dia]["units"]) + ")"
-        elif method == "relative":
-            units = " (%)"
-        # x-axis
-        name = str(fig_titles[method]) + " from random sampling" + str(units)
-        fig_titles = tool_put_in_dict(fig_titles, name, "x_axis", dia)
-        # y-axis
-        name = str(fig_titles[method]) + " from theory" + str(units)
-        fig_titles = tool_put_in_dict(fig_titles, name, "y_axis", dia)
-        # x-y tics
-        if dia in list(fig_ticks.keys()) and isinstance(fig_ticks[dia], list) is True:
-            pass
-        else:
-            list_ticks = None
-            if method in list(fig_ticks.keys()) and isinstance(fig_ticks[method], dict) is True and \
-                    dia in list(fig_ticks[method].keys()) and isinstance(fig_ticks[method][dia], list) is True:
-                list_ticks = fig_ticks[method][dia]
-            fig_ticks = tool_put_in_dict(fig_ticks, list_ticks, dia)
-    #
-    # -- Figure
-    #
-    # output figure name will be the file name (path removed and extension removed)
-    fig_name = __file__.split("/")[-1].split(".")[0] + str(fig_name_add)
-    if fig_name_details is True:
-        # add details of the computation to the figure name
-        fig_name += "_data_" + str(len(data_projects)) + "pro_" + str(len(data_experiments)) + "exp_" + \
-                    str(data_smile_minimum_size) + "mem_" + str(len(data_diagnostics)) + "dia"
-        if data_mme_create is True:
-            fig_name += "_mme"
-            fig_name += "_of_em" if data_mme_use_smile_mean is True else "_of_1m"
-            fig_name += "_all_smile" if data_mme_use_all_smiles is True else "_1st_smile"
-        fig_name += "_relative_uncertainty" if uncertainty_relative is True else "_absolute_uncertainty"
-        fig_name += "_" + str(uncertainty_confidence_interval) + "ci"
-        fig_name += "_" + str(uncertainty_distribution) + "_distribution"
-        fig_name += "_" + str(fig_orientation)
-    fig_scatter_and_regression(data_to_plot, data_diagnostics, fig_format, fig_name, fig_colors, fig_markers,
-                               fig_marker_size, fig_orientation, fig_panel_size, fig_ticks, fig_titles,
-                               fig_legend_bool=False, panel_param=panel_param)
+    # skip (or not) the checks of the inputs in internal hot paths, also in the worker processes (the previous mode
+    # is restored once the figure is done)
+    with check_trusted_inputs_scope(uncertainty_trusted_inputs):
+        #
+        # -- Read json
+        #
+        values, metadata = data_organize_json(
+            data_diagnostics, data_epoch_lengths, data_projects, data_experiments, data_filename=data_filename,
+            data_mme_create=data_mme_create, data_mme_use_all_smiles=data_mme_use_all_smiles,
+            data_mme_use_smile_mean=data_mme_use_smile_mean, data_smile_minimum_size=data_smile_minimum_size,
+            data_smile_rejected=data_smile_rejected,
+            data_smile_require_all_experiments=data_smile_require_all_experiments,
+            data_columnar_cache=data_columnar_cache, data_stream_json=data_stream_json)
+        #
+        # -- Compute uncertainty
+        #
+        bootstrap, _, _ = nest_compute_uncertainty(
+            values, uncertainty_confidence_interval, uncertainty_distribution, uncertainty_relative,
+            uncertainty_combinations, uncertainty_resamples, False, n_jobs=uncertainty_n_jobs,
+            uncertainty_seed=uncertainty_seed, uncertainty_shared_draws=uncertainty_shared_draws,
+            uncertainty_exact_bootstrap=uncertainty_exact_bootstrap, uncertainty_tolerance=uncertainty_tolerance,
+            uncertainty_control_variate=uncertainty_control_variate)
+        theory, _, _ = nest_compute_uncertainty(
+            values, uncertainty_confidence_interval, uncertainty_distribution, uncertainty_relative,
+            uncertainty_combinations, uncertainty_resamples, True, n_jobs=uncertainty_n_jobs,
+            uncertainty_seed=uncertainty_seed, uncertainty_shared_draws=uncertainty_shared_draws,
+            uncertainty_exact_bootstrap=uncertainty_exact_bootstrap, uncertainty_tolerance=uncertainty_tolerance,
+            uncertainty_control_variate=uncertainty_control_variate)
+        #
+        # -- Organize data for the figure
+        #
+        data_to_plot = {}
+        for dia in sorted(list(theory.keys()), key=str.casefold):
+            for dur in sorted(list(theory[dia].keys()), key=str.casefold):
+                for pro in sorted(list(theory[dia][dur].keys()), key=str.casefold):
+                    for exp in sorted(list(theory[dia][dur][pro].keys()), key=str.casefold):
+                        for dat in sorted(list(theory[dia][dur][pro][exp].keys()), key=str.casefold):
+                            for epo in sorted(list(theory[dia][dur][pro][exp][dat].keys()), key=str.casefold):
+                                for siz in sorted(list(theory[dia][dur][pro][exp][dat][epo].keys()), key=str.casefold):
+                                    # uncertainty of the sample mean computed using the bootstrap as x values
+                                    data_to_plot = tool_put_in_dict(
+                                        data_to_plot, [bootstrap[dia][dur][pro][exp][dat][epo][siz]], dia, dat, "x")
+                                    # uncertainty of the sample mean computed using the theory as y values
+                                    data_to_plot = tool_put_in_dict(
+                                        data_to_plot, [theory[dia][dur][pro][exp][dat][epo][siz]], dia, dat, "y")
+        fig_colors = dict((dat, fig_marker_color) for dat in list(data_to_plot[data_diagnostics[0]].keys()))
+        fig_markers = dict((dat, fig_marker) for dat in list(data_to_plot[data_diagnostics[0]].keys()))
+        method = "relative" if uncertainty_relative is True else "absolute"
+        for dia in list(data_to_plot.keys()):
+            units = ""
+            if method == "absolute" and metadata[dia]["units"] != "":
+                units = " (" + str(metadata[dia]["units"]) + ")"
+            elif method == "relative":
+                units = " (%)"
+            # x-axis
+            name = str(fig_titles[method]) + " from random sampling" + str(units)
+            fig_titles = tool_put_in_dict(fig_titles, name, "x_axis", dia)
+            # y-axis
+            name = str(fig_titles[method]) + " from theory" + str(units)
+            fig_titles = tool_put_in_dict(fig_titles, name, "y_axis", dia)
+            # x-y tics
+            if dia in list(fig_ticks.keys()) and isinstance(fig_ticks[dia], list) is True:
+                pass
+            else:
+                list_ticks = None
+                if method in list(fig_ticks.keys()) and isinstance(fig_ticks[method], dict) is True and \
+                        dia in list(fig_ticks[method].keys()) and isinstance(fig_ticks[method][dia], list) is True:
+                    list_ticks = fig_ticks[method][dia]
+                fig_ticks = tool_put_in_dict(fig_ticks, list_ticks, dia)
+        #
+        # -- Figure
+        #
+        # output figure name will be the file name (path removed and extension removed)
+        fig_name = __file__.split("/")[-1].split(".")[0] + str(fig_name_add)
+        if fig_name_details is True:
+            # add details of the computation to the figure name
+            fig_name += "_data_" + str(len(data_projects)) + "pro_" + str(len(data_experiments)) + "exp_" + \
+                        str(data_smile_minimum_size) + "mem_" + str(len(data_diagnostics)) + "dia"
+            if data_mme_create is True:
+                fig_name += "_mme"
+                fig_name += "_of_em" if data_mme_use_smile_mean is True else "_of_1m"
+                fig_name += "_all_smile" if data_mme_use_all_smiles is True else "_1st_smile"
+            fig_name += "_relative_uncertainty" if uncertainty_relative is True else "_absolute_uncertainty"
+            fig_name += "_" + str(uncertainty_confidence_interval) + "ci"
+            fig_name += "_" + str(uncertainty_distribution) + "_distribution"
+            fig_name += "_" + str(fig_orientation)
+        fig_scatter_and_regression(data_to_plot, data_diagnostics, fig_format, fig_name, fig_colors, fig_markers,
+                                   fig_marker_size, fig_orientation, fig_panel_size, fig_ticks, fig_titles,
+                                   fig_legend_bool=False, panel_param=panel_param)
 # ---------------------------------------------------------------------------------------------------------------------#
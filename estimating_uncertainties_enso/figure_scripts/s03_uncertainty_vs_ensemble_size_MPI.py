@@ -13,7 +13,7 @@ from . params import default_parameters
 from estimating_uncertainties_enso.compute_lib.data_lib import data_organize_json
 from estimating_uncertainties_enso.compute_lib.nest_lib import deepcopy, nest_compute_statistic, \
     nest_influence_of_ensemble_size, nest_standardize_distributions
-from estimating_uncertainties_enso.compute_lib.stat_lib import stat_uncertainty_select_and_compute
+from estimating_uncertainties_enso.compute_lib.stat_lib import stat_uncertainty_curve
 from estimating_uncertainties_enso.compute_lib.tool_lib import tool_put_in_dict
 from estimating_uncertainties_enso.figure_templates.fig_template import fig_distribution_and_ensemble_size
 # ---------------------------------------------------#
@@ -48,6 +48,10 @@ default = {
     "data_smile_rejected": default_parameters["data_smile_rejected"],
     # require all experiments to keep SMILE: True, False
     "data_smile_require_all_experiments": default_parameters["data_smile_require_all_experiments"],
+    # read the columnar cache of the json file (created at the first call, faster reads): True, False
+    "data_columnar_cache": default_parameters["data_columnar_cache"],
+    # stream the json file (slower, but lower peak memory; very large files are always streamed): True, False
+    "data_stream_json": default_parameters["data_stream_json"],
     #
     # -- Uncertainty
     #
@@ -191,6 +195,8 @@ def s03_ensemble_size_mpi(
         data_smile_minimum_size: int = default["data_smile_minimum_size"],
         data_smile_rejected: list = default["data_smile_rejected"],
         data_smile_require_all_experiments: bool = default["data_smile_require_all_experiments"],
+        data_columnar_cache: bool = default["data_columnar_cache"],
+        data_stream_json: bool = default["data_stream_json"],
         uncertainty_combinations: int = default["uncertainty_combinations"],
         uncertainty_confidence_interval: float = default["uncertainty_confidence_interval"],
         uncertainty_distribution: str = default["uncertainty_distribution"],
@@ -226,7 +232,8 @@ def s03_ensemble_size_mpi(
         data_diagnostics, data_epoch_lengths, data_projects, data_experiments, data_filename=data_filename,
         data_mme_create=data_mme_create, data_mme_use_all_smiles=data_mme_use_all_smiles,
         data_mme_use_smile_mean=data_mme_use_smile_mean, data_smile_minimum_size=data_smile_minimum_size,
-        data_smile_rejected=data_smile_rejected, data_smile_require_all_experiments=data_smile_require_all_experiments)
+        data_smile_rejected=data_smile_rejected, data_smile_require_all_experiments=data_smile_require_all_experiments,
+        data_columnar_cache=data_columnar_cache, data_stream_json=data_stream_json)
     #
     # -- Standardize SMILE distributions
     #
@@ -259,11 +266,11 @@ def s03_ensemble_size_mpi(
                                 sample_sizes = [k for k in uncertainty_sample_sizes if isinstance(k, int) and
                                                 k < len(arr1)] + [len(arr1)]
                                 # compute uncertainty as a function of ensemble size
-                                for k2 in sample_sizes:
-                                    val = stat_uncertainty_select_and_compute(
-                                        arr1, uncertainty_confidence_interval, uncertainty_distribution,
-                                        uncertainty_relative, uncertainty_combinations, uncertainty_resamples,
-                                        uncertainty_theory, k2)
+                                list_val = stat_uncertainty_curve(
+                                    arr1, uncertainty_confidence_interval, uncertainty_distribution,
+                                    uncertainty_relative, uncertainty_combinations, uncertainty_resamples,
+                                    uncertainty_theory, sample_sizes)
+                                for k2, val in zip(sample_sizes, list_val):
                                     # save values
                                     name = str(k2).zfill(3) + "_members" if len(uncertainty_sample_sizes) > 0 else \
                                         "max_members"
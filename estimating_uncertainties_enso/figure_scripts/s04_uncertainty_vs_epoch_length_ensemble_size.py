@@ -13,14 +13,16 @@
 # basic python package
 from copy import deepcopy
 # numpy
+from numpy import arange as numpy__arange
 from numpy import array as numpy__array
+from numpy.random import default_rng as numpy__random__default_rng
 # scipy
 from scipy.stats import scoreatpercentile as scipy__stats__scoreatpercentile
 # estimating_uncertainties_enso package
 from . params import default_parameters
+from estimating_uncertainties_enso.compute_lib.check_lib import check_trusted_inputs_scope
 from estimating_uncertainties_enso.compute_lib.data_lib import data_organize_json
-from estimating_uncertainties_enso.compute_lib.stat_lib import stat_combination_indices, stat_compute_statistic, \
-    stat_uncertainty_select_and_compute
+from estimating_uncertainties_enso.compute_lib.stat_lib import stat_combination_indices, stat_uncertainty_batch
 from estimating_uncertainties_enso.compute_lib.tool_lib import tool_put_in_dict
 from estimating_uncertainties_enso.figure_templates.fig_template import fig_influence_of
 # ---------------------------------------------------#
@@ -60,6 +62,10 @@ default = {
     "uncertainty_resamples": default_parameters["uncertainty_resamples"],
     # list of sample sizes for which the uncertainty will be computed
     "uncertainty_sample_sizes": list(range(10, 51, 10)),
+    # seed of the random numbers (None to draw different random numbers at each call): int [0, 2**32 - 1], None
+    "uncertainty_seed": default_parameters["uncertainty_seed"],
+    # skip the checks of the inputs in internal hot paths (faster, but wrong inputs are not explained): True, False
+    "uncertainty_trusted_inputs": default_parameters["uncertainty_trusted_inputs"],
     #
     # -- Figure
     #
@@ -145,7 +151,9 @@ def s04_epoch_length_ensemble_size(
         uncertainty_relative: bool = default["uncertainty_relative"],
         uncertainty_resamples: int = default["uncertainty_resamples"],
         uncertainty_sample_sizes: list = default["uncertainty_sample_sizes"],
+        uncertainty_seed: int = default["uncertainty_seed"],
         uncertainty_theory: bool = default["uncertainty_theory"],
+        uncertainty_trusted_inputs: bool = default["uncertainty_trusted_inputs"],
         fig_colors: dict = default["fig_colors"],
         fig_format: str = default["fig_format"],
         fig_legend_position: str = default["fig_legend_position"],
@@ -164,163 +172,157 @@ def s04_epoch_length_ensemble_size(
         fig_uncertainty_reference: str = default["fig_uncertainty_reference"],
         panel_param: dict = default["panel_param"],
         **kwargs):
-    #
-    # -- Read json
-    #
-    values, metadata = data_organize_json(data_diagnostics, data_epoch_lengths, data_projects, data_experiments,
-                                          data_filename=data_filename)
-    #
-    # -- Reorder dictionary and keep only the selected dataset
-    #
-    values_reordered = {}
-    for dia in list(values.keys()):
-        for dur in list(values[dia].keys()):
-            for pro in list(values[dia][dur].keys()):
-                for exp in list(values[dia][dur][pro].keys()):
-                    dat = deepcopy(fig_smile_selected)
-                    if exp != "historical" or dat not in list(values[dia][dur][pro][exp].keys()):
-                        # do not continue this loop if the selected dataset is not available
-                        break
-                    for epo in list(values[dia][dur][pro][exp][dat].keys()):
-                        values_reordered = tool_put_in_dict(values_reordered, values[dia][dur][pro][exp][dat][epo], dia,
-                                                            pro, exp, dat, dur, epo)
-    #
-    # -- Compute uncertainty
-    #
-    uncertainties = {}
-    for dia in list(values_reordered.keys()):
-        for pro in list(values_reordered[dia].keys()):
-            for exp in list(values_reordered[dia][pro].keys()):
-                for dat in list(values_reordered[dia][pro][exp].keys()):
-                    # dictionary
-                    d1 = values_reordered[dia][pro][exp][dat]
-                    # the ensemble size is the same for all epoch lengths and epochs
-                    ensemble_size = len(d1[list(d1.keys())[0]][list(d1[list(d1.keys())[0]].keys())[0]])
-                    # list sample sizes to use
-                    sample_sizes = [k for k in uncertainty_sample_sizes if isinstance(k, int) and k < ensemble_size]
-                    # compute uncertainty in maximum ensemble
-                    dict_t = {}
-                    for dur in list(d1.keys()):
-                        for epo in list(d1[dur].keys()):
-                            val = stat_uncertainty_select_and_compute(
-                                d1[dur][epo], uncertainty_confidence_interval, uncertainty_distribution,
-                                uncertainty_relative, uncertainty_combinations, uncertainty_resamples,
-                                uncertainty_theory, ensemble_size)
-                            dict_t = tool_put_in_dict(
-                                dict_t, val, "maximum", dur, str(0).zfill(6), epo)
-                    # compute uncertainty in reduced ensemble
-                    for siz in sample_sizes:
+    # skip (or not) the checks of the inputs in internal hot paths, also in the worker processes (the previous mode
+    # is restored once the figure is done)
+    with check_trusted_inputs_scope(uncertainty_trusted_inputs):
+        #
+        # -- Read json
+        #
+        values, metadata = data_organize_json(data_diagnostics, data_epoch_lengths, data_projects, data_experiments,
+                                              data_filename=data_filename)
+        #
+        # -- Reorder dictionary and keep only the selected dataset
+        #
+        values_reordered = {}
+        for dia in list(values.keys()):
+            for dur in list(values[dia].keys()):
+                for pro in list(values[dia][dur].keys()):
+                    for exp in list(values[dia][dur][pro].keys()):
+                        dat = deepcopy(fig_smile_selected)
+                        if exp != "historical" or dat not in list(values[dia][dur][pro][exp].keys()):
+                            # do not continue this loop if the selected dataset is not available
+                            break
+                        for epo in list(values[dia][dur][pro][exp][dat].keys()):
+                            values_reordered = tool_put_in_dict(values_reordered, values[dia][dur][pro][exp][dat][epo],
+                                                                dia, pro, exp, dat, dur, epo)
+        #
+        # -- Compute uncertainty
+        #
+        # a single generator is used by all draws
+        rng = numpy__random__default_rng(uncertainty_seed)
+        uncertainties = {}
+        for dia in list(values_reordered.keys()):
+            for pro in list(values_reordered[dia].keys()):
+                for exp in list(values_reordered[dia][pro].keys()):
+                    for dat in list(values_reordered[dia][pro][exp].keys()):
+                        # dictionary
+                        d1 = values_reordered[dia][pro][exp][dat]
+                        # array (epochs x members) per epoch length
+                        dict_arr = dict((dur, numpy__array([d1[dur][epo] for epo in list(d1[dur].keys())]))
+                                        for dur in list(d1.keys()))
+                        # the ensemble size is the same for all epoch lengths and epochs
+                        ensemble_size = dict_arr[list(dict_arr.keys())[0]].shape[1]
+                        # list sample sizes to use
+                        sample_sizes = [k for k in uncertainty_sample_sizes if isinstance(k, int) and k < ensemble_size]
+                        # members of the maximum ensemble and of the reduced ensembles
                         # select the same indices for all epoch lengths and epochs
                         # the goal is to compute the uncertainty each time as if the ensemble size was smaller
-                        idx = stat_combination_indices(ensemble_size, uncertainty_combinations, siz)
-                        for dur in list(d1.keys()):
-                            for epo in list(d1[dur].keys()):
-                                # select members
-                                sample = numpy__array(d1[dur][epo])[idx]
-                                for k in list(range(uncertainty_combinations)):
-                                    # compute uncertainty for each combination of reduced ensemble
-                                    val = stat_uncertainty_select_and_compute(
-                                        sample[k], uncertainty_confidence_interval, uncertainty_distribution,
-                                        uncertainty_relative, uncertainty_combinations, uncertainty_resamples,
-                                        uncertainty_theory, siz)
-                                    dict_t = tool_put_in_dict(
-                                        dict_t, val, str(siz) + " members", dur, str(k).zfill(6), epo)
-                    # compute the influence of the epoch length for each sample size
-                    for siz in list(dict_t.keys()):
-                        # list epoch lengths for given data
-                        list_lengths = sorted(list(dict_t[siz].keys()), key=str.casefold)
-                        if len(list_lengths) < 2:
-                            list_lengths = []
-                        if fig_uncertainty_reference == "maximum":
-                            list_lengths = list(reversed(list_lengths))
-                        # reference epoch length
-                        dur_ref = list_lengths[0]
-                        # compute the influence of the epoch length
-                        list_y_low, list_y_upp = [], []
-                        for dur in list_lengths:
-                            ratio_per_sample = list()
-                            for nbr in list(dict_t[siz][dur].keys()):
-                                # list uncertainties by epoch
-                                arr = [dict_t[siz][dur][nbr][k] for k in list(dict_t[siz][dur][nbr].keys())]
-                                ref = [dict_t[siz][dur_ref][nbr][k] for k in list(dict_t[siz][dur_ref][nbr].keys())]
-                                # compute ratio of epoch means
-                                ratio_per_sample.append(float(stat_compute_statistic(arr, "mea")) /
-                                                        float(stat_compute_statistic(ref, "mea")))
-                            if len(ratio_per_sample) == 1:
-                                list_y_low.append(ratio_per_sample[0])
-                                list_y_upp.append(ratio_per_sample[0])
+                        dict_idx = {"maximum": numpy__arange(ensemble_size)[None]}
+                        for siz in sample_sizes:
+                            dict_idx[str(siz) + " members"] = stat_combination_indices(
+                                ensemble_size, uncertainty_combinations, siz, rng=rng)
+                        # compute the uncertainty of each ensemble, averaged across epochs
+                        dict_t = {}
+                        for siz, idx in dict_idx.items():
+                            for dur, arr in dict_arr.items():
+                                # select members (epochs x ensembles x members)
+                                sample = arr[:, idx]
+                                val = stat_uncertainty_batch(
+                                    sample.reshape((-1, idx.shape[1])), uncertainty_confidence_interval,
+                                    uncertainty_distribution, uncertainty_relative, uncertainty_combinations,
+                                    uncertainty_resamples, uncertainty_theory, idx.shape[1], uncertainty_rng=rng)
+                                dict_t = tool_put_in_dict(dict_t, val.reshape(sample.shape[:2]).mean(axis=0), siz, dur)
+                        # compute the influence of the epoch length for each sample size
+                        for siz in list(dict_t.keys()):
+                            # list epoch lengths for given data
+                            list_lengths = sorted(list(dict_t[siz].keys()), key=str.casefold)
+                            if len(list_lengths) < 2:
+                                list_lengths = []
+                            if fig_uncertainty_reference == "maximum":
+                                list_lengths = list(reversed(list_lengths))
+                            # reference epoch length
+                            dur_ref = list_lengths[0]
+                            # compute the influence of the epoch length
+                            list_y_low, list_y_upp = [], []
+                            for dur in list_lengths:
+                                # compute ratio of epoch means for each ensemble
+                                ratio_per_sample = dict_t[siz][dur] / dict_t[siz][dur_ref]
+                                if len(ratio_per_sample) == 1:
+                                    list_y_low.append(float(ratio_per_sample[0]))
+                                    list_y_upp.append(float(ratio_per_sample[0]))
+                                else:
+                                    # lower and upper value on the interval
+                                    low = 50 - uncertainty_confidence_interval / 2
+                                    upp = 50 + uncertainty_confidence_interval / 2
+                                    list_y_low.append(float(scipy__stats__scoreatpercentile(ratio_per_sample, low)))
+                                    list_y_upp.append(float(scipy__stats__scoreatpercentile(ratio_per_sample, upp)))
+                            # x-values
+                            if fig_uncertainty_reference == "maximum":
+                                list_x = [int(dur.split("_")[0]) / int(dur_ref.split("_")[0]) for dur in list_lengths]
                             else:
-                                # lower and upper value on the interval
-                                low = 50 - uncertainty_confidence_interval / 2
-                                upp = 50 + uncertainty_confidence_interval / 2
-                                list_y_low.append(float(scipy__stats__scoreatpercentile(ratio_per_sample, low)))
-                                list_y_upp.append(float(scipy__stats__scoreatpercentile(ratio_per_sample, upp)))
-                        # x-values
-                        if fig_uncertainty_reference == "maximum":
-                            list_x = [int(dur.split("_")[0]) / int(dur_ref.split("_")[0]) for dur in list_lengths]
-                        else:
-                            list_x = [int(dur.split("_")[0]) for dur in list_lengths]
-                        # save value
-                        if siz == "maximum":
-                            uncertainties = tool_put_in_dict(uncertainties, list_x, dia, siz, exp, pro, "x")
-                            uncertainties = tool_put_in_dict(uncertainties, list_y_low, dia, siz, exp, pro, "y")
-                        else:
-                            uncertainties = tool_put_in_dict(uncertainties, list_x, dia, siz, exp, pro, "x")
-                            uncertainties = tool_put_in_dict(uncertainties, list_y_low, dia, siz, exp, pro, "y1")
-                            uncertainties = tool_put_in_dict(uncertainties, list_y_upp, dia, siz, exp, pro, "y2")
-    #
-    # -- Organize data to for figure
-    #
-    method = "relative" if uncertainty_relative is True else "absolute"
-    for dia in list(uncertainties.keys()):
-        # x-y titles
-        title = ""
-        if "x_axis" in list(fig_titles.keys()) and fig_uncertainty_reference in list(fig_titles["x_axis"].keys()):
-            title = fig_titles["x_axis"][fig_uncertainty_reference]
-        fig_titles = tool_put_in_dict(fig_titles, title, "x_axis", dia)
-        title = ""
-        if "y_axis" in list(fig_titles.keys()) and fig_uncertainty_reference in list(fig_titles["y_axis"].keys()):
-            title = str(fig_titles[method]) + " " + str(fig_titles["y_axis"][fig_uncertainty_reference])
-        fig_titles = tool_put_in_dict(fig_titles, title, "y_axis", dia)
-        # x tics
-        if "x_axis" in list(fig_ticks.keys()) and isinstance(fig_ticks["x_axis"], dict) is True and \
-                dia in list(fig_ticks["x_axis"].keys()) and isinstance(fig_ticks["x_axis"][dia], list) is True:
-            pass
-        else:
-            list_ticks = None
-            if "x_axis" in list(fig_ticks.keys()) and fig_uncertainty_reference in list(fig_ticks["x_axis"].keys()):
-                list_ticks = fig_ticks["x_axis"][fig_uncertainty_reference]
-            fig_ticks = tool_put_in_dict(fig_ticks, list_ticks, "x_axis", dia)
-        # y tics
-        if "y_axis" in list(fig_ticks.keys()) and isinstance(fig_ticks["y_axis"], dict) is True and \
-                dia in list(fig_ticks["y_axis"].keys()) and isinstance(fig_ticks["y_axis"][dia], list) is True:
-            pass
-        else:
-            list_ticks = None
-            if "y_axis" in list(fig_ticks.keys()) and fig_uncertainty_reference in list(fig_ticks["y_axis"].keys()) \
-                    and fig_smile_selected in list(fig_ticks["y_axis"][fig_uncertainty_reference].keys()) and \
-                    dia in list(fig_ticks["y_axis"][fig_uncertainty_reference][fig_smile_selected].keys()):
-                list_ticks = fig_ticks["y_axis"][fig_uncertainty_reference][fig_smile_selected][dia]
-            fig_ticks = tool_put_in_dict(fig_ticks, list_ticks, "y_axis", dia)
-    # markers
-    fig_markers = dict((siz, fig_marker) for siz in list(fig_colors.keys()))
-    #
-    # -- Figure
-    #
-    # output figure name will be the file name (path removed and extension removed)
-    fig_name = __file__.split("/")[-1].split(".")[0] + str(fig_name_add)
-    if fig_name_details is True:
-        # add details of the computation to the figure name
-        fig_name += "_data_" + str(len(data_projects)) + "pro_" + str(len(data_experiments)) + "exp_" + \
-                    str(len(data_diagnostics)) + "dia_" + str(fig_smile_selected)
-        fig_name += "_relative_uncertainty" if uncertainty_relative is True else "_absolute_uncertainty"
-        fig_name += "_theory" if uncertainty_theory is True else "_random"
-        fig_name += "_" + str(uncertainty_confidence_interval) + "ci_" + str(fig_uncertainty_reference)
-        if uncertainty_theory is True:
-            fig_name += "_" + str(uncertainty_distribution) + "_distribution"
-        fig_name += "_" + str(fig_orientation)
-    fig_influence_of(uncertainties, data_diagnostics, data_experiments, fig_format, fig_name, fig_colors,
-                     fig_legend_position, fig_linestyles, fig_linewidth, fig_linezorder, fig_markers, fig_marker_size,
-                     fig_orientation, fig_panel_size, fig_ticks, fig_titles, 10, "epoch_length",
-                     fig_uncertainty_reference, panel_param=panel_param)
+                                list_x = [int(dur.split("_")[0]) for dur in list_lengths]
+                            # save value
+                            if siz == "maximum":
+                                uncertainties = tool_put_in_dict(uncertainties, list_x, dia, siz, exp, pro, "x")
+                                uncertainties = tool_put_in_dict(uncertainties, list_y_low, dia, siz, exp, pro, "y")
+                            else:
+                                uncertainties = tool_put_in_dict(uncertainties, list_x, dia, siz, exp, pro, "x")
+                                uncertainties = tool_put_in_dict(uncertainties, list_y_low, dia, siz, exp, pro, "y1")
+                                uncertainties = tool_put_in_dict(uncertainties, list_y_upp, dia, siz, exp, pro, "y2")
+        #
+        # -- Organize data to for figure
+        #
+        method = "relative" if uncertainty_relative is True else "absolute"
+        for dia in list(uncertainties.keys()):
+            # x-y titles
+            title = ""
+            if "x_axis" in list(fig_titles.keys()) and fig_uncertainty_reference in list(fig_titles["x_axis"].keys()):
+                title = fig_titles["x_axis"][fig_uncertainty_reference]
+            fig_titles = tool_put_in_dict(fig_titles, title, "x_axis", dia)
+            title = ""
+            if "y_axis" in list(fig_titles.keys()) and fig_uncertainty_reference in list(fig_titles["y_axis"].keys()):
+                title = str(fig_titles[method]) + " " + str(fig_titles["y_axis"][fig_uncertainty_reference])
+            fig_titles = tool_put_in_dict(fig_titles, title, "y_axis", dia)
+            # x tics
+            if "x_axis" in list(fig_ticks.keys()) and isinstance(fig_ticks["x_axis"], dict) is True and \
+                    dia in list(fig_ticks["x_axis"].keys()) and isinstance(fig_ticks["x_axis"][dia], list) is True:
+                pass
+            else:
+                list_ticks = None
+                if "x_axis" in list(fig_ticks.keys()) and fig_uncertainty_reference in list(fig_ticks["x_axis"].keys()):
+                    list_ticks = fig_ticks["x_axis"][fig_uncertainty_reference]
+                fig_ticks = tool_put_in_dict(fig_ticks, list_ticks, "x_axis", dia)
+            # y tics
+            if "y_axis" in list(fig_ticks.keys()) and isinstance(fig_ticks["y_axis"], dict) is True and \
+                    dia in list(fig_ticks["y_axis"].keys()) and isinstance(fig_ticks["y_axis"][dia], list) is True:
+                pass
+            else:
+                list_ticks = None
+                if "y_axis" in list(fig_ticks.keys()) and \
+                        fig_uncertainty_reference in list(fig_ticks["y_axis"].keys()) and \
+                        fig_smile_selected in list(fig_ticks["y_axis"][fig_uncertainty_reference].keys()) and \
+                        dia in list(fig_ticks["y_axis"][fig_uncertainty_reference][fig_smile_selected].keys()):
+                    list_ticks = fig_ticks["y_axis"][fig_uncertainty_reference][fig_smile_selected][dia]
+                fig_ticks = tool_put_in_dict(fig_ticks, list_ticks, "y_axis", dia)
+        # markers
+        fig_markers = dict((siz, fig_marker) for siz in list(fig_colors.keys()))
+        #
+        # -- Figure
+        #
+        # output figure name will be the file name (path removed and extension removed)
+        fig_name = __file__.split("/")[-1].split(".")[0] + str(fig_name_add)
+        if fig_name_details is True:
+            # add details of the computation to the figure name
+            fig_name += "_data_" + str(len(data_projects)) + "pro_" + str(len(data_experiments)) + "exp_" + \
+                        str(len(data_diagnostics)) + "dia_" + str(fig_smile_selected)
+            fig_name += "_relative_uncertainty" if uncertainty_relative is True else "_absolute_uncertainty"
+            fig_name += "_theory" if uncertainty_theory is True else "_random"
+            fig_name += "_" + str(uncertainty_confidence_interval) + "ci_" + str(fig_uncertainty_reference)
+            if uncertainty_theory is True:
+                fig_name += "_" + str(uncertainty_distribution) + "_distribution"
+            fig_name += "_" + str(fig_orientation)
+        fig_influence_of(uncertainties, data_diagnostics, data_experiments, fig_format, fig_name, fig_colors,
+                         fig_legend_position, fig_linestyles, fig_linewidth, fig_linezorder, fig_markers,
+                         fig_marker_size, fig_orientation, fig_panel_size, fig_ticks, fig_titles, 10, "epoch_length",
+                         fig_uncertainty_reference, panel_param=panel_param)
 # ---------------------------------------------------------------------------------------------------------------------#
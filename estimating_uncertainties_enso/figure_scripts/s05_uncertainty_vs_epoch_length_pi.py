@@ -49,6 +49,10 @@ default = {
     "data_smile_rejected": default_parameters["data_smile_rejected"],
     # require all experiments to keep SMILE: True, False
     "data_smile_require_all_experiments": False,
+    # read the columnar cache of the json file (created at the first call, faster reads): True, False
+    "data_columnar_cache": default_parameters["data_columnar_cache"],
+    # stream the json file (slower, but lower peak memory; very large files are always streamed): True, False
+    "data_stream_json": default_parameters["data_stream_json"],
     #
     # -- Uncertainty
     #
@@ -225,6 +229,8 @@ def s05_epoch_length_pi(
         data_smile_minimum_size: int = default["data_smile_minimum_size"],
         data_smile_rejected: list = default["data_smile_rejected"],
         data_smile_require_all_experiments: bool = default["data_smile_require_all_experiments"],
+        data_columnar_cache: bool = default["data_columnar_cache"],
+        data_stream_json: bool = default["data_stream_json"],
         uncertainty_combinations: int = default["uncertainty_combinations"],
         uncertainty_confidence_interval: float = default["uncertainty_confidence_interval"],
         uncertainty_distribution: str = default["uncertainty_distribution"],
@@ -255,7 +261,8 @@ def s05_epoch_length_pi(
         data_diagnostics, data_epoch_lengths, data_projects, data_experiments, data_filename=data_filename,
         data_mme_create=data_mme_create, data_mme_use_all_smiles=data_mme_use_all_smiles,
         data_mme_use_smile_mean=data_mme_use_smile_mean, data_smile_minimum_size=data_smile_minimum_size,
-        data_smile_rejected=data_smile_rejected, data_smile_require_all_experiments=data_smile_require_all_experiments)
+        data_smile_rejected=data_smile_rejected, data_smile_require_all_experiments=data_smile_require_all_experiments,
+        data_columnar_cache=data_columnar_cache, data_stream_json=data_stream_json)
     #
     # -- Delete unneeded data
     #
@@ -10,6 +10,7 @@
 # ---------------------------------------------------#
 # estimating_uncertainties_enso package
 from . params import default_parameters
+from estimating_uncertainties_enso.compute_lib.check_lib import check_trusted_inputs_scope
 from estimating_uncertainties_enso.compute_lib.data_lib import data_organize_json
 from estimating_uncertainties_enso.compute_lib.nest_lib import nest_compute_res, nest_define_uncertainty_threshold
 from estimating_uncertainties_enso.compute_lib.tool_lib import tool_put_in_dict
@@ -46,6 +47,10 @@ default = {
     "data_smile_rejected": default_parameters["data_smile_rejected"],
     # require all experiments to keep SMILE: True, False
     "data_smile_require_all_experiments": False,
+    # read the columnar cache of the json file (created at the first call, faster reads): True, False
+    "data_columnar_cache": default_parameters["data_columnar_cache"],
+    # stream the json file (slower, but lower peak memory; very large files are always streamed): True, False
+    "data_stream_json": default_parameters["data_stream_json"],
     #
     # -- Uncertainty
     #
@@ -55,6 +60,12 @@ default = {
     "uncertainty_combinations": default_parameters["uncertainty_combinations"],
     # number of resamples used for the bootstrap if uncertainty_theory is False: int [10, 1e10]
     "uncertainty_resamples": default_parameters["uncertainty_resamples"],
+    # number of processes used to compute the uncertainty of the datasets and epochs in parallel: int [1, 1e5]
+    "uncertainty_n_jobs": default_parameters["uncertainty_n_jobs"],
+    # seed of the random numbers (None to draw different random numbers at each call): int [0, 2**32 - 1], None
+    "uncertainty_seed": default_parameters["uncertainty_seed"],
+    # skip the checks of the inputs in internal hot paths (faster, but wrong inputs are not explained): True, False
+    "uncertainty_trusted_inputs": default_parameters["uncertainty_trusted_inputs"],
     # uncertainty to reach per diagnostic per method
     "uncertainty_threshold": {
         "ave_pr_val_n30e": {"unc": {"uncertainty_relative": True, "threshold": list(range(5, 101, 5))}},
@@ -116,11 +127,16 @@ def s06_theory_vs_bootstrap(
         data_smile_minimum_size: int = default["data_smile_minimum_size"],
         data_smile_rejected: list = default["data_smile_rejected"],
         data_smile_require_all_experiments: bool = default["data_smile_require_all_experiments"],
+        data_columnar_cache: bool = default["data_columnar_cache"],
+        data_stream_json: bool = default["data_stream_json"],
         res_maximum: int = default["res_maximum"],
         uncertainty_combinations: int = default["uncertainty_combinations"],
         uncertainty_confidence_interval: float = default["uncertainty_confidence_interval"],
+        uncertainty_n_jobs: int = default["uncertainty_n_jobs"],
         uncertainty_resamples: int = default["uncertainty_resamples"],
+        uncertainty_seed: int = default["uncertainty_seed"],
         uncertainty_threshold: dict = default["uncertainty_threshold"],
+        uncertainty_trusted_inputs: bool = default["uncertainty_trusted_inputs"],
         fig_format: str = default["fig_format"],
         fig_marker: str = default["fig_marker"],
         fig_marker_color: str = default["fig_marker_color"],
@@ -132,85 +148,92 @@ def s06_theory_vs_bootstrap(
         fig_titles: dict = default["fig_titles"],
         panel_param: dict = default["panel_param"],
         **kwargs):
-    #
-    # -- Read json
-    #
-    values, metadata = data_organize_json(
-        data_diagnostics, data_epoch_lengths, data_projects, data_experiments, data_filename=data_filename,
-        data_mme_create=data_mme_create, data_mme_use_all_smiles=data_mme_use_all_smiles,
-        data_mme_use_smile_mean=data_mme_use_smile_mean, data_smile_minimum_size=data_smile_minimum_size,
-        data_smile_rejected=data_smile_rejected, data_smile_require_all_experiments=data_smile_require_all_experiments)
-    #
-    # -- Define thresholds for each method
-    #
-    values, thresholds = nest_define_uncertainty_threshold(values, uncertainty_threshold)
-    #
-    # -- Compute required ensemble size (RES) to reach an uncertainty smaller than the desired ones
-    #
-    res_bootstrap, _, _ = nest_compute_res(
-        values, thresholds, res_maximum, uncertainty_confidence_interval, "normal",
-        uncertainty_combinations, uncertainty_resamples, False)
-    res_theory, _, _ = nest_compute_res(
-        values, thresholds, res_maximum, uncertainty_confidence_interval, "normal",
-        uncertainty_combinations, uncertainty_resamples, True)
-    #
-    # -- Organize data for the plot
-    #
-    # [diagnostic, epoch_length, project, experiment, dataset, epoch, method]
-    data_to_plot = {}
-    for dia in list(res_bootstrap.keys()):
-        for dur in list(res_bootstrap[dia].keys()):
-            for pro in list(res_bootstrap[dia][dur].keys()):
-                for exp in list(res_bootstrap[dia][dur][pro].keys()):
-                    for dat in list(res_bootstrap[dia][dur][pro][exp].keys()):
-                        for epo in list(res_bootstrap[dia][dur][pro][exp][dat].keys()):
-                            for method in list(res_bootstrap[dia][dur][pro][exp][dat][epo].keys()):
-                                for threshold in list(res_bootstrap[dia][dur][pro][exp][dat][epo][method].keys()):
-                                    if threshold in list(res_theory[dia][dur][pro][exp][dat][epo][method].keys()):
-                                        # RES computed using the bootstrap as x values
-                                        arr_x = res_bootstrap[dia][dur][pro][exp][dat][epo][method][threshold]
-                                        # RES computed using the theory as y values
-                                        arr_y = res_theory[dia][dur][pro][exp][dat][epo][method][threshold]
-                                        # save values
-                                        data_to_plot = tool_put_in_dict(data_to_plot, [arr_x], "res", dat, "x")
-                                        data_to_plot = tool_put_in_dict(data_to_plot, [arr_y], "res", dat, "y")
-    fig_colors, fig_markers = {}, {}
-    for dia in list(data_to_plot.keys()):
-        # x-y ranges
-        if dia not in list(fig_ticks.keys()):
-            fig_ticks = tool_put_in_dict(fig_ticks, None, dia)
-        # x-y titles
-        if "x_axis" not in list(fig_titles.keys()) or (
-                "x_axis" in list(fig_titles.keys()) and dia not in list(fig_titles["x_axis"].keys())):
-            fig_titles = tool_put_in_dict(fig_titles, "", "x_axis", dia)
-        if "y_axis" not in list(fig_titles.keys()) or (
-                "y_axis" in list(fig_titles.keys()) and dia not in list(fig_titles["y_axis"].keys())):
-            fig_titles = tool_put_in_dict(fig_titles, "", "y_axis", dia)
-        # colors and markers
-        for dat in list(data_to_plot[dia].keys()):
-            if dat not in list(fig_colors.keys()):
-                fig_colors = tool_put_in_dict(fig_colors, fig_marker_color, dat)
-            if dat not in list(fig_markers.keys()):
-                fig_markers = tool_put_in_dict(fig_markers, fig_marker, dat)
-    #
-    # -- Figure
-    #
-    # output figure name will be the file name (path removed and extension removed)
-    fig_name = __file__.split("/")[-1].split(".")[0] + str(fig_name_add)
-    if fig_name_details is True:
-        # add details of the computation to the figure name
-        fig_name += "_data_" + str(len(data_projects)) + "pro_" + str(len(data_experiments)) + "exp_" + \
-                    str(data_smile_minimum_size) + "mem_" + str(len(data_diagnostics)) + "dia"
-        if len(data_epoch_lengths) == 1:
-            fig_name += "_" + str(data_epoch_lengths[0])
-        else:
-            fig_name += "_" + str(len(data_epoch_lengths)) + "dur"
-        if data_mme_create is True:
-            fig_name += "_mme"
-            fig_name += "_of_em" if data_mme_use_smile_mean is True else "_of_1m"
-            fig_name += "_all_smile" if data_mme_use_all_smiles is True else "_1st_smile"
-        fig_name += "_" + str(95) + "ci"
-    fig_scatter_and_regression(data_to_plot, ["res"], fig_format, fig_name, fig_colors, fig_markers, fig_marker_size,
-                               "row", fig_panel_size, fig_ticks, fig_titles, fig_legend_bool=False,
-                               fig_title_bool=False, panel_param=panel_param)
+    # skip (or not) the checks of the inputs in internal hot paths, also in the worker processes (the previous mode
+    # is restored once the figure is done)
+    with check_trusted_inputs_scope(uncertainty_trusted_inputs):
+        #
+        # -- Read json
+        #
+        values, metadata = data_organize_json(
+            data_diagnostics, data_epoch_lengths, data_projects, data_experiments, data_filename=data_filename,
+            data_mme_create=data_mme_create, data_mme_use_all_smiles=data_mme_use_all_smiles,
+            data_mme_use_smile_mean=data_mme_use_smile_mean, data_smile_minimum_size=data_smile_minimum_size,
+            data_smile_rejected=data_smile_rejected,
+            data_smile_require_all_experiments=data_smile_require_all_experiments,
+            data_columnar_cache=data_columnar_cache, data_stream_json=data_stream_json)
+        #
+        # -- Define thresholds for each method
+        #
+        values, thresholds = nest_define_uncertainty_threshold(values, uncertainty_threshold)
+        #
+        # -- Compute required ensemble size (RES) to reach an uncertainty smaller than the desired ones
+        #
+        res_bootstrap, _, _ = nest_compute_res(
+            values, thresholds, res_maximum, uncertainty_confidence_interval, "normal",
+            uncertainty_combinations, uncertainty_resamples, False, n_jobs=uncertainty_n_jobs,
+            uncertainty_seed=uncertainty_seed)
+        res_theory, _, _ = nest_compute_res(
+            values, thresholds, res_maximum, uncertainty_confidence_interval, "normal",
+            uncertainty_combinations, uncertainty_resamples, True, n_jobs=uncertainty_n_jobs,
+            uncertainty_seed=uncertainty_seed)
+        #
+        # -- Organize data for the plot
+        #
+        # [diagnostic, epoch_length, project, experiment, dataset, epoch, method]
+        data_to_plot = {}
+        for dia in list(res_bootstrap.keys()):
+            for dur in list(res_bootstrap[dia].keys()):
+                for pro in list(res_bootstrap[dia][dur].keys()):
+                    for exp in list(res_bootstrap[dia][dur][pro].keys()):
+                        for dat in list(res_bootstrap[dia][dur][pro][exp].keys()):
+                            for epo in list(res_bootstrap[dia][dur][pro][exp][dat].keys()):
+                                for method in list(res_bootstrap[dia][dur][pro][exp][dat][epo].keys()):
+                                    for threshold in list(res_bootstrap[dia][dur][pro][exp][dat][epo][method].keys()):
+                                        if threshold in list(res_theory[dia][dur][pro][exp][dat][epo][method].keys()):
+                                            # RES computed using the bootstrap as x values
+                                            arr_x = res_bootstrap[dia][dur][pro][exp][dat][epo][method][threshold]
+                                            # RES computed using the theory as y values
+                                            arr_y = res_theory[dia][dur][pro][exp][dat][epo][method][threshold]
+                                            # save values
+                                            data_to_plot = tool_put_in_dict(data_to_plot, [arr_x], "res", dat, "x")
+                                            data_to_plot = tool_put_in_dict(data_to_plot, [arr_y], "res", dat, "y")
+        fig_colors, fig_markers = {}, {}
+        for dia in list(data_to_plot.keys()):
+            # x-y ranges
+            if dia not in list(fig_ticks.keys()):
+                fig_ticks = tool_put_in_dict(fig_ticks, None, dia)
+            # x-y titles
+            if "x_axis" not in list(fig_titles.keys()) or (
+                    "x_axis" in list(fig_titles.keys()) and dia not in list(fig_titles["x_axis"].keys())):
+                fig_titles = tool_put_in_dict(fig_titles, "", "x_axis", dia)
+            if "y_axis" not in list(fig_titles.keys()) or (
+                    "y_axis" in list(fig_titles.keys()) and dia not in list(fig_titles["y_axis"].keys())):
+                fig_titles = tool_put_in_dict(fig_titles, "", "y_axis", dia)
+            # colors and markers
+            for dat in list(data_to_plot[dia].keys()):
+                if dat not in list(fig_colors.keys()):
+                    fig_colors = tool_put_in_dict(fig_colors, fig_marker_color, dat)
+                if dat not in list(fig_markers.keys()):
+                    fig_markers = tool_put_in_dict(fig_markers, fig_marker, dat)
+        #
+        # -- Figure
+        #
+        # output figure name will be the file name (path removed and extension removed)
+        fig_name = __file__.split("/")[-1].split(".")[0] + str(fig_name_add)
+        if fig_name_details is True:
+            # add details of the computation to the figure name
+            fig_name += "_data_" + str(len(data_projects)) + "pro_" + str(len(data_experiments)) + "exp_" + \
+                        str(data_smile_minimum_size) + "mem_" + str(len(data_diagnostics)) + "dia"
+            if len(data_epoch_lengths) == 1:
+                fig_name += "_" + str(data_epoch_lengths[0])
+            else:
+                fig_name += "_" + str(len(data_epoch_lengths)) + "dur"
+            if data_mme_create is True:
+                fig_name += "_mme"
+                fig_name += "_of_em" if data_mme_use_smile_mean is True else "_of_1m"
+                fig_name += "_all_smile" if data_mme_use_all_smiles is True else "_1st_smile"
+            fig_name += "_" + str(95) + "ci"
+        fig_scatter_and_regression(data_to_plot, ["res"], fig_format, fig_name, fig_colors, fig_markers,
+                                   fig_marker_size, "row", fig_panel_size, fig_ticks, fig_titles, fig_legend_bool=False,
+                                   fig_title_bool=False, panel_param=panel_param)
 # ---------------------------------------------------------------------------------------------------------------------#
@@ -9,6 +9,7 @@
 # ---------------------------------------------------#
 # estimating_uncertainties_enso package
 from . params import default_parameters
+from estimating_uncertainties_enso.compute_lib.check_lib import check_trusted_inputs_scope
 from estimating_uncertainties_enso.compute_lib.data_lib import data_organize_json
 from estimating_uncertainties_enso.compute_lib.nest_lib import nest_compute_res, nest_define_uncertainty_threshold
 # ---------------------------------------------------#
@@ -41,6 +42,10 @@ default = {
     "data_smile_rejected": default_parameters["data_smile_rejected"],
     # require all experiments to keep SMILE: True, False
     "data_smile_require_all_experiments": False,
+    # read the columnar cache of the json file (created at the first call, faster reads): True, False
+    "data_columnar_cache": default_parameters["data_columnar_cache"],
+    # stream the json file (slower, but lower peak memory; very large files are always streamed): True, False
+    "data_stream_json": default_parameters["data_stream_json"],
     #
     # -- Uncertainty
     #
@@ -50,6 +55,12 @@ default = {
     "uncertainty_combinations": default_parameters["uncertainty_combinations"],
     # number of resamples used for the bootstrap if uncertainty_theory is False: int [10, 1e10]
     "uncertainty_resamples": default_parameters["uncertainty_resamples"],
+    # number of processes used to compute the uncertainty of the datasets and epochs in parallel: int [1, 1e5]
+    "uncertainty_n_jobs": default_parameters["uncertainty_n_jobs"],
+    # seed of the random numbers (None to draw different random numbers at each call): int [0, 2**32 - 1], None
+    "uncertainty_seed": default_parameters["uncertainty_seed"],
+    # skip the checks of the inputs in internal hot paths (faster, but wrong inputs are not explained): True, False
+    "uncertainty_trusted_inputs": default_parameters["uncertainty_trusted_inputs"],
     # uncertainty to reach per diagnostic per method
     "uncertainty_threshold": {
         "ave_pr_val_n30e": {"unc": {"uncertainty_relative": True, "threshold": list(range(1, 11, 1))}},
@@ -100,62 +111,73 @@ def z01_print_res(
         data_smile_minimum_size: int = default["data_smile_minimum_size"],
         data_smile_rejected: list = default["data_smile_rejected"],
         data_smile_require_all_experiments: bool = default["data_smile_require_all_experiments"],
+        data_columnar_cache: bool = default["data_columnar_cache"],
+        data_stream_json: bool = default["data_stream_json"],
         res_maximum: int = default["res_maximum"],
         uncertainty_combinations: int = default["uncertainty_combinations"],
         uncertainty_confidence_interval: float = default["uncertainty_confidence_interval"],
+        uncertainty_n_jobs: int = default["uncertainty_n_jobs"],
         uncertainty_resamples: int = default["uncertainty_resamples"],
+        uncertainty_seed: int = default["uncertainty_seed"],
         uncertainty_threshold: dict = default["uncertainty_threshold"],
+        uncertainty_trusted_inputs: bool = default["uncertainty_trusted_inputs"],
         **kwargs):
-    #
-    # -- Read json
-    #
-    values, metadata = data_organize_json(
-        data_diagnostics, data_epoch_lengths, data_projects, data_experiments, data_mme_create=data_mme_create,
-        data_mme_use_all_smiles=data_mme_use_all_smiles, data_mme_use_smile_mean=data_mme_use_smile_mean,
-        data_smile_minimum_size=data_smile_minimum_size, data_smile_rejected=data_smile_rejected,
-        data_smile_require_all_experiments=data_smile_require_all_experiments)
-    print("data_organize_json", sorted(list(values.keys()), key=str.casefold))
-    #
-    # -- Define thresholds for each method
-    #
-    values, thresholds = nest_define_uncertainty_threshold(values, uncertainty_threshold)
-    print("nest_define_uncertainty_threshold", sorted(list(thresholds.keys()), key=str.casefold))
-    #
-    # -- Compute required ensemble size (RES) to reach an uncertainty smaller than the desired ones
-    #
-    res_theory, _, _ = nest_compute_res(
-        values, thresholds, res_maximum, uncertainty_confidence_interval, "normal",
-        uncertainty_combinations, uncertainty_resamples, True)
-    print("nest_compute_res", sorted(list(res_theory.keys()), key=str.casefold))
-    #
-    # -- Print
-    #
-    for dia in list(res_theory.keys()):
-        for dur in list(res_theory[dia].keys()):
-            for pro in list(res_theory[dia][dur].keys()):
-                for exp in list(res_theory[dia][dur][pro].keys()):
-                    print("diagnostic: " + str(dia))
-                    print("epoch length: " + str(dur))
-                    print("project: " + str(pro))
-                    print("experiment: " + str(exp))
-                    print("datasets:")
-                    for dat in list(res_theory[dia][dur][pro][exp].keys()):
-                        print(dat)
-                    print("required ensemble size")
-                    print("relative uncertainty: " + str(uncertainty_threshold[dia]["unc"]["uncertainty_relative"]))
-                    for thr in uncertainty_threshold[dia]["unc"]["threshold"]:
-                        print("threshold: " + str(thr))
+    # skip (or not) the checks of the inputs in internal hot paths, also in the worker processes (the previous mode
+    # is restored once the figure is done)
+    with check_trusted_inputs_scope(uncertainty_trusted_inputs):
+        #
+        # -- Read json
+        #
+        values, metadata = data_organize_json(
+            data_diagnostics, data_epoch_lengths, data_projects, data_experiments, data_mme_create=data_mme_create,
+            data_mme_use_all_smiles=data_mme_use_all_smiles, data_mme_use_smile_mean=data_mme_use_smile_mean,
+            data_smile_minimum_size=data_smile_minimum_size, data_smile_rejected=data_smile_rejected,
+            data_smile_require_all_experiments=data_smile_require_all_experiments,
+            data_columnar_cache=data_columnar_cache, data_stream_json=data_stream_json)
+        print("data_organize_json", sorted(list(values.keys()), key=str.casefold))
+        #
+        # -- Define thresholds for each method
+        #
+        values, thresholds = nest_define_uncertainty_threshold(values, uncertainty_threshold)
+        print("nest_define_uncertainty_threshold", sorted(list(thresholds.keys()), key=str.casefold))
+        #
+        # -- Compute required ensemble size (RES) to reach an uncertainty smaller than the desired ones
+        #
+        res_theory, _, _ = nest_compute_res(
+            values, thresholds, res_maximum, uncertainty_confidence_interval, "normal",
+            uncertainty_combinations, uncertainty_resamples, True, n_jobs=uncertainty_n_jobs,
+            uncertainty_seed=uncertainty_seed)
+        print("nest_compute_res", sorted(list(res_theory.keys()), key=str.casefold))
+        #
+        # -- Print
+        #
+        for dia in list(res_theory.keys()):
+            for dur in list(res_theory[dia].keys()):
+                for pro in list(res_theory[dia][dur].keys()):
+                    for exp in list(res_theory[dia][dur][pro].keys()):
+                        print("diagnostic: " + str(dia))
+                        print("epoch length: " + str(dur))
+                        print("project: " + str(pro))
+                        print("experiment: " + str(exp))
+                        print("datasets:")
                         for dat in list(res_theory[dia][dur][pro][exp].keys()):
-                            for epo in list(res_theory[dia][dur][pro][exp][dat].keys()):
-                                for method in list(res_theory[dia][dur][pro][exp][dat][epo].keys()):
-                                    print(res_theory[dia][dur][pro][exp][dat][epo][method][thr])
-    # diagnostic, epoch_length, project, experiment, dataset, epoch, method
-    # "uncertainty_threshold": {
-    #     "ave_pr_val_n30e": {"unc": {"uncertainty_relative": True, "threshold": list(range(5, 101, 5))}},
-    #     "ave_ts_val_n30e": {"unc": {"uncertainty_relative": True, "threshold": [k / 10 for k in list(range(1, 11))]}},
-    #     "ske_pr_ano_n30e": {"unc": {"uncertainty_relative": True, "threshold": list(range(5, 101, 5))}},
-    #     "ske_ts_ano_n30e": {"unc": {"uncertainty_relative": True, "threshold": list(range(5, 101, 5))}},
-    #     "var_pr_ano_n30e": {"unc": {"uncertainty_relative": True, "threshold": list(range(5, 101, 5))}},
-    #     "var_ts_ano_n30e": {"unc": {"uncertainty_relative": True, "threshold": list(range(5, 101, 5))}},
-    # },
+                            print(dat)
+                        print("required ensemble size")
+                        print("relative uncertainty: " + str(uncertainty_threshold[dia]["unc"]["uncertainty_relative"]))
+                        for thr in uncertainty_threshold[dia]["unc"]["threshold"]:
+                            print("threshold: " + str(thr))
+                            for dat in list(res_theory[dia][dur][pro][exp].keys()):
+                                for epo in list(res_theory[dia][dur][pro][exp][dat].keys()):
+                                    for method in list(res_theory[dia][dur][pro][exp][dat][epo].keys()):
+                                        print(res_theory[dia][dur][pro][exp][dat][epo][method][thr])
+        # diagnostic, epoch_length, project, experiment, dataset, epoch, method
+        # "uncertainty_threshold": {
+        #     "ave_pr_val_n30e": {"unc": {"uncertainty_relative": True, "threshold": list(range(5, 101, 5))}},
+        #     "ave_ts_val_n30e": {"unc": {"uncertainty_relative": True,
+        #                                 "threshold": [k / 10 for k in list(range(1, 11))]}},
+        #     "ske_pr_ano_n30e": {"unc": {"uncertainty_relative": True, "threshold": list(range(5, 101, 5))}},
+        #     "ske_ts_ano_n30e": {"unc": {"uncertainty_relative": True, "threshold": list(range(5, 101, 5))}},
+        #     "var_pr_ano_n30e": {"unc": {"uncertainty_relative": True, "threshold": list(range(5, 101, 5))}},
+        #     "var_ts_ano_n30e": {"unc": {"uncertainty_relative": True, "threshold": list(range(5, 101, 5))}},
+        # },
 # ---------------------------------------------------------------------------------------------------------------------#
@@ -12,6 +12,7 @@ from copy import deepcopy
 from numpy import array as numpy__array
 # estimating_uncertainties_enso package
 from . params import default_parameters
+from estimating_uncertainties_enso.compute_lib.check_lib import check_trusted_inputs_scope
 from estimating_uncertainties_enso.compute_lib.data_lib import data_organize_json
 from estimating_uncertainties_enso.compute_lib.nest_lib import nest_compute_res, nest_define_uncertainty_threshold,\
     nest_examples_of_res_method
@@ -53,6 +54,10 @@ default = {
     "data_smile_rejected": default_parameters["data_smile_rejected"] + ["GISS-E2-1-G_p3f1", "GISS-E2-1-G_p5f1", "GISS-E2-2-G"],
     # require all experiments to keep SMILE: True, False
     "data_smile_require_all_experiments": False,
+    # read the columnar cache of the json file (created at the first call, faster reads): True, False
+    "data_columnar_cache": default_parameters["data_columnar_cache"],
+    # stream the json file (slower, but lower peak memory; very large files are always streamed): True, False
+    "data_stream_json": default_parameters["data_stream_json"],
     #
     # -- Uncertainty
     #
@@ -66,6 +71,12 @@ default = {
     "uncertainty_combinations": 10000,
     # number of resamples used for the bootstrap if uncertainty_theory is False: int [10, 1e10]
     "uncertainty_resamples": 10000,
+    # number of processes used to compute the uncertainty of the datasets and epochs in parallel: int [1, 1e5]
+    "uncertainty_n_jobs": default_parameters["uncertainty_n_jobs"],
+    # seed of the random numbers (None to draw different random numbers at each call): int [0, 2**32 - 1], None
+    "uncertainty_seed": default_parameters["uncertainty_seed"],
+    # skip the checks of the inputs in internal hot paths (faster, but wrong inputs are not explained): True, False
+    "uncertainty_trusted_inputs": default_parameters["uncertainty_trusted_inputs"],
     # uncertainty computed for a given experiment
     "uncertainty_experiment": "piControl",
     # uncertainty to reach per diagnostic per method
@@ -176,14 +187,19 @@ def z02_required_ensemble_size(
         data_smile_minimum_size: int = default["data_smile_minimum_size"],
         data_smile_rejected: list = default["data_smile_rejected"],
         data_smile_require_all_experiments: bool = default["data_smile_require_all_experiments"],
+        data_columnar_cache: bool = default["data_columnar_cache"],
+        data_stream_json: bool = default["data_stream_json"],
         res_maximum: int = default["res_maximum"],
         uncertainty_combinations: int = default["uncertainty_combinations"],
         uncertainty_confidence_interval: float = default["uncertainty_confidence_interval"],
         uncertainty_distribution: str = default["uncertainty_distribution"],
         uncertainty_experiment: str = default["uncertainty_experiment"],
+        uncertainty_n_jobs: int = default["uncertainty_n_jobs"],
         uncertainty_resamples: int = default["uncertainty_resamples"],
+        uncertainty_seed: int = default["uncertainty_seed"],
         uncertainty_theory: bool = default["uncertainty_theory"],
         uncertainty_threshold: dict = default["uncertainty_threshold"],
+        uncertainty_trusted_inputs: bool = default["uncertainty_trusted_inputs"],
         fig_colors: dict = default["fig_colors"],
         fig_format: str = default["fig_format"],
         fig_markers: dict = default["fig_markers"],
@@ -197,91 +213,97 @@ def z02_required_ensemble_size(
         fig_titles: dict = default["fig_titles"],
         panel_param: dict = default["panel_param"],
         **kwargs):
-    #
-    # -- Read json
-    #
-    values, metadata = data_organize_json(
-        data_diagnostics, data_epoch_lengths, data_projects, data_experiments, data_filename=data_filename,
-        data_mme_create=data_mme_create, data_mme_use_all_smiles=data_mme_use_all_smiles,
-        data_mme_use_smile_mean=data_mme_use_smile_mean, data_smile_minimum_size=data_smile_minimum_size,
-        data_smile_rejected=data_smile_rejected, data_smile_require_all_experiments=data_smile_require_all_experiments)
-    print("values", list(values.keys()))
-    #
-    # -- Define thresholds for each method
-    #
-    values, thresholds = nest_define_uncertainty_threshold(values, uncertainty_threshold, uncertainty_experiment)
-    #
-    # -- Compute required ensemble size (RES) to reach an uncertainty smaller than the desired ones
-    #
-    res, _, _ = nest_compute_res(
-        values, thresholds, res_maximum, uncertainty_confidence_interval, uncertainty_distribution,
-        uncertainty_combinations, uncertainty_resamples, uncertainty_theory)
-    # print("nest_compute_res", list(res.keys()))
-    # k1 = "ave_sl_val_n30e"
-    # print(k1, list(res[k1].keys()))
-    # k2 = "030_year_epoch"
-    # print(k1, k2, list(res[k1][k2].keys()))
-    # k3 = "cmip6"
-    # print(k1, k2, k3, list(res[k1][k2][k3].keys()))
-    # k4 = "piControl"
-    # print(k1, k2, k3, k4, list(res[k1][k2][k3][k4].keys()))
-    # for k5 in list(res[k1][k2][k3][k4].keys()):
-    #     # print(list(res[k1][k2][k3][k4][k5]["y0001"]["unc"].keys()))
-    #     print(k5, res[k1][k2][k3][k4][k5]["y0001"]["unc"])
-    #     # if max(res[k1][k2][k3][k4][k5]["y0001"]["unc"]) > 3:
-    #     #     print(k5, res[k1][k2][k3][k4][k5]["y0001"]["unc"])
-    #
-    # -- Organize data for the plot
-    #
-    examples = nest_examples_of_res_method(res, fig_smile_selected)
-    #
-    # -- Organize data for plot
-    #
-    # x/y values for scatterplot
-    figure_axes, plot_data = {}, {}
-    figure_panel_size = deepcopy(fig_panel_size)
-    # panel 1: boxplot
-    nbr_panel = 2
-    panel = "panel_1"
-    for ii, dia in enumerate(data_diagnostics):  # loop on diagnostics
-        if dia not in list(examples.keys()):
-            continue
-        pan = deepcopy(panel)
-        grp = "boxplot"
-        tuple_k = (grp, pan)
-        # panel sizes
-        # panel axes definition
-        if panel in list(fig_ticks.keys()):
-            for k1, k2 in fig_ticks[panel].items():
-                if grp in list(figure_axes.keys()) and pan in list(figure_axes[grp].keys()) and \
-                        k1 in list(figure_axes[grp][pan].keys()):
-                    continue
-                figure_axes = tool_put_in_dict(figure_axes, k2, *tuple_k + (k1,))
-        dt = {}
-        if grp in list(figure_axes.keys()) and pan in list(figure_axes[grp].keys()):
-            dt = figure_axes[grp][pan]
-        # dictionary
-        d1 = deepcopy(examples[dia]["unc"]["boxplot"])
-        d1 = [k * 30 for k in d1]
-        print(dia, "{0:.1f}".format(round(float(numpy__array(d1).mean()), 1)).rjust(8),
-              "{0:.1f}".format(round(min(d1), 1)).rjust(8),
-              "{0:.1f}".format(round(max(d1), 1)).rjust(8))
-        # -- boxplot per diagnostic (boxplot)
-        plot_type = "box"
-        plot_data = tool_put_in_dict(plot_data, [fig_colors[dia]], *tuple_k + (str(plot_type) + "_c",))
-        plot_data = tool_put_in_dict(plot_data, [0.2], *tuple_k + (str(plot_type) + "_w",))
-        plot_data = tool_put_in_dict(plot_data, [ii], *tuple_k + (str(plot_type) + "_x",))
-        plot_data = tool_put_in_dict(plot_data, [d1], *tuple_k + (str(plot_type) + "_y",))
-    #
-    # -- Plot
-    #
-    # output plot directory (relative to current file directory)
-    # figure name
-    figure_name = __file__.split("/")[-1].split(".")[0]
-    # list plot names
-    list_names = list(plot_data.keys())
-    # path to output figure
-    # plot
-    fig_basic(plot_data, list_names, 1, figure_axes, fig_format, figure_name, figure_panel_size,
-              panel_param=panel_param)
+    # skip (or not) the checks of the inputs in internal hot paths, also in the worker processes (the previous mode
+    # is restored once the figure is done)
+    with check_trusted_inputs_scope(uncertainty_trusted_inputs):
+        #
+        # -- Read json
+        #
+        values, metadata = data_organize_json(
+            data_diagnostics, data_epoch_lengths, data_projects, data_experiments, data_filename=data_filename,
+            data_mme_create=data_mme_create, data_mme_use_all_smiles=data_mme_use_all_smiles,
+            data_mme_use_smile_mean=data_mme_use_smile_mean, data_smile_minimum_size=data_smile_minimum_size,
+            data_smile_rejected=data_smile_rejected,
+            data_smile_require_all_experiments=data_smile_require_all_experiments,
+            data_columnar_cache=data_columnar_cache, data_stream_json=data_stream_json)
+        print("values", list(values.keys()))
+        #
+        # -- Define thresholds for each method
+        #
+        values, thresholds = nest_define_uncertainty_threshold(values, uncertainty_threshold, uncertainty_experiment)
+        #
+        # -- Compute required ensemble size (RES) to reach an uncertainty smaller than the desired ones
+        #
+        res, _, _ = nest_compute_res(
+            values, thresholds, res_maximum, uncertainty_confidence_interval, uncertainty_distribution,
+            uncertainty_combinations, uncertainty_resamples, uncertainty_theory, n_jobs=uncertainty_n_jobs,
+            uncertainty_seed=uncertainty_seed)
+        # print("nest_compute_res", list(res.keys()))
+        # k1 = "ave_sl_val_n30e"
+        # print(k1, list(res[k1].keys()))
+        # k2 = "030_year_epoch"
+        # print(k1, k2, list(res[k1][k2].keys()))
+        # k3 = "cmip6"
+        # print(k1, k2, k3, list(res[k1][k2][k3].keys()))
+        # k4 = "piControl"
+        # print(k1, k2, k3, k4, list(res[k1][k2][k3][k4].keys()))
+        # for k5 in list(res[k1][k2][k3][k4].keys()):
+        #     # print(list(res[k1][k2][k3][k4][k5]["y0001"]["unc"].keys()))
+        #     print(k5, res[k1][k2][k3][k4][k5]["y0001"]["unc"])
+        #     # if max(res[k1][k2][k3][k4][k5]["y0001"]["unc"]) > 3:
+        #     #     print(k5, res[k1][k2][k3][k4][k5]["y0001"]["unc"])
+        #
+        # -- Organize data for the plot
+        #
+        examples = nest_examples_of_res_method(res, fig_smile_selected)
+        #
+        # -- Organize data for plot
+        #
+        # x/y values for scatterplot
+        figure_axes, plot_data = {}, {}
+        figure_panel_size = deepcopy(fig_panel_size)
+        # panel 1: boxplot
+        nbr_panel = 2
+        panel = "panel_1"
+        for ii, dia in enumerate(data_diagnostics):  # loop on diagnostics
+            if dia not in list(examples.keys()):
+                continue
+            pan = deepcopy(panel)
+            grp = "boxplot"
+            tuple_k = (grp, pan)
+            # panel sizes
+            # panel axes definition
+            if panel in list(fig_ticks.keys()):
+                for k1, k2 in fig_ticks[panel].items():
+                    if grp in list(figure_axes.keys()) and pan in list(figure_axes[grp].keys()) and \
+                            k1 in list(figure_axes[grp][pan].keys()):
+                        continue
+                    figure_axes = tool_put_in_dict(figure_axes, k2, *tuple_k + (k1,))
+            dt = {}
+            if grp in list(figure_axes.keys()) and pan in list(figure_axes[grp].keys()):
+                dt = figure_axes[grp][pan]
+            # dictionary
+            d1 = deepcopy(examples[dia]["unc"]["boxplot"])
+            d1 = [k * 30 for k in d1]
+            print(dia, "{0:.1f}".format(round(float(numpy__array(d1).mean()), 1)).rjust(8),
+                  "{0:.1f}".format(round(min(d1), 1)).rjust(8),
+                  "{0:.1f}".format(round(max(d1), 1)).rjust(8))
+            # -- boxplot per diagnostic (boxplot)
+            plot_type = "box"
+            plot_data = tool_put_in_dict(plot_data, [fig_colors[dia]], *tuple_k + (str(plot_type) + "_c",))
+            plot_data = tool_put_in_dict(plot_data, [0.2], *tuple_k + (str(plot_type) + "_w",))
+            plot_data = tool_put_in_dict(plot_data, [ii], *tuple_k + (str(plot_type) + "_x",))
+            plot_data = tool_put_in_dict(plot_data, [d1], *tuple_k + (str(plot_type) + "_y",))
+        #
+        # -- Plot
+        #
+        # output plot directory (relative to current file directory)
+        # figure name
+        figure_name = __file__.split("/")[-1].split(".")[0]
+        # list plot names
+        list_names = list(plot_data.keys())
+        # path to output figure
+        # plot
+        fig_basic(plot_data, list_names, 1, figure_axes, fig_format, figure_name, figure_panel_size,
+                  panel_param=panel_param)
 # ---------------------------------------------------------------------------------------------------------------------#
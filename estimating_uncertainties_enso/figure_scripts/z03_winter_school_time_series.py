@@ -8,6 +8,7 @@
 # ---------------------------------------------------#
 # Import packages
 # ---------------------------------------------------#
+from numpy import array as numpy__array
 # estimating_uncertainties_enso package
 from . params import default_parameters
 from estimating_uncertainties_enso.compute_lib.data_lib import data_organize_json, data_organize_netcdf
@@ -135,9 +136,12 @@ def z03_creating_distributions(
                                 data_to_plot = tool_put_in_dict(data_to_plot, arr_y, dia, exp, dur, "marker", "y")
                             # time series
                             if dur == data_epoch_lengths[0]:
-                                arr_y = []
-                                for ts in tim_values[dia_tim][pro][exp][dat][:3]:
-                                    arr_y.append(stat_smooth_triangle(ts.to_numpy(), 25))
+                                arr_y = [ts.to_numpy() for ts in tim_values[dia_tim][pro][exp][dat][:3]]
+                                if len(set(len(k) for k in arr_y)) == 1:
+                                    # smooth all members at once
+                                    arr_y = list(stat_smooth_triangle(numpy__array(arr_y), 25))
+                                else:
+                                    arr_y = [stat_smooth_triangle(k, 25) for k in arr_y]
                                 arr_x = list(range(len(arr_y[0])))
                                 if exp != "piControl":
                                     arr_x = [int(list_epo[0][1:]) * 12 + k for k in arr_x]
@@ -633,7 +633,7 @@ def _plot_marker(ax, mar_ce: list = None, mar_cf: list = None, mar_ls: list = No
                                     list_y.append(y)
                             ax.scatter(list_x, list_y, clip_on=False, **dict_t)
             else:
-                print_fail(inspect__stack(), "too many non unique parameters for scatter")
+                print_fail(inspect__stack, "too many non unique parameters for scatter")
     return
 
 
@@ -44,7 +44,7 @@ def _tool_flatten_list(arr_i, list_values: list = None) -> list:
         list_values = []
     error = list()
     check_type(arr_i, "arr_i", (float, int, list, numpy__ndarray), error)
-    print_fail(inspect__stack(), "\n".join(k for k in error))
+    print_fail(inspect__stack, "\n".join(k for k in error))
     # if list contains list, flatten
     if isinstance(arr_i, (list, numpy__ndarray)) is True:
         for k in arr_i:
@@ -71,7 +71,7 @@ def _tool_axis_auto_ticks(arr_i: list) -> list:
     # check input
     error = list()
     check_type(arr_i, "arr_i", list, error)
-    print_fail(inspect__stack(), "\n".join(k for k in error))
+    print_fail(inspect__stack, "\n".join(k for k in error))
     # if list contains lists, flatten lists
     list_values = _tool_flatten_list(arr_i)
     # compute auto range
@@ -136,7 +136,7 @@ def tool_axis_label(arr_i: list, nam_i: str = "") -> list:
     error = list()
     check_type(arr_i, "arr_i", list, error)
     check_type(nam_i, "nam_i", str, error)
-    print_fail(inspect__stack(), "\n".join(k for k in error))
+    print_fail(inspect__stack, "\n".join(k for k in error))
     # create labels
     labels = deepcopy(arr_i)
     if nam_i == "latitude":
@@ -237,7 +237,7 @@ def tool_figure_initialization(data_diagnostics: list, fig_orientation: str, x_d
     error = list()
     check_type(data_diagnostics, "data_diagnostics", list, error)
     check_type(fig_orientation, "fig_orientation", str, error)
-    print_fail(inspect__stack(), "\n".join(k for k in error))
+    print_fail(inspect__stack, "\n".join(k for k in error))
     # reorder diagnostic list and select the number of diagnostic per line
     list_dia = []
     n_panel_per_line = 1
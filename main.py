@@ -74,6 +74,10 @@ user_defined_parameters = {
     #                      "ske_ty_ano_n40e", "ske_ty_ano_n34e", "ske_ty_ano_n30e"],
     # "data_diagnostics": ["cor_ts_n30e_to_tx_n40e", "cor_ts_n34e_to_tx_n40e", "cor_ts_n30e_to_tx_n34e",
     #                      "fbk_ts_n30e_to_tx_n40e", "fbk_ts_n34e_to_tx_n40e", "fbk_ts_n30e_to_tx_n34e"],
+    # read the columnar cache of the json file (created at the first call, faster reads): True, False
+    # "data_columnar_cache": True,
+    # stream the json file (slower, but lower peak memory; very large files are always streamed): True, False
+    # "data_stream_json": True,
     # compute uncertainty based on theory (or bootstrap): True, False
     # "uncertainty_theory": True,
     # compute relative uncertainty (or absolute): True, False
@@ -84,6 +88,24 @@ user_defined_parameters = {
     # "uncertainty_combinations": 10000,
     # number of resamples used for the bootstrap if uncertainty_theory is False: int [10, 1e10]
     # "uncertainty_resamples": 1000000,
+    # number of processes used to compute the uncertainty of the datasets and epochs in parallel: int [1, 1e5]
+    # "uncertainty_n_jobs": 8,
+    # seed of the random numbers (None to draw different random numbers at each call): int [0, 2**32 - 1], None
+    # "uncertainty_seed": 0,
+    # skip the checks of the inputs in internal hot paths (faster, but wrong inputs are not explained): True, False
+    # "uncertainty_trusted_inputs": True,
+    # same draws for all diagnostics, epoch lengths and epochs of a SMILE (faster, uncertainties not independent):
+    # True, False
+    # "uncertainty_shared_draws": True,
+    # bootstrap distribution of the sample mean computed without resampling if uncertainty_theory is False (faster,
+    # see stat_uncertainty_bootstrap_exact): True, False
+    # "uncertainty_exact_bootstrap": True,
+    # relative Monte Carlo standard error at which the draws stop (None to draw all uncertainty_combinations or
+    # uncertainty_resamples samples): float [1e-8, 1], None
+    # "uncertainty_tolerance": 0.001,
+    # bootstrap resamples corrected with control variates if uncertainty_theory is False (about ten times fewer
+    # resamples for the same precision, see stat_uncertainty_bootstrap_control): True, False
+    # "uncertainty_control_variate": True,
     # if you changed any default parameter, you should create your own axis ticks for the figure or pass an empty
     # dictionary (i.e., fig_ticks = {}). To create your own axis ticks, the general structure is:
     # fig_ticks = {"x_axis": {"diagnostic_1": []}, "y_axis": {"diagnostic_1": []}}